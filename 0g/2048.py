@@ -5,7 +5,12 @@ from datetime import datetime
 from dotenv import load_dotenv
 from web3 import Web3
 # from web3.middleware import geth_poa_middleware
-from eth_account import Account
+from wallet_registry import WalletRegistry
+from rate_limit import limited_web3
+from broadcaster import RawTxBroadcaster
+from read_cache import cached_web3, is_connected
+import nonce_coordinator
+from nonce_coordinator import COORDINATOR, coordinated_web3
 import colorama
 from colorama import Fore, Style
 
@@ -37,6 +42,7 @@ GAME_STEPS_RANGE = (70, 251)  # Jumlah step per game max2000 bang
 USE_EIP1559 = True  # False (gas legacy)
 CHAIN_ID = 16601
 TIMEOUT = 300
+BROADCAST_FANOUT = 3  # Jumlah RPC yang dikirimi tiap raw tx
 
 # SPDX-License-Identifier: MIT
 # @title Game2048NFT - On-Chain 2048 Game with NFT Rewards & XP
@@ -160,32 +166,25 @@ def print_banner():
 """
     print(banner)
 
+WALLETS = WalletRegistry("private_keys.txt")
+
 def load_private_keys():
     load_dotenv()
-    keys = []
     
     if os.getenv("PRIVATE_KEY"):
-        keys.append(os.getenv("PRIVATE_KEY"))
+        WALLETS.add(os.getenv("PRIVATE_KEY"))
     
     try:
-        with open("private_keys.txt", "r") as f:
-            keys.extend([line.strip() for line in f.readlines()])
+        WALLETS.add_file("private_keys.txt")
+        Logger.info(f" ⚡ {WALLETS.describe_stats()}")
     except FileNotFoundError:
         Logger.warning("private_keys.txt not found. Using only .env private key.")
     except Exception as e:
         Logger.error(f"Error loading private keys: {str(e)}")
     
-    valid_keys = []
-    for key in keys:
-        if key and not key.startswith("#"):
-            try:
-                if Web3.is_address(Account.from_key(key).address):
-                    valid_keys.append(key)
-            except Exception:
-                pass
-    
-    Logger.info(f" 🔓 Loaded EVM wallet {Fore.GREEN}{len(valid_keys)}{Fore.RESET} valid private keys")
-    return valid_keys
+    WALLETS.save_index()
+    Logger.info(f" 🔓 Loaded EVM wallet {Fore.GREEN}{len(WALLETS)}{Fore.RESET} valid private keys")
+    return WALLETS.keys()
 
 def get_wallet_balance(w3, address):
     balance = w3.eth.get_balance(address)
@@ -347,6 +346,8 @@ def check_game_over(board):
 class Game2048:
     def __init__(self):
         self.w3 = self.connect_rpc()
+        self.broadcaster = RawTxBroadcaster(
+            RPC_URLS, lambda url: limited_web3(Web3(Web3.HTTPProvider(url))).eth, fanout=BROADCAST_FANOUT)
         self.private_keys = load_private_keys()
         if not self.private_keys:
             raise ValueError("No valid private keys found. Please check your wallet keys.")
@@ -369,13 +370,14 @@ class Game2048:
         gas_type = "EIP-1559" if self.use_eip1559 else "Legacy"
         Logger.info(f" ⛽️ Using {gas_type} {Fore.MAGENTA}gas{Fore.RESET} pricing")
         Logger.info(f" 👛 Will rotate through {Fore.GREEN}{len(self.private_keys)}{Fore.RESET} wallets before random long delay")
+        Logger.info(f" 🔐 Nonce coordinator: {nonce_coordinator.start()}")
 
     def connect_rpc(self):
         while True:
             for url in RPC_URLS:
                 try:
-                    w3 = Web3(Web3.HTTPProvider(url))
-                    if w3.is_connected():
+                    w3 = cached_web3(coordinated_web3(limited_web3(Web3(Web3.HTTPProvider(url)))))
+                    if is_connected(w3):
                         Logger.info(f" 📶 Yes..Connected to RPC: {Fore.MAGENTA}{url}")
                         if hasattr(self, 'contract'):
                             self.contract = w3.eth.contract(
@@ -400,7 +402,7 @@ class Game2048:
             self.wallet_cycle_complete = False
             
         Logger.info(f"{Fore.MAGENTA} 🔂 Switched to other EVM wallet{Fore.RESET} {Fore.YELLOW}#{self.current_key_index + 1}{Fore.RESET}")
-        current_address = Account.from_key(self.private_keys[self.current_key_index]).address
+        current_address = WALLETS.account_for(self.private_keys[self.current_key_index]).address
         truncated_address = f"{current_address[:6]}...{current_address[-4:]}"
         Logger.info(f" 💲 Current wallet address: {Fore.MAGENTA}{truncated_address}{Fore.RESET}")
         
@@ -431,65 +433,72 @@ class Game2048:
             'gas_cost_wei': gas_cost_wei
         }
 
+    def reserve_nonce(self, address):
+        """Nonce dipesan lewat koordinator: script lain dengan private_keys.txt yang sama tidak memakainya"""
+        return COORDINATOR.next_nonce(address, lambda: self.w3.eth.get_transaction_count(address, 'pending'))
+
     def retry_transaction(self, build_tx_func, priv_key, max_retries=10, delay=25):
         """
         Fungsi untuk mencoba ulang transaksi hingga max_retries kali.
         Menggunakan nonce dari tx_params dengan opsi cadangan jika gagal.
         """
-        account = self.w3.eth.account.from_key(priv_key)
-        for attempt in range(max_retries):
-            try:
-                tx = build_tx_func()
-                if 'nonce' not in tx:
-                    raise ValueError("Nonce not provided in tx_params")
-                signed_tx = account.sign_transaction(tx)
-                tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-                Logger.info(f" 🧵 Transaction sent: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TIMEOUT)
-                if receipt.status == 1:
-                    return tx_hash, receipt
-                else:
-                    Logger.error(f" ↪️ Transaction reverted: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
+        account = WALLETS.account_for(priv_key)
+        # Satu transaksi per wallet di antara semua script yang memakai private_keys.txt
+        with COORDINATOR.wallet(account.address):
+            for attempt in range(max_retries):
+                try:
+                    tx = build_tx_func()
+                    if 'nonce' not in tx:
+                        raise ValueError("Nonce not provided in tx_params")
+                    signed_tx = account.sign_transaction(tx)
+                    tx_hash = self.broadcaster.broadcast(signed_tx.rawTransaction, prefer=self.w3.provider.endpoint_uri)
+                    Logger.info(f" 🧵 Transaction sent: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
+                    receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TIMEOUT)
+                    if receipt.status == 1:
+                        return tx_hash, receipt
+                    else:
+                        Logger.error(f" ↪️ Transaction reverted: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
+                        if attempt < max_retries - 1:
+                            Logger.warning(f"🔁 Retrying transaction in {delay} seconds...")
+                            time.sleep(delay)
+                        continue
+                except Exception as e:
+                    Logger.error(f"Transaction failed: {str(e)} (Attempt {attempt + 1}/{max_retries})")
+                    # Opsi cadangan: Jika error "nonce too low" atau masalah lain, ambil nonce terbaru secara manual
+                    if "nonce too low" in str(e).lower() or "missing kwargs" in str(e).lower():
+                        Logger.warning(f"🔁 {Fore.YELLOW}Nonce issue detected. Switching to manual nonce management...{Fore.RESET}")
+                        try:
+                            nonce = COORDINATOR.resync(
+                                account.address, None, lambda: self.w3.eth.get_transaction_count(account.address, 'pending'))
+                            Logger.info(f"🔁 {Fore.GREEN}Updated nonce to {nonce}{Fore.RESET}")
+                            # Bangun ulang transaksi dengan nonce manual
+                            tx = build_tx_func()
+                            tx['nonce'] = nonce  # Pastikan nonce diperbarui
+                            signed_tx = account.sign_transaction(tx)
+                            tx_hash = self.broadcaster.broadcast(signed_tx.rawTransaction, prefer=self.w3.provider.endpoint_uri)
+                            Logger.info(f" 🧵 Transaction sent with manual nonce: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
+                            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TIMEOUT)
+                            if receipt.status == 1:
+                                return tx_hash, receipt
+                            else:
+                                Logger.error(f" ↪️ Transaction reverted: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
+                        except Exception as e2:
+                            Logger.error(f"Manual nonce retry failed: {str(e2)}")
+                    # Tangani error lain seperti timeout atau koneksi
+                    elif "timeout" in str(e).lower() or "connection" in str(e).lower():
+                        Logger.warning("🔁 RPC might be disconnected. Switching to another RPC...")
+                        self.w3 = self.connect_rpc()
                     if attempt < max_retries - 1:
                         Logger.warning(f"🔁 Retrying transaction in {delay} seconds...")
                         time.sleep(delay)
                     continue
-            except Exception as e:
-                Logger.error(f"Transaction failed: {str(e)} (Attempt {attempt + 1}/{max_retries})")
-                # Opsi cadangan: Jika error "nonce too low" atau masalah lain, ambil nonce terbaru secara manual
-                if "nonce too low" in str(e).lower() or "missing kwargs" in str(e).lower():
-                    Logger.warning(f"🔁 {Fore.YELLOW}Nonce issue detected. Switching to manual nonce management...{Fore.RESET}")
-                    try:
-                        nonce = self.w3.eth.get_transaction_count(account.address, 'pending')
-                        Logger.info(f"🔁 {Fore.GREEN}Updated nonce to {nonce}{Fore.RESET}")
-                        # Bangun ulang transaksi dengan nonce manual
-                        tx = build_tx_func()
-                        tx['nonce'] = nonce  # Pastikan nonce diperbarui
-                        signed_tx = self.w3.eth.account.sign_transaction(tx, priv_key)
-                        tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-                        Logger.info(f" 🧵 Transaction sent with manual nonce: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
-                        receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TIMEOUT)
-                        if receipt.status == 1:
-                            return tx_hash, receipt
-                        else:
-                            Logger.error(f" ↪️ Transaction reverted: {tx_hash.hex()} {Fore.YELLOW}(Attempt {attempt + 1}/{max_retries}){Fore.RESET}")
-                    except Exception as e2:
-                        Logger.error(f"Manual nonce retry failed: {str(e2)}")
-                # Tangani error lain seperti timeout atau koneksi
-                elif "timeout" in str(e).lower() or "connection" in str(e).lower():
-                    Logger.warning("🔁 RPC might be disconnected. Switching to another RPC...")
-                    self.w3 = self.connect_rpc()
-                if attempt < max_retries - 1:
-                    Logger.warning(f"🔁 Retrying transaction in {delay} seconds...")
-                    time.sleep(delay)
-                continue
         Logger.error(f" ↪️ Transaction failed after {max_retries} attempts.")
         return None, None
     
     def execute_game_interaction(self):
         try:
             priv_key = self.private_keys[self.current_key_index]
-            account = Account.from_key(priv_key)
+            account = WALLETS.account_for(priv_key)
             player_address = account.address
 
             balance_before = get_wallet_balance(self.w3, player_address)
@@ -503,7 +512,7 @@ class Game2048:
                     return False
 
             # Ambil nonce terbaru sebelum transaksi pertama
-            nonce = self.w3.eth.get_transaction_count(player_address, 'pending')
+            nonce = self.reserve_nonce(player_address)
             gas_limit = random.randint(*GAS_LIMIT_RANGE)
             gas_params = get_eip1559_gas_params(self.w3) if self.use_eip1559 else get_legacy_gas_price(self.w3)
             tx_params = {
@@ -527,7 +536,7 @@ class Game2048:
             Logger.success(f" 🧵 [Game {self.batch_count}] {Fore.MAGENTA}ApprovePlayer{Fore.RESET} Successful! HashID -> {Fore.GREEN}{approve_tx_hash.hex()}{Fore.RESET}")
 
             # Ambil nonce terbaru sebelum transaksi berikutnya
-            nonce = self.w3.eth.get_transaction_count(player_address, 'pending')
+            nonce = self.reserve_nonce(player_address)
             tx_params['nonce'] = nonce
 
             # Langkah 2: Pilih mode permainan
@@ -543,7 +552,7 @@ class Game2048:
             Logger.success(f" 🧵 [Game {self.batch_count}] {Fore.MAGENTA}SelectMode{Fore.RESET} Successful! {Fore.GREEN}Mode: {GAME_MODE}{Fore.RESET}")
 
             # Ambil nonce terbaru sebelum transaksi berikutnya
-            nonce = self.w3.eth.get_transaction_count(player_address, 'pending')
+            nonce = self.reserve_nonce(player_address)
             tx_params['nonce'] = nonce
 
             # Langkah 3: Mulai game baru
@@ -584,7 +593,7 @@ class Game2048:
                         time.sleep(7)  # Jeda 7 detik antar langkah
                         Logger.info(f" 🧵 [Game {self.batch_count}] Sending Play transaction for step {Fore.GREEN}#{step+1}...{Fore.RESET}")
                         # Ambil nonce terbaru sebelum transaksi
-                        nonce = self.w3.eth.get_transaction_count(player_address, 'pending')
+                        nonce = self.reserve_nonce(player_address)
                         tx_params['nonce'] = nonce
                         def build_play_tx():
                             return self.contract.functions.play(
@@ -663,7 +672,7 @@ class Game2048:
 
                     Logger.info(f" 🧵 [Game {self.batch_count}] Sending batch of {self.game_steps} moves with gas limit {gas_limit}...")
                     # Ambil nonce terbaru sebelum transaksi
-                    nonce = self.w3.eth.get_transaction_count(player_address, 'pending')
+                    nonce = self.reserve_nonce(player_address)
                     tx_params['nonce'] = nonce
                     def build_batch_tx():
                         return self.contract.functions.submitBatchMoves(
@@ -720,7 +729,7 @@ class Game2048:
 
             Logger.info(f" 🧵 [Game {self.batch_count}] Sending EndGame transaction with gas limit {gas_limit}...")
             # Ambil nonce terbaru sebelum transaksi
-            nonce = self.w3.eth.get_transaction_count(player_address, 'pending')
+            nonce = self.reserve_nonce(player_address)
             tx_params['nonce'] = nonce
             def build_end_game_tx():
                 return self.contract.functions.endGame(game_id).build_transaction(tx_params)
@@ -759,7 +768,7 @@ class Game2048:
 
             Logger.info(f" 🧵 [Game {self.batch_count}] Sending ClaimNFT transaction with gas limit {gas_limit}...")
             # Ambil nonce terbaru sebelum transaksi
-            nonce = self.w3.eth.get_transaction_count(player_address, 'pending')
+            nonce = self.reserve_nonce(player_address)
             tx_params['nonce'] = nonce
             def build_claim_nft_tx():
                 return self.contract.functions.claimNFT(game_id).build_transaction(tx_params)
@@ -834,6 +843,7 @@ class Game2048:
                     minutes, seconds = divmod(game_delay, 60)
                     Logger.warning(f" ✅ Cycle Completed!! Next game in {Fore.GREEN}{minutes} mins {seconds} secs{Fore.RESET}")
                     Logger.gas_report(f" 💲 Total gas used so far: {Fore.YELLOW}{self.total_gas_used:.8f} 0G{Fore.RESET}")
+                    Logger.info(f" 📡 Broadcast: {self.broadcaster.summary()}")
                     time.sleep(game_delay)
                 else:
                     Logger.warning(f" 🔁 Moving to next wallet")
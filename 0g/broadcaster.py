@@ -0,0 +1,279 @@
+import sys
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+# ======================== Constants ========================
+BROADCAST_FANOUT = 3  # endpoint yang menerima setiap raw tx
+EWMA_ALPHA = 0.3
+OPTIMISTIC_LATENCY = 0.5  # detik, untuk endpoint yang belum pernah dipakai
+FAILURE_PENALTY = 4.0
+COOLDOWN_BASE = 30.0
+COOLDOWN_MAX = 10 * 60.0
+RECEIPT_POLL_INTERVAL = 3.0
+
+# Node sudah punya tx ini di mempool: sama dengan sukses
+KNOWN_TX_ERRORS = ("already known", "known transaction", "already imported",
+                   "already exists", "already in mempool", "alreadyknown")
+
+
+def is_known_tx_error(error):
+    message = str(error).lower()
+    return any(pattern in message for pattern in KNOWN_TX_ERRORS)
+
+
+def is_not_found_error(error):
+    return "not found" in str(error).lower() or type(error).__name__ == "TransactionNotFound"
+
+
+# ======================== Endpoint State ========================
+class Endpoint:
+    """Health of one RPC endpoint plus its lazily created client"""
+
+    __slots__ = ("url", "client", "latency", "successes", "failures",
+                 "consecutive_failures", "cooldown_until", "first_mined")
+
+    def __init__(self, url):
+        self.url = url
+        self.client = None
+        self.latency = None
+        self.successes = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.first_mined = 0
+
+    def score(self):
+        """Lower is better: send latency inflated by failures, deflated by inclusion wins"""
+        latency = self.latency if self.latency is not None else OPTIMISTIC_LATENCY
+        failure_rate = self.failures / (self.successes + self.failures + 1)
+        return latency * (1 + FAILURE_PENALTY * failure_rate) / (1 + 0.1 * self.first_mined)
+
+
+# ======================== Broadcaster ========================
+class RawTxBroadcaster:
+    """Sends every signed raw tx to the K healthiest RPC endpoints at once.
+
+    `connect(url)` returns a client with `send_raw_transaction(raw)` and
+    `get_transaction_receipt(tx_hash)` (e.g. `Web3(...).eth`). `broadcast()` returns as soon
+    as one endpoint accepted the tx ("already known" counts as accepted) and raises the
+    first real error only when none did, so callers keep their nonce/fee handling. Receipts
+    are polled on every endpoint that accepted the tx and the first one to report it mined
+    is credited, which also nudges future picks toward endpoints with a fresh mempool.
+    """
+
+    def __init__(self, urls, connect, fanout=BROADCAST_FANOUT, clock=time.monotonic, sleep=time.sleep):
+        self.connect = connect
+        self.fanout = max(1, fanout)
+        self.clock = clock
+        self.sleep = sleep
+        self.endpoints = {url: Endpoint(url) for url in dict.fromkeys(url.strip() for url in urls)}
+        self.accepted = {}  # tx hash -> url endpoint yang menerima
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=max(4, len(self.endpoints)), thread_name_prefix="broadcast")
+
+    # -------- health --------
+    def _client(self, endpoint):
+        if endpoint.client is None:
+            endpoint.client = self.connect(endpoint.url)
+        return endpoint.client
+
+    def _report(self, endpoint, latency, ok):
+        with self.lock:
+            if ok:
+                endpoint.successes += 1
+                endpoint.consecutive_failures = 0
+                endpoint.latency = latency if endpoint.latency is None else (
+                    EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * endpoint.latency)
+                return
+            endpoint.failures += 1
+            endpoint.consecutive_failures += 1
+            backoff = COOLDOWN_BASE * 2 ** (endpoint.consecutive_failures - 1)
+            endpoint.cooldown_until = self.clock() + min(backoff, COOLDOWN_MAX)
+
+    def pick(self, prefer=None):
+        """`fanout` endpoints, healthiest first; `prefer` (the script's current RPC) is always in"""
+        with self.lock:
+            now = self.clock()
+            ranked = sorted(self.endpoints.values(),
+                            key=lambda e: (e.cooldown_until > now, e.cooldown_until if e.cooldown_until > now else e.score()))
+        chosen = [self.endpoints[prefer]] if prefer in self.endpoints else []
+        chosen += [endpoint for endpoint in ranked if endpoint not in chosen]
+        return chosen[:self.fanout]
+
+    # -------- send --------
+    def _send(self, endpoint, raw):
+        started = self.clock()
+        try:
+            self._client(endpoint).send_raw_transaction(raw)
+        except Exception as e:
+            if is_known_tx_error(e):
+                self._report(endpoint, self.clock() - started, ok=True)
+                return endpoint, None
+            # Error transaksi (nonce, saldo, fee) bukan salah endpoint-nya
+            self._report(endpoint, self.clock() - started, ok=not _is_transport_error(e))
+            return endpoint, e
+        self._report(endpoint, self.clock() - started, ok=True)
+        return endpoint, None
+
+    def broadcast(self, raw, prefer=None):
+        """Fan `raw` out; returns its hash once any endpoint accepted it"""
+        raw = bytes(raw)
+        tx_hash = HexBytes(keccak(raw))
+        key = tx_hash.hex()
+        pending = {self.pool.submit(self._send, endpoint, raw) for endpoint in self.pick(prefer)}
+        errors = []
+        with self.lock:
+            self.accepted.setdefault(key, set())
+
+        def record(future):
+            endpoint, error = future.result()
+            if error is None:
+                with self.lock:
+                    if key in self.accepted:
+                        self.accepted[key].add(endpoint.url)
+            return error
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            errors += [error for error in map(record, done) if error is not None]
+            if len(errors) < len(done):
+                # Sisanya jalan terus di background dan tetap tercatat
+                for rest in pending:
+                    rest.add_done_callback(record)
+                return tx_hash
+        with self.lock:
+            self.accepted.pop(key, None)
+        raise next((e for e in errors if not _is_transport_error(e)), errors[0])
+
+    # -------- receipts --------
+    def _receipt(self, endpoint, tx_hash):
+        try:
+            return endpoint, self._client(endpoint).get_transaction_receipt(tx_hash)
+        except Exception as e:
+            if not is_not_found_error(e):
+                self._report(endpoint, 0.0, ok=False)
+            return endpoint, None
+
+    def poll_receipt(self, tx_hash):
+        """One parallel receipt check on the endpoints that accepted `tx_hash`; (receipt, url)"""
+        key = HexBytes(tx_hash).hex()
+        with self.lock:
+            urls = list(self.accepted.get(key, ()))
+        endpoints = [self.endpoints[url] for url in urls] or self.pick()
+        futures = [self.pool.submit(self._receipt, endpoint, tx_hash) for endpoint in endpoints]
+        for future in as_completed(futures):
+            endpoint, receipt = future.result()
+            if receipt is not None:
+                with self.lock:
+                    endpoint.first_mined += 1
+                    self.accepted.pop(key, None)
+                return receipt, endpoint.url
+        return None, None
+
+    def wait_for_receipt(self, tx_hash, timeout=150, poll_interval=RECEIPT_POLL_INTERVAL):
+        """Poll until mined or `timeout`; (receipt, first url) or (None, None)"""
+        deadline = self.clock() + timeout
+        while True:
+            receipt, url = self.poll_receipt(tx_hash)
+            if receipt is not None or self.clock() >= deadline:
+                return receipt, url
+            self.sleep(min(poll_interval, max(0.0, deadline - self.clock())))
+
+    def summary(self):
+        with self.lock:
+            now = self.clock()
+            healthy = sum(1 for e in self.endpoints.values() if e.cooldown_until <= now)
+            wins = sorted(self.endpoints.values(), key=lambda e: -e.first_mined)
+            top = ", ".join(f"{_host(e.url)}x{e.first_mined}" for e in wins[:3] if e.first_mined)
+        return f"{healthy}/{len(self.endpoints)} RPC sehat, pertama mined: {top or '-'}"
+
+
+def _is_transport_error(error):
+    message = str(error).lower()
+    return (isinstance(error, (ConnectionError, TimeoutError, OSError))
+            or any(pattern in message for pattern in ("timed out", "timeout", "429", "too many requests",
+                                                      "server error", "connection", "502", "503", "504")))
+
+
+def _host(url):
+    return url.split("//", 1)[-1].split("/", 1)[0]
+
+
+# ======================== Benchmark ========================
+class _FakeNode:
+    """Stand-in RPC on a virtual clock: accepts txs, sees them mined after its own sync lag"""
+
+    def __init__(self, chain, kind, rng):
+        self.chain = chain
+        self.kind = kind
+        self.lag = {"good": rng.uniform(0.5, 2), "stale": rng.uniform(20, 40), "dead": 0}[kind]
+        # stale = mempool tidak pernah sampai ke proposer
+        self.propagation = {"good": rng.uniform(1, 4), "stale": None, "dead": None}[kind]
+
+    def send_raw_transaction(self, raw):
+        if self.kind == "dead":
+            raise ConnectionError("connection refused")
+        tx_hash = keccak(bytes(raw))
+        if self.propagation is not None:
+            mined_at = self.chain.clock() + self.propagation + self.chain.block_time
+            self.chain.mined[tx_hash] = min(self.chain.mined.get(tx_hash, mined_at), mined_at)
+        return tx_hash
+
+    def get_transaction_receipt(self, tx_hash):
+        mined_at = self.chain.mined.get(bytes(HexBytes(tx_hash)))
+        if mined_at is None or self.chain.clock() < mined_at + self.lag:
+            raise LookupError(f"Transaction {HexBytes(tx_hash).hex()} not found")
+        return {"status": 1, "minedAt": mined_at}
+
+
+class _FakeChain:
+    def __init__(self):
+        self.now = 0.0
+        self.mined = {}
+        self.block_time = 2.0
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def benchmark(txs=300, nodes=9, seed=11, timeout=150.0):
+    """Single random RPC vs fan-out to 3, on a fleet with stale and dead endpoints"""
+    rng = random.Random(seed)
+    kinds = ["good", "stale", "good", "dead", "good", "stale", "good", "good", "stale"][:nodes]
+    urls = [f"https://rpc-{n}.example" for n in range(nodes)]
+
+    for label, fanout in (("1 RPC  ", 1), ("fan-out", BROADCAST_FANOUT)):
+        chain = _FakeChain()
+        fleet = {url: _FakeNode(chain, kind, random.Random(rng.random())) for url, kind in zip(urls, kinds)}
+        broadcaster = RawTxBroadcaster(urls, fleet.__getitem__, fanout=fanout, clock=chain.clock, sleep=chain.sleep)
+        picker = random.Random(seed)
+        inclusion, stuck = [], 0
+        for n in range(txs):
+            started = chain.now
+            try:
+                tx_hash = broadcaster.broadcast(n.to_bytes(8, "big"), prefer=picker.choice(urls))
+            except Exception:
+                stuck += 1
+                chain.sleep(timeout)
+                continue
+            receipt, _ = broadcaster.wait_for_receipt(tx_hash, timeout=timeout)
+            if receipt is None:
+                stuck += 1  # di script asli: reset tx untuk nonce ini
+            else:
+                inclusion.append(chain.now - started)
+            chain.sleep(rng.uniform(5, 20))
+        inclusion.sort()
+        median = inclusion[len(inclusion) // 2] if inclusion else float("nan")
+        print(f"{label}: median inklusi {median:.1f}s, stuck/reset {stuck}/{txs} ({broadcaster.summary()})")
+        broadcaster.pool.shutdown()
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,135 @@
+import os
+import time
+import queue
+import threading
+
+# ======================== Constants ========================
+PREFETCH_CAPACITY = 8  # payload siap-upload yang disimpan di ring
+PREFETCH_WORKERS = 2
+PREFETCH_RETRY_DELAY = 5.0  # detik setelah fetch gagal
+PREFETCH_TAKE_TIMEOUT = 120.0  # detik menunggu payload sebelum take() menyerah
+PRICE_TTL_SECONDS = 300
+
+
+# ======================== Rate Limiting ========================
+class SourceLimiter:
+    """Minimum spacing between calls to one source, shared by all threads"""
+
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.next_at = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self, clock=time.monotonic, sleep=time.sleep):
+        with self.lock:
+            now = clock()
+            start = max(now, self.next_at)
+            self.next_at = start + self.min_interval
+        if start > now:
+            sleep(start - now)
+
+
+# ======================== TTL Cache ========================
+class TTLCache:
+    """Single cached value refreshed by one caller once it is older than `ttl`"""
+
+    def __init__(self, fetch, ttl=PRICE_TTL_SECONDS):
+        self.fetch = fetch
+        self.ttl = ttl
+        self.value = None
+        self.fetched_at = None
+        self.lock = threading.Lock()
+
+    def get(self, clock=time.monotonic):
+        with self.lock:
+            if self.fetched_at is None or clock() - self.fetched_at >= self.ttl:
+                value = self.fetch()
+                if value is not None:
+                    self.value = value
+                    self.fetched_at = clock()
+            return self.value
+
+
+# ======================== Prefetcher ========================
+class ContentPrefetcher:
+    """Background workers keep a bounded ring of ready payloads.
+
+    ``produce()`` builds one payload (a dict with at least ``filepath``) or raises; workers
+    block while the ring is full, so at most ``capacity`` files sit on disk. ``take()`` is
+    what the upload path calls and only waits when producers fall behind; it gives up
+    after ``take_timeout`` seconds or on ``stop()`` so a dead source fails the upload.
+    """
+
+    def __init__(self, produce, capacity=PREFETCH_CAPACITY, workers=PREFETCH_WORKERS,
+                 retry_delay=PREFETCH_RETRY_DELAY, on_error=None, take_timeout=PREFETCH_TAKE_TIMEOUT):
+        self.produce = produce
+        self.ring = queue.Queue(maxsize=max(1, capacity))
+        self.workers = max(1, workers)
+        self.retry_delay = retry_delay
+        self.take_timeout = take_timeout
+        self.on_error = on_error or (lambda error: None)
+        self.stopped = threading.Event()
+        self.threads = []
+        self.produced = 0
+        self.waits = 0
+        self.lock = threading.Lock()
+
+    def start(self):
+        for n in range(self.workers):
+            thread = threading.Thread(target=self._fill, name=f"prefetch-{n + 1}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def _fill(self):
+        while not self.stopped.is_set():
+            try:
+                item = self.produce()
+            except Exception as e:
+                self.on_error(e)
+                self.stopped.wait(self.retry_delay)
+                continue
+            while not self.stopped.is_set():
+                try:
+                    self.ring.put(item, timeout=0.5)
+                    with self.lock:
+                        self.produced += 1
+                    break
+                except queue.Full:
+                    continue
+            else:
+                self.discard(item)
+
+    def take(self):
+        """Next ready payload; blocks only if the ring is empty, raises after take_timeout or stop()"""
+        try:
+            return self.ring.get_nowait()
+        except queue.Empty:
+            with self.lock:
+                self.waits += 1
+        deadline = time.monotonic() + self.take_timeout
+        while not self.stopped.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise Exception(f"Tidak ada konten siap-upload setelah {self.take_timeout:.0f} detik")
+            try:
+                return self.ring.get(timeout=min(remaining, 0.5))
+            except queue.Empty:
+                continue
+        raise Exception("Prefetcher sudah dihentikan")
+
+    @staticmethod
+    def discard(item):
+        filepath = item.get("filepath")
+        if filepath and os.path.exists(filepath):
+            os.remove(filepath)
+
+    def stop(self):
+        """Stop workers and delete payloads that were never taken"""
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join()
+        while True:
+            try:
+                self.discard(self.ring.get_nowait())
+            except queue.Empty:
+                break
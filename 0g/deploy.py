@@ -1,26 +1,37 @@
 import os
+import sys
 import time
 import random
 import string
 import json
 import asyncio
+from contextlib import ExitStack
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
-from solcx import compile_source, install_solc
+from solc_cache import ARTIFACTS
 from dotenv import load_dotenv
 from datetime import datetime
 from colorama import Fore, Style, init
+from waiter import WAITER, wait_async, sleep, sleep_async
+from wallet_registry import WalletRegistry
+from rate_limit import LIMITER, limited_web3
+from read_cache import CACHE, cached_web3, is_connected
+import metrics
+import tracing
+import log_pipeline
+import memwatch
+import startup
+import nonce_coordinator
+from metrics import metered_web3
+from nonce_coordinator import COORDINATOR, coordinated_web3
+import preflight
+from preflight import PREFLIGHT
+from broadcaster import RawTxBroadcaster
+from rbf import RbfEngine, parse_ladder
 
 init(autoreset=True)
 load_dotenv()
 
-try:
-    install_solc("0.8.17")
-except Exception as e:
-    print(
-        f"{Fore.YELLOW}Warning: Could not install solc 0.8.17, will use available version. Error: {e}{Style.RESET_ALL}"
-    )
-
 # ======================== Constants ========================
 CONFIG = {
     "RPC_URLS": [
@@ -41,10 +52,19 @@ CONFIG = {
     "GAS_RESET_GWEI": 3.5,
     "RPC_TIMEOUT": 21,  # detik
     "RPC_RETRY_DELAY": 10,  # detik
+    "RPC_RATE_LIMIT": float(os.getenv("RPC_RATE_LIMIT", "10")),  # req/detik awal per RPC, lalu dipelajari dari 429
+    "READ_CACHE_TTL": float(os.getenv("READ_CACHE_TTL", "2")),  # detik maksimal gas price/latest block dipakai ulang tanpa block baru
+    "BROADCAST_FANOUT": int(os.getenv("BROADCAST_FANOUT", "3")),  # RPC per raw tx
+    "RBF_LADDER": parse_ladder(os.getenv("RBF_LADDER", "")),  # fee multipliers over the stuck tx
+    "RBF_STEP_WAIT": float(os.getenv("RBF_STEP_WAIT", "20")),  # detik per RBF step
+    "RBF_MAX_GWEI": float(os.getenv("RBF_MAX_GWEI", "10")),  # cap for replacement fees
     "WALLET_SWITCH_DELAY_MIN": 120,  # detik
     "WALLET_SWITCH_DELAY_MAX": 300,  # detik
 }
 
+WALLETS = WalletRegistry("private_keys.txt")
+DEFAULT_DEPLOY_GAS = 300000  # deploy gas limit when estimation fails
+
 CHAIN_SYMBOLS = {16601: "0G"}
 
 # ======================== Helper Functions ========================
@@ -67,11 +87,12 @@ def short_address(address):
     """Format address with : 0x1234...5678"""
     return f"{address[:6]}...{address[-4:]}" if address else "Unknown address"
 
+@tracing.traced("sleep", tracing.KIND_SLEEP)
 def sleep_seconds(seconds, message=None):
     """Sleep function with informative messages"""
     if message:
         print(f"⏳ {Fore.MAGENTA}{message} in {seconds} detik...{Style.RESET_ALL}")
-        time.sleep(seconds)
+        sleep(seconds)
 
 def random_sleep(min_secs, max_secs, message=None):
     """Sleep with random durasition """
@@ -102,7 +123,7 @@ def handle_rpc_error(error_msg, w3, current_rpc, attempt=0):
             print_warning(f"🔄 Attempting to switch RPC (attempt {attempt+1})...")
             try:
                 new_w3, new_rpc = switch_rpc(current_rpc)
-                if new_w3.is_connected():
+                if is_connected(new_w3):
                     return new_w3, new_rpc, True  # Success
             except Exception as e:
                 print_error(f"❌ Failed to switch RPC: {str(e)}")
@@ -119,12 +140,15 @@ def connect_to_rpc():
     for rpc_url in rpc_urls:
         try:
             print_info(f"🔄 Try to connection RPC: {rpc_url}")
-            w3 = Web3(Web3.HTTPProvider(rpc_url.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))
+            w3 = cached_web3(coordinated_web3(limited_web3(metered_web3(Web3(Web3.HTTPProvider(rpc_url.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))))))
             w3.middleware_onion.inject(geth_poa_middleware, layer=0)
             
-            if w3.is_connected():
+            if is_connected(w3):
                 chain_id = w3.eth.chain_id
                 print_success(f"🌐 Already connect to RPC: {rpc_url}")
+                first_rpc = startup.mark()
+                if first_rpc:
+                    print_info(first_rpc)
                 print_info(f"📡 Chain ID: {chain_id} - {CHAIN_SYMBOLS.get(chain_id, 'Unknown')}")
                 return w3, rpc_url
         except Exception as e:
@@ -143,14 +167,15 @@ def switch_rpc(current_rpc_url):
         sleep_seconds(CONFIG["RPC_RETRY_DELAY"], "Wait before retrying the same RPC")
         return connect_to_rpc()
     
-    new_rpc = random.choice(available_rpcs)
+    # RPC yang paling cepat bisa dilayani token bucket-nya
+    new_rpc = LIMITER.pick(available_rpcs)
     print_warning(f"🔄 Switch to other RPC {current_rpc_url} ke {new_rpc}")
     
     try:
-        w3 = Web3(Web3.HTTPProvider(new_rpc.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))
+        w3 = cached_web3(coordinated_web3(limited_web3(metered_web3(Web3(Web3.HTTPProvider(new_rpc.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))))))
         w3.middleware_onion.inject(geth_poa_middleware, layer=0)
         
-        if w3.is_connected():
+        if is_connected(w3):
             print_success(f"✅ Successful switch to RPC: {new_rpc}")
             return w3, new_rpc
     except Exception as e:
@@ -158,6 +183,38 @@ def switch_rpc(current_rpc_url):
         CONFIG["RPC_URLS"] = [url for url in CONFIG["RPC_URLS"] if url != new_rpc]
         return switch_rpc(current_rpc_url)
 
+broadcaster = None
+
+def get_broadcaster():
+    """Fan-out sender over every RPC in CONFIG, created on first use"""
+    global broadcaster
+    if broadcaster is None:
+        broadcaster = RawTxBroadcaster(
+            validate_rpc_urls(CONFIG["RPC_URLS"]),
+            lambda url: limited_web3(metered_web3(Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]})))).eth,
+            fanout=CONFIG["BROADCAST_FANOUT"])
+    return broadcaster
+
+rbf = None
+rbf_web3 = None
+
+def get_rbf(w3):
+    """Replace-by-fee engine shared by every wallet, following the caller's current RPC"""
+    global rbf, rbf_web3
+    rbf_web3 = w3
+    if rbf is None:
+        rbf = RbfEngine(
+            lambda raw: get_broadcaster().broadcast(raw),
+            lambda address: rbf_web3.eth.get_transaction_count(address, "latest"),
+            sign=lambda tx, key: WALLETS.account_for(key).sign_transaction(tx).rawTransaction,
+            network_fees=lambda: update_gas_price(rbf_web3),
+            chain_id=w3.eth.chain_id,
+            ladder=CONFIG["RBF_LADDER"],
+            step_wait=CONFIG["RBF_STEP_WAIT"],
+            fee_cap=w3.to_wei(CONFIG["RBF_MAX_GWEI"], "gwei"),
+            sleep=sleep)
+    return rbf
+
 # ================= Gas Price Management ===================
 def check_eip1559_support(w3):
     """Check EIP-1559 support on the network"""
@@ -265,58 +322,61 @@ def get_safe_nonce(w3, address):
     
         if pending_nonce > latest_nonce:
             print_debug(f"🔄 Waiting for pending transactions to complete... (pending nonce: {pending_nonce}, latest nonce: {latest_nonce})")
-            time.sleep(5)
+            sleep(5)
             return get_safe_nonce(w3, address)
     
-        print_debug(f"🔢 {Fore.MAGENTA}Used nonce: {latest_nonce}{Style.RESET_ALL}")
-        return latest_nonce
+        # Reserved through the coordinator: other scripts on private_keys.txt never get the same nonce
+        nonce = COORDINATOR.next_nonce(address, lambda: latest_nonce)
+        print_debug(f"🔢 {Fore.MAGENTA}Used nonce: {nonce}{Style.RESET_ALL}")
+        return nonce
     except Exception as e:
         print_warning(f"⚠️ Error get nonce: {str(e)}")
-        return w3.eth.get_transaction_count(address, "latest")
+        return COORDINATOR.next_nonce(address, lambda: w3.eth.get_transaction_count(address, "latest"))
 
 def reset_pending_transactions(w3, address, private_key):
-    """Reset pending transaction! sending a dummy tx in same address & nonce"""
+    """Unstick pending nonces: escalate the original tx's fees step by step, cancel only as a last resort"""
     try:
         pending_nonce = w3.eth.get_transaction_count(address, "pending")
         latest_nonce = w3.eth.get_transaction_count(address, "latest")
         
         if pending_nonce > latest_nonce:
             print_warning(f"⚠️ Detections {pending_nonce - latest_nonce} pending transactions that may be stuck.")
-            
-            max_reset_tx = 3
-            for nonce in range(latest_nonce, min(pending_nonce, latest_nonce + max_reset_tx)):
-                print_warning(f"🔄 Trying to reset transaction with nonce {nonce}...")
-                tx = {
-                    "from": address,
-                    "to": address,
-                    "value": 0,
-                    "gas": 21000,
-                    "nonce": nonce,
-                    "chainId": w3.eth.chain_id,
-                }
-
-                gas_price = update_gas_price(w3)
-                if isinstance(gas_price, dict):
-                    tx["maxFeePerGas"] = w3.to_wei(1, "gwei")
-                    tx["maxPriorityFeePerGas"] = w3.to_wei(3, "gwei")
-                else:
-                    tx["gasPrice"] = w3.to_wei(1.5, "gwei")
-
-                try:
-                    signed = w3.eth.account.sign_transaction(tx, private_key)
-                    receipt = w3.eth.send_raw_transaction(signed.rawTransaction)
-                    print_success(f"✅ Transaaction reset for nonce {nonce} success sending: {receipt.hex()}")
-                except Exception as e:
-                    if "already known" in str(e).lower():
-                        print_warning(f"⚠️ Transaction for nonce {nonce} ready on mempool")
-                    else:
-                        print_error(f"❌ Error reset nonce {nonce}: {str(e)}")
+            unstuck = get_rbf(w3).unstick(address, private_key, pending=pending_nonce,
+                                          report=lambda message: print_warning(f"🔄 {message}"))
+            if unstuck:
+                print_success(f"✅ Stuck nonces of {short_address(address)} are mined")
+            else:
+                print_error(f"❌ Nonces of {short_address(address)} still stuck after every RBF step")
             
         return True
     except Exception as e:
         print_error(f"❌ Error reset transaction pending: {str(e)}")
         return False
 
+def clear_stuck_nonces(w3, private_keys):
+    """Unstick every wallet's pending nonces in parallel before a cycle starts"""
+    stuck = []
+    for private_key in private_keys:
+        address = WALLETS.account_for(private_key).address
+        try:
+            pending_nonce = w3.eth.get_transaction_count(address, "pending")
+            if pending_nonce > w3.eth.get_transaction_count(address, "latest"):
+                stuck.append((address, private_key, pending_nonce))
+        except Exception as e:
+            print_warning(f"⚠️ Error checking pending nonce of {short_address(address)}: {str(e)}")
+    if not stuck:
+        return
+    with ExitStack() as held:
+        # A wallet another script is using right now has a pending tx that is not stuck
+        free = [entry for entry in stuck if held.enter_context(COORDINATOR.wallet(entry[0], wait=0))]
+        if len(free) < len(stuck):
+            print_info(f"🔐 {len(stuck) - len(free)} wallet(s) busy in another script, not touched")
+        if not free:
+            return
+        print_warning(f"⚠️ {len(free)} wallet(s) with stuck nonces, escalating in parallel...")
+        results = get_rbf(w3).unstick_all(free)
+    print_info(f"⛽ RBF: {sum(results.values())}/{len(free)} wallet(s) cleared")
+
 def estimate_gas(w3, contract_func, sender):
     """Generic function for gas estimation with fallback to defaults"""
     try:
@@ -327,21 +387,21 @@ def estimate_gas(w3, contract_func, sender):
         print_warning(f"⚠️ Estimasi gas failed: {str(e)}. Used default: {default_gas}")
         return default_gas
 
-def wait_for_transaction_completion(w3, tx_hash, timeout=150, current_rpc=None):
+def wait_for_transaction_completion(w3, tx_hash, timeout=150):
     """Waiting for transactions to complete with better error handling"""
     print_info(f"⏳ Waiting transaction {tx_hash} terconfirmed...")
     start_time = time.time()
     
     last_error_time = 0
     check_interval = 5
-    rpc_switch_attempts = 0
 
     while time.time() - start_time < timeout:
         try:
-            receipt = w3.eth.get_transaction_receipt(tx_hash)
+            # Every RPC that accepted the tx is asked; the first to see it mined is recorded
+            receipt, first_rpc = get_broadcaster().poll_receipt(tx_hash)
             if receipt is not None:
                 if receipt.status == 1:
-                    print_success(f"✅ Transaction terconfirm: number blok #{receipt.blockNumber}")
+                    print_success(f"✅ Transaction terconfirm: number blok #{receipt.blockNumber} (first seen by {first_rpc})")
                     return receipt
                 else:
                     print_error(f"❌ Transaction failed on blockchain")
@@ -354,21 +414,8 @@ def wait_for_transaction_completion(w3, tx_hash, timeout=150, current_rpc=None):
                 if "not found" not in error_msg:
                     print_warning(f"⚠️ Error checking receipt: {str(e)}")
                     last_error_time = current_time
-                    
-                    # RPC-specific errors
-                    if ("429" in error_msg or "too many requests" in error_msg or "server error" in error_msg) and rpc_switch_attempts < 3:
-                        print_warning(f"⚠️ RPC limiting requests, trying to switch...")
-                        try:
-                            if current_rpc:
-                                new_w3, new_rpc = switch_rpc(current_rpc)
-                                w3 = new_w3
-                                current_rpc = new_rpc
-                                rpc_switch_attempts += 1
-                                continue
-                        except Exception as switch_error:
-                            print_warning(f"Failed to switch RPC: {str(switch_error)}")
-
-        time.sleep(check_interval)
+
+        sleep(check_interval)
 
     print_warning(f"⏱️ Timeout wait transaction {tx_hash}")
     return None
@@ -386,41 +433,26 @@ def track_gas_usage(w3, tx_receipt, gas_price):
 
 def load_private_keys():
     """Load private keys dari environment variable dan file"""
-    private_keys = []
-
     env_private_key = os.getenv("PRIVATE_KEY")
     if env_private_key and env_private_key.strip():
-        if not env_private_key.startswith("0x"):
-            env_private_key = "0x" + env_private_key
-        private_keys.append(env_private_key.strip())
+        WALLETS.add(env_private_key)
 
     try:
-        with open("private_keys.txt", "r") as file:
-            keys = [
-                line.strip()
-                for line in file.readlines()
-                if line.strip() and not line.strip().startswith("#")
-            ]
-            for key in keys:
-                if not key.startswith("0x"):
-                    key = "0x" + key
-                private_keys.append(key)
+        WALLETS.add_file("private_keys.txt")
+        print_info(f"⚡ {WALLETS.describe_stats()}")
     except Exception as e:
         print(f"{Fore.YELLOW}Note: private_keys.txt not found or couldn't be read: {e}{Style.RESET_ALL}")
 
-    if not private_keys:
-        raise Exception("No private keys found in .env or private_keys.txt")
+    if WALLETS.invalid:
+        print_warning(f"⚠️ Skipped {WALLETS.invalid} invalid private key(s)")
 
-    print_success(f"📸 Loaded {len(private_keys)} EVM wallet successfully")
+    if not len(WALLETS):
+        raise Exception("No private keys found in .env or private_keys.txt")
 
-    seen = set()
-    unique_keys = []
-    for key in private_keys:
-        if key not in seen:
-            seen.add(key)
-            unique_keys.append(key)
+    WALLETS.save_index()
+    print_success(f"📸 Loaded {len(WALLETS)} EVM wallet successfully")
 
-    return unique_keys
+    return WALLETS.keys()
 
 # Simple contract templates
 SIMPLE_CONTRACTS = {
@@ -624,16 +656,34 @@ def generate_random_name(length=10):
 
 def compile_contract(contract_source, contract_name):
     """Compile Solidity contract and return bytecode and ABI."""
-    compiled_sol = compile_source(
-        contract_source, output_values=["abi", "bin"], solc_version="0.8.17")
-
-    contract_key = f"<stdin>:{contract_name}"
-    contract_interface = compiled_sol[contract_key]
-
-    return {"abi": contract_interface["abi"], "bytecode": contract_interface["bin"]}
-
-async def deploy_contract(w3, current_rpc, contract_type, contract_name, private_key, attempt=0):
-    """Deploy a contract and return its details."""
+    # Prebuilt by `--build`; only a source missing from the artifact starts solc
+    return ARTIFACTS.get(contract_source, contract_name)
+
+def plan_deployments(w3, private_keys, contract_types, cycle):
+    """Simulate this cycle's deployment of every wallet in one JSON-RPC batch; returns {private_key: Verdict}"""
+    keys, wave = [], []
+    for private_key in private_keys:
+        contract_type = contract_types[private_key][cycle]
+        try:
+            contract_data = compile_contract(CONTRACTS[contract_type], contract_type)
+        except Exception:
+            continue  # deploy_contract reports the compile error
+        keys.append(private_key)
+        wave.append({"from": WALLETS.account_for(private_key).address, "data": contract_data["bytecode"],
+                     "gas": DEFAULT_DEPLOY_GAS})
+    # A constructor only reads its own state, so a verdict holds for the minutes the wallets wait their turn
+    verdicts = PREFLIGHT.simulate(w3, wave)
+    dropped = sum(verdict.dropped for verdict in verdicts)
+    print_info(f"🧪 Preflight: {len(wave)} deployments simulated in one batch, "
+               f"{Fore.RED if dropped else Fore.GREEN}{dropped} would revert{Style.RESET_ALL}")
+    return dict(zip(keys, verdicts))
+
+@tracing.traced("deploy")
+async def deploy_contract(w3, current_rpc, contract_type, contract_name, private_key, attempt=0, estimated_gas=None):
+    """Deploy a contract and return its details.
+
+    `estimated_gas` comes from the cycle's preflight batch; without it the gas is estimated here.
+    """
     print_info(f"⚙️ {Fore.MAGENTA} Compiling {Fore.GREEN}{contract_type}{Fore.MAGENTA} the contract name is {Fore.GREEN}{contract_name}{Style.RESET_ALL}")
     if attempt >= 3:  # Limit maximum retries
         print_error(f"❌ Exceeded maximum retry attempts for deploying {contract_name}")
@@ -650,7 +700,7 @@ async def deploy_contract(w3, current_rpc, contract_type, contract_name, private
 
     print_success(f"✅ Compilation successful")
 
-    account = w3.eth.account.from_key(private_key)
+    account = WALLETS.account_for(private_key)
     wallet_address = account.address
 
     reset_pending_transactions(w3, wallet_address, private_key)
@@ -675,9 +725,10 @@ async def deploy_contract(w3, current_rpc, contract_type, contract_name, private
     nonce = get_safe_nonce(w3, wallet_address)
 
     # Estimasi gas Default
-    gas_limit = 300000
+    gas_limit = DEFAULT_DEPLOY_GAS
     try:
-        estimated_gas = w3.eth.estimate_gas({"from": wallet_address, "data": contract_data["bytecode"]})
+        if estimated_gas is None:
+            estimated_gas = w3.eth.estimate_gas({"from": wallet_address, "data": contract_data["bytecode"]})
         gas_limit = int(estimated_gas * 1.05)  # 5% buffer
         print_info(f"⛽ Estimated gas: {Fore.YELLOW}{estimated_gas}{Style.RESET_ALL} -> Add 5-10% boosting -> final {Fore.YELLOW}gas is {gas_limit}{Style.RESET_ALL}")
     except Exception as e:
@@ -695,6 +746,7 @@ async def deploy_contract(w3, current_rpc, contract_type, contract_name, private
 
     if balance < max_gas_cost:
         print_error(f"❌ Insufficient balance for gas! Need {Fore.RED}{max_gas_cost_eth:.6f}{Style.RESET_ALL} 0G but have {Fore.YELLOW}{balance_eth:.6f} 0G{Style.RESET_ALL}")
+        COORDINATOR.release(wallet_address, nonce)
         return None
     tx_data = {}
     
@@ -720,6 +772,7 @@ async def deploy_contract(w3, current_rpc, contract_type, contract_name, private
             )
     except Exception as e:
         print_error(f"❌ Error building transaction: {str(e)}")
+        COORDINATOR.release(wallet_address, nonce)
         if "429" in str(e) or "too many requests" in str(e) or "server error" in str(e):
             print_warning(f"⚠️ RPC problem, try switching to other RPC...")
             w3, current_rpc = switch_rpc(current_rpc)
@@ -727,14 +780,21 @@ async def deploy_contract(w3, current_rpc, contract_type, contract_name, private
         return None
 
     print_info(f"{Fore.MAGENTA}🚀 Deploying contract to blockchain...WAIT...WAIT{Style.RESET_ALL}")
-    signed_tx = w3.eth.account.sign_transaction(tx_data, private_key)
+    with metrics.phase("sign"):
+        signed_tx = account.sign_transaction(tx_data)
 
+    tx_hash = None  # set once a node accepted the tx: from then on its nonce is spent
     try:
-        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+        with metrics.phase("send"):
+            tx_hash = get_broadcaster().broadcast(signed_tx.rawTransaction, prefer=current_rpc)
+        metrics.tx_sent()
+        get_rbf(w3).track(wallet_address, tx_data, private_key, tx_hash)
         print_info(f"📨 Transaction explorer TXiD: {Fore.CYAN} {w3.to_hex(tx_hash)} {Style.RESET_ALL}")
 
         print_warning(f"⏳ Waiting for transaction confirmation...")
-        tx_receipt = wait_for_transaction_completion(w3, tx_hash, timeout=150)
+        with metrics.phase("confirm"):
+            tx_receipt = wait_for_transaction_completion(w3, tx_hash, timeout=150)
+        metrics.tx_result(tx_receipt, wallet_address)
 
         if tx_receipt and tx_receipt.status == 1:
             contract_address = tx_receipt.contractAddress
@@ -783,7 +843,10 @@ async def deploy_contract(w3, current_rpc, contract_type, contract_name, private
 
     except Exception as e:
         error_msg = str(e)
+        metrics.retry(e)
         print_error(f"❌ Error during deployment: {Fore.RED}{error_msg}{Style.RESET_ALL}")
+        if tx_hash is None:
+            COORDINATOR.release(wallet_address, nonce, error=e)
 
         # Handle RPC errors
         if "429" in error_msg or "too many requests" in error_msg or "server error" in error_msg:
@@ -799,7 +862,8 @@ async def deploy_contract(w3, current_rpc, contract_type, contract_name, private
         if attempt < 2:  # Allow a couple retries for non-RPC errors too
             retry_delay = 30 * (attempt + 1)  # Increasing delay
             print_warning(f"⏳ Retrying deployment in {retry_delay} seconds... (attempt {attempt + 1}/3)")
-            await asyncio.sleep(retry_delay)
+            with tracing.span("retry_cooldown", tracing.KIND_SLEEP):
+                await sleep_async(retry_delay)
             return await deploy_contract(w3, current_rpc, contract_type, contract_name, private_key, attempt + 1)
             
         return None
@@ -820,31 +884,20 @@ def save_deployment_records(deployments):
 
 
 async def wait_with_progress(hours, message="Waiting"):
-    """Wait for specified hours with progress updates."""
+    """Wait for specified hours with progress updates; False if stopped."""
     seconds = int(hours * 3600)
-    update_interval = 900  # progress every 15 menit
 
     print(f"\n{Fore.YELLOW}⏳ {message} for approximately {hours:.1f} hours...{Style.RESET_ALL}")
 
-    start_time = time.time()
-    end_time = start_time + seconds
-
-    while time.time() < end_time:
-        elapsed = time.time() - start_time
-        remaining = end_time - time.time()
-
-        if remaining <= 0:
-            break
-
-        elapsed_hours = elapsed / 3600
-        remaining_hours = remaining / 3600
-        progress_percent = (elapsed / seconds) * 100
-
-        print(f"⌛ Progress: {Fore.YELLOW}{progress_percent:.1f}%{Style.RESET_ALL} | Elapsed: {Fore.YELLOW}{elapsed_hours:.1f}h{Style.RESET_ALL} | Remaining: {Fore.YELLOW}{remaining_hours:.1f}h{Style.RESET_ALL}",end="\r",)
-
-        await asyncio.sleep(min(update_interval, remaining))
+    def render(remaining, elapsed, total):
+        progress_percent = (elapsed / total) * 100 if total else 100.0
+        return (f"⌛ Progress: {Fore.YELLOW}{progress_percent:.1f}%{Style.RESET_ALL} | Elapsed: {Fore.YELLOW}{elapsed / 3600:.1f}h{Style.RESET_ALL} "
+                f"| Remaining: {Fore.YELLOW}{remaining / 3600:.1f}h{Style.RESET_ALL}")
 
+    if not await wait_async(seconds, render):
+        return False
     print(f"✅ Wait {Fore.GREEN}completed! bang{Style.RESET_ALL}")
+    return True
 
 
 # Bang welcome banner
@@ -877,6 +930,18 @@ def get_contract_types_for_deployment(num_contracts=3):
 
 async def main():
     print_welcome_message()
+    LIMITER.configure(rate=CONFIG["RPC_RATE_LIMIT"])
+    CACHE.configure(head_ttl=CONFIG["READ_CACHE_TTL"])
+    log_pipeline.setup()
+    exporter = metrics.start()
+    if exporter:
+        print_info(f"📈 Metrics exported at {exporter}")
+    trace_file = tracing.start()
+    if trace_file:
+        print_info(f"🧵 Tracing spans to {trace_file} (python tracing.py report {trace_file})")
+    print_info(f"🧠 Memory watchdog: {memwatch.start()}")
+    print_info(f"🔐 Nonce coordinator: {nonce_coordinator.start()}")
+    print_info(f"🧪 Preflight: {preflight.start()}")
 
     private_keys = load_private_keys()
     if not private_keys:
@@ -888,7 +953,7 @@ async def main():
     except ConnectionError as e:
         print_error(f"❌ {str(e)}")
         print_warning("⏳ Waiting 30 seconds before trying again...")
-        await asyncio.sleep(30)
+        await sleep_async(30)
         try:
             w3, current_rpc = connect_to_rpc()
         except Exception as retry_error:
@@ -900,7 +965,7 @@ async def main():
 
     for idx, private_key in enumerate(private_keys):
         try:
-            account = w3.eth.account.from_key(private_key)
+            account = WALLETS.account_for(private_key)
             wallet_address = account.address
 
             balance = w3.eth.get_balance(wallet_address)
@@ -939,7 +1004,7 @@ async def main():
     try:
         for i in range(15, 0, -1):
             print(f"{Fore.YELLOW} Starting in {i} seconds...{Style.RESET_ALL}", end="\r")
-            await asyncio.sleep(1)
+            await sleep_async(1)
         print(f"{Fore.GREEN} Starting now!{Style.RESET_ALL}")
     except KeyboardInterrupt:
         print_error(f"Deployment cancelled by user.")
@@ -957,22 +1022,25 @@ async def main():
         print(f"\n{Fore.CYAN}== Starting deployment cycle {cycle+1}/{total_contracts_per_wallet} at {cycle_start_time.strftime('%Y-%m-%d %H:%M:%S')} =={Style.RESET_ALL}")
 
         # Check RPC connection at the start of each cycle
-        if not w3.is_connected():
+        if not is_connected(w3):
             print_warning("⚠️ RPC connection lost at cycle start, attempting to reconnect...")
             try:
                 w3, current_rpc = connect_to_rpc()
             except Exception as e:
                 print_error(f"❌ Failed to reconnect: {str(e)}")
                 print_warning("⏳ Waiting 60 seconds before trying again...")
-                await asyncio.sleep(60)
+                await sleep_async(60)
                 try:
                     w3, current_rpc = connect_to_rpc()
                 except Exception as retry_error:
                     print_error(f"❌ Still cannot connect: {str(retry_error)}")
                     continue  # Skip this cycle
 
+        clear_stuck_nonces(w3, valid_wallets)
+        plans = plan_deployments(w3, valid_wallets, contract_types_per_wallet, cycle)
+
         for wallet_idx, wallet_key in enumerate(valid_wallets):
-            wallet_account = w3.eth.account.from_key(wallet_key)
+            wallet_account = WALLETS.account_for(wallet_key)
             wallet_address = wallet_account.address
 
             contract_type = contract_types_per_wallet[wallet_key][cycle]
@@ -986,7 +1054,7 @@ async def main():
             print(f"{Fore.WHITE}🔨 Deploying: {Fore.YELLOW}{contract_name}{Style.RESET_ALL} ({Fore.CYAN}{contract_type}{Style.RESET_ALL})")
             print(f"{Fore.BLUE}══════════════════════════════════════════════════{Style.RESET_ALL}\n")
 
-            if not w3.is_connected():
+            if not is_connected(w3):
                 print_warning("⚠️ RPC connection lost, attempting to reconnect...")
                 try:
                     w3, current_rpc = switch_rpc(current_rpc)
@@ -997,8 +1065,16 @@ async def main():
                         print_error(f"❌ Failed to reconnect: {str(e)}")
                         continue
 
-            deployment = await deploy_contract(
-                w3, current_rpc, contract_type, contract_name, wallet_key)
+            plan = plans.get(wallet_key)
+            if plan is not None and plan.dropped:
+                print_error(f"🧪 Preflight: {contract_type} constructor would revert ({plan.reason}), not sent. Moving to next wallet.")
+                continue
+
+            # One deployment at a time per wallet across every script sharing private_keys.txt
+            with COORDINATOR.wallet(wallet_address):
+                deployment = await deploy_contract(
+                    w3, current_rpc, contract_type, contract_name, wallet_key,
+                    estimated_gas=plan.estimate if plan is not None else None)
 
             if deployment:
                 deployment["wallet_address"] = wallet_address
@@ -1009,18 +1085,30 @@ async def main():
                 if wallet_idx < len(valid_wallets) - 1:
                     wait_seconds = random.randint(CONFIG["WALLET_SWITCH_DELAY_MIN"], CONFIG["WALLET_SWITCH_DELAY_MAX"])
                     print_warning(f"⏳ Moving on to the next wallet in {wait_seconds} second (~{wait_seconds//60} minutes)")
-                    await asyncio.sleep(wait_seconds)
+                    await sleep_async(wait_seconds)
             else:
                 print_error(f"❌ Deployment failed for wallet {short_address(wallet_address)}. Moving to next wallet.")
                 if wallet_idx < len(valid_wallets) - 1:
                     wait_seconds = random.randint(60, 350)  # 1-5 menit
                     print_warning(f"⏳ Moving on to the next wallet in {wait_seconds} detik if failed")
-                    await asyncio.sleep(wait_seconds)
+                    await sleep_async(wait_seconds)
+
+        print_info(f"📡 Broadcast: {get_broadcaster().summary()}")
+        print_info(f"🚦 Rate limit: {LIMITER.summary()}")
+        print_info(f"🧾 Log: {log_pipeline.summary()}")
+        print_info(f"📦 Read cache: {CACHE.summary()}")
+        print_info(f"⛽ RBF: {get_rbf(w3).summary()}")
+        print_info(f"🔐 Nonces: {nonce_coordinator.summary()}")
+        print_info(f"🧪 Preflight: {preflight.summary()}")
+        # Sampling only: a re-exec here would restart the whole deployment plan
+        memwatch.checkpoint(label=f"deploy cycle {cycle+1}", restart=False)
 
         if cycle < total_contracts_per_wallet - 1:
             # Random wait time between 3-4 hours
             wait_hours = random.uniform(0.4, 2.0)
-            await wait_with_progress(wait_hours,f"Completed cycle {cycle+1}/{total_contracts_per_wallet}. Waiting for next cycle",)
+            if not await wait_with_progress(wait_hours,f"Completed cycle {cycle+1}/{total_contracts_per_wallet}. Waiting for next cycle",):
+                print(f"{Fore.YELLOW}Stopped, skipping remaining cycles.{Style.RESET_ALL}")
+                break
 
     if deployments:
         save_deployment_records(deployments)
@@ -1031,6 +1119,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    if "--build" in sys.argv[1:]:
+        # Out of band (setup / before PM2 start): install solc and precompile every contract
+        ARTIFACTS.build(CONTRACTS)
+        sys.exit(0)
+    WAITER.install_signal_handlers()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
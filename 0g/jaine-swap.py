@@ -6,7 +6,23 @@ import datetime
 from web3 import Web3
 from pathlib import Path
 from colorama import Fore, Style, init
+from waiter import sleep
 from dotenv import load_dotenv
+from wallet_registry import WalletRegistry, normalize_key
+from rate_limit import LIMITER, limited_web3
+from read_cache import CACHE, cached_web3, is_connected
+import metrics
+import tracing
+import log_pipeline
+import memwatch
+import startup
+import nonce_coordinator
+from metrics import metered_web3
+from nonce_coordinator import COORDINATOR, coordinated_web3
+import preflight
+from preflight import PREFLIGHT
+from broadcaster import RawTxBroadcaster
+from rbf import RbfEngine, parse_ladder
 
 init(autoreset=True)
 load_dotenv()
@@ -48,6 +64,12 @@ CONFIG = {
     "GAS_RESET_GWEI": 2,
     "RPC_TIMEOUT": 15,  # detik
     "RPC_RETRY_DELAY": 15,  # detik
+    "RPC_RATE_LIMIT": float(os.getenv("RPC_RATE_LIMIT", "10")),  # req/detik awal per RPC, lalu dipelajari dari 429
+    "READ_CACHE_TTL": float(os.getenv("READ_CACHE_TTL", "2")),  # detik maksimal gas price/latest block dipakai ulang tanpa block baru
+    "BROADCAST_FANOUT": int(os.getenv("BROADCAST_FANOUT", "3")),  # RPC per raw tx
+    "RBF_LADDER": parse_ladder(os.getenv("RBF_LADDER", "")),  # kelipatan fee tx asli per tahap
+    "RBF_STEP_WAIT": float(os.getenv("RBF_STEP_WAIT", "20")),  # detik per tahap RBF
+    "RBF_MAX_GWEI": float(os.getenv("RBF_MAX_GWEI", "10")),  # batas fee replacement
     "DEBUG_PARAMETERS": False,  # False/True aktifkan param tuples
 }
 
@@ -142,13 +164,14 @@ def short_address(address):
     """Format address dengan singkat: 0x1234...5678"""
     return f"{address[:6]}...{address[-4:]}" if address else "Unknown address"
 
+@tracing.traced("sleep", tracing.KIND_SLEEP)
 def sleep_seconds(seconds, message=None):
     """Fungsi sleep dengan pesan informatif"""
     if message:
         print(f"⏳ {Fore.MAGENTA}{message} dalam {seconds} detik...{Style.RESET_ALL}")
     else:
         print(f"⏳ {Fore.YELLOW}Menunggu {seconds} detik...{Style.RESET_ALL}")
-    time.sleep(seconds)
+    sleep(seconds)
 
 def random_sleep(min_secs, max_secs, message=None):
     """Sleep dengan durasi acak"""
@@ -194,6 +217,7 @@ def print_banner():
 class OGSwapper:
     def __init__(self):
         self.accounts = []
+        self.wallets = None
         self.web3 = None
         self.gas_price = None
         self.current_rpc_index = 0
@@ -202,6 +226,8 @@ class OGSwapper:
         self.tx_counter = 0
         self.token_contracts = {}
         self.rpc_last_error_time = {}
+        self.broadcaster = None
+        self.rbf = None
         
         self.token_decimals = {
             "USDT": 18,
@@ -211,9 +237,40 @@ class OGSwapper:
 
     def initialize(self):
         """Inisialisasi connection dan load accounts"""
+        LIMITER.configure(rate=CONFIG["RPC_RATE_LIMIT"])
+        CACHE.configure(head_ttl=CONFIG["READ_CACHE_TTL"])
+        log_pipeline.setup()
+        exporter = metrics.start()
+        if exporter:
+            print_info(f"📈 Metrics exported at {exporter}")
+        trace_file = tracing.start()
+        if trace_file:
+            print_info(f"🧵 Tracing spans to {trace_file} (python tracing.py report {trace_file})")
+        print_info(f"🧠 Memory watchdog: {memwatch.start()}")
+        state = memwatch.restore()
+        if state:
+            self.cycle_count = state.get("cycle_count", self.cycle_count)
+            print_info(f"♻️ Dipulihkan setelah restart memori, lanjut ke siklus {self.cycle_count}")
+        print_info(f"🔐 Nonce coordinator: {nonce_coordinator.start()}")
+        print_info(f"🧪 Preflight: {preflight.start()}")
         CONFIG["RPC_URLS"] = validate_rpc_urls(CONFIG["RPC_URLS"])
+        self.broadcaster = RawTxBroadcaster(
+            CONFIG["RPC_URLS"],
+            lambda url: limited_web3(metered_web3(Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]})))).eth,
+            fanout=CONFIG["BROADCAST_FANOUT"])
         
         self.connect_to_rpc()
+        # Tx stuck dinaikkan fee-nya bertahap (replace-by-fee), bukan ditimpa tx dummy
+        self.rbf = RbfEngine(
+            lambda raw: self.broadcaster.broadcast(raw, prefer=CONFIG["RPC_URLS"][self.current_rpc_index]),
+            lambda address: self.web3.eth.get_transaction_count(address, "latest"),
+            sign=lambda tx, key: self.wallets.account_for(key).sign_transaction(tx).rawTransaction,
+            network_fees=lambda: self.get_eip1559_gas_params() or self.get_legacy_gas_price(),
+            chain_id=self.web3.eth.chain_id,
+            ladder=CONFIG["RBF_LADDER"],
+            step_wait=CONFIG["RBF_STEP_WAIT"],
+            fee_cap=self.web3.to_wei(CONFIG["RBF_MAX_GWEI"], "gwei"),
+            sleep=sleep)
         self.load_accounts()
         self.update_gas_price()
         self.initialize_contracts()
@@ -223,10 +280,13 @@ class OGSwapper:
         for i, rpc_url in enumerate(CONFIG["RPC_URLS"]):
             try:
                 self.current_rpc_index = i
-                w3 = Web3(Web3.HTTPProvider(rpc_url.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))
-                if w3.is_connected():
+                w3 = cached_web3(coordinated_web3(limited_web3(metered_web3(Web3(Web3.HTTPProvider(rpc_url.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))))))
+                if is_connected(w3):
                     chain_id = w3.eth.chain_id
                     print(f"🌐 Terhubung ke RPC: {Fore.YELLOW}{rpc_url}{Fore.RESET}")
+                    first_rpc = startup.mark()
+                    if first_rpc:
+                        print_info(first_rpc)
                     print_info(f"📡 Chain ID: {chain_id} - {CHAIN_SYMBOLS.get(chain_id, 'Unknown')}")
                     self.web3 = w3
                     self.rpc_last_error_time[rpc_url] = 0
@@ -258,14 +318,15 @@ class OGSwapper:
             sleep_seconds(CONFIG["RPC_RETRY_DELAY"], "Menunggu sebelum mencoba ulang RPC yang sama")
             return False
         
-        # random RPC
-        self.current_rpc_index, new_rpc = random.choice(available_rpcs)
+        # RPC yang paling cepat bisa dilayani token bucket-nya
+        new_rpc = LIMITER.pick(url for _, url in available_rpcs)
+        self.current_rpc_index = CONFIG["RPC_URLS"].index(new_rpc)
         
         print(f"🔄 Beralih dari RPC {Fore.RED}{old_rpc}{Fore.RESET} ke --> {Fore.YELLOW}{new_rpc}{Fore.RESET}")
         
         try:
-            self.web3 = Web3(Web3.HTTPProvider(new_rpc.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))
-            if self.web3.is_connected():
+            self.web3 = cached_web3(coordinated_web3(limited_web3(metered_web3(Web3(Web3.HTTPProvider(new_rpc.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))))))
+            if is_connected(self.web3):
                 self.initialize_contracts()
                 print(f"✅ Berhasil beralih ke RPC: {Fore.YELLOW}{new_rpc}{Fore.RESET}")
                 self.rpc_last_error_time[new_rpc] = 0
@@ -293,64 +354,43 @@ class OGSwapper:
 
     def is_valid_private_key(self, key):
         """Validasi format private key"""
-        try:
-            if not key or key.startswith("#") or len(key.strip()) < 5:
-                return None
-
-            if not key.startswith("0x"):
-                key = "0x" + key
-
-            if len(key) != 66:
-                return None
-
-            self.web3.eth.account.from_key(key)
-            return key
-        except Exception as e:
-            print_warning(f"⚠️ Private key tidak valid: {str(e)}")
-            return None
+        raw = normalize_key(key)
+        return "0x" + raw.hex() if raw else None
 
     def load_accounts(self):
         """Load private keys dari file dan env"""
-        accounts = []
+        registry = WalletRegistry(CONFIG["PRIVATE_KEY_FILE"])
 
         if os.path.exists(CONFIG["ENV_FILE"]):
             try:
                 load_dotenv(CONFIG["ENV_FILE"])
                 private_key = os.getenv("PRIVATE_KEY")
-                if private_key:
-                    valid_key = self.is_valid_private_key(private_key)
-                    if valid_key:
-                        account = self.web3.eth.account.from_key(valid_key)
-                        accounts.append({"key": valid_key, "address": account.address})
-                        print_success(f"✅ Wallet dari .env berhasil dimuat: {short_address(account.address)}")
+                if private_key and registry.add(private_key) is not None:
+                    print_success(f"✅ Wallet dari .env berhasil dimuat: {short_address(registry.address(0))}")
             except Exception as e:
                 print_error(f"❌ Error loading from .env: {str(e)}")
 
         if os.path.exists(CONFIG["PRIVATE_KEY_FILE"]):
             try:
-                with open(CONFIG["PRIVATE_KEY_FILE"], "r") as file:
-                    keys = [line.strip() for line in file.readlines()]
-                    loaded = 0
-                    for key in keys:
-                        valid_key = self.is_valid_private_key(key)
-                        if valid_key:
-                            account = self.web3.eth.account.from_key(valid_key)
-                            if not any(acc["address"] == account.address for acc in accounts):
-                                accounts.append({"key": valid_key, "address": account.address})
-                                loaded += 1
-                                print(f"✅ Wallet #{loaded} berhasil dimuat: {Fore.GREEN}{short_address(account.address)}{Fore.RESET}")
-                        else:
-                            print_warning("⚠️ Private key tidak valid, melewatkan...")
+                loaded_before = len(registry)
+                registry.add_file(CONFIG["PRIVATE_KEY_FILE"])
+                print_info(f"⚡ {registry.describe_stats()}")
+                if registry.invalid:
+                    print_warning(f"⚠️ {registry.invalid} private key tidak valid, melewatkan...")
+                for loaded, index in enumerate(range(loaded_before, len(registry)), 1):
+                    print(f"✅ Wallet #{loaded} berhasil dimuat: {Fore.GREEN}{short_address(registry.address(index))}{Fore.RESET}")
             except Exception as e:
                 print_error(f"❌ Error loading private keys: {str(e)}")
 
-        if not accounts:
+        if not len(registry):
             print_error("❌ Tidak ada private key valid yang ditemukan.")
             exit(1)
 
-        self.accounts = accounts
+        registry.save_index()
+        self.wallets = registry
+        self.accounts = registry.as_dicts()
         print(f"📊 Total {len(self.accounts)} wallet berhasil dimuat")
-    
+
     def check_eip1559_support(self):
         """Periksa dukungan EIP-1559 pada jaringan"""
         try:
@@ -467,6 +507,7 @@ class OGSwapper:
         self.token_contracts[token_symbol] = contract
         return contract
 
+    @tracing.traced("balance")
     def check_wallet_balance(self, address, token_symbol=None):
         """Periksa saldo wallet, native token atau token tertentu"""
         max_retries = 3
@@ -505,6 +546,7 @@ class OGSwapper:
     
         return 0
 
+    @tracing.traced("estimate_gas")
     def estimate_gas(self, contract_func, sender):
         try:
             estimate_gas = contract_func.estimate_gas({'from': sender})
@@ -622,14 +664,16 @@ class OGSwapper:
         
             if pending_nonce > latest_nonce:
                 print_debug(f"🔄 Menunggu transaksi pending selesai... (pending nonce: {pending_nonce}, latest nonce: {latest_nonce})")
-                time.sleep(5)
+                sleep(5)
                 return self.get_safe_nonce(address)
         
-            print(f"🔢 Menggunakan {Fore.YELLOW}nonce {latest_nonce}{Fore.RESET}")
-            return latest_nonce
+            # Dipesan lewat koordinator: script lain dengan private_keys.txt yang sama tidak dapat nonce ini
+            nonce = COORDINATOR.next_nonce(address, lambda: latest_nonce)
+            print(f"🔢 Menggunakan {Fore.YELLOW}nonce {nonce}{Fore.RESET}")
+            return nonce
         except Exception as e:
             print(f"⚠️  Error mendapatkan nonce: {Fore.RED}{str(e)}{Fore.RESET}")
-            return self.web3.eth.get_transaction_count(address, "latest")
+            return COORDINATOR.next_nonce(address, lambda: self.web3.eth.get_transaction_count(address, "latest"))
 
     def wait_for_transaction_completion(self, tx_hash, timeout=150):
         """Menunggu transaksi selesai dengan penanganan error yang lebih baik"""
@@ -642,10 +686,12 @@ class OGSwapper:
     
         while time.time() - start_time < timeout:
             try:
-                receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+                # Cek di semua RPC yang menerima tx ini, yang pertama lihat mined dicatat
+                receipt, first_rpc = self.broadcaster.poll_receipt(tx_hash)
                 if receipt is not None:
                     if receipt.status == 1:
                         print_success(MESSAGES["TX_CONFIRMED"].format(receipt.blockNumber))
+                        print_info(f"📡 Pertama terlihat mined di RPC: {first_rpc}")
                         return receipt
                     else:
                         print_error(MESSAGES["TX_FAILED"])
@@ -668,48 +714,26 @@ class OGSwapper:
                                     rpc_switched = True
                                     continue
 
-            time.sleep(check_interval)
+            sleep(check_interval)
     
         print(f"⏱️ Timeout menunggu transaksi {tx_hash}.")
         return None
 
+    @tracing.traced("nonce")
     def reset_pending_transactions(self, address, private_key):
-        """Reset transaksi pending dengan mengirim transaksi dummy dengan nonce sama"""
+        """Lepaskan nonce yang stuck: tx asli dinaikkan fee-nya bertahap (RBF), dibatalkan hanya jika terpaksa"""
         try:
             pending_nonce = self.web3.eth.get_transaction_count(address, "pending")
             latest_nonce = self.web3.eth.get_transaction_count(address, "latest")
             
             if pending_nonce > latest_nonce:
                 print_warning(f"⚠️ Terdeteksi {pending_nonce - latest_nonce} transaksi pending yang mungkin stuck.")
-                
-                # Coba kirim transaksi dummy untuk reset, krim ke wallet sendiri
-                max_reset_tx = 3
-                for nonce in range(latest_nonce, min(pending_nonce, latest_nonce + max_reset_tx)):
-                    print_warning(f"🔄 Mencoba reset transaksi dengan nonce {nonce}...")
-                    tx = {
-                        "from": address,
-                        "to": address,
-                        "value": 0,
-                        "gas": 21000,
-                        "nonce": nonce,
-                        "chainId": self.web3.eth.chain_id,
-                    }
-
-                    if isinstance(self.gas_price, dict):
-                        tx["maxFeePerGas"] = self.web3.to_wei(2, "gwei")
-                        tx["maxPriorityFeePerGas"] = self.web3.to_wei(2, "gwei")
-                    else:
-                        tx["gasPrice"] = self.web3.to_wei(2, "gwei")
-
-                    try:
-                        signed = self.web3.eth.account.sign_transaction(tx, private_key)
-                        receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
-                        print_success(f"✅ Transaksi reset untuk nonce {nonce} berhasil dikirim: {receipt.hex()}")
-                    except Exception as e:
-                        if "already known" in str(e).lower():
-                            print_warning(f"⚠️ Transaksi untuk nonce {nonce} sudah ada di mempool")
-                        else:
-                            print_error(f"❌ Error reset nonce {nonce}: {str(e)}")
+                unstuck = self.rbf.unstick(address, private_key, pending=pending_nonce,
+                                           report=lambda message: print_warning(f"🔄 {message}"))
+                if unstuck:
+                    print_success(f"✅ Semua nonce stuck sudah mined")
+                else:
+                    print_error(f"❌ Nonce masih stuck setelah semua tahap RBF")
                 
             return True
         except Exception as e:
@@ -726,7 +750,8 @@ class OGSwapper:
             
         elif "nonce too low" in error_message:
             try:
-                new_nonce = self.web3.eth.get_transaction_count(tx["from"], "pending")
+                new_nonce = COORDINATOR.resync(
+                    tx["from"], tx["nonce"], lambda: self.web3.eth.get_transaction_count(tx["from"], "pending"))
                 tx["nonce"] = new_nonce
                 print_warning(MESSAGES["NONCE_UPDATE"].format(new_nonce))
                 return tx, True
@@ -734,6 +759,16 @@ class OGSwapper:
                 print_error(f"❌ Error memperbarui nonce: {str(nonce_error)}")
                 return None, False
         
+        elif "replacement transaction underpriced" in error_message:
+            # Nonce ini sudah punya tx di mempool: fee baru wajib melewati bump minimum node
+            fees = self.rbf.replacement_fees(tx["from"], tx)
+            if fees is None:
+                print_error(f"❌ Fee replacement melewati batas {CONFIG['RBF_MAX_GWEI']} Gwei")
+                return None, False
+            tx.update(fees)
+            print_warning(f"⚠️ Replacement underpriced. Fee dinaikkan ke {self.web3.from_wei(max(fees.values()), 'gwei'):.6f} Gwei")
+            return tx, True
+
         elif any(msg in error_message for msg in ["fee too low", "underpriced"]):
             return self.increase_gas_price(tx, 0.5, "Fee transaksi terlalu rendah")
  
@@ -833,23 +868,46 @@ class OGSwapper:
             tx["maxFeePerGas"] = self.web3.to_wei(CONFIG["GAS_MIN_GWEI"], "gwei")
             tx["maxPriorityFeePerGas"] = self.web3.to_wei(0.5, "gwei")
 
+        # eth_call + estimateGas di block pending dalam satu batch: tx yang pasti revert tidak dikirim
+        verdict = PREFLIGHT.check(self.web3, tx)
+        if verdict.dropped:
+            print_error(f"🧪 Preflight: transaksi {tx_type} akan revert ({verdict.reason}), tidak dikirim")
+            COORDINATOR.release(tx["from"], tx["nonce"])
+            return None
+        if verdict.replanned:
+            print_warning(f"🧪 Preflight: gas limit {tx['gas']} tidak cukup, dinaikkan ke {verdict.gas}")
+            tx["gas"] = verdict.gas
+
         consecutive_failures = 0
         rpc_switch_attempts = 0  # Menghitung berapa kali mencoba switch RPC
 
+        # Nonce yang sudah diterima node tidak boleh dikembalikan ke koordinator
+        accepted_nonces = set()
+        last_error = None
+
         while retries > 0:
             try:
-                wallet = self.web3.eth.account.from_key(private_key)
-                signed = self.web3.eth.account.sign_transaction(tx, private_key)
-                receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
+                wallet = self.wallets.account_for(private_key)
+                with metrics.phase("sign"):
+                    signed = wallet.sign_transaction(tx)
+                # Kirim ke beberapa RPC sehat sekaligus, bukan cuma RPC aktif
+                with metrics.phase("send"):
+                    receipt = self.broadcaster.broadcast(
+                        signed.rawTransaction, prefer=CONFIG["RPC_URLS"][self.current_rpc_index])
+                accepted_nonces.add(tx["nonce"])
                 tx_hash = receipt.hex()
+                self.rbf.track(wallet.address, tx, private_key, receipt)
         
                 consecutive_failures = 0
                 rpc_switch_attempts = 0  # Reset counter setelah berhasil
 
                 self.tx_counter += 1
+                metrics.tx_sent()
                 print_success(MESSAGES["TX_SENT"].format(tx_type, self.tx_counter, tx_hash))
 
-                tx_receipt = self.wait_for_transaction_completion(tx_hash)
+                with metrics.phase("confirm"):
+                    tx_receipt = self.wait_for_transaction_completion(tx_hash)
+                metrics.tx_result(tx_receipt, wallet.address)
         
                 if tx_receipt:
                     if tx_receipt.status == 1:
@@ -862,11 +920,15 @@ class OGSwapper:
                         return None
                 else:
                     print_warning(f"⏱️ Timeout menunggu konfirmasi, tetapi transaksi mungkin berhasil. TxID: {tx_hash}")
+                    # Jangan biarkan nonce ini menahan tx berikutnya
+                    self.reset_pending_transactions(wallet.address, private_key)
                     return {'transactionHash': tx_hash}
                 
             except Exception as e:
+                last_error = e
                 error_msg = str(e).lower()
                 consecutive_failures += 1
+                metrics.retry(e)
             
                 # Jika error terkait dengan RPC (429, dst), coba switch RPC langsung
                 if "429" in error_msg or "too many requests" in error_msg:
@@ -892,6 +954,8 @@ class OGSwapper:
                 if not should_retry or updated_tx is None:
                     retries = 0
                     print_error(f"❌ Transaksi tidak dapat dikirim: {str(e)}")
+                    if tx["nonce"] not in accepted_nonces:
+                        COORDINATOR.release(tx["from"], tx["nonce"], error=e)
                     return None
         
                 tx = updated_tx
@@ -902,8 +966,11 @@ class OGSwapper:
                     delay = random.randint(CONFIG["COOLDOWN"]["ERROR"][0], CONFIG["COOLDOWN"]["ERROR"][1])
                     sleep_seconds(delay, "Menunggu sebelum retry")
 
+        if tx["nonce"] not in accepted_nonces:
+            COORDINATOR.release(tx["from"], tx["nonce"], error=last_error)
         return None
 
+    @tracing.traced("approval")
     def perform_token_approval(self, token_symbol, router_address, amount_in_wei, sender_address, private_key):
         """Fungsi helper untuk proses approval token"""
         approval_tx = self.build_approval_tx(token_symbol, router_address, amount_in_wei, sender_address)
@@ -931,6 +998,7 @@ class OGSwapper:
         sleep_seconds(random.randint(11, 21), "Memastikan konfirmasi approval")
         return approval_receipt
     
+    @tracing.traced("swap_tx")
     def perform_token_swap(self, token_in, token_out, amount_in_wei, sender_address, private_key):
         """Fungsi helper untuk proses swap token"""
         swap_tx = self.build_swap_tx(token_in, token_out, amount_in_wei, sender_address)
@@ -946,6 +1014,7 @@ class OGSwapper:
         print_success(f"✅ Swap {token_in} ke {token_out} berhasil!")
         return swap_receipt
 
+    @tracing.traced("swap")
     def swap_token_to_token(self, private_key, token_in, token_out, wallet_num=0, total_wallets=1):
         """Lakukan swap dari satu token ke token lain dengan penanganan nonce yang lebih baik"""
         max_retries = 2  # Jumlah maksimum percobaan untuk swap keseluruhan
@@ -953,61 +1022,63 @@ class OGSwapper:
         for retry in range(max_retries):
             try:
                 # Pastikan RPC terhubung
-                if not self.web3.is_connected():
+                if not is_connected(self.web3):
                     print(f" ⚠️ RPC tidak terhubung, mencoba beralih...")
                     if not self.switch_rpc():
                         print_error(f"❌ Gagal terhubung ke RPC. Membatalkan swap.")
                         return False
             
-                wallet = self.web3.eth.account.from_key(private_key)
+                wallet = self.wallets.account_for(private_key)
                 address = wallet.address
 
-                self.reset_pending_transactions(address, private_key)
+                # Satu aksi per wallet di antara semua script yang memakai private_keys.txt
+                with COORDINATOR.wallet(address):
+                    self.reset_pending_transactions(address, private_key)
 
-                decimals = self.token_decimals.get(token_in, 18)
+                    decimals = self.token_decimals.get(token_in, 18)
             
-                if token_in == "USDT":
-                    random_amount = round(random.uniform(CONFIG["SWAP_AMOUNT_USDT"][0], CONFIG["SWAP_AMOUNT_USDT"][1]), 2)
-                elif token_in == "ETH":
-                    random_amount = round(random.uniform(CONFIG["SWAP_AMOUNT_ETH"][0], CONFIG["SWAP_AMOUNT_ETH"][1]), 6)
-                elif token_in == "BTC":
-                    random_amount = round(random.uniform(CONFIG["SWAP_AMOUNT_BTC"][0], CONFIG["SWAP_AMOUNT_BTC"][1]), 6)
-                else:
-                    random_amount = round(random.uniform(0.01, 0.03), 2)
+                    if token_in == "USDT":
+                        random_amount = round(random.uniform(CONFIG["SWAP_AMOUNT_USDT"][0], CONFIG["SWAP_AMOUNT_USDT"][1]), 2)
+                    elif token_in == "ETH":
+                        random_amount = round(random.uniform(CONFIG["SWAP_AMOUNT_ETH"][0], CONFIG["SWAP_AMOUNT_ETH"][1]), 6)
+                    elif token_in == "BTC":
+                        random_amount = round(random.uniform(CONFIG["SWAP_AMOUNT_BTC"][0], CONFIG["SWAP_AMOUNT_BTC"][1]), 6)
+                    else:
+                        random_amount = round(random.uniform(0.01, 0.03), 2)
                 
-                amount_in_wei = int(random_amount * (10 ** decimals))
+                    amount_in_wei = int(random_amount * (10 ** decimals))
             
-                print_debug(f"🔄 Memulai random swap {random_amount} {token_in} </> {token_out}", wallet_num, total_wallets)
+                    print_debug(f"🔄 Memulai random swap {random_amount} {token_in} </> {token_out}", wallet_num, total_wallets)
             
-                try:
-                    self.check_wallet_balance(address, token_in)
-                except Exception as balance_error:
-                    if "429" in str(balance_error).lower() and retry < max_retries - 1:
-                        print_warning(f"⚠️ Error RPC saat memeriksa saldo. Mencoba beralih RPC...")
-                        if self.switch_rpc():
-                            continue  # Coba lagi dari awal
+                    try:
+                        self.check_wallet_balance(address, token_in)
+                    except Exception as balance_error:
+                        if "429" in str(balance_error).lower() and retry < max_retries - 1:
+                            print_warning(f"⚠️ Error RPC saat memeriksa saldo. Mencoba beralih RPC...")
+                            if self.switch_rpc():
+                                continue  # Coba lagi dari awal
+                            else:
+                                print_error(f"❌ Gagal beralih RPC. Membatalkan swap.")
+                                return False
                         else:
-                            print_error(f"❌ Gagal beralih RPC. Membatalkan swap.")
-                            return False
-                    else:
-                        raise  # Reaise error lainnya
+                            raise  # Reaise error lainnya
             
-                router_address = TOKEN_ADDRESSES["ROUTER"]
-                approval_result = self.perform_token_approval(token_in, router_address, amount_in_wei, address, private_key)
-                if not approval_result:
-                    if retry < max_retries - 1:
-                        print(f"⚠️  Approval gagal, mencoba lagi setelah beralih RPC...")
-                        if self.switch_rpc():
-                            continue  # Coba lagi dari awal
-                    return False
+                    router_address = TOKEN_ADDRESSES["ROUTER"]
+                    approval_result = self.perform_token_approval(token_in, router_address, amount_in_wei, address, private_key)
+                    if not approval_result:
+                        if retry < max_retries - 1:
+                            print(f"⚠️  Approval gagal, mencoba lagi setelah beralih RPC...")
+                            if self.switch_rpc():
+                                continue  # Coba lagi dari awal
+                        return False
 
-                swap_result = self.perform_token_swap(token_in, token_out, amount_in_wei, address, private_key)
-                if not swap_result:
-                    if retry < max_retries - 1:
-                        print_warning(f"⚠️ Swap gagal, mencoba lagi setelah beralih RPC...")
-                        if self.switch_rpc():
-                            continue  # Coba lagi dari awal
-                    return False
+                    swap_result = self.perform_token_swap(token_in, token_out, amount_in_wei, address, private_key)
+                    if not swap_result:
+                        if retry < max_retries - 1:
+                            print_warning(f"⚠️ Swap gagal, mencoba lagi setelah beralih RPC...")
+                            if self.switch_rpc():
+                                continue  # Coba lagi dari awal
+                        return False
 
                 sleep_seconds(5, "Memperbarui saldo")
                 self.check_wallet_balance(address, token_out)
@@ -1123,7 +1194,7 @@ class OGSwapper:
         print(f"🔄 Memulai siklus swap ke [{self.cycle_count}] dengan [{len(self.accounts)}] wallet")
     
         # Pastikan RPC terhubung atau beralih
-        if not self.web3.is_connected():
+        if not is_connected(self.web3):
             print(f"🔄 Koneksi RPC hilang sebelum siklus, mencoba beralih...")
             if not self.switch_rpc():
                 print_warning(f"❌ Gagal menemukan RPC yang berfungsi. Menunggu sebelum mencoba lagi...")
@@ -1143,6 +1214,14 @@ class OGSwapper:
                 print_warning(f"⚠️ Semua transaksi pada wallet {wallet_num} gagal. Lanjut ke wallet berikutnya.")
     
         print_success(f"✅ Siklus #{self.cycle_count} selesai untuk semua wallet")
+        print_info(f"📡 Broadcast: {self.broadcaster.summary()}")
+        print_info(f"🚦 Rate limit: {LIMITER.summary()}")
+        print_info(f"🧾 Log: {log_pipeline.summary()}")
+        print_info(f"📦 Read cache: {CACHE.summary()}")
+        print_info(f"🔐 Nonces: {nonce_coordinator.summary()}")
+        print_info(f"🧪 Preflight: {preflight.summary()}")
+        print_info(f"⛽ RBF: {self.rbf.summary()}")
+        memwatch.checkpoint({"cycle_count": self.cycle_count}, "siklus swap")
         return True
 
 # ======================== Main Function ========================
@@ -1171,7 +1250,7 @@ def main():
             print_error(f"❌ Error koneksi: {str(e)}")
             if global_retries > 0:
                 print_warning(f"⏳ Mencoba ulang dalam {retry_delay} detik...")
-                time.sleep(retry_delay)
+                sleep(retry_delay)
                 retry_delay *= 2  # backoff
             else:
                 print_error("❌ Nyerah bang setelah beberapa kali percobaan.")
@@ -0,0 +1,737 @@
+import os
+import sys
+import json
+import time
+import socket
+import hashlib
+import tempfile
+import threading
+import subprocess
+from contextlib import contextmanager
+
+# ======================== Constants ========================
+KEY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "private_keys.txt")
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+SYNC_INTERVAL = 60.0  # seconds a wallet's counter is trusted before the next reserve re-reads the chain
+RESERVE_TTL = 60.0  # a reservation younger than this may not have reached the mempool yet
+LOCK_TTL = 900.0  # wallet lock expiry, in case a holder hangs without closing its connection
+LOCK_WAIT = 120.0  # how long a script waits for another script's wallet action to finish
+LOCK_POLL = 0.5
+SHARED_TTL = 2.0  # fee/head answers shared between processes, roughly one block
+# Scalar answers only: block and fee-history objects come back as AttributeDicts
+SHARED_METHODS = {"eth_gasPrice", "eth_maxPriorityFeePerGas", "eth_blockNumber"}
+CLIENT_TIMEOUT = 2.0
+SPAWN_WAIT = 3.0  # seconds to wait for a freshly spawned daemon to listen
+RECONNECT_INTERVAL = 30.0  # after a failure, run locally this long before trying the daemon again
+LOCAL_CONN = "local"
+# Send errors after which the nonce is taken by a tx in the mempool (or already mined)
+OCCUPIED_ERRORS = ("already known", "known transaction", "already imported", "already exists", "underpriced",
+                   "nonce too low")
+OFF_VALUES = ("off", "0", "false", "no")
+
+
+def socket_path(key_file=KEY_FILE):
+    """One daemon per key set: every script reading the same private_keys.txt meets on this socket"""
+    digest = hashlib.sha1(os.path.abspath(key_file).encode()).hexdigest()[:12]
+    return os.path.join(tempfile.gettempdir(), f"nonce-coordinator-{digest}.sock")
+
+
+# ======================== State ========================
+class _Wallet:
+    __slots__ = ("next", "synced_at", "recent", "gaps", "owner", "conn", "locked_until")
+
+    def __init__(self):
+        self.next = None  # next nonce to hand out, None until the first chain sync
+        self.synced_at = 0.0
+        self.recent = {}  # nonce -> reserved at; may still be between build and send
+        self.gaps = set()  # released nonces below `next`, handed out again first
+        self.owner = None
+        self.conn = None
+        self.locked_until = 0.0
+
+
+class CoordinatorState:
+    """Nonce counters, wallet locks and the shared fee/head cache behind the daemon.
+
+    Requests are dicts with an "op"; `handle()` answers with a dict. The chain is never
+    read here: a reserve for a wallet that is unknown or older than `sync_interval` is
+    answered with {"sync": True} and the client repeats it with the chain's pending
+    count. The same class serves a single process when the daemon is unreachable.
+    """
+
+    def __init__(self, sync_interval=SYNC_INTERVAL, reserve_ttl=RESERVE_TTL, clock=time.monotonic):
+        self.sync_interval = sync_interval
+        self.reserve_ttl = reserve_ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.wallets = {}
+        self.cache = {}
+        self.clients = 0
+        self.reserved = 0
+        self.reused = 0
+        self.synced = 0
+        self.contended = 0
+
+    def handle(self, request, conn=LOCAL_CONN):
+        op = getattr(self, f"_op_{request.get('op')}", None)
+        if op is None:
+            return {"error": f"unknown op {request.get('op')!r}"}
+        with self.lock:
+            try:
+                return op(request, conn, self.clock())
+            except (KeyError, TypeError, ValueError) as e:
+                return {"error": f"bad {request.get('op')} request: {e}"}
+
+    def connected(self):
+        with self.lock:
+            self.clients += 1
+
+    def disconnect(self, conn):
+        """A client went away: its wallet locks are released at once instead of at TTL"""
+        with self.lock:
+            self.clients -= 1
+            for wallet in self.wallets.values():
+                if wallet.conn == conn:
+                    wallet.owner = wallet.conn = None
+
+    def _wallet(self, address):
+        address = address.lower()
+        wallet = self.wallets.get(address)
+        if wallet is None:
+            wallet = self.wallets[address] = _Wallet()
+        return wallet
+
+    def _sync(self, wallet, chain, now):
+        for nonce, reserved_at in list(wallet.recent.items()):
+            if now - reserved_at > self.reserve_ttl:
+                del wallet.recent[nonce]
+        # Reservations still being built are not in the chain's pending count yet; with none
+        # left the chain wins, also when it is lower (a dropped tx frees its nonce again)
+        floor = max(wallet.recent) + 1 if wallet.recent else chain
+        wallet.next = max(chain, floor)
+        wallet.gaps = {nonce for nonce in wallet.gaps if chain <= nonce < wallet.next and nonce not in wallet.recent}
+        wallet.synced_at = now
+        self.synced += 1
+
+    def _take(self, wallet, now):
+        if wallet.gaps:
+            nonce = min(wallet.gaps)
+            wallet.gaps.discard(nonce)
+            self.reused += 1
+        else:
+            nonce = wallet.next
+            wallet.next += 1
+        wallet.recent[nonce] = now
+        self.reserved += 1
+        return {"nonce": nonce}
+
+    # -------- nonces --------
+    def _op_reserve(self, request, conn, now):
+        wallet = self._wallet(request["address"])
+        if request.get("chain") is not None:
+            self._sync(wallet, int(request["chain"]), now)
+        elif wallet.next is None or now - wallet.synced_at > self.sync_interval:
+            return {"sync": True}
+        return self._take(wallet, now)
+
+    def _op_release(self, request, conn, now):
+        """The tx with this nonce never reached a node: hand the nonce out again"""
+        wallet = self._wallet(request["address"])
+        nonce = int(request["nonce"])
+        wallet.recent.pop(nonce, None)
+        if wallet.next is None or nonce >= wallet.next:
+            return {}
+        if nonce == wallet.next - 1:
+            wallet.next -= 1
+            while wallet.next - 1 in wallet.gaps:
+                wallet.gaps.discard(wallet.next - 1)
+                wallet.next -= 1
+        else:
+            wallet.gaps.add(nonce)
+        return {}
+
+    def _op_resync(self, request, conn, now):
+        """"nonce too low": the nonce was used elsewhere; re-read the chain and reserve again"""
+        wallet = self._wallet(request["address"])
+        if request.get("nonce") is not None:
+            wallet.recent.pop(int(request["nonce"]), None)
+        self._sync(wallet, int(request["chain"]), now)
+        return self._take(wallet, now)
+
+    # -------- wallet locks --------
+    def _op_lock(self, request, conn, now):
+        wallet = self._wallet(request["address"])
+        owner = request["owner"]
+        if wallet.owner not in (None, owner) and now < wallet.locked_until:
+            self.contended += 1
+            return {"ok": False, "owner": wallet.owner, "wait": round(wallet.locked_until - now, 3)}
+        wallet.owner, wallet.conn = owner, conn
+        wallet.locked_until = now + float(request.get("ttl", LOCK_TTL))
+        return {"ok": True}
+
+    def _op_unlock(self, request, conn, now):
+        wallet = self._wallet(request["address"])
+        if wallet.owner == request["owner"]:
+            wallet.owner = wallet.conn = None
+        return {}
+
+    # -------- shared cache --------
+    def _op_get(self, request, conn, now):
+        entry = self.cache.get(request["key"])
+        if entry is not None and now < entry[1]:
+            return {"value": entry[0]}
+        return {}
+
+    def _op_set(self, request, conn, now):
+        self.cache[request["key"]] = (request["value"], now + float(request.get("ttl", SHARED_TTL)))
+        if len(self.cache) > 1024:
+            self.cache = {key: entry for key, entry in self.cache.items() if now < entry[1]}
+        return {}
+
+    def _op_status(self, request, conn, now):
+        return {
+            "clients": self.clients,
+            "wallets": len(self.wallets),
+            "locked": sum(1 for wallet in self.wallets.values() if wallet.owner and now < wallet.locked_until),
+            "in_flight": sum(len(wallet.recent) for wallet in self.wallets.values()),
+            "reserved": self.reserved,
+            "reused": self.reused,
+            "synced": self.synced,
+            "contended": self.contended,
+            "cached": len(self.cache),
+        }
+
+
+# ======================== Daemon ========================
+class _Handler:
+    """JSON line in, JSON line out, for as long as the client keeps the connection"""
+
+    def __init__(self, state, sock):
+        self.state = state
+        self.sock = sock
+
+    def run(self):
+        conn = id(self)
+        self.state.connected()
+        try:
+            with self.sock, self.sock.makefile("rb") as lines:
+                for line in lines:
+                    try:
+                        response = self.state.handle(json.loads(line), conn)
+                    except ValueError:
+                        response = {"error": "bad request"}
+                    self.sock.sendall(json.dumps(response).encode() + b"\n")
+        except OSError:
+            pass
+        finally:
+            self.state.disconnect(conn)
+
+
+def serve(path=None, out=sys.stderr):
+    """Run the coordinator on `path` until killed; returns False when one already listens there"""
+    import fcntl
+    import signal
+
+    path = path or socket_path()
+    # The lock file decides which of two racing spawns becomes the daemon
+    guard = open(f"{path}.lock", "w")
+    try:
+        fcntl.flock(guard, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        out.write(f"nonce coordinator already running on {path}\n")
+        return False
+    if os.path.exists(path):
+        os.unlink(path)  # left behind by a daemon that was killed
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    umask = os.umask(0o177)  # socket reachable by this user only
+    try:
+        server.bind(path)
+    finally:
+        os.umask(umask)
+    server.listen(64)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    state = CoordinatorState()
+    out.write(f"nonce coordinator listening on {path}\n")
+    try:
+        while True:
+            sock, _ = server.accept()
+            threading.Thread(target=_Handler(state, sock).run, name="coordinator-client", daemon=True).start()
+    finally:
+        server.close()
+        os.unlink(path)
+        guard.close()
+
+
+def spawn_daemon(path):
+    """Start `serve` as a detached process, so it outlives the script that started it"""
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "serve", path],
+                            stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True, close_fds=True)
+
+
+# ======================== Client ========================
+class NonceCoordinator:
+    """Client every script uses for nonces, wallet locks and the shared fee/head cache.
+
+    With the daemon reachable (spawned on first use) all processes sharing the key file
+    draw nonces from one counter per wallet and take turns on a wallet through
+    `wallet()`. When it is not, the same calls run against an in-process state, which
+    still coordinates the threads of this script. `enabled=False` (NONCE_COORDINATOR=off)
+    reads nonces straight from the RPC as before.
+    """
+
+    def __init__(self, path=None, spawn=True, enabled=True, timeout=CLIENT_TIMEOUT, lock_wait=LOCK_WAIT,
+                 lock_ttl=LOCK_TTL, shared_ttl=SHARED_TTL):
+        self.path = path or socket_path()
+        self.spawn = spawn
+        self.enabled = enabled
+        self.timeout = timeout
+        self.lock_wait = lock_wait
+        self.lock_ttl = lock_ttl
+        self.shared_ttl = shared_ttl
+        self.local = CoordinatorState()
+        self.lock = threading.Lock()
+        self.held = threading.local()
+        self.sock = None
+        self.reader = None
+        self.retry_at = 0.0
+        self.spawned = False
+        self.owner = f"{SCRIPT}:{os.getpid()}"
+        self.reserved = 0
+        self.synced = 0
+        self.resynced = 0
+        self.released = 0
+        self.waits = 0
+        self.waited = 0.0
+        self.timeouts = 0
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+
+    def configure(self, path=None, enabled=None, lock_wait=None, lock_ttl=None):
+        if path is not None and path != self.path:
+            with self.lock:
+                self._close()
+                self.path = path
+        if enabled is not None:
+            self.enabled = enabled
+        if lock_wait is not None:
+            self.lock_wait = float(lock_wait)
+        if lock_ttl is not None:
+            self.lock_ttl = float(lock_ttl)
+
+    # -------- transport --------
+    def _open(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        self.sock, self.reader = sock, sock.makefile("rb")
+
+    def _close(self):
+        if self.sock is not None:
+            self.reader.close()
+            self.sock.close()
+        self.sock = self.reader = None
+
+    def _connect(self):
+        if not hasattr(socket, "AF_UNIX"):
+            return False
+        try:
+            self._open()
+            return True
+        except OSError:
+            if not self.spawn:
+                return False
+        spawn_daemon(self.path)
+        self.spawned = True
+        deadline = time.monotonic() + SPAWN_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            try:
+                self._open()
+                return True
+            except OSError:
+                pass
+        return False
+
+    def _ready(self):
+        if self.sock is None and time.monotonic() >= self.retry_at:
+            if not self._connect():
+                self.retry_at = time.monotonic() + RECONNECT_INTERVAL
+        return self.sock is not None
+
+    def call(self, request):
+        with self.lock:
+            for _ in range(2):  # the second round reconnects (or respawns) after a broken connection
+                if not self._ready():
+                    break
+                try:
+                    self.sock.sendall(json.dumps(request).encode() + b"\n")
+                    line = self.reader.readline()
+                    if line:
+                        return json.loads(line)
+                except (OSError, ValueError):
+                    pass
+                self._close()
+            if self.sock is None:
+                self.fallbacks += 1
+            return self.local.handle(request)
+
+    @property
+    def mode(self):
+        if not self.enabled:
+            return "off"
+        return "daemon" if self.sock is not None else "local"
+
+    def connect(self):
+        """Reach (or start) the daemon now; returns a description for the startup line"""
+        if not self.enabled:
+            return "off (nonces straight from the RPC)"
+        with self.lock:
+            self._ready()
+        if self.sock is None:
+            return f"local only, no daemon on {self.path}"
+        return f"daemon on {self.path}{' (started)' if self.spawned else ''}"
+
+    # -------- nonces --------
+    def next_nonce(self, address, fetch):
+        """Reserve the next nonce of `address`; `fetch()` returns the chain's count when a sync is due"""
+        if not self.enabled:
+            return int(fetch())
+        address = address.lower()
+        response = self.call({"op": "reserve", "address": address})
+        if response.get("sync"):
+            self.synced += 1
+            response = self.call({"op": "reserve", "address": address, "chain": int(fetch())})
+        self.reserved += 1
+        return response["nonce"]
+
+    def release(self, address, nonce, error=None):
+        """The tx holding `nonce` was never accepted by a node; `error` = the send error, if any"""
+        if not self.enabled or nonce is None:
+            return
+        if error is not None and any(pattern in str(error).lower() for pattern in OCCUPIED_ERRORS):
+            return
+        self.released += 1
+        self.call({"op": "release", "address": address.lower(), "nonce": int(nonce)})
+
+    def resync(self, address, nonce, fetch):
+        """After "nonce too low": a fresh nonce above what the chain has already seen"""
+        chain = int(fetch())
+        if not self.enabled:
+            return chain
+        self.resynced += 1
+        response = self.call({"op": "resync", "address": address.lower(), "nonce": nonce, "chain": chain})
+        return response["nonce"]
+
+    # -------- wallet locks --------
+    def _held(self):
+        held = getattr(self.held, "addresses", None)
+        if held is None:
+            held = self.held.addresses = set()
+        return held
+
+    def _acquire(self, address, owner, wait, ttl):
+        started = time.monotonic()
+        deadline = started + wait
+        contended = False
+        while True:
+            response = self.call({"op": "lock", "address": address, "owner": owner, "ttl": ttl})
+            now = time.monotonic()
+            if response.get("ok") or now >= deadline:
+                break
+            contended = True
+            time.sleep(max(0.01, min(LOCK_POLL, deadline - now, response.get("wait", LOCK_POLL))))
+        if contended:
+            self.waits += 1
+            self.waited += time.monotonic() - started
+        if not response.get("ok"):
+            self.timeouts += 1
+            return False
+        return True
+
+    @contextmanager
+    def wallet(self, address, wait=None, ttl=None):
+        """Hold `address` against the other scripts for one wallet action.
+
+        Yields False when `wait` ran out: the action goes ahead anyway, its nonces are
+        still coordinated. Re-entering a wallet this thread already holds is free.
+        """
+        address = address.lower()
+        held = self._held()
+        if not self.enabled or address in held:
+            yield True
+            return
+        owner = f"{self.owner}:{threading.get_ident()}"
+        acquired = self._acquire(address, owner, self.lock_wait if wait is None else wait, ttl or self.lock_ttl)
+        if acquired:
+            held.add(address)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                held.discard(address)
+                self.call({"op": "unlock", "address": address, "owner": owner})
+
+    # -------- shared cache --------
+    def shared(self, key, fetch, ttl=None, keep=None):
+        """`fetch()` once per `ttl` across every process; `keep(value)` decides what may be shared"""
+        if not self.enabled:
+            return fetch()
+        response = self.call({"op": "get", "key": key})
+        if "value" in response:
+            self.hits += 1
+            return response["value"]
+        self.misses += 1
+        value = fetch()
+        if keep is None or keep(value):
+            self.call({"op": "set", "key": key, "value": value, "ttl": ttl or self.shared_ttl})
+        return value
+
+    def status(self):
+        return self.call({"op": "status"})
+
+    def summary(self):
+        if not self.enabled:
+            return "off"
+        parts = [f"{self.mode}", f"{self.reserved} reserved ({self.synced} chain syncs, {self.resynced} resyncs, "
+                                 f"{self.released} released)"]
+        if self.waits or self.timeouts:
+            parts.append(f"{self.waits} wallet waits ({self.waited:.1f}s), {self.timeouts} timed out")
+        if self.hits or self.misses:
+            parts.append(f"shared fees {self.hits}/{self.hits + self.misses} hit")
+        if self.fallbacks:
+            parts.append(f"{self.fallbacks} calls without daemon")
+        return ", ".join(parts)
+
+
+COORDINATOR = NonceCoordinator()
+
+
+def start():
+    """Configure COORDINATOR from NONCE_COORDINATOR / NONCE_LOCK_WAIT and connect; returns a description"""
+    setting = os.getenv("NONCE_COORDINATOR", "").strip()
+    if setting.lower() in OFF_VALUES:
+        COORDINATOR.configure(enabled=False)
+    else:
+        COORDINATOR.configure(path=setting or None, enabled=True,
+                              lock_wait=os.getenv("NONCE_LOCK_WAIT", "").strip() or None)
+    return COORDINATOR.connect()
+
+
+def summary():
+    return COORDINATOR.summary()
+
+
+# ======================== web3 integration ========================
+def _shareable(response):
+    return isinstance(response, dict) and "error" not in response and isinstance(response.get("result"), str)
+
+
+def coordinator_middleware(coordinator=None):
+    """web3 v6 middleware sharing gas price / block number answers between processes"""
+    coordinator = coordinator or COORDINATOR
+
+    def middleware(make_request, w3):
+        def request(method, params):
+            if method not in SHARED_METHODS or params:
+                return make_request(method, params)
+            return coordinator.shared(method, lambda: make_request(method, params), keep=_shareable)
+
+        return request
+
+    return middleware
+
+
+def coordinated_web3(w3, coordinator=None):
+    """Share fee/head reads of `w3` with the other scripts; returns `w3`.
+
+    Add it before `cached_web3()` so the in-process cache is asked first and only its
+    misses reach the daemon (and only the daemon's misses the rate limiter).
+    """
+    w3.middleware_onion.add(coordinator_middleware(coordinator), "nonce_coordinator")
+    return w3
+
+
+# ======================== Benchmark ========================
+class _Chain:
+    """Node with one mempool shared by every script: a block every `block_time`, `latency` per call"""
+
+    def __init__(self, block_time, latency, bump=10):
+        self.block_time = block_time
+        self.latency = latency
+        self.bump = bump
+        self.lock = threading.Lock()
+        self.mined = {}
+        self.mempool = {}  # (address, nonce) -> (fee, tx id)
+        self.included = set()
+
+    def call(self):
+        time.sleep(self.latency)
+
+    def pending_nonce(self, address):
+        self.call()
+        with self.lock:
+            nonce = self.mined.get(address, 0)
+            while (address, nonce) in self.mempool:
+                nonce += 1
+            return nonce
+
+    def send(self, address, nonce, fee, txid):
+        self.call()
+        with self.lock:
+            if nonce < self.mined.get(address, 0):
+                raise ValueError("nonce too low")
+            old = self.mempool.get((address, nonce))
+            if old is not None and fee < old[0] * (100 + self.bump) // 100:
+                raise ValueError("replacement transaction underpriced")
+            self.mempool[(address, nonce)] = (fee, txid)
+
+    def receipt(self, address, nonce, txid):
+        """True mined, False replaced by another tx at the same nonce, None still pending"""
+        self.call()
+        with self.lock:
+            if txid in self.included:
+                return True
+            return False if self.mined.get(address, 0) > nonce else None
+
+    def mine(self, stop):
+        while not stop.wait(self.block_time):
+            with self.lock:
+                for address, nonce in sorted(self.mempool):
+                    if nonce == self.mined.get(address, 0):
+                        self.included.add(self.mempool.pop((address, nonce))[1])
+                        self.mined[address] = nonce + 1
+
+
+class _Result:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.sends = 0
+        self.errors = 0
+        self.confirmed = 0
+        self.lost = 0
+        self.failed = 0
+
+    def add(self, **counts):
+        with self.lock:
+            for name, count in counts.items():
+                setattr(self, name, getattr(self, name) + count)
+
+
+def _script(chain, coordinator, wallets, reads, stop, result, cooldown, retries=3):
+    """One PM2 script: walk the wallets in file order, one tx per wallet, like voting.py's cycle"""
+    index = 0
+    while not stop.is_set():
+        address = wallets[index % len(wallets)]
+        index += 1
+        txid = object()
+        with coordinator.wallet(address) if coordinator else _no_lock():
+            fetch = lambda: chain.pending_nonce(address)  # noqa: E731
+            nonce = coordinator.next_nonce(address, fetch) if coordinator else fetch()
+            for _ in range(reads):  # balance, gas price, estimate_gas ...
+                chain.call()
+            fee = 100
+            for _ in range(retries):
+                sends = errors = 0
+                try:
+                    chain.send(address, nonce, fee, txid)
+                    sends = 1
+                except ValueError as e:
+                    errors = 1
+                    time.sleep(cooldown)  # COOLDOWN["ERROR"] in the scripts
+                    if "nonce too low" in str(e):
+                        nonce = coordinator.resync(address, nonce, fetch) if coordinator else fetch()
+                    else:
+                        fee = fee * 3 // 2  # increase_gas_price(tx, 0.5, ...)
+                result.add(sends=sends, errors=errors)
+                if sends:
+                    break
+            else:
+                result.add(failed=1)
+                if coordinator:
+                    coordinator.release(address, nonce)
+                continue
+            while not stop.is_set():
+                mined = chain.receipt(address, nonce, txid)
+                if mined is not None:
+                    result.add(confirmed=int(mined), lost=int(not mined))
+                    break
+                time.sleep(chain.block_time / 2)
+
+
+@contextmanager
+def _no_lock():
+    yield True
+
+
+def _run(coordinated, path, scripts, wallets, seconds, block_time, latency, cooldown):
+    chain = _Chain(block_time, latency)
+    addresses = [f"0x{n:040x}" for n in range(1, wallets + 1)]
+    stop = threading.Event()
+    result = _Result()
+    clients = [NonceCoordinator(path, spawn=False) if coordinated else None for _ in range(scripts)]
+    threads = [threading.Thread(target=chain.mine, args=(stop,), daemon=True)]
+    # Each script does its own number of reads per tx, so their walks drift in and out of step
+    threads += [threading.Thread(target=_script, args=(chain, client, addresses, 2 + n, stop, result, cooldown),
+                                 daemon=True) for n, client in enumerate(clients)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join(5)
+    attempts = result.sends + result.errors
+    line = (f"{'coordinator' if coordinated else 'uncoordinated':<14}{attempts:>9}{result.errors:>8}"
+            f"{result.errors / max(attempts, 1):>8.1%}{result.lost:>7}{result.failed:>8}{result.confirmed:>11}"
+            f"{result.confirmed / seconds:>9.1f}")
+    return line, clients
+
+
+def benchmark(seconds=10, scripts=5, wallets=100, block_time=0.2, latency=0.01, cooldown=0.5):
+    """`scripts` bots sharing `wallets` keys against one mempool, with and without the daemon.
+
+    Times are scaled ~1:10 (0.2 s blocks, 10 ms RPC calls, 0.5 s error cooldown). Scripts
+    are threads with a connection each, the daemon is a real `serve` process.
+    """
+    path = os.path.join(tempfile.mkdtemp(prefix="nonce-bench-"), "coordinator.sock")
+    daemon = spawn_daemon(path)
+    try:
+        probe = NonceCoordinator(path, spawn=False)
+        deadline = time.monotonic() + SPAWN_WAIT
+        while not probe._ready() and time.monotonic() < deadline:
+            probe.retry_at = 0.0
+            time.sleep(0.05)
+        print(f"{scripts} scripts, {wallets} shared wallets, {seconds}s each")
+        print(f"{'':<14}{'sends':>9}{'errors':>8}{'rate':>8}{'lost':>7}{'failed':>8}{'confirmed':>11}{'tx/s':>9}")
+        print(_run(False, path, scripts, wallets, seconds, block_time, latency, cooldown)[0])
+        line, clients = _run(True, path, scripts, wallets, seconds, block_time, latency, cooldown)
+        print(line)
+        waits = sum(client.waits for client in clients)
+        print(f"wallet waits {waits} ({sum(client.waited for client in clients):.1f}s), "
+              f"daemon: {json.dumps(probe.status())}")
+        rounds = 2000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            probe.call({"op": "get", "key": "eth_gasPrice"})
+        print(f"round trip {(time.perf_counter() - started) / rounds * 1e6:.0f} us")
+    finally:
+        daemon.terminate()
+        daemon.wait(5)
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "bench"
+    if command == "serve":
+        serve(*sys.argv[2:3])
+    elif command == "status":
+        client = NonceCoordinator(*sys.argv[2:3], spawn=False)
+        print(json.dumps(client.status()) if client._ready() else "no daemon running")
+    elif command == "bench":
+        benchmark(*[int(arg) for arg in sys.argv[2:3]])
+    else:
+        sys.exit("usage: python nonce_coordinator.py [serve [socket] | status [socket] | bench [seconds]]")
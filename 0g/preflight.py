@@ -0,0 +1,342 @@
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import nullcontext
+import requests
+
+try:
+    import metrics
+except ImportError:
+    metrics = None  # directories without the Prometheus exporter keep the ledger in this module only
+
+try:
+    from rate_limit import limited_session
+except ImportError:
+    limited_session = None
+
+# ======================== Constants ========================
+PREFLIGHT_BLOCK = "pending"  # simulate on top of our own txs that are still in the mempool
+GAS_MARGIN = 1.15  # re-planned gas limit = eth_estimateGas * margin
+BATCH_TIMEOUT = 15
+CONFIRM_SECONDS = 20.0  # confirmation wait a dropped tx saves, until the script has timed real ones
+CALL_FIELDS = ("from", "to", "data", "value", "gas")
+REVERT_ERRORS = ("revert", "invalid opcode", "invalid jump", "stack underflow", "stack limit")
+OUT_OF_GAS_ERRORS = ("out of gas", "gas required exceeds", "intrinsic gas too low")
+ERROR_STRING = "0x08c379a0"  # Error(string) selector
+OFF_VALUES = ("0", "off", "false", "no")
+
+OK, REPLAN, DROP, UNCHECKED = "ok", "replan", "drop", "unchecked"
+
+
+def _hex(value):
+    if isinstance(value, int):
+        return hex(value)
+    if isinstance(value, (bytes, bytearray)):
+        text = value.hex()
+    else:
+        text = str(value)
+    return text if text.startswith("0x") else "0x" + text  # solc bytecode comes without the prefix
+
+
+def call_object(tx, gas=True):
+    """eth_call / eth_estimateGas params of a built tx; fee fields are left out so the balance check is value only"""
+    fields = CALL_FIELDS if gas else CALL_FIELDS[:-1]
+    return {field: _hex(tx[field]) for field in fields if tx.get(field) is not None}
+
+
+def revert_reason(error):
+    """Readable reason of a JSON-RPC error, decoding Error(string) revert data when the message lacks it"""
+    message = str(error.get("message", "")) if isinstance(error, dict) else str(error)
+    data = error.get("data") if isinstance(error, dict) else None
+    if isinstance(data, dict):
+        data = data.get("data")
+    if isinstance(data, str) and data.startswith(ERROR_STRING) and ":" not in message:
+        try:
+            raw = bytes.fromhex(data[len(ERROR_STRING):])
+            length = int.from_bytes(raw[32:64], "big")
+            message = f"{message}: {raw[64:64 + length].decode('utf-8', 'replace')}"
+        except ValueError:
+            pass
+    return message
+
+
+def _matches(message, patterns):
+    message = message.lower()
+    return any(pattern in message for pattern in patterns)
+
+
+# ======================== Verdict ========================
+class Verdict:
+    """What to do with one simulated tx.
+
+    `action` is "ok" (send as planned), "replan" (send with `gas`), "drop" (the call
+    reverted, do not send) or "unchecked" (the simulation was unavailable, send as
+    planned). `estimate` is the node's eth_estimateGas, `output` the eth_call return data.
+    """
+
+    __slots__ = ("action", "gas", "estimate", "reason", "output")
+
+    def __init__(self, action, gas=None, estimate=None, reason=None, output=None):
+        self.action = action
+        self.gas = gas
+        self.estimate = estimate
+        self.reason = reason
+        self.output = output
+
+    @property
+    def dropped(self):
+        return self.action == DROP
+
+    @property
+    def replanned(self):
+        return self.action == REPLAN
+
+    def __repr__(self):
+        return f"Verdict({self.action}, gas={self.gas}, estimate={self.estimate}, reason={self.reason!r})"
+
+
+# ======================== Preflight ========================
+class Preflight:
+    """Simulates a wave of txs in one JSON-RPC batch before any of them is signed and sent.
+
+    Every tx gets an `eth_call` with its planned gas limit and an `eth_estimateGas`
+    without one, both at the pending block, so a wave of N txs is one HTTP round trip
+    instead of 2N. A call that reverts drops the tx; a call that only runs out of its
+    fixed gas limit is re-planned to the estimate plus `margin`. Transport errors or a
+    node that rejects the call for other reasons leave the tx unchecked: the script sends
+    it as it did before. The txs of one wave must not depend on each other (an approve
+    and the swap spending it belong in consecutive waves).
+
+    Dropped txs are counted in a small ledger: gas (their limit, which a revert can burn
+    entirely), fee at their price cap and the confirmation wait they would have cost.
+    """
+
+    def __init__(self, block=PREFLIGHT_BLOCK, margin=GAS_MARGIN, session=None, clock=time.monotonic):
+        self.block = block
+        self.margin = margin
+        self.enabled = True
+        self.session = session
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.counts = {OK: 0, REPLAN: 0, DROP: 0, UNCHECKED: 0}
+        self.waves = 0
+        self.gas_avoided = 0
+        self.fees_avoided = 0
+        self.time_avoided = 0.0
+        self.simulate_time = 0.0
+
+    def configure(self, enabled=None, block=None, margin=None):
+        if enabled is not None:
+            self.enabled = enabled
+        if block:
+            self.block = block
+        if margin is not None:
+            self.margin = float(margin)
+
+    def _session(self):
+        if self.session is None:
+            self.session = limited_session() if limited_session is not None else requests.Session()
+        return self.session
+
+    # -------- JSON-RPC --------
+    def _post(self, url, payload):
+        response = self._session().post(url, json=payload, timeout=BATCH_TIMEOUT)
+        response.raise_for_status()
+        body = response.json()
+        if isinstance(payload, list) and not isinstance(body, list):
+            # Node without batch support answers the array with one error: fall back to one post per call
+            return [self._post(url, item) for item in payload]
+        return body
+
+    def _batch(self, url, txs):
+        payload = []
+        for n, tx in enumerate(txs):
+            payload.append({"jsonrpc": "2.0", "id": 2 * n, "method": "eth_call",
+                            "params": [call_object(tx), self.block]})
+            payload.append({"jsonrpc": "2.0", "id": 2 * n + 1, "method": "eth_estimateGas",
+                            "params": [call_object(tx, gas=False), self.block]})
+        responses = self._post(url, payload)
+        return {response.get("id"): response for response in responses if isinstance(response, dict)}
+
+    # -------- verdicts --------
+    def _verdict(self, tx, call, estimate, margin):
+        estimate_gas = None
+        if estimate is not None and "result" in estimate:
+            estimate_gas = int(estimate["result"], 16)
+        planned = round(estimate_gas * margin) if estimate_gas is not None else None
+        if call is None:
+            return Verdict(UNCHECKED, estimate=estimate_gas, reason="no response")
+        if "error" in call:
+            reason = revert_reason(call["error"])
+            if _matches(reason, OUT_OF_GAS_ERRORS) and planned is not None:
+                return Verdict(REPLAN, gas=planned, estimate=estimate_gas, reason=reason)
+            if _matches(reason, REVERT_ERRORS + OUT_OF_GAS_ERRORS):
+                return Verdict(DROP, estimate=estimate_gas, reason=reason)
+            return Verdict(UNCHECKED, estimate=estimate_gas, reason=reason)
+        limit = tx.get("gas")
+        if planned is not None and (limit is None or estimate_gas > int(limit)):
+            # The call passed, but the fixed limit is below what the node estimates: it would run out of gas
+            return Verdict(REPLAN, gas=planned, estimate=estimate_gas, output=call.get("result"))
+        return Verdict(OK, estimate=estimate_gas, output=call.get("result"))
+
+    def _record(self, tx, verdict):
+        gas = fee = 0
+        wait = 0.0
+        if verdict.dropped:
+            gas = int(tx.get("gas") or verdict.estimate or 0)
+            price = tx.get("maxFeePerGas") or tx.get("gasPrice") or 0
+            fee = gas * int(price)
+            wait = confirm_seconds()
+        with self.lock:
+            self.counts[verdict.action] += 1
+            self.gas_avoided += gas
+            self.fees_avoided += fee
+            self.time_avoided += wait
+        if metrics is not None:
+            metrics.preflight(verdict.action, gas, fee, wait)
+
+    def simulate(self, w3, txs, margin=None):
+        """One Verdict per tx of the wave, from a single batch against `w3`'s endpoint"""
+        txs = list(txs)
+        if not self.enabled or not txs:
+            return [Verdict(UNCHECKED, reason="disabled") for _ in txs]
+        margin = margin or self.margin
+        started = self.clock()
+        try:
+            with metrics.phase("preflight") if metrics is not None else nullcontext():
+                responses = self._batch(w3.provider.endpoint_uri, txs)
+        except (requests.RequestException, ValueError, AttributeError) as e:
+            verdicts = [Verdict(UNCHECKED, reason=str(e)) for _ in txs]
+        else:
+            verdicts = [self._verdict(tx, responses.get(2 * n), responses.get(2 * n + 1), margin)
+                        for n, tx in enumerate(txs)]
+        with self.lock:
+            self.waves += 1
+            self.simulate_time += self.clock() - started
+        for tx, verdict in zip(txs, verdicts):
+            self._record(tx, verdict)
+        return verdicts
+
+    def check(self, w3, tx, margin=None):
+        """Verdict for a single tx (a wave of one)"""
+        return self.simulate(w3, [tx], margin)[0]
+
+    def summary(self):
+        with self.lock:
+            checked = sum(self.counts.values())
+            if not checked:
+                return "-" if self.enabled else "off"
+            return (f"{checked} txs in {self.waves} batches ({self.simulate_time / self.waves * 1000:.0f} ms avg), "
+                    f"{self.counts[DROP]} dropped, {self.counts[REPLAN]} re-planned, "
+                    f"{self.counts[UNCHECKED]} unchecked; avoided {self.gas_avoided} gas, "
+                    f"{self.fees_avoided / 1e18:.6f} fees, ~{self.time_avoided:.0f}s waiting")
+
+
+PREFLIGHT = Preflight()
+
+
+def confirm_seconds():
+    """Mean confirmation wait of this script so far (metrics "confirm" phase), else CONFIRM_SECONDS"""
+    if metrics is not None:
+        mean = metrics.phase_mean("confirm")
+        if mean is not None:
+            return mean
+    return CONFIRM_SECONDS
+
+
+def start():
+    """Apply PREFLIGHT (off disables), PREFLIGHT_BLOCK and PREFLIGHT_GAS_MARGIN; returns a description"""
+    enabled = os.getenv("PREFLIGHT", "").strip().lower() not in OFF_VALUES
+    margin = os.getenv("PREFLIGHT_GAS_MARGIN", "").strip()
+    PREFLIGHT.configure(enabled=enabled, block=os.getenv("PREFLIGHT_BLOCK", "").strip() or None,
+                        margin=float(margin) if margin else None)
+    if not enabled:
+        return "off"
+    return f"eth_call at {PREFLIGHT.block} block, re-planned gas = estimate x{PREFLIGHT.margin:g}"
+
+
+def summary():
+    return PREFLIGHT.summary()
+
+
+# ======================== Benchmark ========================
+def _fake_node(latency, revert_every, heavy_every):
+    """Local JSON-RPC node: every `revert_every`-th tx reverts, every `heavy_every`-th needs 180000 gas"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    def answer(request):
+        call = request["params"][0]
+        n = int(call.get("data", "0x0")[2:] or "0", 16)
+        needed = 180000 if n % heavy_every == 0 else 60000
+        if n % revert_every == 0:
+            error = {"code": 3, "message": "execution reverted",
+                     "data": ERROR_STRING + (32).to_bytes(32, "big").hex() + (3).to_bytes(32, "big").hex()
+                     + b"SPL".ljust(32, b"\0").hex()}
+            return {"jsonrpc": "2.0", "id": request["id"], "error": error}
+        if request["method"] == "eth_estimateGas":
+            return {"jsonrpc": "2.0", "id": request["id"], "result": hex(needed)}
+        if "gas" in call and int(call["gas"], 16) < needed:
+            return {"jsonrpc": "2.0", "id": request["id"], "error": {"code": -32000, "message": "out of gas"}}
+        return {"jsonrpc": "2.0", "id": request["id"], "result": "0x"}
+
+    class Node(BaseHTTPRequestHandler):
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            body = json.dumps([answer(r) for r in payload] if isinstance(payload, list) else answer(payload)).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Node)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class _Provider:
+    def __init__(self, url):
+        self.endpoint_uri = url
+
+
+class _Web3:
+    def __init__(self, url):
+        self.provider = _Provider(url)
+
+
+def benchmark(wave=20, latency=0.05, revert_every=7, heavy_every=5, gas_price=10 ** 9):
+    """One batched wave vs one call per tx, and what the dropped txs would have cost"""
+    server = _fake_node(latency, revert_every, heavy_every)
+    w3 = _Web3(f"http://127.0.0.1:{server.server_address[1]}")
+    txs = [{"from": "0x" + "11" * 20, "to": "0x" + "22" * 20, "data": hex(n), "gas": 100000,
+            "gasPrice": gas_price} for n in range(1, wave + 1)]
+
+    batched = Preflight(session=requests.Session())
+    started = time.perf_counter()
+    verdicts = batched.simulate(w3, txs)
+    batch_time = time.perf_counter() - started
+
+    single = Preflight(session=requests.Session())
+    started = time.perf_counter()
+    for tx in txs:
+        single.check(w3, tx)
+    single_time = time.perf_counter() - started
+    server.shutdown()
+
+    dropped = [verdict for verdict in verdicts if verdict.dropped]
+    print(f"wave of {wave} txs, {latency * 1000:.0f} ms RPC latency: one batch {batch_time * 1000:.0f} ms, "
+          f"per tx {single_time * 1000:.0f} ms ({single_time / batch_time:.1f}x)")
+    print(f"{len(dropped)} dropped ({dropped[0].reason if dropped else '-'}), "
+          f"{sum(v.replanned for v in verdicts)} re-planned above the fixed 100000 gas limit")
+    print(f"ledger: {batched.summary()}")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
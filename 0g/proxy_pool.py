@@ -0,0 +1,187 @@
+import sys
+import time
+import random
+import threading
+
+# ======================== Constants ========================
+BAN_STATUS_CODES = {403, 407, 429}
+EWMA_ALPHA = 0.3
+OPTIMISTIC_LATENCY = 1.0  # detik, dipakai untuk proxy yang belum pernah dicoba
+FAILURE_PENALTY = 4.0  # skor dikali (1 + penalty * failure_rate)
+QUARANTINE_BASE = 30.0
+QUARANTINE_MAX = 30 * 60.0
+BAN_QUARANTINE = 10 * 60.0
+QUARANTINE_AFTER_FAILURES = 2
+
+
+# ======================== Proxy State ========================
+class ProxyStats:
+    """Health of one proxy plus its pooled session"""
+
+    __slots__ = ("proxy", "session", "latency", "successes", "failures", "bans",
+                 "consecutive_failures", "quarantined_until", "in_flight")
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.session = None
+        self.latency = None
+        self.successes = 0
+        self.failures = 0
+        self.bans = 0
+        self.consecutive_failures = 0
+        self.quarantined_until = 0.0
+        self.in_flight = 0
+
+    @property
+    def failure_rate(self):
+        total = self.successes + self.failures
+        # Laplace smoothing: proxy baru dianggap 0% gagal tapi belum pasti
+        return self.failures / (total + 1)
+
+    def score(self):
+        """Lower is better: expected latency inflated by failures and current load"""
+        latency = self.latency if self.latency is not None else OPTIMISTIC_LATENCY
+        return latency * (1 + FAILURE_PENALTY * self.failure_rate) * (1 + self.in_flight)
+
+
+# ======================== Pool ========================
+class ProxyPool:
+    """Health-scored proxy selection with quarantine and one session per proxy.
+
+    Picks the better of two random healthy proxies (power of two choices) so load spreads
+    out while fast, reliable proxies still win. Failures put a proxy in quarantine with
+    exponential backoff; ban responses (403/407/429) quarantine it straight away.
+    An empty proxy list gives a pool with a single direct connection.
+    """
+
+    def __init__(self, proxies, session_factory, clock=time.monotonic, rng=None):
+        self.session_factory = session_factory
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.entries = [ProxyStats(proxy) for proxy in proxies] or [ProxyStats(None)]
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def acquire(self):
+        with self.lock:
+            now = self.clock()
+            healthy = [entry for entry in self.entries if entry.quarantined_until <= now]
+            if not healthy:
+                entry = min(self.entries, key=lambda e: e.quarantined_until)
+            elif len(healthy) == 1:
+                entry = healthy[0]
+            else:
+                first, second = self.rng.sample(healthy, 2)
+                entry = first if first.score() <= second.score() else second
+            entry.in_flight += 1
+            if entry.session is None:
+                entry.session = self.session_factory(entry.proxy)
+            return entry
+
+    def report(self, entry, latency, ok, banned=False):
+        with self.lock:
+            entry.in_flight -= 1
+            if ok:
+                entry.successes += 1
+                entry.consecutive_failures = 0
+                entry.latency = latency if entry.latency is None else (
+                    EWMA_ALPHA * latency + (1 - EWMA_ALPHA) * entry.latency)
+                return
+            entry.failures += 1
+            entry.consecutive_failures += 1
+            if banned:
+                entry.bans += 1
+                entry.quarantined_until = self.clock() + BAN_QUARANTINE
+            elif entry.consecutive_failures >= QUARANTINE_AFTER_FAILURES:
+                backoff = QUARANTINE_BASE * 2 ** (entry.consecutive_failures - QUARANTINE_AFTER_FAILURES)
+                entry.quarantined_until = self.clock() + min(backoff, QUARANTINE_MAX)
+
+    def request(self, method, url, **kwargs):
+        """Send through the best proxy and record the outcome; raises like requests does"""
+        entry = self.acquire()
+        started = self.clock()
+        try:
+            response = entry.session.request(method, url, **kwargs)
+        except Exception:
+            self.report(entry, self.clock() - started, ok=False)
+            raise
+        banned = response.status_code in BAN_STATUS_CODES
+        self.report(entry, self.clock() - started, ok=response.status_code < 500 and not banned, banned=banned)
+        return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def summary(self):
+        with self.lock:
+            now = self.clock()
+            healthy = sum(1 for entry in self.entries if entry.quarantined_until <= now)
+            return f"{healthy}/{len(self.entries)} proxy sehat, {sum(e.bans for e in self.entries)} ban"
+
+
+# ======================== Benchmark ========================
+class _RoundRobin:
+    def __init__(self, proxies):
+        self.proxies = proxies
+        self.index = 0
+
+    def acquire(self):
+        proxy = self.proxies[self.index]
+        self.index = (self.index + 1) % len(self.proxies)
+        return proxy
+
+
+def benchmark(fleet=40, fetches=5000, timeout=20.0, seed=7):
+    """Round-robin vs health-scored pool on a simulated fleet (virtual clock, no network).
+
+    A quarter of the fleet is dead (always times out), some are slow, some flaky and a few
+    answer 429; a request that fails costs the full timeout like in upload.py.
+    """
+    rng = random.Random(seed)
+    profiles = {}
+    for n in range(fleet):
+        kind = ("dead", "slow", "flaky", "banned", "good", "good", "good", "dead")[n % 8]
+        profiles[f"http://proxy-{n}:8080"] = {
+            "dead": (timeout, 1.0, False),
+            "slow": (rng.uniform(4, 8), 0.05, False),
+            "flaky": (rng.uniform(0.5, 1.5), 0.4, False),
+            "banned": (0.3, 1.0, True),
+            "good": (rng.uniform(0.3, 1.2), 0.02, False),
+        }[kind]
+
+    def simulate(proxy):
+        mean, fail_p, banned = profiles[proxy]
+        if rng.random() < fail_p:
+            return (0.3 if banned else timeout), False, banned
+        return rng.expovariate(1 / mean), True, False
+
+    clock = [0.0]
+    concurrency = 8  # upload worker paralel; waktu virtual maju per request / concurrency
+
+    baseline = _RoundRobin(list(profiles))
+    total = failed = 0.0
+    for _ in range(fetches):
+        latency, ok, _ = simulate(baseline.acquire())
+        total += latency
+        failed += not ok
+    print(f"round-robin : latency rata-rata={total / fetches:.2f}s gagal={failed / fetches:.1%}")
+
+    pool = ProxyPool(list(profiles), session_factory=lambda proxy: None, clock=lambda: clock[0], rng=rng)
+    total = failed = 0.0
+    for _ in range(fetches):
+        entry = pool.acquire()
+        latency, ok, banned = simulate(entry.proxy)
+        clock[0] += latency / concurrency
+        pool.report(entry, latency, ok, banned)
+        total += latency
+        failed += not ok
+    print(f"health pool : latency rata-rata={total / fetches:.2f}s gagal={failed / fetches:.1%} ({pool.summary()})")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:3]])
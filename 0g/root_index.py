@@ -0,0 +1,106 @@
+import os
+import mmap
+import time
+import hashlib
+import threading
+
+# ======================== Constants ========================
+ROOT_SIZE = 32
+BLOOM_BITS = 1 << 23  # 1MB bitmap, ~0.1% false positives at 500k roots
+BLOOM_HASHES = 7
+BLOOM_SUFFIX = ".bloom"
+ROOTS_SUFFIX = ".roots"
+REMOTE_CHECK_INTERVAL = 60.0  # detik antar cek /file/info ke indexer
+
+
+def _bloom_positions(root):
+    """BLOOM_HASHES bit positions from one blake2b digest of the root"""
+    digest = hashlib.blake2b(root, digest_size=4 * BLOOM_HASHES, person=b"gm-root-bloom").digest()
+    return [int.from_bytes(digest[i:i + 4], "little") % BLOOM_BITS for i in range(0, len(digest), 4)]
+
+
+# ======================== Root Index ========================
+class RootIndex:
+    """Persistent set of merkle roots we generated or uploaded.
+
+    A memory-mapped bloom filter (``<path>.bloom``) answers most lookups without touching
+    the exact set; positives are confirmed against ``<path>.roots``, an append-only file
+    of 32-byte roots that is only read into memory on the first bloom hit.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.bloom_path = path + BLOOM_SUFFIX
+        self.roots_path = path + ROOTS_SUFFIX
+        self.lock = threading.Lock()
+        self._exact = None
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.bloom_path, "a+b") as f:
+            if os.path.getsize(self.bloom_path) != BLOOM_BITS // 8:
+                f.truncate(BLOOM_BITS // 8)
+        self._bloom_file = open(self.bloom_path, "r+b")
+        self._bloom = mmap.mmap(self._bloom_file.fileno(), 0)
+
+    def _bloom_hit(self, root):
+        return all(self._bloom[pos >> 3] & (1 << (pos & 7)) for pos in _bloom_positions(root))
+
+    def _load_exact(self):
+        roots = set()
+        if os.path.exists(self.roots_path):
+            with open(self.roots_path, "rb") as f:
+                while True:
+                    root = f.read(ROOT_SIZE)
+                    if len(root) < ROOT_SIZE:
+                        break
+                    roots.add(root)
+        return roots
+
+    def __contains__(self, root):
+        with self.lock:
+            if not self._bloom_hit(root):
+                return False
+            if self._exact is None:
+                self._exact = self._load_exact()
+            return root in self._exact
+
+    def add(self, root):
+        """Record a root; returns False if it was already known"""
+        with self.lock:
+            if self._bloom_hit(root):
+                if self._exact is None:
+                    self._exact = self._load_exact()
+                if root in self._exact:
+                    return False
+            for pos in _bloom_positions(root):
+                self._bloom[pos >> 3] |= 1 << (pos & 7)
+            with open(self.roots_path, "ab") as f:
+                f.write(root)
+            if self._exact is not None:
+                self._exact.add(root)
+            return True
+
+    def close(self):
+        with self.lock:
+            self._bloom.flush()
+            self._bloom.close()
+            self._bloom_file.close()
+
+
+# ======================== Remote Check Limiter ========================
+class RemoteCheckLimiter:
+    """Allows at most one remote existence check per interval across all threads"""
+
+    def __init__(self, interval=REMOTE_CHECK_INTERVAL):
+        self.interval = interval
+        self.last = None
+        self.lock = threading.Lock()
+
+    def due(self, clock=time.monotonic):
+        with self.lock:
+            now = clock()
+            if self.last is not None and now - self.last < self.interval:
+                return False
+            self.last = now
+            return True
@@ -1,12 +1,20 @@
 import os
-import time
 import random
 import asyncio
 import json
 from web3 import Web3
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
-from eth_account import Account
+from waiter import sleep, sleep_async
+from wallet_registry import WalletRegistry
+from rate_limit import limited_web3
+from broadcaster import RawTxBroadcaster
+from read_cache import CACHE, cached_web3, is_connected
+import memwatch
+import nonce_coordinator
+from nonce_coordinator import COORDINATOR, coordinated_web3
+import preflight
+from preflight import PREFLIGHT
 from datetime import datetime, timedelta
 
 init(autoreset=True)
@@ -45,6 +53,7 @@ USE_EIP1559 = True  # True/False EIP-1559 or legacy
 
 # CONFIG RPC & CONTRACT
 RPC_URLS = os.getenv("RPC_URLS", "https://evmrpc-testnet.0g.ai,https://0g-testnet-rpc.astrostake.xyz,https://0g-evm.zstake.xyz").split(",")
+BROADCAST_FANOUT = int(os.getenv("BROADCAST_FANOUT", "3"))  # RPC per raw tx
 EXPLORER_URL = "https://chainscan-galileo.0g.ai/tx/"
 WETH_ADDRESS = Web3.to_checksum_address("0x1265ace75c199a531b7b1cd2a9666f434325d1e8")
 WBTC_ADDRESS = Web3.to_checksum_address("0x15b1121c947d1806e32c4c00e41c60bdf1b35e26")
@@ -108,20 +117,19 @@ def connect_to_rpc():
     """Connect to one of the RPC URLs"""
     global RPC_CACHE
     if RPC_CACHE:
-        try:
-            RPC_CACHE.eth.chain_id
+        # chain_id is cached for good now, the probe still reaches the node once per block
+        if is_connected(RPC_CACHE):
             print(f"🔄 Already Connected to RPC URL: {Fore.GREEN}{RPC_CACHE.provider.endpoint_uri}{Style.RESET_ALL}")
             return RPC_CACHE
-        except:
-            RPC_CACHE = None
-            print(f"{Fore.RED}RPC connection lost, reconnecting...{Style.RESET_ALL}")
+        RPC_CACHE = None
+        print(f"{Fore.RED}RPC connection lost, reconnecting...{Style.RESET_ALL}")
 
     random.shuffle(RPC_URLS)
     
     for url in RPC_URLS:
         try:
-            web3 = Web3(Web3.HTTPProvider(url))
-            if web3.is_connected():
+            web3 = cached_web3(coordinated_web3(limited_web3(Web3(Web3.HTTPProvider(url)))))
+            if is_connected(web3):
                 print(f"📶 Connected to RPC URL: {Fore.GREEN}{url}{Style.RESET_ALL}")
                 RPC_CACHE = web3
                 return web3
@@ -130,32 +138,42 @@ def connect_to_rpc():
 
     raise Exception("Unable to connect to any RPC URL.")
 
+broadcaster = None
+
+def get_broadcaster():
+    """Fan-out sender over every RPC URL, created on first use"""
+    global broadcaster
+    if broadcaster is None:
+        broadcaster = RawTxBroadcaster(
+            [url for url in RPC_URLS if url.strip()],
+            lambda url: limited_web3(Web3(Web3.HTTPProvider(url))).eth,
+            fanout=BROADCAST_FANOUT)
+    return broadcaster
+
 def load_private_keys():
     """Load private keys from environment variable and file"""
-    private_keys = []
+    wallets = WalletRegistry("private_keys.txt")
 
     # Load from environment variable
     env_private_key = os.getenv("PRIVATE_KEY")
     if env_private_key:
-        private_keys.append(env_private_key.strip())
+        wallets.add(env_private_key)
 
-    # Try to load from private_keys.txt
+    # Stream private_keys.txt, addresses are derived in a process pool or read from the index
     try:
-        with open("private_keys.txt", "r") as file:
-            keys = [line.strip() for line in file.readlines()]
-            private_keys.extend(keys)
+        wallets.add_file("private_keys.txt")
+        print(f"⚡ {wallets.describe_stats()}")
     except Exception as e:
         print(f"{Fore.YELLOW}Note: private_keys.txt not found or couldn't be read: {e}{Style.RESET_ALL}")
 
-    if not private_keys:
+    if not len(wallets):
         raise Exception("No private keys found in .env or private_keys.txt")
 
-    private_keys = [k if k.startswith("0x") else "0x" + k for k in private_keys]
+    wallets.save_index()
+    print(f"📸 Loaded {len(wallets)} wallet(s) {Fore.GREEN}successfully{Style.RESET_ALL}")
     
-    print(f"📸 Loaded {len(private_keys)} wallet(s) {Fore.GREEN}successfully{Style.RESET_ALL}")
-    
-    # Return unique keys
-    return list(set(private_keys))
+    # Unique keys, file order preserved
+    return wallets
 
 def get_wallet_balance(web3, address, token_contract):
     """Get wallet balance of a token"""
@@ -175,6 +193,23 @@ def get_reasonable_gas_price(web3):
         default_gwei = 0.101
         return int(web3.to_wei(default_gwei, 'gwei'))
 
+def next_nonce(web3, address):
+    """Nonce reserved through the coordinator, never handed to another script on the same private_keys.txt"""
+    return COORDINATOR.next_nonce(address, lambda: web3.eth.get_transaction_count(address, "pending"))
+
+def preflight_ok(web3, tx, wallet_idx, label):
+    """Simulate `tx` at the pending block before signing: False (nonce released) when it would revert"""
+    verdict = PREFLIGHT.check(web3, tx)
+    if verdict.dropped:
+        print(f"🧪 Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} {label} would revert ({verdict.reason}), {Fore.RED}not sent{Style.RESET_ALL}")
+        COORDINATOR.release(tx["from"], tx["nonce"])
+        return False
+    if verdict.replanned:
+        # Gas limit tetap (GAS_LIMIT_STAKE dst) lebih kecil dari estimasi node: naikkan, jangan sampai out of gas
+        print(f"🧪 Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} {label} gas limit {tx['gas']} too low, raised to {verdict.gas}")
+        tx["gas"] = verdict.gas
+    return True
+
 def get_random_amount():
     """Generate random amount between MIN_STAKE_AMOUNT and MAX_STAKE_AMOUNT"""
     random_amount = random.uniform(MIN_STAKE_AMOUNT, MAX_STAKE_AMOUNT)
@@ -184,7 +219,7 @@ async def sleep_seconds(seconds, wallet_idx=None):
     """Sleep with a nice message"""
     wallet_str = f"Wallet {wallet_idx} " if wallet_idx is not None else ""
     print(f"🛏️  {Fore.CYAN} {wallet_str}sleeping in {seconds} seconds...{Style.RESET_ALL}")
-    await asyncio.sleep(seconds)
+    await sleep_async(seconds)
 
 # ======================= TRANSACTION FUNCTIONS =======================
 async def deposit_token(web3, wallet, wallet_idx, token_contract, token_address, amount, contract):
@@ -196,10 +231,12 @@ async def deposit_token(web3, wallet, wallet_idx, token_contract, token_address,
         # Approve token contract to spend tokens
         approve_tx = token_contract.functions.approve(contract.address, amount_wei).build_transaction({
             'from': wallet.address,
-            'nonce': web3.eth.get_transaction_count(wallet.address),
+            'nonce': next_nonce(web3, wallet.address),
             'gas': 100000,
             'gasPrice': get_reasonable_gas_price(web3)
         })
+        if not preflight_ok(web3, approve_tx, wallet_idx, "approve"):
+            return False
         signed_approve_tx = wallet.sign_transaction(approve_tx)
         approve_tx_hash = safe_send_transaction(web3, signed_approve_tx, wallet_idx)
         if not approve_tx_hash:
@@ -216,10 +253,12 @@ async def deposit_token(web3, wallet, wallet_idx, token_contract, token_address,
         # Deposit token
         deposit_tx = contract.functions.deposit(token_address, amount_wei).build_transaction({
             'from': wallet.address,
-            'nonce': web3.eth.get_transaction_count(wallet.address),
+            'nonce': next_nonce(web3, wallet.address),
             'gas': 150000,
             'gasPrice': get_reasonable_gas_price(web3)
         })
+        if not preflight_ok(web3, deposit_tx, wallet_idx, "deposit"):
+            return False
         signed_deposit_tx = wallet.sign_transaction(deposit_tx)
         deposit_tx_hash = safe_send_transaction(web3, signed_deposit_tx, wallet_idx)
         if not deposit_tx_hash:
@@ -265,10 +304,12 @@ async def withdraw_token(web3, wallet, wallet_idx, contract, token_address, min_
         # Prepare withdraw transaction
         withdraw_tx = contract.functions.withdraw(token_address, amount_wei).build_transaction({
             'from': wallet.address,
-            'nonce': web3.eth.get_transaction_count(wallet.address),
+            'nonce': next_nonce(web3, wallet.address),
             'gas': 150000,
             'gasPrice': get_reasonable_gas_price(web3)
         })
+        if not preflight_ok(web3, withdraw_tx, wallet_idx, "withdraw"):
+            return False
         signed_withdraw_tx = wallet.sign_transaction(withdraw_tx)
         withdraw_tx_hash = safe_send_transaction(web3, signed_withdraw_tx, wallet_idx)
         if not withdraw_tx_hash:
@@ -311,10 +352,12 @@ async def stake_token(web3, wallet, wallet_idx, contract, token_symbol):
         # Approve contract to spend tokens
         approve_tx = contract.functions.approve(contract.address, amount_wei).build_transaction({
             'from': wallet.address,
-            'nonce': web3.eth.get_transaction_count(wallet.address),
+            'nonce': next_nonce(web3, wallet.address),
             'gas': 100000,
             'gasPrice': get_reasonable_gas_price(web3)
         })
+        if not preflight_ok(web3, approve_tx, wallet_idx, "approve"):
+            return None
         signed_approve_tx = wallet.sign_transaction(approve_tx)
         approve_tx_hash = safe_send_transaction(web3, signed_approve_tx, wallet_idx)
         if not approve_tx_hash:
@@ -331,12 +374,14 @@ async def stake_token(web3, wallet, wallet_idx, contract, token_symbol):
         # Prepare staking transaction
         tx = contract.functions.stake(amount_wei).build_transaction({
             'from': wallet.address,
-            'nonce': web3.eth.get_transaction_count(wallet.address),
+            'nonce': next_nonce(web3, wallet.address),
             'gas': GAS_LIMIT_STAKE,
             'gasPrice': get_reasonable_gas_price(web3)
         })
         
-        # Sign and send transaction
+        # Simulate, then sign and send transaction
+        if not preflight_ok(web3, tx, wallet_idx, "stake"):
+            return None
         print(f"✅ Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} sending stake transaction...")
         signed_tx = wallet.sign_transaction(tx)
         tx_hash = safe_send_transaction(web3, signed_tx, wallet_idx)
@@ -396,12 +441,14 @@ async def unstake_token(web3, wallet, wallet_idx, contract, token_symbol):
         # Prepare unstaking transaction
         tx = contract.functions.unstake(amount_to_unstake).build_transaction({
             'from': wallet.address,
-            'nonce': web3.eth.get_transaction_count(wallet.address),
+            'nonce': next_nonce(web3, wallet.address),
             'gas': GAS_LIMIT_UNSTAKE,
             'gasPrice': get_reasonable_gas_price(web3)
         })
         
-        # Sign and send transaction
+        # Simulate, then sign and send transaction
+        if not preflight_ok(web3, tx, wallet_idx, "unstake"):
+            return False
         print(f"✅ Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} sending unstake transaction...")
         signed_tx = wallet.sign_transaction(tx)
         tx_hash = safe_send_transaction(web3, signed_tx, wallet_idx)
@@ -446,7 +493,7 @@ def safe_send_transaction(web3, signed_tx, wallet_idx, retries=3):
     """Send transaction with retries"""
     for i in range(retries):
         try:
-            tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            tx_hash = get_broadcaster().broadcast(signed_tx.rawTransaction, prefer=web3.provider.endpoint_uri)
             return tx_hash
         except Exception as e:
             error_str = str(e)
@@ -462,7 +509,7 @@ def safe_send_transaction(web3, signed_tx, wallet_idx, retries=3):
             if i < retries - 1:
                 wait_time = 7 * (i + 1)
                 print(f"Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} waiting {wait_time} seconds before {Fore.MAGENTA}RETRY...{Style.RESET_ALL}")
-                time.sleep(wait_time)
+                sleep(wait_time)
     
     print(f"{Fore.RED}🥵 Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} transaction ultimately failed after {retries} retries.{Style.RESET_ALL}")
     return None
@@ -591,6 +638,11 @@ async def process_wallet(wallet, wallet_idx, cycle):
             await sleep_seconds(delay, wallet_idx)
 
         print(f"\n ✅ Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} cycle {Fore.YELLOW}[{cycle}]{Fore.RESET} {Fore.GREEN}completed successfully!{Style.RESET_ALL}\n")
+        print(f"📦 Read cache: {CACHE.summary()}")
+        print(f"🧪 Preflight: {preflight.summary()}")
+        print(f"📡 Broadcast: {get_broadcaster().summary()}")
+        # Sampling only: the other wallets' tasks may be mid-transaction
+        memwatch.checkpoint(label=f"wallet {wallet_idx} cycle {cycle}", restart=False)
         return True
         
     except Exception as e:
@@ -622,10 +674,14 @@ async def run_wallet_continuously(wallet, wallet_idx):
 async def main():
     """Main entry point - runs all wallets in parallel"""
     try:
-        private_keys = load_private_keys()
+        wallets = load_private_keys()
+        private_keys = wallets.keys()
         
         print(f"🚀 Starting 0G Galileo Testnet Wrapped/Staking Automation...")
         print(f"ℹ️ Using {'EIP-1559' if USE_EIP1559 else 'Legacy'} transaction type{Style.RESET_ALL}")
+        print(f"🧠 Memory watchdog: {memwatch.start()}")
+        print(f"🔐 Nonce coordinator: {nonce_coordinator.start()}")
+        print(f"🧪 Preflight: {preflight.start()}")
         
         web3 = connect_to_rpc()
         # Inisialisasi kontrak WETH dan WBTC
@@ -663,8 +719,8 @@ async def main():
         tasks = []
         
         # Start process for each wallet with a small delay
-        for idx, private_key in enumerate(private_keys):
-            wallet = Account.from_key(private_key)
+        for idx in range(len(wallets)):
+            wallet = wallets.account(idx)
             print(f"🔑 Preparing wallet {Fore.YELLOW}[{idx+1}/{len(private_keys)}]{Fore.RESET}: {Fore.MAGENTA}{wallet.address}{Style.RESET_ALL}")
             
             task = asyncio.create_task(run_wallet_continuously(wallet, idx+1))
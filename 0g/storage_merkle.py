@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import mmap
+import time
+import binascii
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from Crypto.Hash import keccak
+
+# ======================== Constants ========================
+CHUNK_SIZE = 256  # bytes per merkle leaf (0G storage chunk)
+SEGMENT_CHUNKS = 1024  # chunks per segment
+SEGMENT_SIZE = CHUNK_SIZE * SEGMENT_CHUNKS  # 256KB
+SEGMENT_PARALLELISM = 4
+SEGMENT_RETRIES = 3
+HEX_BLOCK = 64 * 1024  # raw bytes hex encoded per streamed piece
+
+
+# ======================== Hashing ========================
+def keccak256(*parts):
+    """keccak256 over bytes/memoryview parts without joining them"""
+    h = keccak.new(digest_bits=256)
+    for part in parts:
+        h.update(part)
+    return h.digest()
+
+
+ZERO_CHUNK_HASH = keccak256(bytes(CHUNK_SIZE))
+
+
+def merkle_levels(leaves):
+    """All tree levels bottom-up; an odd node at the end of a level is promoted as-is"""
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [keccak256(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_proof(levels, index):
+    """Lemma [leaf, siblings..., root] and path (True = node is the left child)"""
+    lemma = [levels[0][index]]
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            lemma.append(level[sibling])
+            path.append(index % 2 == 0)
+        index //= 2
+    lemma.append(levels[-1][0])
+    return lemma, path
+
+
+def segment_root(view):
+    """Merkle root of one segment; the last chunk is zero padded, leaves padded to a power of two"""
+    leaves = []
+    for offset in range(0, len(view), CHUNK_SIZE):
+        chunk = view[offset:offset + CHUNK_SIZE]
+        if len(chunk) < CHUNK_SIZE:
+            leaves.append(keccak256(chunk, bytes(CHUNK_SIZE - len(chunk))))
+        else:
+            leaves.append(keccak256(chunk))
+        chunk.release()
+    width = 1
+    while width < len(leaves):
+        width *= 2
+    leaves.extend([ZERO_CHUNK_HASH] * (width - len(leaves)))
+    return merkle_levels(leaves)[-1][0]
+
+
+# ======================== File Segmenter ========================
+class FileSegmenter:
+    """Memory-mapped view of a file split into SEGMENT_SIZE segments with merkle proofs.
+
+    Segment roots are computed in one pass over memoryview slices of the mmap, so only
+    ~32 bytes per 256KB segment stay in memory regardless of file size. An optional
+    ``suffix`` (e.g. a nonce) is treated as trailing bytes of the data without ever
+    being written into the file.
+    """
+
+    def __init__(self, path, suffix=b""):
+        self.path = path
+        self.suffix = bytes(suffix)
+        self.file_size = os.path.getsize(path)
+        if self.file_size == 0:
+            raise ValueError(f"File kosong tidak bisa di-segmentasi: {path}")
+        self.size = self.file_size + len(self.suffix)
+        self.segment_count = (self.size + SEGMENT_SIZE - 1) // SEGMENT_SIZE
+        roots = []
+        with self.mapped() as view:
+            for index in range(self.segment_count):
+                file_part, suffix_part = self._segment_parts(view, index)
+                if suffix_part:
+                    roots.append(segment_root(memoryview(bytes(file_part) + suffix_part)))
+                else:
+                    roots.append(segment_root(file_part))
+                file_part.release()
+        self.levels = merkle_levels(roots)
+        self.root = self.levels[-1][0]
+        self.root_hex = "0x" + self.root.hex()
+
+    def _segment_parts(self, view, index):
+        """(file slice, suffix bytes) making up one segment of file + suffix"""
+        start = index * SEGMENT_SIZE
+        end = min(start + SEGMENT_SIZE, self.size)
+        file_part = view[min(start, self.file_size):min(end, self.file_size)]
+        suffix_part = self.suffix[max(start - self.file_size, 0):max(end - self.file_size, 0)]
+        return file_part, suffix_part
+
+    @contextmanager
+    def mapped(self):
+        """Read-only memoryview over the whole file"""
+        with open(self.path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mm)
+            try:
+                yield view
+            finally:
+                view.release()
+                mm.close()
+
+    def proof(self, index):
+        lemma, path = merkle_proof(self.levels, index)
+        return {"lemma": ["0x" + node.hex() for node in lemma], "path": path}
+
+    def segment_stream(self, view, index, block=HEX_BLOCK):
+        """Indexer JSON body for one segment, yielded in pieces.
+
+        The segment is hex encoded HEX_BLOCK bytes at a time straight from the mmap, so
+        neither the raw segment nor its full hex string is ever materialized.
+        """
+        head = {
+            "root": self.root_hex,
+            "index": index,
+            "proof": self.proof(index),
+            "fileSize": self.size,
+        }
+        yield json.dumps(head)[:-1].encode() + b', "data": "'
+        file_part, suffix_part = self._segment_parts(view, index)
+        try:
+            for offset in range(0, len(file_part), block):
+                piece = file_part[offset:offset + block]
+                try:
+                    yield binascii.hexlify(piece)
+                finally:
+                    piece.release()
+        finally:
+            file_part.release()
+        if suffix_part:
+            yield binascii.hexlify(suffix_part)
+        yield b'"}'
+
+
+# ======================== Segment Uploader ========================
+class SegmentUploader:
+    """Uploads segments with bounded parallelism and resumes from a progress file"""
+
+    def __init__(self, post_segment, parallelism=SEGMENT_PARALLELISM, retries=SEGMENT_RETRIES):
+        self.post_segment = post_segment
+        self.parallelism = max(1, parallelism)
+        self.retries = max(1, retries)
+
+    @staticmethod
+    def state_path(segmenter):
+        return f"{segmenter.path}.segments.json"
+
+    def _load_done(self, segmenter):
+        try:
+            with open(self.state_path(segmenter), "r") as f:
+                state = json.load(f)
+            if state.get("root") == segmenter.root_hex:
+                return set(state.get("done", []))
+        except (OSError, ValueError):
+            pass
+        return set()
+
+    def _save_done(self, segmenter, done):
+        tmp_path = f"{self.state_path(segmenter)}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"root": segmenter.root_hex, "done": sorted(done)}, f)
+        os.replace(tmp_path, self.state_path(segmenter))
+
+    def upload(self, segmenter):
+        """Upload every missing segment, raises if some still fail after retries"""
+        done = self._load_done(segmenter)
+        pending = [i for i in range(segmenter.segment_count) if i not in done]
+        failures = {}
+
+        with segmenter.mapped() as view:
+            def send(index):
+                last_error = None
+                for _ in range(self.retries):
+                    try:
+                        self.post_segment(segmenter.segment_stream(view, index))
+                        return index
+                    except Exception as e:
+                        last_error = e
+                raise last_error
+
+            with ThreadPoolExecutor(max_workers=self.parallelism) as pool:
+                futures = {pool.submit(send, index): index for index in pending}
+                for future in as_completed(futures):
+                    index = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        failures[index] = e
+                        continue
+                    done.add(index)
+                    self._save_done(segmenter, done)
+
+        if failures:
+            first = next(iter(failures.values()))
+            raise Exception(f"{len(failures)}/{segmenter.segment_count} segmen gagal diunggah (progress disimpan): {first}")
+        self.clear(segmenter)
+        return segmenter.segment_count
+
+    def clear(self, segmenter):
+        path = self.state_path(segmenter)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# ======================== Benchmark ========================
+def _legacy_encode(path):
+    """The old path: whole file in memory, hex string, then one JSON body"""
+    with open(path, "rb") as f:
+        content = f.read()
+    return json.dumps({"root": "0x", "index": 0, "data": content.hex()}).encode()
+
+
+def benchmark(sizes_mb=(1, 16, 64, 256), legacy_max_mb=64):
+    """tracemalloc peak of hashing + streaming every segment vs the old hex/JSON copies"""
+    for size_mb in sizes_mb:
+        fd, path = tempfile.mkstemp(suffix=".bin")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for _ in range(size_mb):
+                    f.write(os.urandom(1024 * 1024))
+
+            tracemalloc.start()
+            started = time.monotonic()
+            segmenter = FileSegmenter(path)
+            sent = []
+            SegmentUploader(lambda body: sent.append(sum(len(piece) for piece in body))).upload(segmenter)
+            elapsed = time.monotonic() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"{size_mb:>4} MB  segmen={segmenter.segment_count:<5} body={sum(sent) / 2**20:.1f}MB "
+                  f"peak={peak / 2**20:.2f}MB ({peak / (size_mb * 2**20):.2f}x) waktu={elapsed:.1f}s")
+
+            if size_mb <= legacy_max_mb:
+                tracemalloc.start()
+                _legacy_encode(path)
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+                print(f"{'':>4}     legacy hex/json peak={peak / 2**20:.2f}MB ({peak / (size_mb * 2**20):.2f}x)")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    sizes = [int(arg) for arg in sys.argv[1:]] or (1, 16, 64, 256)
+    benchmark(sizes)
@@ -0,0 +1,139 @@
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.request import urlopen
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content_prefetch import ContentPrefetcher, SourceLimiter, TTLCache
+
+
+@pytest.fixture
+def sources():
+    """Local stand-in image and CoinGecko price servers; `fail` makes both return 503"""
+    state = {"fail": False, "hits": {"/image": 0, "/markets": 0}}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            state["hits"][path] = state["hits"].get(path, 0) + 1
+            if state["fail"]:
+                self.send_response(503)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            if path == "/image":
+                body, kind = os.urandom(4 * 1024), "image/jpeg"
+            else:
+                body, kind = json.dumps([{"id": "bitcoin", "current_price": 1}]).encode(), "application/json"
+            self.send_response(200)
+            self.send_header("Content-Type", kind)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    state["base"] = f"http://127.0.0.1:{server.server_address[1]}"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def make_produce(sources, workdir):
+    image_limiter = SourceLimiter(0.01)
+    prices = TTLCache(lambda: json.load(urlopen(f"{sources['base']}/markets", timeout=5)), ttl=60)
+    counter = iter(range(10**6))
+
+    def produce():
+        n = next(counter)
+        path = os.path.join(workdir, f"payload-{n}")
+        if n % 2:
+            image_limiter.wait()
+            content = urlopen(f"{sources['base']}/image", timeout=5).read()
+            with open(path, "wb") as f:
+                f.write(content)
+            return {"data_type": "image", "filepath": path}
+        snapshot = {"timestamp": time.time(), "cryptocurrencies": prices.get()}
+        with open(path, "w") as f:
+            json.dump(snapshot, f)
+        return {"data_type": "crypto_prices", "filepath": path}
+
+    return produce
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.01)
+
+
+def test_take_does_not_wait_while_ring_is_full(sources, tmp_path):
+    prefetcher = ContentPrefetcher(make_produce(sources, str(tmp_path)), capacity=4, workers=2)
+    prefetcher.start()
+    try:
+        wait_until(prefetcher.ring.full)
+        items = [prefetcher.take() for _ in range(4)]
+        assert prefetcher.waits == 0
+        assert all(os.path.exists(item["filepath"]) for item in items)
+        assert {item["data_type"] for item in items} == {"image", "crypto_prices"}
+        assert sources["hits"]["/markets"] == 1  # price snapshot served from the TTL cache
+    finally:
+        prefetcher.stop()
+
+
+def test_stop_deletes_payloads_nobody_took(sources, tmp_path):
+    prefetcher = ContentPrefetcher(make_produce(sources, str(tmp_path)), capacity=3, workers=2)
+    prefetcher.start()
+    wait_until(prefetcher.ring.full)
+    taken = prefetcher.take()
+    wait_until(prefetcher.ring.full)
+    prefetcher.stop()
+    assert os.listdir(tmp_path) == [os.path.basename(taken["filepath"])]
+
+
+def test_take_raises_when_every_source_fails(sources, tmp_path):
+    sources["fail"] = True
+    errors = []
+    prefetcher = ContentPrefetcher(make_produce(sources, str(tmp_path)), capacity=2, workers=1,
+                                   retry_delay=0.05, on_error=errors.append, take_timeout=0.5)
+    prefetcher.start()
+    try:
+        started = time.monotonic()
+        with pytest.raises(Exception, match="Tidak ada konten"):
+            prefetcher.take()
+        assert time.monotonic() - started < 2
+        assert errors and prefetcher.waits == 1
+    finally:
+        prefetcher.stop()
+
+
+def test_stop_wakes_a_blocked_take(sources, tmp_path):
+    sources["fail"] = True
+    prefetcher = ContentPrefetcher(make_produce(sources, str(tmp_path)), capacity=2, workers=1,
+                                   retry_delay=0.05, take_timeout=60)
+    prefetcher.start()
+    outcome = []
+
+    def consumer():
+        try:
+            outcome.append(prefetcher.take())
+        except Exception as e:
+            outcome.append(e)
+
+    thread = threading.Thread(target=consumer)
+    thread.start()
+    time.sleep(0.2)
+    prefetcher.stop()
+    thread.join(timeout=2)
+    assert not thread.is_alive()
+    assert isinstance(outcome[0], Exception)
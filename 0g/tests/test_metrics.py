@@ -0,0 +1,122 @@
+import os
+import sys
+from urllib.request import urlopen
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics
+from metrics import Registry
+
+
+@pytest.mark.parametrize("message, expected", [
+    ("nonce too low: next nonce 5", "nonce"),
+    ("replacement transaction underpriced", "replacement_underpriced"),
+    ("max fee per gas less than block base fee", "underpriced"),
+    ("insufficient funds for gas * price + value", "insufficient_funds"),
+    ("429 Client Error: Too Many Requests", "rate_limited"),
+    ("HTTPSConnectionPool: Read timed out", "timeout"),
+    ("execution reverted: not owner", "reverted"),
+    ("502 Bad Gateway", "connection"),
+    ("something else", "other"),
+])
+def test_error_class(message, expected):
+    assert metrics.error_class(Exception(message)) == expected
+
+
+def test_counter_and_gauge_render_labels_and_escape_values():
+    registry = Registry()
+    sent = registry.counter("bot_tx_sent_total", "Sent", ("script",))
+    rss = registry.gauge("bot_memory_rss_bytes", "RSS", ("script",))
+    sent.inc(script="voting")
+    sent.inc(2, script="voting")
+    sent.inc(script='we"ird\nname')
+    rss.set(1024, script="voting")
+    text = registry.render()
+    assert "# TYPE bot_tx_sent_total counter" in text
+    assert 'bot_tx_sent_total{script="voting"} 3' in text
+    assert 'bot_tx_sent_total{script="we\\"ird\\nname"} 1' in text
+    assert 'bot_memory_rss_bytes{script="voting"} 1024' in text
+    assert text.endswith("\n")
+
+
+def test_histogram_buckets_are_cumulative_and_end_at_inf():
+    registry = Registry()
+    latency = registry.histogram("rpc_seconds", "Latency", ("method",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value, method="eth_call")
+    lines = registry.render().splitlines()
+    assert 'rpc_seconds_bucket{method="eth_call",le="0.1"} 1' in lines
+    assert 'rpc_seconds_bucket{method="eth_call",le="1.0"} 3' in lines
+    assert 'rpc_seconds_bucket{method="eth_call",le="+Inf"} 4' in lines
+    assert 'rpc_seconds_count{method="eth_call"} 4' in lines
+    assert 'rpc_seconds_sum{method="eth_call"} 6.25' in lines
+
+
+def test_tx_result_counts_receipts_and_ignores_missing_ones():
+    confirmed = metrics.TX_CONFIRMED.values.get((metrics.SCRIPT,), 0)
+    metrics.tx_result(None)
+    metrics.tx_result({"transactionHash": "0x01"})
+    assert metrics.TX_CONFIRMED.values.get((metrics.SCRIPT,), 0) == confirmed
+
+    wallet = "0xTestWallet"
+    metrics.tx_result({"status": 1, "gasUsed": 21000, "effectiveGasPrice": 2, "from": wallet})
+    metrics.tx_result({"status": 0, "gasUsed": 50000, "from": wallet})
+    assert metrics.TX_CONFIRMED.values[(metrics.SCRIPT,)] == confirmed + 1
+    assert metrics.GAS_USED.values[(metrics.SCRIPT, wallet)] == 71000
+    assert metrics.FEES_PAID.values[(metrics.SCRIPT, wallet)] == 42000
+
+
+def test_http_exporter_serves_the_registry():
+    registry = Registry()
+    registry.counter("bot_retries_total", "Retries", ("error_class",)).inc(error_class="nonce")
+    server = metrics.serve(0, host="127.0.0.1", registry=registry)
+    try:
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        with urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.headers["Content-Type"] == metrics.CONTENT_TYPE
+            assert 'bot_retries_total{error_class="nonce"} 1' in response.read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_textfile_exporter_writes_atomically_and_start_runs_once(tmp_path):
+    registry = Registry()
+    registry.counter("bot_tx_sent_total", "Sent").inc()
+    path = tmp_path / "bot.prom"
+    metrics.write_textfile(str(path), registry)
+    assert "bot_tx_sent_total 1" in path.read_text()
+    assert os.listdir(tmp_path) == ["bot.prom"]
+
+    assert metrics.start(port="", textfile="", registry=registry) is None
+    assert metrics.start(port="", textfile=str(path), registry=registry) is None  # already started
+
+
+def test_rpc_middleware_times_calls_and_counts_errors():
+    class Provider:
+        endpoint_uri = "https://rpc-metrics.example/v1"
+
+    class W3:
+        provider = Provider()
+
+    def make_request(method, params):
+        if method == "eth_call":
+            return {"jsonrpc": "2.0", "id": 1, "error": {"code": 3, "message": "execution reverted"}}
+        if method == "eth_sendRawTransaction":
+            raise ConnectionError("reset")
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+
+    request = metrics.rpc_middleware()(make_request, W3())
+    request("eth_blockNumber", [])
+    request("eth_call", [{}, "latest"])
+    with pytest.raises(ConnectionError):
+        request("eth_sendRawTransaction", ["0x00"])
+
+    key = lambda method: (metrics.SCRIPT, "rpc-metrics.example", method)
+    assert metrics.RPC_LATENCY.series[key("eth_blockNumber")][2] == 1
+    assert metrics.RPC_LATENCY.series[key("eth_sendRawTransaction")][2] == 1
+    assert key("eth_blockNumber") not in metrics.RPC_ERRORS.values
+    assert metrics.RPC_ERRORS.values[key("eth_call")] == 1
+    assert metrics.RPC_ERRORS.values[key("eth_sendRawTransaction")] == 1
@@ -0,0 +1,159 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nonce_coordinator import CoordinatorState, NonceCoordinator
+
+ADDRESS = "0xAbC0000000000000000000000000000000000001"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def state(clock):
+    return CoordinatorState(sync_interval=60, reserve_ttl=30, clock=clock)
+
+
+def reserve(state, chain=None):
+    request = {"op": "reserve", "address": ADDRESS}
+    if chain is not None:
+        request["chain"] = chain
+    return state.handle(request)
+
+
+def release(state, nonce):
+    return state.handle({"op": "release", "address": ADDRESS, "nonce": nonce})
+
+
+def wallet(state):
+    return state.wallets[ADDRESS.lower()]
+
+
+# -------- reserve --------
+def test_reserve_asks_for_a_chain_sync_first(state):
+    assert reserve(state) == {"sync": True}
+    assert reserve(state, chain=7) == {"nonce": 7}
+    assert reserve(state) == {"nonce": 8}
+    assert reserve(state) == {"nonce": 9}
+
+
+def test_reserve_resyncs_after_sync_interval(state, clock):
+    reserve(state, chain=7)
+    clock.now += 61
+    assert reserve(state) == {"sync": True}
+
+
+def test_reserve_keeps_recent_reservations_above_a_lagging_chain(state):
+    for _ in range(3):
+        reserve(state, chain=5)  # 5, 6, 7 reserved, none visible in the pending count yet
+    assert reserve(state, chain=5) == {"nonce": 8}
+
+
+def test_chain_below_next_wins_once_reservations_expire(state, clock):
+    for nonce in (5, 6, 7):
+        assert reserve(state, chain=5 if nonce == 5 else None) == {"nonce": nonce}
+    clock.now += 31  # the txs never reached the mempool
+    assert reserve(state, chain=5) == {"nonce": 5}
+    assert wallet(state).next == 6
+
+
+# -------- release --------
+def test_release_of_the_newest_nonce_rewinds_next(state):
+    reserve(state, chain=3)
+    reserve(state)
+    release(state, 4)
+    assert wallet(state).next == 4
+    assert wallet(state).gaps == set()
+    assert reserve(state) == {"nonce": 4}
+
+
+def test_release_below_next_leaves_a_gap_that_is_reused_first(state):
+    reserve(state, chain=10)
+    for _ in range(3):
+        reserve(state)  # 11..13
+    release(state, 12)
+    release(state, 11)
+    assert wallet(state).gaps == {11, 12}
+    assert reserve(state) == {"nonce": 11}
+    assert reserve(state) == {"nonce": 12}
+    assert reserve(state) == {"nonce": 14}
+
+
+def test_release_collapses_gaps_below_the_newest_nonce(state):
+    reserve(state, chain=10)
+    for _ in range(3):
+        reserve(state)  # 11..13
+    release(state, 11)
+    release(state, 12)
+    release(state, 13)
+    assert wallet(state).next == 11
+    assert wallet(state).gaps == set()
+
+
+def test_release_ignores_unknown_and_future_nonces(state):
+    assert release(state, 3) == {}
+    reserve(state, chain=3)
+    release(state, 9)
+    assert wallet(state).next == 4
+    assert wallet(state).gaps == set()
+
+
+# -------- resync --------
+def test_resync_with_chain_above_next_skips_used_nonces(state):
+    reserve(state, chain=3)
+    response = state.handle({"op": "resync", "address": ADDRESS, "nonce": 3, "chain": 9})
+    assert response == {"nonce": 9}
+    assert wallet(state).next == 10
+
+
+def test_resync_with_chain_below_next_keeps_in_flight_reservations(state):
+    reserve(state, chain=3)
+    reserve(state)  # 4 is still in flight
+    response = state.handle({"op": "resync", "address": ADDRESS, "nonce": 3, "chain": 2})
+    assert response == {"nonce": 5}
+
+
+def test_resync_drops_gaps_the_chain_has_passed(state):
+    reserve(state, chain=3)
+    for _ in range(3):
+        reserve(state)  # 4..6
+    release(state, 4)
+    assert wallet(state).gaps == {4}
+    response = state.handle({"op": "resync", "address": ADDRESS, "nonce": 6, "chain": 5})
+    assert wallet(state).gaps == set()
+    assert response == {"nonce": 6}
+
+
+def test_resync_rejects_a_request_without_chain(state):
+    assert "error" in state.handle({"op": "resync", "address": ADDRESS, "nonce": 1})
+
+
+# -------- client release --------
+@pytest.mark.parametrize("error, released", [
+    (None, True),
+    (Exception("connection reset by peer"), True),
+    (Exception("replacement transaction underpriced"), False),
+    (Exception("already known"), False),
+    (Exception("nonce too low"), False),
+])
+def test_client_release_keeps_occupied_nonces(tmp_path, error, released):
+    coordinator = NonceCoordinator(path=str(tmp_path / "none.sock"), spawn=False)
+    assert coordinator.next_nonce(ADDRESS, lambda: 20) == 20
+    assert coordinator.next_nonce(ADDRESS, lambda: 20) == 21
+    coordinator.release(ADDRESS, 20, error=error)
+    gaps = coordinator.local.wallets[ADDRESS.lower()].gaps
+    assert (20 in gaps) is released
@@ -0,0 +1,140 @@
+import os
+import sys
+
+import pytest
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import preflight
+from preflight import Preflight, DROP, OK, REPLAN, UNCHECKED, ERROR_STRING, revert_reason
+
+TX = {"from": "0x" + "11" * 20, "to": "0x" + "22" * 20, "data": "0x01", "gas": 100000, "maxFeePerGas": 2 * 10**9}
+
+
+class Web3Stub:
+    class provider:
+        endpoint_uri = "http://node.example"
+
+
+class Response:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class Session:
+    """requests.Session stand-in answering each post with the next queued body"""
+
+    def __init__(self, *bodies, error=None):
+        self.bodies = list(bodies)
+        self.error = error
+        self.payloads = []
+
+    def post(self, url, json=None, timeout=None):
+        self.payloads.append(json)
+        if self.error is not None:
+            raise self.error
+        return Response(self.bodies.pop(0))
+
+
+def error_data(reason):
+    raw = reason.encode()
+    return (ERROR_STRING + (32).to_bytes(32, "big").hex() + len(raw).to_bytes(32, "big").hex()
+            + raw.ljust(32, b"\0").hex())
+
+
+def estimate(gas):
+    return {"result": hex(gas)}
+
+
+# -------- _verdict --------
+@pytest.mark.parametrize("tx, call, est, action, gas", [
+    (TX, {"result": "0x"}, estimate(60000), OK, None),
+    (TX, {"result": "0x"}, estimate(150000), REPLAN, 172500),  # passes, but above the fixed limit
+    (dict(TX, gas=None), {"result": "0x"}, estimate(50000), REPLAN, 57500),
+    (TX, {"error": {"message": "out of gas"}}, estimate(120000), REPLAN, 138000),
+    (TX, {"error": {"message": "out of gas"}}, {"error": {"message": "execution reverted"}}, DROP, None),
+    (TX, {"error": {"message": "execution reverted", "data": error_data("SPL")}}, None, DROP, None),
+    (TX, {"error": {"message": "invalid opcode: INVALID"}}, estimate(21000), DROP, None),
+    (TX, {"error": {"message": "header not found"}}, estimate(60000), UNCHECKED, None),
+    (TX, None, estimate(60000), UNCHECKED, None),
+    (TX, {"result": "0x"}, None, OK, None),
+])
+def test_verdict(tx, call, est, action, gas):
+    verdict = Preflight()._verdict(tx, call, est, 1.15)
+    assert verdict.action == action
+    assert verdict.gas == gas
+
+
+def test_revert_reason_decodes_error_string_data():
+    assert revert_reason({"message": "execution reverted", "data": error_data("SPL")}) == "execution reverted: SPL"
+    nested = {"message": "execution reverted", "data": {"data": error_data("not owner")}}
+    assert revert_reason(nested) == "execution reverted: not owner"
+    assert revert_reason({"message": "execution reverted: SPL", "data": error_data("SPL")}) == "execution reverted: SPL"
+    assert revert_reason(ValueError("boom")) == "boom"
+
+
+def test_call_object_hexes_fields_and_leaves_out_fees():
+    tx = dict(TX, data=bytes.fromhex("a9059cbb"), value=5)
+    assert preflight.call_object(tx) == {"from": TX["from"], "to": TX["to"], "data": "0xa9059cbb",
+                                         "value": "0x5", "gas": hex(100000)}
+    assert "gas" not in preflight.call_object(tx, gas=False)
+    assert preflight.call_object(dict(TX, data="6080"))["data"] == "0x6080"  # solc output has no prefix
+
+
+# -------- simulate --------
+def test_one_batch_per_wave_and_a_ledger_of_dropped_txs(monkeypatch):
+    monkeypatch.setattr(preflight, "confirm_seconds", lambda: 12.0)
+    body = [
+        {"id": 0, "result": "0x"}, {"id": 1, "result": hex(60000)},
+        {"id": 2, "error": {"message": "execution reverted", "data": error_data("SPL")}},
+        {"id": 3, "error": {"message": "execution reverted"}},
+    ]
+    session = Session(body)
+    checker = Preflight(session=session)
+    verdicts = checker.simulate(Web3Stub(), [TX, dict(TX, data="0x02")])
+    assert [verdict.action for verdict in verdicts] == [OK, DROP]
+    assert verdicts[1].reason == "execution reverted: SPL"
+    assert len(session.payloads) == 1
+    assert [call["method"] for call in session.payloads[0]] == ["eth_call", "eth_estimateGas"] * 2
+    assert session.payloads[0][0]["params"][1] == "pending"
+    assert checker.gas_avoided == 100000
+    assert checker.fees_avoided == 100000 * 2 * 10**9
+    assert checker.time_avoided == 12.0
+    assert "2 txs in 1 batches" in checker.summary() and "1 dropped" in checker.summary()
+
+
+def test_a_node_without_batch_support_gets_one_post_per_call():
+    session = Session({"error": {"code": -32600, "message": "batch not supported"}},
+                      {"id": 0, "result": "0x"}, {"id": 1, "result": hex(60000)})
+    (verdict,) = Preflight(session=session).simulate(Web3Stub(), [TX])
+    assert verdict.action == OK
+    assert verdict.estimate == 60000
+    assert len(session.payloads) == 3
+
+
+def test_transport_errors_and_disabled_preflight_leave_txs_unchecked():
+    checker = Preflight(session=Session(error=requests.ConnectionError("refused")))
+    assert [v.action for v in checker.simulate(Web3Stub(), [TX, TX])] == [UNCHECKED, UNCHECKED]
+    assert checker.counts[UNCHECKED] == 2
+
+    checker.configure(enabled=False)
+    (verdict,) = checker.simulate(Web3Stub(), [TX])
+    assert (verdict.action, verdict.reason) == (UNCHECKED, "disabled")
+    assert checker.counts[UNCHECKED] == 2  # disabled waves are not counted
+
+
+def test_start_reads_the_environment(monkeypatch):
+    monkeypatch.setattr(preflight, "PREFLIGHT", Preflight())
+    monkeypatch.setenv("PREFLIGHT", "off")
+    assert preflight.start() == "off"
+    monkeypatch.setenv("PREFLIGHT", "")
+    monkeypatch.setenv("PREFLIGHT_BLOCK", "latest")
+    monkeypatch.setenv("PREFLIGHT_GAS_MARGIN", "1.3")
+    assert preflight.start() == "eth_call at latest block, re-planned gas = estimate x1.3"
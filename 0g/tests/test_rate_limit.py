@@ -0,0 +1,73 @@
+import io
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rate_limit
+from rate_limit import EndpointLimiter, limited_session
+
+
+@pytest.fixture
+def limited_server():
+    """Local endpoint that answers every POST with 429 and records the bodies it got"""
+    bodies = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            if self.headers.get("Transfer-Encoding") == "chunked":
+                body = b""
+                while True:
+                    size = int(self.rfile.readline(), 16)
+                    body += self.rfile.read(size)
+                    self.rfile.readline()
+                    if size == 0:
+                        break
+            else:
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            bodies.append(body)
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/file/segment", bodies
+    server.shutdown()
+    server.server_close()
+
+
+def make_session():
+    limiter = EndpointLimiter(sleep=lambda seconds: None)
+    return limited_session(limiter=limiter), limiter
+
+
+def test_replayable_body_is_retried_after_429(limited_server):
+    url, bodies = limited_server
+    session, _ = make_session()
+    response = session.post(url, data=b'{"index": 0}')
+    assert response.status_code == 429
+    assert bodies == [b'{"index": 0}'] * (rate_limit.RETRY_LIMITED + 1)
+
+
+@pytest.mark.parametrize("make_body", [
+    lambda: (piece for piece in [b'{"index": 0, ', b'"data": "00"}']),
+    lambda: io.BytesIO(b'{"index": 0, "data": "00"}'),
+], ids=["generator", "file"])
+def test_streamed_body_is_not_replayed_after_429(limited_server, make_body):
+    url, bodies = limited_server
+    session, limiter = make_session()
+    response = session.post(url, data=make_body())
+    assert response.status_code == 429
+    assert bodies == [b'{"index": 0, "data": "00"}']
+    assert limiter.buckets[rate_limit.endpoint_key(url)].limited == 1  # the 429 still taught the limiter
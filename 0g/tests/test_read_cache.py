@@ -0,0 +1,143 @@
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from read_cache import ReadCache
+
+URL = "https://rpc.example"
+OTHER_URL = "https://rpc2.example"
+
+
+class Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class Upstream:
+    """Fake RPC whose head block and gas price are set by the test"""
+
+    def __init__(self):
+        self.head = 10
+        self.gas = 10**9
+        self.calls = []
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        result = {
+            "eth_chainId": "0x40d9",
+            "eth_blockNumber": hex(self.head),
+            "eth_gasPrice": hex(self.gas),
+            "eth_getBlockByNumber": {"number": hex(self.head)},
+        }.get(method, "0x1")
+        return {"jsonrpc": "2.0", "id": len(self.calls), "result": result}
+
+
+def make_cache(head_ttl=60):
+    clock = Clock()
+    return ReadCache(head_ttl=head_ttl, clock=clock), clock, Upstream()
+
+
+def test_head_reads_are_served_until_a_new_block_shows_up():
+    cache, _, upstream = make_cache()
+    cache.request(URL, "eth_getBlockByNumber", ["latest", False], upstream.make_request)
+    assert cache.request(URL, "eth_gasPrice", [], upstream.make_request)["result"] == hex(10**9)
+    upstream.gas = 2 * 10**9
+    assert cache.request(URL, "eth_gasPrice", [], upstream.make_request)["result"] == hex(10**9)
+    assert upstream.calls.count("eth_gasPrice") == 1
+
+    upstream.head = 11
+    cache.request(URL, "eth_blockNumber", [], upstream.make_request)  # reveals block 11
+    assert cache.request(URL, "eth_gasPrice", [], upstream.make_request)["result"] == hex(2 * 10**9)
+    assert upstream.calls.count("eth_gasPrice") == 2
+
+
+def test_latest_block_response_also_moves_the_head():
+    cache, _, upstream = make_cache()
+    cache.request(URL, "eth_blockNumber", [], upstream.make_request)
+    cache.request(URL, "eth_gasPrice", [], upstream.make_request)
+    upstream.head = 12
+    cache.request(URL, "eth_getBlockByNumber", ["latest", False], upstream.make_request)
+    assert cache.heads[URL] == 12
+    assert cache.request(URL, "eth_blockNumber", [], upstream.make_request)["result"] == hex(12)
+    cache.request(URL, "eth_gasPrice", [], upstream.make_request)
+    assert upstream.calls.count("eth_blockNumber") == 2
+    assert upstream.calls.count("eth_gasPrice") == 2
+
+
+def test_a_new_head_on_one_endpoint_keeps_the_other_endpoints_entries():
+    cache, _, upstream = make_cache()
+    cache.request(URL, "eth_gasPrice", [], upstream.make_request)
+    cache.request(OTHER_URL, "eth_gasPrice", [], upstream.make_request)
+    upstream.head = 11
+    cache.request(URL, "eth_getBlockByNumber", ["latest", False], upstream.make_request)
+    cache.request(OTHER_URL, "eth_gasPrice", [], upstream.make_request)
+    assert upstream.calls.count("eth_gasPrice") == 2
+
+
+def test_head_entries_expire_after_head_ttl_without_a_new_block():
+    cache, clock, upstream = make_cache(head_ttl=2)
+    cache.request(URL, "eth_gasPrice", [], upstream.make_request)
+    clock.now += 1
+    cache.request(URL, "eth_gasPrice", [], upstream.make_request)
+    assert upstream.calls.count("eth_gasPrice") == 1
+    clock.now += 1.5
+    cache.request(URL, "eth_gasPrice", [], upstream.make_request)
+    assert upstream.calls.count("eth_gasPrice") == 2
+
+
+def test_static_answers_survive_new_heads_and_ttl():
+    cache, clock, upstream = make_cache(head_ttl=2)
+    cache.request(URL, "eth_chainId", [], upstream.make_request)
+    upstream.head = 20
+    cache.request(URL, "eth_blockNumber", [], upstream.make_request)
+    clock.now += 3600
+    cache.request(URL, "eth_chainId", [], upstream.make_request)
+    assert upstream.calls.count("eth_chainId") == 1
+
+
+def test_nonce_and_historical_blocks_are_never_cached():
+    cache, _, upstream = make_cache()
+    for _ in range(2):
+        cache.request(URL, "eth_getTransactionCount", ["0xabc", "pending"], upstream.make_request)
+        cache.request(URL, "eth_getBlockByNumber", ["0x5", False], upstream.make_request)
+    assert upstream.calls.count("eth_getTransactionCount") == 2
+    assert upstream.calls.count("eth_getBlockByNumber") == 2
+    assert cache.entries == {}
+
+
+def test_error_responses_are_not_stored():
+    cache, _, upstream = make_cache()
+    failing = lambda method, params: {"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "busy"}}
+    assert "error" in cache.request(URL, "eth_gasPrice", [], failing)
+    assert cache.request(URL, "eth_gasPrice", [], upstream.make_request)["result"] == hex(10**9)
+
+
+def test_identical_concurrent_reads_share_one_upstream_request():
+    cache = ReadCache()
+    calls = []
+    release = threading.Event()
+
+    def slow(method, params):
+        calls.append(method)
+        release.wait(timeout=5)
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x3b9aca00"}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.request(URL, "eth_gasPrice", [], slow)))
+               for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.1)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == ["eth_gasPrice"]
+    assert len(results) == 20
+    assert cache.stats["eth_gasPrice"].upstream == 1
+    assert cache.stats["eth_gasPrice"].shared == 19
@@ -3,14 +3,25 @@ import json
 import os
 import time
 import random
-import logging
+import threading
 from datetime import datetime, timedelta
 from web3 import Web3
-import hashlib
-import shutil
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
 from hexbytes import HexBytes
+from wallet_registry import WalletRegistry, normalize_key
+from rate_limit import LIMITER, limited_session, limited_web3
+from read_cache import cached_web3
+from upload_pipeline import Stage, StagedPipeline, WalletPacer
+from storage_merkle import FileSegmenter, SegmentUploader
+from root_index import RootIndex, RemoteCheckLimiter
+from content_prefetch import ContentPrefetcher, SourceLimiter, TTLCache
+from proxy_pool import ProxyPool
+from waiter import WAITER, wait
+from log_pipeline import setup as setup_logging, summary as log_summary
+import memwatch
+import nonce_coordinator
+from nonce_coordinator import COORDINATOR, coordinated_web3
 
 init(autoreset=True)
 load_dotenv()
@@ -19,15 +30,8 @@ LOG_FILE = "og_uploader.log"
 MAX_LOG_SIZE = 2 * 1024 * 1024  # 2MB
 MAX_LOG_FILES = 3
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(LOG_FILE),
-        logging.StreamHandler()
-    ]
-)
-logger = logging.getLogger(__name__)
+# Log ditulis thread terpisah (antrian), rotasi file per ukuran tidak menahan upload
+logger = setup_logging(__name__, logfile=LOG_FILE, max_bytes=MAX_LOG_SIZE, backups=MAX_LOG_FILES)
 
 def banner(msg=None):
     """Menampilkan banner dengan pesan opsional"""
@@ -58,38 +62,19 @@ def section(msg=None):
     logger.info(f"{Fore.CYAN}{line}{Style.RESET_ALL}\n")
 
 def success(msg):
-    logger.info(f"{Fore.GREEN}[+] {msg}{Style.RESET_ALL}")
+    logger.info("%s[+] %s%s", Fore.GREEN, msg, Style.RESET_ALL)
 
 def loading(msg):
-    logger.info(f"{Fore.MAGENTA}[*] {msg}{Style.RESET_ALL}")
+    logger.info("%s[*] %s%s", Fore.MAGENTA, msg, Style.RESET_ALL)
 
 def step(msg):
-    logger.info(f"{Fore.CYAN}[>] {Style.BRIGHT}{msg}{Style.RESET_ALL}")
+    logger.info("%s[>] %s%s%s", Fore.CYAN, Style.BRIGHT, msg, Style.RESET_ALL)
 
 def summary(msg):
-    logger.info(f"{Fore.YELLOW}{Style.BRIGHT}[SUMMARY] {msg}{Style.RESET_ALL}")
+    logger.info("%s%s[SUMMARY] %s%s", Fore.YELLOW, Style.BRIGHT, msg, Style.RESET_ALL)
 
 def wallet(msg):
-    logger.info(f"{Fore.CYAN}[W] {msg}{Style.RESET_ALL}")
-
-def countdown(msg):
-    print(f"\r{Fore.YELLOW} [🧩] {msg}{Style.RESET_ALL}", end="")
-
-def rotate_logs():
-    """Rotasi file log untuk mencegah penggunaan disk berlebih"""
-    try:
-        if os.path.exists(LOG_FILE) and os.path.getsize(LOG_FILE) > MAX_LOG_SIZE:
-            for i in range(MAX_LOG_FILES - 1, 0, -1):
-                src = f"{LOG_FILE}.{i}" if i > 0 else LOG_FILE
-                dst = f"{LOG_FILE}.{i+1}"
-                if os.path.exists(src):
-                    if os.path.exists(dst):
-                        os.remove(dst)
-                    shutil.move(src, dst)
-            open(LOG_FILE, 'w').close()
-            logger.info("File log dirotasi")
-    except Exception as e:
-        logger.error(f"Error saat merotasi log: {e}")
+    logger.info("%s[W] %s%s", Fore.CYAN, msg, Style.RESET_ALL)
 
 def clean_old_data_files(days=1):
     """Membersihkan file data yang lebih lama dari jumlah hari tertentu"""
@@ -120,22 +105,32 @@ PROXY_FILE = 'proxies.txt'
 INDEXER_URL = 'https://indexer-storage-testnet-turbo.0g.ai'
 EXPLORER_URL = 'https://chainscan-galileo.0g.ai/tx/'
 
+MAX_UPLOAD_RETRIES = 5
+TX_TIMEOUT_SECONDS = 101
+UPLOAD_PACING_SECONDS = 300  # jeda 5 menit antar upload per wallet
+DEFAULT_STAGE_WORKERS = {'fetch': 2, 'hash': 1, 'upload': 2, 'submit': 2, 'confirm': 4}
+
 IMAGE_SOURCES = [
-    {'url': 'https://picsum.photos/800/600', 'response_type': 'content'},
-    {'url': 'https://loremflickr.com/800/600', 'response_type': 'content'}
+    {'url': 'https://picsum.photos/800/600', 'response_type': 'content', 'min_interval': 1.0},
+    {'url': 'https://loremflickr.com/800/600', 'response_type': 'content', 'min_interval': 2.0}
 ]
+IMAGE_LIMITERS = {source['url']: SourceLimiter(source['min_interval']) for source in IMAGE_SOURCES}
 
 private_keys = []
-current_key_index = 0
+wallets = WalletRegistry("private_keys.txt")
+root_index = None
+remote_check_limiter = None
+root_index_lock = threading.Lock()
+prefetcher = None
 proxies = []
-current_proxy_index = 0
+proxy_pool = None
 
-w3 = Web3(Web3.HTTPProvider(ZERO_G_RPC_URL))
+w3 = cached_web3(coordinated_web3(limited_web3(Web3(Web3.HTTPProvider(ZERO_G_RPC_URL)))))
 
 def load_private_keys():
     """Memuat private key dari .env dan private_keys.txt"""
-    global private_keys
-    private_keys = []
+    global private_keys, wallets
+    wallets = WalletRegistry("private_keys.txt")
     
     # Memuat dari .env
     index = 1
@@ -143,25 +138,21 @@ def load_private_keys():
         key = os.getenv(f"PRIVATE_KEY_{index}")
         if not key:
             break
-        if is_valid_private_key(key):
-            private_keys.append(key)
-        else:
+        if wallets.add(key) is None:
             logger.error(f"Format private key tidak valid pada PRIVATE_KEY_{index}")
         index += 1
     
     # Memuat dari private_keys.txt
     try:
-        with open("private_keys.txt", "r") as file:
-            keys = [line.strip() for line in file.readlines() if line.strip()]
-            for key in keys:
-                if is_valid_private_key(key):
-                    private_keys.append(key)
-                else:
-                    logger.error(f"Format private key tidak valid di private_keys.txt: {key}")
+        invalid_before = wallets.invalid
+        wallets.add_file("private_keys.txt")
+        if wallets.invalid > invalid_before:
+            logger.error(f"{wallets.invalid - invalid_before} format private key tidak valid di private_keys.txt")
     except Exception as e:
         logger.warning(f"Catatan: private_keys.txt tidak ditemukan atau tidak dapat dibaca: {e}")
 
-    private_keys = list(set(private_keys))
+    wallets.save_index()
+    private_keys = wallets.keys()
     if not private_keys:
         logger.critical("Tidak ada private key valid yang ditemukan di .env atau private_keys.txt")
         return False
@@ -171,23 +162,11 @@ def load_private_keys():
 
 def is_valid_private_key(key):
     """Memvalidasi format private key"""
-    key = key.strip()
-    if not key.startswith('0x'):
-        key = '0x' + key
-    try:
-        bytes_key = bytes.fromhex(key.replace('0x', ''))
-        return len(key) == 66 and len(bytes_key) == 32
-    except:
-        return False
-
-def get_next_private_key():
-    """Mengambil private key berikutnya"""
-    global current_key_index
-    return private_keys[current_key_index]
+    return normalize_key(key) is not None
 
 def load_proxies():
     """Memuat proxy dari proxies.txt"""
-    global proxies, current_proxy_index
+    global proxies, proxy_pool
     try:
         if os.path.exists(PROXY_FILE):
             with open(PROXY_FILE, 'r') as file:
@@ -200,19 +179,17 @@ def load_proxies():
             logger.warning(f"File proxy {PROXY_FILE} tidak ditemukan")
     except Exception as e:
         logger.error(f"Gagal memuat proxy: {e}")
-    current_proxy_index = 0
+    proxy_pool = ProxyPool(proxies, create_session)
 
-def get_next_proxy():
-    """Mengambil proxy berikutnya"""
-    global current_proxy_index
-    if not proxies:
-        return None
-    proxy = proxies[current_proxy_index]
-    current_proxy_index = (current_proxy_index + 1) % len(proxies)
-    return proxy
+def get_proxy_pool():
+    """Pool proxy aktif (koneksi langsung jika proxies.txt belum dimuat)"""
+    global proxy_pool
+    if proxy_pool is None:
+        proxy_pool = ProxyPool(proxies, create_session)
+    return proxy_pool
 
-def create_session():
-    """Membuat sesi requests dengan proxy dan header"""
+def create_session(proxy=None):
+    """Membuat sesi requests dengan proxy dan header (satu sesi per proxy di pool)"""
     session = requests.Session()
     session.headers.update({
         'User-Agent': random.choice([
@@ -222,15 +199,10 @@ def create_session():
         'accept': 'application/json, text/plain, */*',
         'Referer': 'https://storagescan-galileo.0g.ai/'
     })
-    proxy = get_next_proxy()
     if proxy:
         session.proxies = {'http': proxy, 'https': proxy}
-    return session
-
-def initialize_wallet():
-    """Inisialisasi wallet dengan private key saat ini"""
-    private_key = get_next_private_key()
-    return w3.eth.account.from_key(private_key)
+    # Indexer, sumber gambar & CoinGecko lewat token bucket per host (per proxy)
+    return limited_session(session, scope=proxy)
 
 def check_network_sync():
     """Memeriksa apakah jaringan 0G sudah tersinkronisasi"""
@@ -243,18 +215,19 @@ def check_network_sync():
         logger.error(f"Pemeriksaan sinkronisasi jaringan 0G gagal: {e}")
         return False
 
-def fetch_random_image():
-    """Mengambil gambar acak dari sumber yang ditentukan"""
+def fetch_random_image(filepath):
+    """Mengambil gambar acak dari sumber yang ditentukan, di-stream langsung ke file"""
     for source in IMAGE_SOURCES:
         try:
             logger.info(f"{Fore.YELLOW}Mengambil gambar 🖼️  dari sumber {source['url']}{Fore.RESET}")
-            session = create_session()
-            # logger.info(f"Header permintaan: {session.headers}")
-            # logger.info(f"Proxy yang digunakan: {session.proxies}")
-            response = session.get(source['url'], timeout=20)
-            response.raise_for_status()
+            IMAGE_LIMITERS[source['url']].wait()
+            with get_proxy_pool().get(source['url'], timeout=20, stream=True) as response:
+                response.raise_for_status()
+                with open(filepath, 'wb') as f:
+                    for block in response.iter_content(chunk_size=64 * 1024):
+                        f.write(block)
             success("Random gambar 📸 berhasil diambil")
-            return response.content
+            return filepath
         except Exception as e:
             logger.error(f"Error saat mengambil gambar 🖼️ dari {source['url']}: {e}")
             if source != IMAGE_SOURCES[-1]:
@@ -266,28 +239,46 @@ def check_file_exists(file_hash):
     """Memeriksa apakah hash file sudah ada di indexer"""
     try:
         loading(f"Memeriksa root hash (merkle tree) {file_hash}...")
-        session = create_session()
-        response = session.get(f"{INDEXER_URL}/file/info/{file_hash}", timeout=20)
+        response = get_proxy_pool().get(f"{INDEXER_URL}/file/info/{file_hash}", timeout=20)
         return response.json().get('exists', False)
     except Exception as e:
         logger.warning(f"Gagal memeriksa root hash (merkle tree): {e}")
         return False
 
-def prepare_image_data(image_buffer):
-    """Menyiapkan data gambar dengan hash unik"""
+def get_root_index():
+    """Index lokal root hash (bloom + set exact), dibuat saat pertama dipakai"""
+    global root_index, remote_check_limiter
+    with root_index_lock:
+        if root_index is None:
+            path = os.getenv("ROOT_INDEX_PATH") or os.path.join(os.getenv("DATA_DIR", "data_files"), "roots")
+            root_index = RootIndex(path)
+            remote_check_limiter = RemoteCheckLimiter(float(os.getenv("ROOT_CHECK_INTERVAL", "60")))
+        return root_index
+
+def is_root_taken(segmenter):
+    """Cek lokal dulu; /file/info hanya dipanggil saat miss lokal dan sesuai rate limit"""
+    index = get_root_index()
+    if segmenter.root in index:
+        return True
+    if remote_check_limiter.due() and check_file_exists(segmenter.root_hex):
+        index.add(segmenter.root)
+        return True
+    return not index.add(segmenter.root)
+
+def prepare_file_data(filepath):
+    """Menyiapkan root hash merkle unik (nonce 16 byte di akhir data, file sumber tidak diubah)"""
     MAX_HASH_ATTEMPTS = 5
     for attempt in range(1, MAX_HASH_ATTEMPTS + 1):
-        hash_input = image_buffer + os.urandom(16)
-        hash_obj = hashlib.sha256(hash_input)
-        file_hash = '0x' + hash_obj.hexdigest()
-        if not check_file_exists(file_hash):
-            success(f"Menghasilkan root hash file unik {file_hash}...")
-            return {'root': file_hash, 'data': image_buffer.hex()}
+        segmenter = FileSegmenter(filepath, suffix=os.urandom(16))
+        file_hash = segmenter.root_hex
+        if not is_root_taken(segmenter):
+            success(f"Menghasilkan root hash file unik {file_hash} ({segmenter.segment_count} segmen)...")
+            return {'root': file_hash, 'filepath': filepath, 'segmenter': segmenter}
         logger.warning(f"Root Hash {file_hash} sudah ada, mencoba lagi...")
     raise Exception(f"Gagal menghasilkan hash unik setelah {MAX_HASH_ATTEMPTS} percobaan")
 
-def fetch_crypto_prices():
-    """Mengambil data harga kripto dari CoinGecko"""
+def fetch_coingecko_markets():
+    """Mengambil snapshot harga kripto mentah dari CoinGecko"""
     api_key = os.getenv("COINGECKO_API_KEY")
     if not api_key:
         logger.warning("Tidak ada kunci API CoinGecko, melewati pengambilan harga kripto")
@@ -308,142 +299,251 @@ def fetch_crypto_prices():
             "precision": 6
         }
         headers = {"accept": "application/json", "x-cg-demo-api-key": api_key}
-        session = create_session()
-        response = session.get(url, headers=headers, params=params, timeout=20)
+        response = get_proxy_pool().get(url, headers=headers, params=params, timeout=20)
         response.raise_for_status()
-        data = response.json()
-        structured_data = {
-            'timestamp': datetime.now().isoformat(),
-            'data_source': "coingecko_prices",
-            'collection_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-            'cryptocurrencies': data
-        }
-        if data:
-            total_market_cap = sum(coin.get('market_cap', 0) for coin in data if coin.get('market_cap') is not None)
-            total_volume = sum(coin.get('total_volume', 0) for coin in data if coin.get('total_volume') is not None)
-            structured_data['market_stats'] = {
-                'total_market_cap': total_market_cap,
-                'total_24h_volume': total_volume,
-                'num_cryptocurrencies': len(data)
-            }
-        return structured_data
+        return response.json()
     except Exception as e:
         logger.error(f"Error saat mengambil data harga kripto: {e}")
         return None
 
-def save_data_to_file(data, source_name):
-    """Menyimpan data ke file di direktori data_files"""
+def fetch_crypto_prices():
+    """Data harga kripto terstruktur dari snapshot CoinGecko yang di-cache (TTL)"""
+    data = price_cache.get()
+    if data is None:
+        return None
+    structured_data = {
+        'timestamp': datetime.now().isoformat(),
+        'data_source': "coingecko_prices",
+        'collection_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'cryptocurrencies': data
+    }
+    if data:
+        total_market_cap = sum(coin.get('market_cap', 0) for coin in data if coin.get('market_cap') is not None)
+        total_volume = sum(coin.get('total_volume', 0) for coin in data if coin.get('total_volume') is not None)
+        structured_data['market_stats'] = {
+            'total_market_cap': total_market_cap,
+            'total_24h_volume': total_volume,
+            'num_cryptocurrencies': len(data)
+        }
+    return structured_data
+
+price_cache = TTLCache(fetch_coingecko_markets, ttl=int(os.getenv("PRICE_TTL_SECONDS", "300")))
+
+def data_file_path(source_name):
+    """Path file baru di direktori data_files"""
     data_dir = os.getenv("DATA_DIR", "data_files")
     os.makedirs(data_dir, exist_ok=True)
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     ext = "jpg" if source_name == "image" else "json"
-    filename = f"{source_name}_{timestamp}.{ext}"
-    filepath = os.path.join(data_dir, filename)
-    
-    if source_name == "image":
-        with open(filepath, 'wb') as f:
-            f.write(bytes.fromhex(data['data']))
-    else:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f)
-    
-    file_size_kb = os.path.getsize(filepath) / 1024
-    logger.info(f"Menyimpan data {source_name} ke {filepath} ({file_size_kb:.2f}KB)")
+    filename = f"{source_name}_{timestamp}_{os.urandom(3).hex()}.{ext}"
+    return os.path.join(data_dir, filename)
+
+def save_data_to_file(data, filepath):
+    """Menyimpan data JSON langsung ke file tanpa salinan string di memori"""
+    with open(filepath, 'w') as f:
+        json.dump(data, f)
     return filepath
 
-def upload_to_storage(data, wallet, wallet_index):
-    """Mengunggah data ke penyimpanan dan mengirim ke kontrak"""
-    MAX_RETRIES = 5
-    TIMEOUT_SECONDS = 101
-    logger.info(f"Memeriksa saldo wallet untuk {wallet.address}...")
+def check_upload_balance(wallet):
+    """Memastikan saldo wallet cukup untuk upload"""
+    logger.info("Memeriksa saldo wallet untuk %s...", wallet.address)
     balance = w3.eth.get_balance(wallet.address)
     if balance < Web3.to_wei(0.0015, 'ether'):
         raise Exception(f"Saldo tidak cukup: {Web3.from_wei(balance, 'ether')} OG")
     logger.info(f"{Fore.YELLOW}Saldo wallet: {Web3.from_wei(balance, 'ether')} OG{Fore.RESET}")
 
-    for attempt in range(1, MAX_RETRIES + 1):
+def post_segment(body):
+    """POST satu segmen (dengan proof merkle) ke indexer"""
+    response = get_proxy_pool().post(
+        f"{INDEXER_URL}/file/segment",
+        data=body,
+        headers={'content-type': 'application/json'},
+        timeout=20
+    )
+    response.raise_for_status()
+
+def upload_segment(data, wallet_index, attempt=1):
+    """Mengunggah semua segmen file ke indexer, lanjut dari progress jika sempat gagal"""
+    loading(f"Mengunggah file untuk wallet #{wallet_index + 1} -> Percobaan ke {attempt}...")
+    uploader = SegmentUploader(post_segment, parallelism=int(os.getenv("UPLOAD_SEGMENT_PARALLELISM", "4")))
+    count = uploader.upload(data['segmenter'])
+    success(f"{count} segmen root hash file berhasil di upload...")
+
+def send_storage_tx(wallet, data):
+    """Membangun, menandatangani dan mengirim transaksi ke kontrak storage"""
+    segmenter = data['segmenter']
+    # Data transaksi: panjang byte dan root merkle dari file yang diunggah
+    tx_data = (
+        HexBytes(ZERO_G_METHOD_ID) +
+        HexBytes('0000000000000000000000000000000000000000000000000000000000000020') +
+        segmenter.size.to_bytes(32, 'big') +
+        HexBytes('0000000000000000000000000000000000000000000000000000000000000060') +
+        HexBytes('0000000000000000000000000000000000000000000000000000000000000080') +
+        HexBytes('0000000000000000000000000000000000000000000000000000000000000000') +
+        HexBytes('0000000000000000000000000000000000000000000000000000000000000001') +
+        segmenter.root +
+        HexBytes('0000000000000000000000000000000000000000000000000000000000000000')
+    )
+
+    value = Web3.to_wei('0.000010001', 'ether')
+    gas_price = w3.eth.gas_price or Web3.to_wei('1.033', 'gwei')
+
+    loading("get estimasi gas bang...")
+    try:
+        gas_estimate = w3.eth.estimate_gas({
+            'to': ZERO_G_CONTRACT_ADDRESS,
+            'data': tx_data,
+            'from': wallet.address,
+            'value': value
+        })
+    except Exception as e:
+        logger.warning(f"Gagal memperkirakan gas dengan akurat, menggunakan default lebih tinggi. Error: {e}")
+        gas_estimate = 300003
+    gas_limit = int(gas_estimate * 1.1)
+    success(f"Batas limit gas tersedia: {gas_limit}")
+
+    loading("Mengirim transaksi...")
+    # Dipesan lewat koordinator: script lain dengan private_keys.txt yang sama tidak dapat nonce ini
+    nonce = COORDINATOR.next_nonce(wallet.address, lambda: w3.eth.get_transaction_count(wallet.address, 'pending'))
+    tx = {
+        'to': ZERO_G_CONTRACT_ADDRESS,
+        'data': tx_data,
+        'value': value,
+        'nonce': nonce,
+        'chainId': ZERO_G_CHAIN_ID,
+        'gasPrice': gas_price,
+        'gas': gas_limit
+    }
+    signed_tx = wallet.sign_transaction(tx)
+    try:
+        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    except Exception as e:
+        COORDINATOR.release(wallet.address, nonce, error=e)
+        raise
+    logger.info("Transaksi terkirim: %s%s", EXPLORER_URL, tx_hash.hex())
+    return tx_hash
+
+def confirm_storage_tx(tx_hash):
+    """Menunggu receipt transaksi storage"""
+    loading(f"{Fore.YELLOW}Menunggu konfirmasi {TX_TIMEOUT_SECONDS} detik...{Fore.RESET}")
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TX_TIMEOUT_SECONDS)
+    if receipt and receipt.status == 1:
+        success(f"Transaksi dikonfirmasi pada blok {receipt.blockNumber}")
+        return receipt
+    raise Exception(f"Transaksi gagal (status 0): {EXPLORER_URL}{tx_hash.hex()}")
+
+def with_retries(action, description):
+    """Menjalankan action hingga MAX_UPLOAD_RETRIES kali dengan jeda 15 detik"""
+    for attempt in range(1, MAX_UPLOAD_RETRIES + 1):
         try:
-            loading(f"Mengunggah file untuk wallet #{wallet_index + 1} -> Percobaan ke {attempt}...")
-            session = create_session()
-            response = session.post(
-                f"{INDEXER_URL}/file/segment",
-                json={
-                    'root': data['root'],
-                    'index': 0,
-                    'data': data['data'],
-                    'proof': {'siblings': [data['root']], 'path': []}
-                },
-                headers={'content-type': 'application/json'},
-                timeout=20
-            )
-            response.raise_for_status()
-            success("Segmen root hash file berhasil di upload...")
-
-            # Data transaksi
-            tx_data = (
-                HexBytes(ZERO_G_METHOD_ID) +
-                HexBytes('0000000000000000000000000000000000000000000000000000000000000020') +
-                HexBytes('0000000000000000000000000000000000000000000000000000000000000014') +
-                HexBytes('0000000000000000000000000000000000000000000000000000000000000060') +
-                HexBytes('0000000000000000000000000000000000000000000000000000000000000080') +
-                HexBytes('0000000000000000000000000000000000000000000000000000000000000000') +
-                HexBytes('0000000000000000000000000000000000000000000000000000000000000001') +
-                os.urandom(32) +
-                HexBytes('0000000000000000000000000000000000000000000000000000000000000000')
-            )
-
-            value = Web3.to_wei('0.000010001', 'ether')
-            gas_price = w3.eth.gas_price or Web3.to_wei('1.033', 'gwei')
-
-            loading("get estimasi gas bang...")
-            try:
-                gas_estimate = w3.eth.estimate_gas({
-                    'to': ZERO_G_CONTRACT_ADDRESS,
-                    'data': tx_data,
-                    'from': wallet.address,
-                    'value': value
-                })
-            except Exception as e:
-                logger.warning(f"Gagal memperkirakan gas dengan akurat, menggunakan default lebih tinggi. Error: {e}")
-                gas_estimate = 300003
-            gas_limit = int(gas_estimate * 1.1)
-            success(f"Batas limit gas tersedia: {gas_limit}")
-
-            loading("Mengirim transaksi...")
-            nonce = w3.eth.get_transaction_count(wallet.address, 'latest')
-            tx = {
-                'to': ZERO_G_CONTRACT_ADDRESS,
-                'data': tx_data,
-                'value': value,
-                'nonce': nonce,
-                'chainId': ZERO_G_CHAIN_ID,
-                'gasPrice': gas_price,
-                'gas': gas_limit
-            }
-            signed_tx = wallet.sign_transaction(tx)
-            tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            logger.info(f"Transaksi terkirim: {EXPLORER_URL}{tx_hash.hex()}")
-
-            loading(f"{Fore.YELLOW}Menunggu konfirmasi {TIMEOUT_SECONDS} detik...{Fore.RESET}")
-            receipt = w3.eth.wait_for_transaction_receipt(tx_hash, timeout=TIMEOUT_SECONDS)
-            if receipt and receipt.status == 1:
-                success(f"Transaksi dikonfirmasi pada blok {receipt.blockNumber}")
-                return receipt
-            else:
-                raise Exception(f"Transaksi gagal (status 0): {EXPLORER_URL}{tx_hash.hex()}")
+            return action(attempt)
         except Exception as e:
-            logger.error(f"Percobaan upload {attempt} gagal: {e}")
+            logger.error("Percobaan %s %s gagal: %s", description, attempt, e)
             if hasattr(e, 'receipt') and e.receipt:
-                logger.error(f"Status Receipt Transaksi: {e.receipt.status}")
-                logger.error(f"Hash Transaksi: {e.receipt.transactionHash.hex()}")
-            if attempt < MAX_RETRIES:
-                countdown_delay(15, "Mencoba lagi dalam")
+                logger.error("Status Receipt Transaksi: %s", e.receipt.status)
+                logger.error("Hash Transaksi: %s", e.receipt.transactionHash.hex())
+            if attempt < MAX_UPLOAD_RETRIES:
+                time.sleep(15)
             else:
                 raise
-    return None
+
+def upload_to_storage(data, wallet, wallet_index):
+    """Mengunggah data ke penyimpanan dan mengirim ke kontrak"""
+    check_upload_balance(wallet)
+    with_retries(lambda attempt: upload_segment(data, wallet_index, attempt), "upload")
+    tx_hash = with_retries(lambda attempt: send_storage_tx(wallet, data), "kirim transaksi")
+    return confirm_storage_tx(tx_hash)
+
+# ================= Staged upload pipeline ===================
+def prefetch_content():
+    """Ambil satu konten (gambar atau JSON harga kripto) langsung ke file, dipanggil oleh prefetcher"""
+    data_type = "image" if random.choice(["image", "json"]) == "image" else "crypto_prices"
+    filepath = data_file_path(data_type)
+    try:
+        if data_type == "image":
+            fetch_random_image(filepath)
+        else:
+            crypto_data = fetch_crypto_prices()
+            if not crypto_data:
+                raise Exception("Gagal mengambil harga kripto")
+            save_data_to_file(crypto_data, filepath)
+    except Exception:
+        if os.path.exists(filepath):
+            os.remove(filepath)
+        raise
+    file_size_kb = os.path.getsize(filepath) / 1024
+    logger.info("Menyimpan data %s ke %s (%.2fKB)", data_type, filepath, file_size_kb)
+    return {'data_type': data_type, 'filepath': filepath}
+
+def build_prefetcher():
+    return ContentPrefetcher(
+        prefetch_content,
+        capacity=int(os.getenv("PREFETCH_CAPACITY", "8")),
+        workers=int(os.getenv("PREFETCH_WORKERS", "2")),
+        take_timeout=float(os.getenv("PREFETCH_TAKE_TIMEOUT", "120")),
+        on_error=lambda error: logger.warning(f"Prefetch konten gagal: {error}")
+    )
+
+def stage_fetch(job):
+    """Stage 1: ambil konten siap-upload dari ring prefetch"""
+    job.update(prefetcher.take())
+    return job
+
+def stage_hash(job):
+    """Stage 2: hitung root hash merkle unik dari file (mmap)"""
+    job['data'] = prepare_file_data(job['filepath'])
+    return job
+
+def stage_upload(job):
+    """Stage 3: cek saldo lalu upload segmen ke indexer"""
+    wallet = wallets.account(job['wallet_index'])
+    check_upload_balance(wallet)
+    with_retries(lambda attempt: upload_segment(job['data'], job['wallet_index'], attempt), "upload")
+    return job
+
+def stage_submit(job):
+    """Stage 4: kirim transaksi storage"""
+    wallet = wallets.account(job['wallet_index'])
+    job['tx_hash'] = with_retries(lambda attempt: send_storage_tx(wallet, job['data']), "kirim transaksi")
+    return job
+
+def stage_confirm(job):
+    """Stage 5: tunggu konfirmasi lalu hapus file sementara"""
+    job['receipt'] = confirm_storage_tx(job['tx_hash'])
+    remove_job_file(job)
+    return job
+
+def remove_job_file(job):
+    filepath = job.get('filepath')
+    for path in (filepath, f"{filepath}.segments.json"):
+        if filepath and os.path.exists(path):
+            logger.info("Menghapus file yang diunggah: %s", path)
+            os.remove(path)
+
+def parse_stage_workers(spec):
+    """Parse 'fetch=2,upload=2' menjadi dict jumlah worker per stage"""
+    workers = dict(DEFAULT_STAGE_WORKERS)
+    for item in spec.split(","):
+        if "=" in item:
+            name, count = item.split("=", 1)
+            if name.strip() in workers and count.strip().isdigit():
+                workers[name.strip()] = int(count)
+    return workers
+
+def build_upload_pipeline(on_done, on_error):
+    workers = parse_stage_workers(os.getenv("UPLOAD_STAGE_WORKERS", ""))
+    queue_size = int(os.getenv("UPLOAD_QUEUE_SIZE", "4"))
+    stages = [
+        Stage("fetch", stage_fetch, workers["fetch"], queue_size),
+        Stage("hash", stage_hash, workers["hash"], queue_size),
+        Stage("upload", stage_upload, workers["upload"], queue_size),
+        Stage("submit", stage_submit, workers["submit"], queue_size),
+        Stage("confirm", stage_confirm, workers["confirm"], queue_size),
+    ]
+    return StagedPipeline(stages, on_done=on_done, on_error=on_error)
 
 def run_uploads(count_per_wallet):
-    """Menjalankan upload untuk semua wallet"""
+    """Menjalankan upload untuk semua wallet lewat pipeline bertahap"""
     banner("0G Storage Uploader")
     if not load_private_keys():
         return
@@ -458,75 +558,70 @@ def run_uploads(count_per_wallet):
         raise Exception("Jaringan 0G tidak tersinkronisasi")
 
     step("Wallet yang Tersedia:")
-    for i, key in enumerate(private_keys, 1):
-        wallet = w3.eth.account.from_key(key)
-        logger.info(f"[{i}] {wallet.address}")
+    for entry in wallets:
+        logger.info(f"[{entry.index + 1}] {entry.address}")
 
     total_uploads = count_per_wallet * len(private_keys)
     logger.info(f"Memulai {total_uploads} upload ({count_per_wallet} per wallet)")
-    successful = 0
-    failed = 0
-
-    global current_key_index
-    for wallet_index in range(len(private_keys)):
-        current_key_index = wallet_index
-        wallet = initialize_wallet()
-        section(f"Memproses Wallet {Fore.MAGENTA}#{wallet_index + 1} [{wallet.address}]{Fore.RESET}")
-
-        for i in range(1, count_per_wallet + 1):
-            upload_number = (wallet_index * count_per_wallet) + i
-            step(f"Upload {upload_number}/{total_uploads}")
-            try:
-                # Pilih data secara acak (50:50 gambar atau JSON)
-                data_choice = random.choice(["image", "json"])
-                if data_choice == "image":
-                    data_type = "image"
-                    image_buffer = fetch_random_image()
-                    data = prepare_image_data(image_buffer)
-                    filepath = save_data_to_file(data, data_type)
-                else:
-                    data_type = "crypto_prices"
-                    crypto_data = fetch_crypto_prices()
-                    if not crypto_data:
-                        raise Exception("Gagal mengambil harga kripto")
-                    filepath = save_data_to_file(crypto_data, data_type)
-                    data = prepare_image_data(json.dumps(crypto_data).encode())
-
-                receipt = upload_to_storage(data, wallet, wallet_index)
-                successful += 1
-                success(f"Upload file {upload_number} selesai")
-                if os.path.exists(filepath):
-                    logger.info(f"Menghapus file yang diunggah: {filepath}")
-                    os.remove(filepath)
-                if upload_number < total_uploads:
-                    countdown_delay(300, "Menunggu upload berikutnya dalam")  # Jeda 5 menit
-            except Exception as e:
-                failed += 1
-                logger.error(f"Upload {upload_number} gagal: {e}")
-                countdown_delay(300, "Melanjutkan setelah error dalam")  # Jeda 5 menit
-        if wallet_index < len(private_keys) - 1:
-            countdown_delay(300, "Beralih ke wallet berikutnya dalam")  # Jeda 5 menit
+    results = {'successful': 0, 'failed': 0}
+    results_lock = threading.Lock()
+    pacer = WalletPacer(len(private_keys), count_per_wallet)
+
+    def on_done(job):
+        with results_lock:
+            results['successful'] += 1
+        success(f"Upload file {job['upload_number']} wallet #{job['wallet_index'] + 1} selesai")
+        pacer.finished(job['wallet_index'], UPLOAD_PACING_SECONDS)
+
+    def on_error(job, stage_name, error):
+        with results_lock:
+            results['failed'] += 1
+        logger.error(f"Upload {job['upload_number']} gagal di stage {stage_name}: {error}")
+        remove_job_file(job)
+        pacer.finished(job['wallet_index'], UPLOAD_PACING_SECONDS)
+
+    global prefetcher
+    prefetcher = build_prefetcher()
+    prefetcher.start()
+    pipeline = build_upload_pipeline(on_done, on_error)
+    pipeline.start()
+    upload_number = 0
+    while True:
+        wallet_index = pacer.next_wallet()
+        if wallet_index is None:
+            break
+        upload_number += 1
+        step(f"Upload {upload_number}/{total_uploads} -> wallet #{wallet_index + 1} [{wallets.address(wallet_index)}]")
+        pipeline.submit({'wallet_index': wallet_index, 'upload_number': upload_number})
+    pipeline.close()
+    prefetcher.stop()
 
     section("Ringkasan upload")
     summary(f"Total wallet: {len(private_keys)}")
     summary(f"Total mencoba: {total_uploads}")
-    if successful > 0:
-        success(f"Berhasil: {successful}")
-    if failed > 0:
-        logger.error(f"Gagal: {failed}")
+    if results['successful'] > 0:
+        success(f"Berhasil: {results['successful']}")
+    if results['failed'] > 0:
+        logger.error(f"Gagal: {results['failed']}")
+    for line in pipeline.report():
+        summary(line)
+    summary(f"Proxy: {get_proxy_pool().summary()}")
+    summary(f"Rate limit: {LIMITER.summary()}")
+    summary(f"Log: {log_summary()}")
+    summary(f"Nonce: {nonce_coordinator.summary()}")
 
 def countdown_delay(duration_in_seconds, message):
-    """Menampilkan hitungan mundur untuk jeda"""
-    for i in range(duration_in_seconds, 0, -1):
+    """Jeda dengan hitungan mundur; False jika dihentikan (SIGTERM)"""
+    def render(remaining, elapsed, total):
+        i = int(remaining)
         hours = i // 3600
         minutes = (i % 3600) // 60
         seconds = i % 60
         time_string = f"{hours}j " if hours > 0 else ""
         time_string += f"{minutes}m " if minutes > 0 else ""
         time_string += f"{seconds}d"
-        countdown(f"{message} {time_string}")
-        time.sleep(1)
-    print()
+        return f"{Fore.YELLOW} [🧩] {message} {time_string}{Style.RESET_ALL}"
+    return wait(duration_in_seconds, render)
 
 def main():
     """Fungsi utama untuk memulai uploader"""
@@ -534,6 +629,14 @@ def main():
     def get_random_upload_count():
         return random.randint(10, 25)  # random upload per wallet
 
+    logger.info(f"Memory watchdog: {memwatch.start()}")
+    logger.info(f"Nonce coordinator: {nonce_coordinator.start()}")
+    # Setelah restart karena memori, lanjutkan sisa jeda siklus sebelumnya
+    state = memwatch.restore()
+    if state and state.get("next_run_at", 0) > time.time():
+        if not countdown_delay(state["next_run_at"] - time.time(), "Melanjutkan jeda siklus setelah restart memori"):
+            return
+
     while True:
         try:
             upload_count = get_random_upload_count()
@@ -542,12 +645,17 @@ def main():
             logger.info("Siklus uploader 0G selesai.")
             next_run_time = datetime.now() + timedelta(seconds=twenty_four_hours_in_seconds)
             logger.info(f"Siklus berikutnya akan dimulai pada {next_run_time.strftime('%d/%m/%Y %H:%M:%S')}")
-            countdown_delay(twenty_four_hours_in_seconds, "Menunggu siklus berikutnya dalam")
+            memwatch.checkpoint({"next_run_at": next_run_time.timestamp()}, "siklus upload")
+            if not countdown_delay(twenty_four_hours_in_seconds, "Menunggu siklus berikutnya dalam"):
+                break
         except Exception as e:
             logger.critical(f"Terjadi error selama siklus uploader: {e}")
-            countdown_delay(300, "Mencoba lagi setelah error dalam")  # Jeda 5 menit sebelum coba lagi
+            if not countdown_delay(300, "Mencoba lagi setelah error dalam"):  # Jeda 5 menit sebelum coba lagi
+                break
+    logger.info(f"{Fore.YELLOW}Uploader dihentikan{Style.RESET_ALL}")
 
 if __name__ == "__main__":
+    WAITER.install_signal_handlers()
     try:
         main()
     except KeyboardInterrupt:
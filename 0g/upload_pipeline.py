@@ -0,0 +1,214 @@
+import heapq
+import queue
+import threading
+import time
+
+# ======================== Constants ========================
+STOP = object()  # sentinel that shuts a stage down
+DEPTH_SAMPLE_INTERVAL = 1.0  # detik
+
+
+# ======================== Stage ========================
+class Stage:
+    """One pipeline step: a bounded input queue served by its own worker threads"""
+
+    def __init__(self, name, func, workers=1, maxsize=4):
+        self.name = name
+        self.func = func
+        self.workers = max(1, int(workers))
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.threads = []
+        self.processed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.depth_max = 0
+        self.lock = threading.Lock()
+
+    def sample_depth(self):
+        depth = self.queue.qsize()
+        with self.lock:
+            self.depth_samples += 1
+            self.depth_total += depth
+            self.depth_max = max(self.depth_max, depth)
+
+    def stats(self):
+        with self.lock:
+            mean_depth = self.depth_total / self.depth_samples if self.depth_samples else 0.0
+            return {
+                "workers": self.workers,
+                "processed": self.processed,
+                "failed": self.failed,
+                "busy_seconds": self.busy_seconds,
+                "queue_mean": mean_depth,
+                "queue_max": self.depth_max,
+            }
+
+
+# ======================== Pipeline ========================
+class StagedPipeline:
+    """Chain of stages connected by bounded queues.
+
+    Every stage function takes a job and returns it (optionally mutated) for the next
+    stage. A raised exception drops the job and is reported through ``on_error``;
+    jobs that leave the last stage are reported through ``on_done``.
+    """
+
+    def __init__(self, stages, on_done=None, on_error=None, sample_interval=DEPTH_SAMPLE_INTERVAL):
+        self.stages = stages
+        self.sample_interval = sample_interval
+        self.on_done = on_done or (lambda job: None)
+        self.on_error = on_error or (lambda job, stage, error: None)
+        self.started_at = None
+        self.finished_at = None
+        self.completed = 0
+        self._sampler = None
+        self._stop_sampling = threading.Event()
+
+    def start(self):
+        self.started_at = time.monotonic()
+        for index, stage in enumerate(self.stages):
+            next_stage = self.stages[index + 1] if index + 1 < len(self.stages) else None
+            for n in range(stage.workers):
+                thread = threading.Thread(
+                    target=self._work, args=(stage, next_stage),
+                    name=f"{stage.name}-{n + 1}", daemon=True)
+                thread.start()
+                stage.threads.append(thread)
+        self._sampler = threading.Thread(target=self._sample, name="queue-sampler", daemon=True)
+        self._sampler.start()
+
+    def submit(self, job):
+        """Feed a job into the first stage, blocks while that queue is full"""
+        self.stages[0].queue.put(job)
+
+    def close(self):
+        """Drain every stage in order and stop all workers"""
+        for stage in self.stages:
+            for _ in stage.threads:
+                stage.queue.put(STOP)
+            for thread in stage.threads:
+                thread.join()
+        self._stop_sampling.set()
+        if self._sampler:
+            self._sampler.join()
+        self.finished_at = time.monotonic()
+
+    def _work(self, stage, next_stage):
+        while True:
+            job = stage.queue.get()
+            if job is STOP:
+                return
+            started = time.monotonic()
+            try:
+                job = stage.func(job)
+            except Exception as e:
+                with stage.lock:
+                    stage.failed += 1
+                    stage.busy_seconds += time.monotonic() - started
+                self.on_error(job, stage.name, e)
+                continue
+            with stage.lock:
+                stage.processed += 1
+                stage.busy_seconds += time.monotonic() - started
+            if next_stage is not None:
+                next_stage.queue.put(job)
+            else:
+                with stage.lock:
+                    self.completed += 1
+                self.on_done(job)
+
+    def _sample(self):
+        while not self._stop_sampling.wait(self.sample_interval):
+            for stage in self.stages:
+                stage.sample_depth()
+
+    def uploads_per_hour(self):
+        end = self.finished_at or time.monotonic()
+        elapsed = end - (self.started_at or end)
+        return self.completed * 3600 / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        """Per-stage lines plus overall throughput, ready for logging"""
+        lines = [f"Throughput: {self.uploads_per_hour():.1f} upload/jam ({self.completed} selesai)"]
+        for stage in self.stages:
+            s = stage.stats()
+            lines.append(
+                f"{stage.name:<8} workers={s['workers']} ok={s['processed']} gagal={s['failed']} "
+                f"queue avg={s['queue_mean']:.2f} max={s['queue_max']} busy={s['busy_seconds']:.0f}s")
+        return lines
+
+
+# ======================== Wallet Pacing ========================
+class WalletPacer:
+    """Releases at most one job per wallet, each after that wallet's previous job plus its delay"""
+
+    def __init__(self, wallet_count, jobs_per_wallet):
+        self.remaining = {index: jobs_per_wallet for index in range(wallet_count)}
+        self.in_flight = 0
+        self.heap = [(0.0, index) for index in range(wallet_count) if jobs_per_wallet > 0]
+        heapq.heapify(self.heap)
+        self.cond = threading.Condition()
+
+    def next_wallet(self, clock=time.monotonic):
+        """Block until some wallet may start its next job, None when all are done"""
+        with self.cond:
+            while True:
+                if self.heap:
+                    ready_at, index = self.heap[0]
+                    wait = ready_at - clock()
+                    if wait <= 0:
+                        heapq.heappop(self.heap)
+                        self.remaining[index] -= 1
+                        self.in_flight += 1
+                        return index
+                    self.cond.wait(wait)
+                elif self.in_flight:
+                    self.cond.wait()
+                else:
+                    return None
+
+    def finished(self, index, delay, clock=time.monotonic):
+        """Mark a wallet's job as done; it becomes ready again after `delay` seconds"""
+        with self.cond:
+            self.in_flight -= 1
+            if self.remaining[index] > 0:
+                heapq.heappush(self.heap, (clock() + delay, index))
+            self.cond.notify_all()
+
+
+# ======================== Benchmark ========================
+def benchmark(wallets=20, uploads=3, pacing=3.0, scale=0.01):
+    """Sequential vs pipelined run with simulated stage latencies (seconds * scale)"""
+    latencies = {"fetch": 1.5, "hash": 0.05, "upload": 2.0, "submit": 0.8, "confirm": 10.0}
+    workers = {"fetch": 4, "hash": 1, "upload": 4, "submit": 2, "confirm": 8}
+
+    def fake(name):
+        def run(job):
+            time.sleep(latencies[name] * scale)
+            return job
+        return run
+
+    total = wallets * uploads
+    sequential = sum(latencies.values()) * scale * total + pacing * scale * (total - 1)
+    print(f"Sequential (estimated): {total * 3600 * scale / sequential:.1f} upload/jam")
+
+    stages = [Stage(name, fake(name), workers[name], maxsize=8) for name in latencies]
+    pacer = WalletPacer(wallets, uploads)
+    pipeline = StagedPipeline(stages, on_done=lambda job: pacer.finished(job, pacing * scale),
+                              sample_interval=scale)
+    pipeline.start()
+    while True:
+        index = pacer.next_wallet()
+        if index is None:
+            break
+        pipeline.submit(index)
+    pipeline.close()
+    print(f"Pipelined: {pipeline.uploads_per_hour() * scale:.1f} upload/jam")
+    for line in pipeline.report()[1:]:
+        print(line)
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -4,11 +4,22 @@ import json
 import os
 import time
 import datetime
-import logging
 import random
 from pathlib import Path
 from colorama import Fore, Style, init
 from dotenv import load_dotenv
+from wallet_registry import WalletRegistry, normalize_key
+from rate_limit import LIMITER, limited_web3
+from read_cache import CACHE, cached_web3, is_connected as rpc_connected
+import metrics
+import tracing
+import log_pipeline
+import memwatch
+import startup
+import nonce_coordinator
+from metrics import metered_web3
+from broadcaster import RawTxBroadcaster
+from nonce_coordinator import COORDINATOR, coordinated_web3
 
 init(autoreset=True)
 load_dotenv()
@@ -31,6 +42,9 @@ CONFIG = {
     "CYCLE_COMPLETE_DELAY": (200, 300), # Long delay all wallets use seconsd
     "RPC_TIMEOUT": 15,  # detik
     "RPC_RETRY_DELAY": 8,  # detik
+    "RPC_RATE_LIMIT": float(os.getenv("RPC_RATE_LIMIT", "10")),  # req/detik awal per RPC, lalu dipelajari dari 429
+    "READ_CACHE_TTL": float(os.getenv("READ_CACHE_TTL", "2")),  # detik maksimal gas price/latest block dipakai ulang tanpa block baru
+    "BROADCAST_FANOUT": int(os.getenv("BROADCAST_FANOUT", "3")),  # RPC per raw tx
 }
 
 # ======================== Chain Symbol ========================
@@ -67,11 +81,7 @@ ABI = [
 ]
 
 # ======================== Info Logging ========================
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%H:%M:%S",)
-logger = logging.getLogger("VoteDapps")
+logger = log_pipeline.setup("VoteDapps")
 
 def log_info(message):
     logger.info(message)
@@ -93,6 +103,7 @@ def short_address(address):
     return f"{address[:6]}...{address[-4:]}" if address else "Unknown address"
 
 
+@tracing.traced("sleep", tracing.KIND_SLEEP)
 def sleep_seconds(seconds, message=None):
     if message:
         print(f"9️⃣ {Fore.GREEN}{message} in {seconds} seconds...{Style.RESET_ALL}")
@@ -151,15 +162,35 @@ def is_connected(web3):
 class VoteScheduler:
     def __init__(self):
         self.accounts = []
+        self.wallets = None
         self.gas_price = None
         self.web3 = None
         self.contract = None
         self.cycle_count = 1
         self.current_rpc_index = 0
         self.rpc_last_error_time = {}
+        self.broadcaster = None
 
     def initialize(self):
+        LIMITER.configure(rate=CONFIG["RPC_RATE_LIMIT"])
+        CACHE.configure(head_ttl=CONFIG["READ_CACHE_TTL"])
+        exporter = metrics.start()
+        if exporter:
+            print(f"📈 Metrics exported at {exporter}")
+        trace_file = tracing.start()
+        if trace_file:
+            print(f"🧵 Tracing spans to {trace_file} (python tracing.py report {trace_file})")
+        print(f"🧠 Memory watchdog: {memwatch.start()}")
+        state = memwatch.restore()
+        if state:
+            self.cycle_count = state.get("cycle_count", self.cycle_count)
+            print(f"♻️ Restored after memory restart, continuing at cycle {self.cycle_count}")
+        print(f"🔐 Nonce coordinator: {nonce_coordinator.start()}")
         CONFIG["RPC_URLS"] = validate_rpc_urls(CONFIG["RPC_URLS"])
+        self.broadcaster = RawTxBroadcaster(
+            CONFIG["RPC_URLS"],
+            lambda url: limited_web3(metered_web3(Web3(Web3.HTTPProvider(url, request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]})))).eth,
+            fanout=CONFIG["BROADCAST_FANOUT"])
         self.connect_to_rpc()
         self.load_accounts()
         self.update_gas_price()
@@ -169,10 +200,13 @@ class VoteScheduler:
         for i, rpc_url in enumerate(CONFIG["RPC_URLS"]):
             try:
                 self.current_rpc_index = i
-                w3 = Web3(Web3.HTTPProvider(rpc_url.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))
-                if w3.is_connected():
+                w3 = cached_web3(coordinated_web3(limited_web3(metered_web3(Web3(Web3.HTTPProvider(rpc_url.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))))))
+                if rpc_connected(w3):
                     chain_id = w3.eth.chain_id
                     print(f"🌐 Connected to the RPC: {rpc_url}")
+                    first_rpc = startup.mark()
+                    if first_rpc:
+                        print(first_rpc)
                     print(f"📡 Chain ID: {chain_id} - {CHAIN_SYMBOLS.get(chain_id, 'Unknown')}")
                     self.web3 = w3
                     self.contract = self.web3.eth.contract(address=CONFIG["CONTRACT_ADDRESS"], abi=ABI)
@@ -205,14 +239,15 @@ class VoteScheduler:
             sleep_seconds(CONFIG["RPC_RETRY_DELAY"], "Menunggu sebelum mencoba ulang RPC yg sama bang")
             return False
         
-        # random RPC
-        self.current_rpc_index, new_rpc = random.choice(available_rpcs)
+        # RPC yang paling cepat bisa dilayani token bucket-nya
+        new_rpc = LIMITER.pick(url for _, url in available_rpcs)
+        self.current_rpc_index = CONFIG["RPC_URLS"].index(new_rpc)
         
         print(f"🔄 Switch to old RPC {Fore.RED} {old_rpc} {Fore.RESET} --> {Fore.GREEN} {new_rpc} {Style.RESET_ALL}")
         
         try:
-            self.web3 = Web3(Web3.HTTPProvider(new_rpc.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))
-            if self.web3.is_connected():
+            self.web3 = cached_web3(coordinated_web3(limited_web3(metered_web3(Web3(Web3.HTTPProvider(new_rpc.strip(), request_kwargs={'timeout': CONFIG["RPC_TIMEOUT"]}))))))
+            if rpc_connected(self.web3):
                 self.contract = self.web3.eth.contract(address=CONFIG["CONTRACT_ADDRESS"], abi=ABI)
                 print(f"✅ Successfully switched to RPC: {new_rpc}")
                 self.rpc_last_error_time[new_rpc] = 0
@@ -227,64 +262,45 @@ class VoteScheduler:
 
     def is_valid_private_key(self, key):
         """Validate a private key format and return standardized key"""
-        try:
-            if not key or key.startswith("#"):
-                return None
-
-            # Standardize key format (add 0x if missing)
-            if not key.startswith("0x"):
-                key = "0x" + key
-
-            if len(key) != 66:
-                return None
-
-            self.web3.eth.account.from_key(key)
-            return key
-        except Exception:
-            return None
+        raw = normalize_key(key)
+        return "0x" + raw.hex() if raw else None
 
     def load_accounts(self):
-        accounts = []
+        registry = WalletRegistry(CONFIG["PRIVATE_KEY_FILE"])
 
         # Try loading from .env
         if os.path.exists(CONFIG["ENV_FILE"]):
             try:
                 load_dotenv(CONFIG["ENV_FILE"])
                 private_key = os.getenv("PRIVATE_KEY")
-                if private_key:
-                    valid_key = self.is_valid_private_key(private_key)
-                    if valid_key:
-                        account = self.web3.eth.account.from_key(valid_key)
-                        accounts.append({"key": valid_key, "address": account.address})
-                        print(f"3️⃣ Attempting to load wallet... {Fore.GREEN}Status: OK gas Bang!!!{Style.RESET_ALL}")
-                        print(f"4️⃣ Wallet loaded successfully -> EVM Address: {account.address}")
+                if private_key and registry.add(private_key) is not None:
+                    print(f"3️⃣ Attempting to load wallet... {Fore.GREEN}Status: OK gas Bang!!!{Style.RESET_ALL}")
+                    print(f"4️⃣ Wallet loaded successfully -> EVM Address: {registry.address(0)}")
             except Exception as e:
                 log_error(f"Error loading from .env: {str(e)}")
 
         # Then try loading from private_keys.txt
         if os.path.exists(CONFIG["PRIVATE_KEY_FILE"]):
             try:
-                with open(CONFIG["PRIVATE_KEY_FILE"], "r") as file:
-                    keys = [line.strip() for line in file.readlines()]
-                    for key in keys:
-                        valid_key = self.is_valid_private_key(key)
-                        if valid_key:
-                            account = self.web3.eth.account.from_key(valid_key)
-                            if not any(acc["address"] == account.address for acc in accounts):
-                                accounts.append({"key": valid_key, "address": account.address})
-                                print(f"3️⃣ Attempting to load wallet... {Fore.GREEN}Status: OK gas Bang!!!{Style.RESET_ALL}")
-                                print(f"4️⃣ Wallet loaded successfully -> EVM Address: {account.address}")
-                        else:
-                            print(f"3️⃣ Attempting to load wallet... {Fore.RED}Status: FAILED{Style.RESET_ALL}")
-                            print("Invalid key format or length")
+                loaded_before = len(registry)
+                invalid_before = registry.invalid
+                registry.add_file(CONFIG["PRIVATE_KEY_FILE"])
+                for index in range(loaded_before, len(registry)):
+                    print(f"3️⃣ Attempting to load wallet... {Fore.GREEN}Status: OK gas Bang!!!{Style.RESET_ALL}")
+                    print(f"4️⃣ Wallet loaded successfully -> EVM Address: {registry.address(index)}")
+                for _ in range(registry.invalid - invalid_before):
+                    print(f"3️⃣ Attempting to load wallet... {Fore.RED}Status: FAILED{Style.RESET_ALL}")
+                    print("Invalid key format or length")
             except Exception as e:
                 log_error(f"Error loading private keys: {str(e)}")
 
-        if not accounts:
+        if not len(registry):
             log_error("No valid private keys found in either .env or private_keys.txt")
             exit(1)
 
-        self.accounts = accounts
+        registry.save_index()
+        self.wallets = registry
+        self.accounts = registry.as_dicts()
         print(f"🔄 Successfully loaded {Fore.GREEN}{len(self.accounts)} accounts{Fore.RESET}")
 
     def get_eip1559_gas_params(self):
@@ -367,6 +383,7 @@ class VoteScheduler:
             # Fallback to legacy
             self.gas_price = self.get_legacy_gas_price()
 
+    @tracing.traced("balance")
     def get_wallet_balance(self, address):
         try:
             chain_id = self.web3.eth.chain_id
@@ -386,6 +403,7 @@ class VoteScheduler:
             log_error(f"Error getting balance: {str(e)}")
             return 0
 
+    @tracing.traced("estimate_gas")
     def estimate_gas(self, sender):
         try:
             estimate_gas = self.contract.functions.Vote().estimate_gas({"from": sender})
@@ -395,9 +413,11 @@ class VoteScheduler:
             print(f"⚠️ Gas estimation failed: {str(e)}. Using safe default.")
             return CONFIG["GAS_LIMIT"]
             
+    @tracing.traced("build")
     def build_transaction(self, sender):
         try:
-            nonce = self.web3.eth.get_transaction_count(sender, "pending")
+            # Reserved through the coordinator: other scripts on private_keys.txt never get the same nonce
+            nonce = COORDINATOR.next_nonce(sender, lambda: self.web3.eth.get_transaction_count(sender, "pending"))
             gas_limit = self.estimate_gas(sender)
             print(f"🚀 Estimated gas usage: {Fore.MAGENTA}{gas_limit}{Fore.RESET}")
 
@@ -445,7 +465,8 @@ class VoteScheduler:
             if self.switch_rpc():
                 return tx, True
             else:
-                time.sleep(CONFIG["COOLDOWN"]["ERROR"][0])
+                with tracing.span("retry_cooldown", tracing.KIND_SLEEP):
+                    time.sleep(CONFIG["COOLDOWN"]["ERROR"][0])
                 return tx, True
 
         if "insufficient funds" in error_message.lower():
@@ -454,7 +475,8 @@ class VoteScheduler:
 
         elif "nonce too low" in error_message.lower():
             try:
-                new_nonce = self.web3.eth.get_transaction_count(tx["from"], "pending")
+                new_nonce = COORDINATOR.resync(
+                    tx["from"], tx["nonce"], lambda: self.web3.eth.get_transaction_count(tx["from"], "pending"))
                 tx["nonce"] = new_nonce
                 print(f"Updated nonce to {new_nonce}")
                 return tx, True
@@ -473,7 +495,8 @@ class VoteScheduler:
                 return tx, True
             else:
                 # If can't switch RPC, wait longer and retry with higher gas
-                time.sleep(CONFIG["COOLDOWN"]["ERROR"][0])
+                with tracing.span("retry_cooldown", tracing.KIND_SLEEP):
+                    time.sleep(CONFIG["COOLDOWN"]["ERROR"][0])
                 if isinstance(self.gas_price, dict):
                     self.gas_price["maxFeePerGas"] = int(self.gas_price["maxFeePerGas"] * 0.5)
                     self.gas_price["maxPriorityFeePerGas"] = int(self.gas_price["maxPriorityFeePerGas"] * 0.5)
@@ -539,30 +562,42 @@ class VoteScheduler:
         retries = CONFIG["MAX_RETRIES"]
         consecutive_failures = 0
 
+        # Nonce yang sudah diterima node tidak boleh dikembalikan ke koordinator
+        accepted_nonces = set()
+        last_error = None
+
         while retries > 0:
             try:
-                signed = self.web3.eth.account.sign_transaction(tx, private_key)
-                receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
+                with metrics.phase("sign"):
+                    signed = self.wallets.account_for(private_key).sign_transaction(tx)
+                # Fan out to several healthy RPCs, not just the current one
+                with metrics.phase("send"):
+                    receipt = self.broadcaster.broadcast(
+                        signed.rawTransaction, prefer=CONFIG["RPC_URLS"][self.current_rpc_index])
+                accepted_nonces.add(tx["nonce"])
                 tx_counter += 1
+                metrics.tx_sent()
                 tx_hash = receipt.hex()
                 print(f"6️⃣ Transaction sent {Fore.GREEN}Successfully{Style.RESET_ALL} with total TXiD {Fore.YELLOW}[{tx_counter}]{Style.RESET_ALL} -> {Fore.GREEN}TxID Hash:{Style.RESET_ALL} {tx_hash}")
 
                 print(f"⌛ Waiting for transaction to onchain...")
-                try:
-                    tx_receipt = self.web3.eth.wait_for_transaction_receipt(
-                        receipt, timeout=150)
-                    if tx_receipt.status == 1:
-                        print(f"{Fore.GREEN}😎 Transaction successfully onchain!{Style.RESET_ALL}")
-                    else:
-                        print(f"{Fore.RED}🔞 Transaction failed on-chain! Check explorer for details.{Style.RESET_ALL}")
-                    return tx_receipt
-                except Exception as timeout_error:
-                    print(f"⏱️ Timeout waiting for transaction receipt: {str(timeout_error)}")
+                with metrics.phase("confirm"):
+                    tx_receipt, first_rpc = self.broadcaster.wait_for_receipt(receipt, timeout=150)
+                metrics.tx_result(tx_receipt, tx["from"])
+                if tx_receipt is None:
+                    print(f"⏱️ Timeout waiting for transaction receipt ({self.broadcaster.summary()})")
                     print(f"🆙 Transaction may still be pending. {Fore.GREEN}Check HashID{Fore.RESET}: {tx_hash}")
                     return None
+                if tx_receipt.status == 1:
+                    print(f"{Fore.GREEN}😎 Transaction successfully onchain!{Style.RESET_ALL} (first seen by {first_rpc})")
+                else:
+                    print(f"{Fore.RED}🔞 Transaction failed on-chain! Check explorer for details.{Style.RESET_ALL}")
+                return tx_receipt
 
             except Exception as e:
+                last_error = e
                 consecutive_failures += 1
+                metrics.retry(e)
             
                 # Jika gagal 3x berturut-turut, reset gas price
                 if consecutive_failures >= 3:
@@ -579,6 +614,8 @@ class VoteScheduler:
                 updated_tx, should_retry = self.handle_tx_error(e, tx)
                 if not should_retry or updated_tx is None:
                     print(f"❌ Error sending transaction: {str(e)}")
+                    if tx["nonce"] not in accepted_nonces:
+                        COORDINATOR.release(tx["from"], tx["nonce"], error=e)
                     return None
 
                 tx = updated_tx
@@ -589,15 +626,18 @@ class VoteScheduler:
                     delay = random.randint(CONFIG["COOLDOWN"]["ERROR"][0], CONFIG["COOLDOWN"]["ERROR"][1])
                     sleep_seconds(delay, "Waiting before retry")
         
+        if tx["nonce"] not in accepted_nonces:
+            COORDINATOR.release(tx["from"], tx["nonce"], error=last_error)
         return None
 
+    @tracing.traced("vote")
     def execute_vote(self, account, is_last_wallet=False):
         try:
             private_key = account["key"]
             sender = account["address"]
 
             # Check RPC status first and switch if needed
-            if not self.web3.is_connected():
+            if not rpc_connected(self.web3):
                 print(f"🔄 RPC connection lost, attempting to switch...")
                 self.switch_rpc()
 
@@ -615,33 +655,36 @@ class VoteScheduler:
                 else:
                     raise  # Re-raise if it's a different error
 
-            # Build transaction - handle RPC error
-            try:
-                tx_data = self.build_transaction(sender)
-            except Exception as e:
-                if "429" in str(e) or "too many requests" in str(e).lower():
-                    print(f"⚠️ RPC limiting requests, switching RPC...")
-                    if self.switch_rpc():
-                        # Try again after switch
-                        tx_data = self.build_transaction(sender)
+            # One vote at a time per wallet across every script sharing private_keys.txt
+            with COORDINATOR.wallet(sender):
+                # Build transaction - handle RPC error
+                try:
+                    tx_data = self.build_transaction(sender)
+                except Exception as e:
+                    if "429" in str(e) or "too many requests" in str(e).lower():
+                        print(f"⚠️ RPC limiting requests, switching RPC...")
+                        if self.switch_rpc():
+                            # Try again after switch
+                            tx_data = self.build_transaction(sender)
+                        else:
+                            return False
                     else:
-                        return False
-                else:
-                    raise  # Re-raise if it's a different error
+                        raise  # Re-raise if it's a different error
 
-            if not tx_data:
-                return False
+                if not tx_data:
+                    return False
 
-            receipt = self.send_transaction(tx_data, private_key)
-            if not receipt:
-                print(f"{Fore.RED}🤏 Transaction failed or receipt not available.{Fore.RESET}")
-                return False
+                receipt = self.send_transaction(tx_data, private_key)
+                if not receipt:
+                    print(f"{Fore.RED}🤏 Transaction failed or receipt not available.{Fore.RESET}")
+                    return False
 
-            if receipt.status != 1:
-                print(f"{Fore.RED}🤏 Transaction reverted on-chain.{Fore.RESET}")
-                return False
+                if receipt.status != 1:
+                    print(f"{Fore.RED}🤏 Transaction reverted on-chain.{Fore.RESET}")
+                    return False
 
-            time.sleep(5)
+            with tracing.span("settle", tracing.KIND_SLEEP):
+                time.sleep(5)
 
             # Get updated balance
             chain_id = self.web3.eth.chain_id
@@ -678,7 +721,7 @@ class VoteScheduler:
         print(f"🔄 Starting vote transaction {Fore.YELLOW}CYCLE #{self.cycle_count}{Fore.RESET} with {Fore.GREEN}{len(self.accounts)} wallets{Fore.RESET}")
 
         # Ensure RPC is connected or switch
-        if not self.web3.is_connected():
+        if not rpc_connected(self.web3):
             print(f"🔄 RPC connection lost before cycle, attempting to switch...")
             if not self.switch_rpc():
                 print(f"❌ Failed to find working RPC. Waiting before retry...")
@@ -701,6 +744,12 @@ class VoteScheduler:
                 print(f"🥵 Failed to execute vote for wallet {Fore.YELLOW}[{wallet_num}]{Fore.RESET} Continuing to next wallet.")
 
         print(f"☑️ Vote cycle {Fore.YELLOW}#{self.cycle_count}{Fore.RESET} completed for all wallets.")
+        print(f"📡 Broadcast: {self.broadcaster.summary()}")
+        print(f"🚦 Rate limit: {LIMITER.summary()}")
+        print(f"🧾 Log: {log_pipeline.summary()}")
+        print(f"📦 Read cache: {CACHE.summary()}")
+        print(f"🔐 Nonces: {nonce_coordinator.summary()}")
+        memwatch.checkpoint({"cycle_count": self.cycle_count}, "vote cycle")
         return True
 
 
@@ -0,0 +1,372 @@
+import os
+import sys
+import time
+import hashlib
+import secrets
+from concurrent.futures import ProcessPoolExecutor
+from eth_account import Account
+from eth_utils import to_checksum_address
+
+# ======================== Constants ========================
+KEY_SIZE = 32
+ADDRESS_SIZE = 20
+TAG_SIZE = 16
+RECORD_SIZE = TAG_SIZE + ADDRESS_SIZE
+INDEX_SUFFIX = ".idx"
+INDEX_MAGIC = b"GMWREG01"
+CHUNK_BYTES = 256 * 1024  # ~3.8k keys per read
+PARALLEL_MIN_KEYS = 256  # below this a process pool costs more than it saves
+JOB_KEYS = 128  # keys per worker task
+SECP256K1_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+
+
+# ======================== Helper Functions ========================
+def normalize_key(key):
+    """Return the raw 32 key bytes, or None if the key is not a valid secp256k1 private key"""
+    if not key:
+        return None
+    key = key.strip()
+    if not key or key.startswith("#"):
+        return None
+    if key[:2] in ("0x", "0X"):
+        key = key[2:]
+    if len(key) != KEY_SIZE * 2:
+        return None
+    try:
+        raw = bytes.fromhex(key)
+    except ValueError:
+        return None
+    if not 0 < int.from_bytes(raw, "big") < SECP256K1_N:
+        return None
+    return raw
+
+
+def _index_tag(raw_key):
+    """Lookup tag of a key in the sidecar index (does not reveal the key)"""
+    return hashlib.blake2b(raw_key, digest_size=TAG_SIZE, person=b"gm-wreg-tag").digest()
+
+
+def _address_pad(raw_key):
+    """Keystream used to encrypt the address, only reproducible by the key holder"""
+    return hashlib.blake2b(raw_key, digest_size=ADDRESS_SIZE, person=b"gm-wreg-addr").digest()
+
+
+def _xor(data, pad):
+    return bytes(a ^ b for a, b in zip(data, pad))
+
+
+def derive_addresses(raw_keys):
+    """Derive raw 20-byte addresses for a batch of keys (runs in worker processes)"""
+    return [bytes.fromhex(Account.from_key(raw).address[2:]) for raw in raw_keys]
+
+
+def _generate_batch(count):
+    """Create ``count`` fresh keys with their raw addresses (runs in worker processes)"""
+    raw_keys = []
+    while len(raw_keys) < count:
+        raw = secrets.token_bytes(KEY_SIZE)
+        if 0 < int.from_bytes(raw, "big") < SECP256K1_N:
+            raw_keys.append(raw)
+    return list(zip(raw_keys, derive_addresses(raw_keys)))
+
+
+def generate_wallets(count, workers=None):
+    """Yield (private_key, checksum_address) for ``count`` new wallets, derived in a process pool"""
+    batches = [JOB_KEYS] * (count // JOB_KEYS)
+    if count % JOB_KEYS:
+        batches.append(count % JOB_KEYS)
+    if workers == 0 or count < PARALLEL_MIN_KEYS:
+        results = map(_generate_batch, batches)
+        pool = None
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        results = pool.map(_generate_batch, batches)
+    try:
+        for batch in results:
+            for raw, address in batch:
+                yield "0x" + raw.hex(), to_checksum_address(address)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MB, None where not available (Windows)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+# ======================== Wallet Registry ========================
+class WalletEntry:
+    __slots__ = ("index", "key", "address")
+
+    def __init__(self, index, key, address):
+        self.index = index
+        self.key = key
+        self.address = address
+
+
+class WalletRegistry:
+    """Ordered, de-duplicated key store with addresses cached in an encrypted sidecar index.
+
+    Keys and addresses live in two flat bytearrays, so 50k wallets cost ~2.6MB.
+    Addresses already present in ``<key_file>.idx`` are decrypted instead of derived,
+    and LocalAccount objects are only built on first use and then reused.
+    """
+
+    __slots__ = ("index_path", "invalid", "stats", "_keys", "_addresses", "_positions",
+                 "_checksums", "_accounts", "_cached", "_dirty")
+
+    def __init__(self, key_file="private_keys.txt"):
+        self.index_path = f"{key_file}{INDEX_SUFFIX}" if key_file else None
+        self.invalid = 0
+        self.stats = {}
+        self._keys = bytearray()
+        self._addresses = bytearray()
+        self._positions = {}
+        self._checksums = {}
+        self._accounts = {}
+        self._cached = self._read_index()
+        self._dirty = False
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield WalletEntry(i, self.key(i), self.address(i))
+
+    def __contains__(self, key):
+        return normalize_key(key) in self._positions
+
+    # ---------------- Sidecar index ----------------
+    def _read_index(self):
+        cached = {}
+        if not self.index_path or not os.path.exists(self.index_path):
+            return cached
+        try:
+            with open(self.index_path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            return cached
+        if not blob.startswith(INDEX_MAGIC):
+            return cached
+        view = memoryview(blob)[len(INDEX_MAGIC):]
+        for offset in range(0, len(view) - RECORD_SIZE + 1, RECORD_SIZE):
+            tag = bytes(view[offset:offset + TAG_SIZE])
+            cached[tag] = bytes(view[offset + TAG_SIZE:offset + RECORD_SIZE])
+        return cached
+
+    def save_index(self):
+        """Persist the sidecar index if new addresses were derived"""
+        if not self.index_path or not self._dirty:
+            return False
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(INDEX_MAGIC)
+            for tag, sealed in self._cached.items():
+                f.write(tag)
+                f.write(sealed)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+        return True
+
+    # ---------------- Loading ----------------
+    def _reserve(self, raw):
+        """Append a new key, returns (position, address_known)"""
+        position = len(self._positions)
+        self._keys += raw
+        self._positions[raw] = position
+        sealed = self._cached.get(_index_tag(raw))
+        if sealed is None:
+            self._addresses += bytes(ADDRESS_SIZE)
+            return position, False
+        self._addresses += _xor(sealed, _address_pad(raw))
+        return position, True
+
+    def _store_address(self, position, raw, address):
+        start = position * ADDRESS_SIZE
+        self._addresses[start:start + ADDRESS_SIZE] = address
+        self._cached[_index_tag(raw)] = _xor(address, _address_pad(raw))
+        self._dirty = True
+
+    def add(self, key):
+        """Add a key and return its position, or None if the key is invalid"""
+        raw = normalize_key(key)
+        if raw is None:
+            self.invalid += 1
+            return None
+        position = self._positions.get(raw)
+        if position is not None:
+            return position
+
+        position, known = self._reserve(raw)
+        if not known:
+            account = Account.from_key(raw)
+            self._accounts[position] = account
+            self._store_address(position, raw, bytes.fromhex(account.address[2:]))
+        return position
+
+    def add_file(self, path, workers=None):
+        """Stream a key file in chunks and return the number of keys added.
+
+        Keys are validated and de-duplicated as they are read. Addresses missing from
+        the sidecar index are derived in a process pool (``workers=0`` keeps it inline).
+        """
+        started = time.perf_counter()
+        before = len(self)
+        pool = None
+        jobs = []
+        misses = []
+        derived = 0
+
+        def flush(final=False):
+            nonlocal pool, misses, derived
+            if not misses or (not final and len(misses) < PARALLEL_MIN_KEYS):
+                return
+            batch, misses = misses, []
+            derived += len(batch)
+            raw_keys = [raw for _, raw in batch]
+            if pool is None and workers != 0 and len(batch) >= PARALLEL_MIN_KEYS:
+                pool = ProcessPoolExecutor(max_workers=workers)
+            if pool is not None:
+                for start in range(0, len(batch), JOB_KEYS):
+                    part = batch[start:start + JOB_KEYS]
+                    jobs.append((part, pool.submit(derive_addresses, raw_keys[start:start + JOB_KEYS])))
+            else:
+                for (position, raw), address in zip(batch, derive_addresses(raw_keys)):
+                    self._store_address(position, raw, address)
+
+        try:
+            with open(path, "r") as file:
+                while True:
+                    lines = file.readlines(CHUNK_BYTES)
+                    if not lines:
+                        break
+                    for line in lines:
+                        line = line.strip()
+                        if not line or line.startswith("#"):
+                            continue
+                        raw = normalize_key(line)
+                        if raw is None:
+                            self.invalid += 1
+                        elif raw not in self._positions:
+                            position, known = self._reserve(raw)
+                            if not known:
+                                misses.append((position, raw))
+                    flush()
+            flush(final=True)
+            for batch, job in jobs:
+                for (position, raw), address in zip(batch, job.result()):
+                    self._store_address(position, raw, address)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        added = len(self) - before
+        elapsed = time.perf_counter() - started
+        self.stats = {
+            "keys": added,
+            "derived": derived,
+            "seconds": elapsed,
+            "keys_per_sec": added / elapsed if elapsed > 0 else 0.0,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        return added
+
+    def describe_stats(self):
+        """One-line summary of the last add_file() run"""
+        if not self.stats:
+            return "no key file loaded"
+        peak = self.stats["peak_rss_mb"]
+        peak_info = f", peak RSS {peak:.1f} MB" if peak is not None else ""
+        return (f"{self.stats['keys']} keys in {self.stats['seconds']:.2f}s "
+                f"({self.stats['keys_per_sec']:.0f} keys/sec, {self.stats['derived']} derived{peak_info})")
+
+    @classmethod
+    def load(cls, key_file="private_keys.txt", extra_keys=(), workers=None):
+        """Build a registry from extra keys (e.g. .env) followed by the key file"""
+        registry = cls(key_file)
+        for key in extra_keys:
+            registry.add(key)
+        if key_file and os.path.exists(key_file):
+            registry.add_file(key_file, workers=workers)
+        registry.save_index()
+        return registry
+
+    # ---------------- Accessors ----------------
+    def raw_key(self, index):
+        start = index * KEY_SIZE
+        return bytes(self._keys[start:start + KEY_SIZE])
+
+    def key(self, index):
+        return "0x" + self.raw_key(index).hex()
+
+    def address(self, index):
+        address = self._checksums.get(index)
+        if address is None:
+            start = index * ADDRESS_SIZE
+            address = to_checksum_address(bytes(self._addresses[start:start + ADDRESS_SIZE]))
+            self._checksums[index] = address
+        return address
+
+    def account(self, index):
+        """Return the cached LocalAccount for a position, deriving it only once"""
+        account = self._accounts.get(index)
+        if account is None:
+            account = Account.from_key(self.raw_key(index))
+            self._accounts[index] = account
+        return account
+
+    def position(self, key):
+        return self._positions.get(normalize_key(key))
+
+    def account_for(self, key):
+        """Return the cached LocalAccount for a private key, registering it if needed"""
+        position = self.position(key)
+        if position is None:
+            position = self.add(key)
+            if position is None:
+                raise ValueError("Invalid private key")
+            self.save_index()
+        return self.account(position)
+
+    def keys(self):
+        return [self.key(i) for i in range(len(self))]
+
+    def addresses(self):
+        return [self.address(i) for i in range(len(self))]
+
+    def as_dicts(self):
+        """Compatibility view for code that expects [{"key": ..., "address": ...}]"""
+        return [{"key": self.key(i), "address": self.address(i)} for i in range(len(self))]
+
+
+# ======================== Benchmark ========================
+def benchmark(sizes=(1000, 10000, 100000), workers=None):
+    """Cold (derive) and warm (sidecar index) load of generated key files"""
+    import tempfile
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            key_file = os.path.join(tmp, "private_keys.txt")
+            with open(key_file, "w") as f:
+                for _ in range(size):
+                    f.write(os.urandom(KEY_SIZE).hex() + "\n")
+            for label in ("cold", "warm"):
+                registry = WalletRegistry.load(key_file, workers=workers)
+                print(f"{size:>7} keys [{label}] {registry.describe_stats()}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Wallet registry load benchmark")
+    parser.add_argument("sizes", nargs="*", type=int, default=[1000, 10000, 100000])
+    parser.add_argument("--workers", type=int, default=None, help="process pool size, 0 = inline")
+    args = parser.parse_args()
+    benchmark(args.sizes, args.workers)
@@ -8,10 +8,20 @@ import logging
 import random
 from pathlib import Path
 from colorama import Fore, Style, init
+from dotenv import load_dotenv
+from presign import PresignQueue, PRESIGN_LEAD
+from rbf import RbfEngine, RBF_MIN_BUMP
+import metrics
+import tracing
+import log_pipeline
+import memwatch
 
 # Init colorama
 init(autoreset=True)
 
+# Load environment variables from .env file
+load_dotenv()
+
 # ======================== Configuration Module ========================
 CONFIG = {
     "RPC_URL": "https://rpc-gel.inkonchain.com",
@@ -25,6 +35,11 @@ CONFIG = {
     "GAS_LIMIT": 28008,
     "COOLDOWN": {"SUCCESS": 10, "ERROR": 30},
     # Removed WAIT_TIME: 300
+    # Pre-signed GM: sign the next wallet's tx PRESIGN_LEAD seconds before it is due
+    "PRESIGN": os.getenv("PRESIGN", "1").strip().lower() in ("1", "true", "yes"),
+    "PRESIGN_LEAD": int(os.getenv("PRESIGN_LEAD", str(PRESIGN_LEAD))),
+    "FEE_HEADROOM": 2.0,  # maxFeePerGas = base fee * headroom + priority
+    "RBF_STEP_WAIT": 20,  # seconds per replace-by-fee step for a stuck GM
 }
 
 # ======================== Chain Symbol Mapping ========================
@@ -50,11 +65,19 @@ tx_counter = 0
 
 
 # ======================== Sleep Function ========================
-def sleep_seconds(seconds):
+@tracing.traced("sleep", tracing.KIND_SLEEP)
+def sleep_seconds(seconds, before_end=None, lead=0):
+    """Sleep `seconds`; `before_end()` runs `lead` seconds before the end"""
     print(
         f"9️⃣ {Fore.GREEN}Mode airplane..Rotating sleep in {seconds} seconds...{Style.RESET_ALL}"
     )
-    time.sleep(seconds)
+    if before_end is None or lead <= 0:
+        time.sleep(seconds)
+        return
+    due = time.monotonic() + seconds
+    time.sleep(max(0, seconds - lead))
+    before_end()
+    time.sleep(max(0, due - time.monotonic()))
 
 
 # ======================== ABI Contract ========================
@@ -93,11 +116,7 @@ ABI = [
 ]
 
 # ======================== Info Logging ========================
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    datefmt="%H:%M:%S",
-)
+# Handlers are attached in main() by log_pipeline.setup(), once .env is loaded
 logger = logging.getLogger("gMfootprint")
 
 
@@ -151,14 +170,22 @@ class GMScheduler:
     def __init__(self):
         self.accounts = []
         self.gas_price = None
-        self.web3 = Web3(Web3.HTTPProvider(CONFIG["RPC_URL"]))
+        self.presigned = None
+        self.web3 = metrics.metered_web3(Web3(Web3.HTTPProvider(CONFIG["RPC_URL"])))
         self.contract = self.web3.eth.contract(
             address=CONFIG["CONTRACT_ADDRESS"], abi=ABI
         )
+        self.rbf = RbfEngine(
+            self.web3.eth.send_raw_transaction,
+            lambda address: self.web3.eth.get_transaction_count(address, "latest"),
+            step_wait=CONFIG["RBF_STEP_WAIT"],
+        )
 
     def initialize(self):
         self.load_accounts()
         self.update_gas_price()
+        if CONFIG["PRESIGN"]:
+            self.setup_presign()
 
     def load_accounts(self):
         accounts = []
@@ -273,6 +300,7 @@ class GMScheduler:
                 f"⚡ Gas price updated: {gas_gwei:.9f} Gwei (Legacy Mode) - Exception: {str(e)}"
             )
 
+    @tracing.traced("balance")
     def get_wallet_balance(self, address):
         try:
             # Get chain ID to determine token symbol
@@ -289,6 +317,7 @@ class GMScheduler:
             print(f"Error getting balance: {str(e)}")
             return 0
 
+    @tracing.traced("estimate_gas")
     def estimate_gas(self, sender):
         try:
             gas_estimate = self.contract.functions.gm().estimate_gas({"from": sender})
@@ -335,43 +364,132 @@ class GMScheduler:
             print(f"❌ Error building transaction: {str(e)}")
             return None
 
+    def setup_presign(self):
+        """Queue that signs each GM ahead of time and only broadcasts at the due time"""
+        try:
+            template = {
+                "to": CONFIG["CONTRACT_ADDRESS"],
+                "gas": self.estimate_gas(self.accounts[0]["address"]),
+                "data": self.contract.encodeABI(fn_name="gm", args=[]),
+                "chainId": self.web3.eth.chain_id,
+            }
+            if isinstance(self.gas_price, dict):
+                priority = self.gas_price["maxPriorityFeePerGas"]
+                fetch_price = lambda: self.web3.eth.get_block("latest")["baseFeePerGas"]
+            else:
+                priority = None
+                fetch_price = lambda: self.web3.eth.gas_price
+            self.presigned = PresignQueue(
+                template,
+                fetch_price,
+                self.web3.eth.send_raw_transaction,
+                priority=priority,
+                headroom=CONFIG["FEE_HEADROOM"],
+                legacy_buffer=CONFIG["GAS_MULTIPLIER"],
+            )
+            self.presigned.start()
+        except Exception as e:
+            print(f"⚠️ Pre-signing disabled: {str(e)}")
+            self.presigned = None
+
+    def presign(self, account):
+        """Read balance and nonce now and sign the account's next GM"""
+        if self.presigned is None:
+            return
+        try:
+            balance = self.get_wallet_balance(account["address"])
+            nonce = self.web3.eth.get_transaction_count(account["address"], "pending")
+            self.presigned.prepare(
+                account["key"], account["address"], nonce, {"balance": balance}
+            )
+            print(
+                f"🖊️ GM pre-signed for {short_address(account['address'])} with nonce --> {nonce}"
+            )
+        except Exception as e:
+            print(f"⚠️ Pre-sign failed: {str(e)}. Will build at send time.")
+
+    def send_presigned(self, account):
+        """Broadcast the pre-signed GM; None means build and send it the normal way"""
+        global tx_counter
+        if self.presigned is None or account["address"] not in self.presigned:
+            return None
+        try:
+            with metrics.phase("send"):
+                tx_hash, item = self.presigned.broadcast(account["address"])
+        except Exception as e:
+            print(f"⚠️ Pre-signed broadcast failed: {str(e)}. Building a fresh one...")
+            return None
+        tx_counter += 1
+        metrics.tx_sent()
+        print(
+            f"6️⃣ Transaction Sent {Fore.GREEN}Successfully{Style.RESET_ALL} with Total TXiD {Fore.RED}{tx_counter}{Style.RESET_ALL} -> {Fore.GREEN}TxID Hash:{Style.RESET_ALL} {tx_hash.hex()} (pre-signed nonce {item.nonce})"
+        )
+        self.rbf.track(item.address, item.tx, item.key, tx_hash)
+        with metrics.phase("confirm"):
+            tx_receipt = self.wait_for_receipt(tx_hash)
+        metrics.tx_result(tx_receipt, item.address)
+        if tx_receipt is None:
+            self.unstick_later(item.address, item.key)
+        return tx_receipt, item.extra["balance"]
+
+    def wait_for_receipt(self, tx_hash):
+        print(f"⌛ Waiting for transaction to onchain bang....")
+        try:
+            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+            if tx_receipt.status == 1:
+                print(
+                    f"{Fore.GREEN}😎 Transaction successfully onchain!{Style.RESET_ALL}"
+                )
+            else:
+                print(
+                    f"{Fore.RED}🔞 Transaction failed on-chain! Check explorer for details.{Style.RESET_ALL}"
+                )
+            return tx_receipt
+        except Exception as timeout_error:
+            print(f"⏱️ Timeout waiting for transaction receipt: {str(timeout_error)}")
+            print(f"🆙 Transaction may still be pending. Check hash: {tx_hash.hex()}")
+            return None
+
+    def unstick_later(self, address, key):
+        """Replace-by-fee a stuck GM on the RBF pool; the ladder can take minutes"""
+        def run():
+            try:
+                pending = self.web3.eth.get_transaction_count(address, "pending")
+                self.rbf.unstick(address, key, pending, report=lambda message: print(f"🔄 {message}"))
+            except Exception as e:
+                print(f"⚠️ RBF for {address} failed: {str(e)}")
+
+        return self.rbf.pool.submit(run)
+
     def send_transaction(self, tx, private_key):
         global tx_counter
         retries = CONFIG["MAX_RETRIES"]
 
         while retries > 0:
             try:
-                signed = self.web3.eth.account.sign_transaction(tx, private_key)
-                receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
+                with metrics.phase("sign"):
+                    signed = self.web3.eth.account.sign_transaction(tx, private_key)
+                with metrics.phase("send"):
+                    receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
                 tx_counter += 1
+                metrics.tx_sent()
                 tx_hash = receipt.hex()
                 print(
                     f"6️⃣ Transaction Sent {Fore.GREEN}Successfully{Style.RESET_ALL} with Total TXiD {Fore.RED}{tx_counter}{Style.RESET_ALL} -> {Fore.GREEN}TxID Hash:{Style.RESET_ALL} {tx_hash}"
                 )
+                self.rbf.track(tx["from"], tx, private_key, receipt)
 
-                print(f"⌛ Waiting for transaction to onchain bang....")
-                try:
-                    tx_receipt = self.web3.eth.wait_for_transaction_receipt(
-                        receipt, timeout=120
-                    )
-                    if tx_receipt.status == 1:
-                        print(
-                            f"{Fore.GREEN}😎 Transaction successfully onchain!{Style.RESET_ALL}"
-                        )
-                    else:
-                        print(
-                            f"{Fore.RED}🔞 Transaction failed on-chain! Check explorer for details.{Style.RESET_ALL}"
-                        )
-                    return tx_receipt
-                except Exception as timeout_error:
-                    print(
-                        f"⏱️ Timeout waiting for transaction receipt: {str(timeout_error)}"
-                    )
-                    print(f"🆙 Transaction may still be pending. Check hash: {tx_hash}")
-                    return None
+                with metrics.phase("confirm"):
+                    tx_receipt = self.wait_for_receipt(receipt)
+                metrics.tx_result(tx_receipt, tx["from"])
+                if tx_receipt is None:
+                    # Replace-by-fee the same nonce instead of leaving it stuck
+                    self.unstick_later(tx["from"], private_key)
+                return tx_receipt
 
             except Exception as e:
                 error_message = str(e)
+                metrics.retry(e)
                 if "insufficient funds" in error_message.lower():
                     print(
                         f"{Fore.RED}Error: 💰 Insufficient funds for gas * price + value{Style.RESET_ALL}"
@@ -386,6 +504,14 @@ class GMScheduler:
                         print(f"Updated nonce to {new_nonce}")
                     except Exception as nonce_error:
                         print(f"Error updating nonce: {str(nonce_error)}")
+                elif "replacement transaction underpriced" in error_message.lower():
+                    # Same nonce already in the mempool: clear the node's minimum bump
+                    fees = self.rbf.replacement_fees(tx["from"], tx)
+                    if isinstance(self.gas_price, dict):
+                        self.gas_price.update(fees)
+                    else:
+                        self.gas_price = fees["gasPrice"]
+                    print(f" 🤯 Replacement underpriced. Bumping fees past the mempool tx...")
                 # Check for fee-related errors that might require a slight increase
                 elif (
                     "fee too low" in error_message.lower()
@@ -417,10 +543,10 @@ class GMScheduler:
                         and "underpriced" not in error_message.lower()
                     ):
                         self.gas_price["maxFeePerGas"] = int(
-                            self.gas_price["maxFeePerGas"] * 1.1
+                            self.gas_price["maxFeePerGas"] * (1 + RBF_MIN_BUMP)
                         )
                         self.gas_price["maxPriorityFeePerGas"] = int(
-                            self.gas_price["maxPriorityFeePerGas"] * 1.1
+                            self.gas_price["maxPriorityFeePerGas"] * (1 + RBF_MIN_BUMP)
                         )
                     new_max_fee_gwei = self.web3.from_wei(
                         self.gas_price["maxFeePerGas"], "gwei"
@@ -431,7 +557,7 @@ class GMScheduler:
                         "fee too low" not in error_message.lower()
                         and "underpriced" not in error_message.lower()
                     ):
-                        self.gas_price = int(self.gas_price * 1.1)
+                        self.gas_price = int(self.gas_price * (1 + RBF_MIN_BUMP))
                     new_gas_gwei = self.web3.from_wei(self.gas_price, "gwei")
                     print(f"Increased gas price for retry: {new_gas_gwei:.6f} Gwei")
 
@@ -442,53 +568,71 @@ class GMScheduler:
                 else:
                     tx["gasPrice"] = self.gas_price
 
-                time.sleep(CONFIG["COOLDOWN"]["ERROR"])
+                if "replacement transaction underpriced" not in error_message.lower():
+                    with tracing.span("retry_cooldown", tracing.KIND_SLEEP):
+                        time.sleep(CONFIG["COOLDOWN"]["ERROR"])
 
         return None
 
-    def execute_gm(self, account):
+    @tracing.traced("gm")
+    def execute_gm(self, account, next_account=None):
         try:
             private_key = account["key"]
             sender = account["address"]
 
-            # Cek bang get initial balance
-            initial_balance = self.get_wallet_balance(sender)
-
-            tx_data = self.build_transaction(sender)
-            if tx_data:
+            # Pre-signed at the end of the previous delay: broadcast only
+            presigned = self.send_presigned(account)
+            if presigned:
+                receipt, initial_balance = presigned
+            else:
+                # Cek bang get initial balance
+                initial_balance = self.get_wallet_balance(sender)
+
+                with metrics.phase("build"):
+                    tx_data = self.build_transaction(sender)
+                if not tx_data:
+                    print("Failed to build transaction.")
+                    return False
                 receipt = self.send_transaction(tx_data, private_key)
-                if receipt and receipt.status == 1:
+
+            if receipt and receipt.status == 1:
+                with tracing.span("settle", tracing.KIND_SLEEP):
                     time.sleep(5)
 
-                    # Cek bang get updated balance
-                    chain_id = self.web3.eth.chain_id
-                    token_symbol = CHAIN_SYMBOLS.get(chain_id, "ETH")
-                    new_balance = self.web3.eth.get_balance(sender)
-                    new_balance_eth = self.web3.from_wei(new_balance, "ether")
-                    gas_used = initial_balance - new_balance
-                    gas_cost_eth = self.web3.from_wei(gas_used, "ether")
+                # Cek bang get updated balance
+                chain_id = self.web3.eth.chain_id
+                token_symbol = CHAIN_SYMBOLS.get(chain_id, "ETH")
+                new_balance = self.web3.eth.get_balance(sender)
+                new_balance_eth = self.web3.from_wei(new_balance, "ether")
+                gas_used = initial_balance - new_balance
+                gas_cost_eth = self.web3.from_wei(gas_used, "ether")
 
-                    print(
-                        f"7️⃣ Checking Last Balance: {Fore.YELLOW}{new_balance_eth:.8f} {token_symbol}{Fore.RESET}"
-                    )
-                    print(
-                        f"🤑 Final Transaction Cost: {Fore.YELLOW}{gas_cost_eth:.8f} {token_symbol}{Fore.RESET}"
-                    )
+                print(
+                    f"7️⃣ Checking Last Balance: {Fore.YELLOW}{new_balance_eth:.8f} {token_symbol}{Fore.RESET}"
+                )
+                print(
+                    f"🤑 Final Transaction Cost: {Fore.YELLOW}{gas_cost_eth:.8f} {token_symbol}{Fore.RESET}"
+                )
 
-                    # Add random & rotating delay 6-14m
-                    delay_seconds = random.randint(360, 840)
-                    print(
-                        f"{Fore.GREEN}8️⃣ Get random rotating in {delay_seconds} seconds before next GM transaction...{Style.RESET_ALL}"
+                # Add random & rotating delay 6-14m
+                delay_seconds = random.randint(360, 840)
+                print(
+                    f"{Fore.GREEN}8️⃣ Get random rotating in {delay_seconds} seconds before next GM transaction...{Style.RESET_ALL}"
+                )
+                if self.presigned is not None and next_account:
+                    sleep_seconds(
+                        delay_seconds,
+                        lambda: self.presign(next_account),
+                        CONFIG["PRESIGN_LEAD"],
                     )
+                else:
                     sleep_seconds(delay_seconds)
 
-                    return True
-                else:
-                    print(
-                        f"{Fore.RED}🤏Transaction failed or receipt not available.{Fore.RESET}"
-                    )
+                return True
             else:
-                print("Failed to build transaction.")
+                print(
+                    f"{Fore.RED}🤏Transaction failed or receipt not available.{Fore.RESET}"
+                )
         except Exception as e:
             print(f"Error executing GM: {str(e)}")
 
@@ -497,6 +641,7 @@ class GMScheduler:
 
 # ======================== Main Program ========================
 def main():
+    global tx_counter
     try:
         # Initialize Web3 and contract
         web3 = Web3(Web3.HTTPProvider(CONFIG["RPC_URL"]))
@@ -513,15 +658,31 @@ def main():
         # Initialize scheduler
         scheduler = GMScheduler()
         scheduler.initialize()
+        log_pipeline.setup("gMfootprint")
+        exporter = metrics.start()
+        if exporter:
+            print(f"📈 Metrics exported at {exporter}")
+        trace_file = tracing.start()
+        if trace_file:
+            print(f"🧵 Tracing spans to {trace_file} (python tracing.py report {trace_file})")
+        print(f"🧠 Memory watchdog: {memwatch.start()}")
+        state = memwatch.restore()
+        if state:
+            tx_counter = state.get("tx_counter", tx_counter)
+            print(f"♻️ Restored after memory restart, total TXiD {tx_counter}")
 
         # Execute GM in random delay seconds
         while True:
-            for account in scheduler.accounts:
-                scheduler.execute_gm(account)
+            accounts = scheduler.accounts
+            for n, account in enumerate(accounts):
+                scheduler.execute_gm(account, accounts[(n + 1) % len(accounts)])
 
             print(
                 f"{Fore.YELLOW}☑️ All GM onchain completed..{Fore.RESET} Starting GM to next call bang..."
             )
+            if scheduler.presigned is not None:
+                print(f"🖊️ Pre-signed GM: {scheduler.presigned.latency_summary()}")
+            memwatch.checkpoint({"tx_counter": tx_counter}, "gm round")
 
     except KeyboardInterrupt:
         print(
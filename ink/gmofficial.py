@@ -8,10 +8,20 @@ import queue
 import logging
 from pathlib import Path
 from colorama import Fore, Style, init
+from dotenv import load_dotenv
+from presign import PresignQueue, PRESIGN_LEAD
+from rbf import RbfEngine, RBF_MIN_BUMP
+import metrics
+import tracing
+import log_pipeline
+import memwatch
 
 # Init colorama
 init(autoreset=True)
 
+# Load environment variables from .env file
+load_dotenv()
+
 # ======================== Configuration Module ========================
 CONFIG = {
     "RPC_URL": "https://rpc-gel.inkonchain.com",
@@ -27,7 +37,12 @@ CONFIG = {
         "SUCCESS": 10,
         "ERROR": 30
     },
-    "WAIT_TIME": 300
+    "WAIT_TIME": 300,
+    # Pre-signed GM: sign each wallet's tx PRESIGN_LEAD seconds before it is due
+    "PRESIGN": os.getenv("PRESIGN", "1").strip().lower() in ("1", "true", "yes"),
+    "PRESIGN_LEAD": int(os.getenv("PRESIGN_LEAD", str(PRESIGN_LEAD))),
+    "FEE_HEADROOM": 2.0,  # maxFeePerGas = base fee * headroom + priority
+    "RBF_STEP_WAIT": 20  # seconds per replace-by-fee step for a stuck GM
 }
 
 # Chain ID to mapping
@@ -88,11 +103,7 @@ ABI = [
 ]
 
 # ======================== Logging System ========================
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    datefmt='%H:%M:%S'
-)
+# Handlers are attached in main() by log_pipeline.setup(), once .env is loaded
 logger = logging.getLogger('GMBot')
 
 # ======================== Utility Functions ========================
@@ -130,9 +141,11 @@ def is_connected(web3):
         print(f"0️⃣ Failed to connect to the network: {e}")
         return None
 
-def wait_until_next_gm(web3, contract, address):
+@tracing.traced("wait_next_gm", tracing.KIND_SLEEP)
+def wait_until_next_gm(web3, contract, address, before_end=None, lead=0):
     """
     Gets the last GM time from the blockchain & waits until the next bang!!.
+    `before_end()` runs `lead` seconds before the wait ends (used to pre-sign the GM).
     """
     try:
         # Get the last execution time from the contract
@@ -157,7 +170,13 @@ def wait_until_next_gm(web3, contract, address):
         print(f"{Fore.GREEN}Waiting {int(hours)} hours, {int(minutes)} minutes, {int(seconds)} seconds until the next GM...❓{Fore.RESET}")
 
         # Wait without using an intensive loop
-        time.sleep(wait_seconds)
+        if before_end is None or lead <= 0:
+            time.sleep(wait_seconds)
+            return
+        due = time.monotonic() + wait_seconds
+        time.sleep(max(0, wait_seconds - lead))
+        before_end()
+        time.sleep(max(0, due - time.monotonic()))
 
     except Exception as e:
         print(f"{Fore.RED}Failed to get next GM time: {str(e)}{Fore.RESET}")
@@ -167,12 +186,18 @@ class GMScheduler:
     def __init__(self):
         self.accounts = []
         self.gas_price = None
-        self.web3 = Web3(Web3.HTTPProvider(CONFIG["RPC_URL"]))
+        self.presigned = None
+        self.web3 = metrics.metered_web3(Web3(Web3.HTTPProvider(CONFIG["RPC_URL"])))
         self.contract = self.web3.eth.contract(address=CONFIG["CONTRACT_ADDRESS"], abi=ABI)
+        self.rbf = RbfEngine(self.web3.eth.send_raw_transaction,
+                             lambda address: self.web3.eth.get_transaction_count(address, "latest"),
+                             step_wait=CONFIG["RBF_STEP_WAIT"])
         
     def initialize(self):
         self.load_accounts()
         self.update_gas_price()
+        if CONFIG["PRESIGN"]:
+            self.setup_presign()
         
     def load_accounts(self):
         accounts = []
@@ -267,6 +292,7 @@ class GMScheduler:
             gas_gwei = self.web3.from_wei(legacy_gas_price, 'gwei')
             print(f"⛽ Gas price updated: {gas_gwei:.9f} Gwei (Legacy Mode) - Exception: {str(e)}")
     
+    @tracing.traced("balance")
     def get_wallet_balance(self, address):
         try:
             # Get chain ID to determine token symbol
@@ -291,6 +317,7 @@ class GMScheduler:
             print(f"Failed to query last GM time: {str(e)}")
             return {'last_gm': None, 'next_gm': datetime.datetime.now()}
     
+    @tracing.traced("estimate_gas")
     def estimate_gas(self, sender):
         try:
             # Try to estimate gas from GM function
@@ -341,34 +368,116 @@ class GMScheduler:
             print(f"❌ Error building transaction: {str(e)}")
             return None
         
+    def setup_presign(self):
+        """Queue that signs each GM ahead of time and only broadcasts at the due time"""
+        try:
+            template = {
+                'to': CONFIG["CONTRACT_ADDRESS"],
+                'gas': self.estimate_gas(self.accounts[0]['address']),
+                'data': self.contract.encodeABI(fn_name='gm', args=[]),
+                'chainId': self.web3.eth.chain_id
+            }
+            if isinstance(self.gas_price, dict):
+                priority = self.gas_price['maxPriorityFeePerGas']
+                fetch_price = lambda: self.web3.eth.get_block('latest')['baseFeePerGas']
+            else:
+                priority = None
+                fetch_price = lambda: self.web3.eth.gas_price
+            self.presigned = PresignQueue(template, fetch_price, self.web3.eth.send_raw_transaction,
+                                          priority=priority, headroom=CONFIG["FEE_HEADROOM"],
+                                          legacy_buffer=CONFIG["GAS_MULTIPLIER"])
+            self.presigned.start()
+        except Exception as e:
+            print(f"⚠️ Pre-signing disabled: {str(e)}")
+            self.presigned = None
+
+    def presign(self, account):
+        """Read balance and nonce now and sign the account's next GM"""
+        if self.presigned is None:
+            return
+        try:
+            balance = self.get_wallet_balance(account['address'])
+            nonce = self.web3.eth.get_transaction_count(account['address'], 'pending')
+            self.presigned.prepare(account['key'], account['address'], nonce, {'balance': balance})
+            print(f"🖊️ gM pre-signed for {short_address(account['address'])} with nonce {nonce}")
+        except Exception as e:
+            print(f"⚠️ Pre-sign failed: {str(e)}. Will build at send time.")
+
+    def send_presigned(self, account):
+        """Broadcast the pre-signed GM; None means build and send it the normal way"""
+        global tx_counter
+        if self.presigned is None or account['address'] not in self.presigned:
+            return None
+        try:
+            with metrics.phase('send'):
+                tx_hash, item = self.presigned.broadcast(account['address'])
+        except Exception as e:
+            print(f"⚠️ Pre-signed broadcast failed: {str(e)}. Building a fresh one...")
+            return None
+        tx_counter += 1
+        metrics.tx_sent()
+        print(f"6️⃣ Transaction Sent {Fore.GREEN}Successfully{Style.RESET_ALL} with Total TXiD {Fore.RED}{tx_counter}{Style.RESET_ALL} -> {Fore.GREEN}TxID Hash:{Style.RESET_ALL} {tx_hash.hex()} (pre-signed nonce {item.nonce})")
+        self.rbf.track(item.address, item.tx, item.key, tx_hash)
+        with metrics.phase('confirm'):
+            tx_receipt = self.wait_for_receipt(tx_hash)
+        metrics.tx_result(tx_receipt, item.address)
+        if tx_receipt is None:
+            self.unstick_later(item.address, item.key)
+        return tx_receipt, item.extra['balance']
+
+    def wait_for_receipt(self, tx_hash):
+        print(f"⌛ Waiting for transaction to onchain bang....")
+        try:
+            tx_receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=120)
+            if tx_receipt.status == 1:
+                print(f"{Fore.GREEN}😎 Transaction successfully onchain!{Style.RESET_ALL}")
+            else:
+                print(f"{Fore.RED}🔞 Transaction failed on-chain! Check explorer for details.{Style.RESET_ALL}")
+            return tx_receipt
+        except Exception as timeout_error:
+            print(f"⏱️ Timeout waiting for transaction receipt: {str(timeout_error)}")
+            print(f"🆙 Transaction may still be pending. Check hash: {tx_hash.hex()}")
+            return None
+
+    def unstick_later(self, address, key):
+        """Replace-by-fee a stuck GM on the RBF pool; the ladder can take minutes"""
+        def run():
+            try:
+                pending = self.web3.eth.get_transaction_count(address, 'pending')
+                self.rbf.unstick(address, key, pending, report=lambda message: print(f"🔄 {message}"))
+            except Exception as e:
+                print(f"⚠️ RBF for {address} failed: {str(e)}")
+
+        return self.rbf.pool.submit(run)
+
     def send_transaction(self, tx, private_key):
         global tx_counter
         retries = CONFIG["MAX_RETRIES"]
         
         while retries > 0:
             try:
-                signed = self.web3.eth.account.sign_transaction(tx, private_key)
-                receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
+                with metrics.phase('sign'):
+                    signed = self.web3.eth.account.sign_transaction(tx, private_key)
+                with metrics.phase('send'):
+                    receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
                 tx_counter += 1
+                metrics.tx_sent()
                 tx_hash = receipt.hex()
                 print(f"6️⃣ Transaction Sent {Fore.GREEN}Successfully{Style.RESET_ALL} with Total TXiD {Fore.RED}{tx_counter}{Style.RESET_ALL} -> {Fore.GREEN}TxID Hash:{Style.RESET_ALL} {tx_hash}")
                 
-                # Wait for transaction receipt with timeout
-                print(f"⌛ Waiting for transaction to onchain bang....")
-                try:
-                    tx_receipt = self.web3.eth.wait_for_transaction_receipt(receipt, timeout=120)
-                    if tx_receipt.status == 1:
-                        print(f"{Fore.GREEN}😎 Transaction successfully onchain!{Style.RESET_ALL}")
-                    else:
-                        print(f"{Fore.RED}🔞 Transaction failed on-chain! Check explorer for details.{Style.RESET_ALL}")
-                    return tx_receipt
-                except Exception as timeout_error:
-                    print(f"⏱️ Timeout waiting for transaction receipt: {str(timeout_error)}")
-                    print(f"🆙 Transaction may still be pending. Check hash: {tx_hash}")
-                    return None
+                self.rbf.track(tx['from'], tx, private_key, receipt)
+                
+                # Wait for transaction receipt with timeout, then replace-by-fee the same nonce
+                with metrics.phase('confirm'):
+                    tx_receipt = self.wait_for_receipt(receipt)
+                metrics.tx_result(tx_receipt, tx['from'])
+                if tx_receipt is None:
+                    self.unstick_later(tx['from'], private_key)
+                return tx_receipt
                 
             except Exception as e:
                 error_message = str(e)
+                metrics.retry(e)
                 if "insufficient funds" in error_message.lower():
                     print(f"{Fore.RED}Error: 💰 Insufficient funds for gas * price + value{Style.RESET_ALL}")
                     return None
@@ -381,6 +490,14 @@ class GMScheduler:
                     except Exception as nonce_error:
                         print(f"Error updating nonce: {str(nonce_error)}")
                 # Check for fee-related errors that might require a slight increase
+                elif "replacement transaction underpriced" in error_message.lower():
+                    # Same nonce already in the mempool: clear the node's minimum bump
+                    fees = self.rbf.replacement_fees(tx['from'], tx)
+                    if isinstance(self.gas_price, dict):
+                        self.gas_price.update(fees)
+                    else:
+                        self.gas_price = fees['gasPrice']
+                    print(f" 🤯 Replacement underpriced. Bumping fees past the mempool tx...")
                 elif "fee too low" in error_message.lower() or "underpriced" in error_message.lower():
                     # Increase fees more aggressively on this specific error
                     if isinstance(self.gas_price, dict):
@@ -398,15 +515,15 @@ class GMScheduler:
                 
                 # Increase gas price on retry, but more conservatively
                 if isinstance(self.gas_price, dict):
-                    # Only increase by 10% on each retry unless fee-specific error
+                    # Only increase by the minimum replacement bump on each retry unless fee-specific error
                     if "fee too low" not in error_message.lower() and "underpriced" not in error_message.lower():
-                        self.gas_price['maxFeePerGas'] = int(self.gas_price['maxFeePerGas'] * 1.1)
-                        self.gas_price['maxPriorityFeePerGas'] = int(self.gas_price['maxPriorityFeePerGas'] * 1.1)
+                        self.gas_price['maxFeePerGas'] = int(self.gas_price['maxFeePerGas'] * (1 + RBF_MIN_BUMP))
+                        self.gas_price['maxPriorityFeePerGas'] = int(self.gas_price['maxPriorityFeePerGas'] * (1 + RBF_MIN_BUMP))
                     new_max_fee_gwei = self.web3.from_wei(self.gas_price['maxFeePerGas'], 'gwei')
                     print(f"Increased gas price for retry: {new_max_fee_gwei:.6f} Gwei")
                 else:
                     if "fee too low" not in error_message.lower() and "underpriced" not in error_message.lower():
-                        self.gas_price = int(self.gas_price * 1.1)
+                        self.gas_price = int(self.gas_price * (1 + RBF_MIN_BUMP))
                     new_gas_gwei = self.web3.from_wei(self.gas_price, 'gwei')
                     print(f"Increased gas price for retry: {new_gas_gwei:.6f} Gwei")
                 
@@ -417,14 +534,23 @@ class GMScheduler:
                 else:
                     tx['gasPrice'] = self.gas_price
                 
-                time.sleep(CONFIG["COOLDOWN"]["ERROR"])
+                if "replacement transaction underpriced" not in error_message.lower():
+                    with tracing.span("retry_cooldown", tracing.KIND_SLEEP):
+                        time.sleep(CONFIG["COOLDOWN"]["ERROR"])
         
         return None
                 
+    @tracing.traced("gm")
     def execute_gm(self, account):
         try:
             private_key = account['key']
             sender = account['address']
+
+            # Pre-signed after waiting for the due time: broadcast only, skip the checks
+            presigned = self.send_presigned(account)
+            if presigned:
+                receipt, initial_balance = presigned
+                return self.report_gm(sender, receipt, initial_balance)
             
             # Check if we should execute GM now
             next_info = self.get_next_execution(sender)
@@ -444,35 +570,11 @@ class GMScheduler:
             initial_balance = self.get_wallet_balance(sender)
             
             # Build and send transaction
-            tx_data = self.build_transaction(sender)
+            with metrics.phase('build'):
+                tx_data = self.build_transaction(sender)
             if tx_data:
                 receipt = self.send_transaction(tx_data, private_key)
-                if receipt and receipt.status == 1:
-                    time.sleep(5)
-                    
-                    # Get updated balance
-                    chain_id = self.web3.eth.chain_id
-                    token_symbol = CHAIN_SYMBOLS.get(chain_id, "ETH")
-                    new_balance = self.web3.eth.get_balance(sender)
-                    new_balance_eth = self.web3.from_wei(new_balance, 'ether')
-                    gas_used = initial_balance - new_balance
-                    gas_cost_eth = self.web3.from_wei(gas_used, 'ether')
-                    
-                    print(f"7️⃣ Checking Last Balance: {Fore.YELLOW}{new_balance_eth:.8f} {token_symbol}{Fore.RESET}")
-                    print(f"🤑 Transaction cost: {Fore.YELLOW}{gas_cost_eth:.8f} {token_symbol}{Fore.RESET}")
-                    
-                    # Schedule next GM time for display purposes
-                    next_info = self.get_next_execution(sender)
-                    if next_info['next_gm']:
-                        now = datetime.datetime.now()
-                        wait_time = (next_info['next_gm'] - now).total_seconds()
-                        hours, remainder = divmod(wait_time, 3600)
-                        minutes, seconds = divmod(remainder, 60)
-                        print(f"🥱🥱 Next GM available in: {int(hours)} hours, {int(minutes)} minutes")
-                    
-                    return True
-                else:
-                    print(f"{Fore.RED}🤏Transaction failed or receipt not available.{Fore.RESET}")
+                return self.report_gm(sender, receipt, initial_balance)
             else:
                 print("Failed to build transaction.")
         except Exception as e:
@@ -480,12 +582,49 @@ class GMScheduler:
         
         return False
 
+    def report_gm(self, sender, receipt, initial_balance):
+        """Balance, cost and next-GM lines after a send; True when the GM landed"""
+        try:
+            if receipt and receipt.status == 1:
+                with tracing.span("settle", tracing.KIND_SLEEP):
+                    time.sleep(5)
+                
+                # Get updated balance
+                chain_id = self.web3.eth.chain_id
+                token_symbol = CHAIN_SYMBOLS.get(chain_id, "ETH")
+                new_balance = self.web3.eth.get_balance(sender)
+                new_balance_eth = self.web3.from_wei(new_balance, 'ether')
+                gas_used = initial_balance - new_balance
+                gas_cost_eth = self.web3.from_wei(gas_used, 'ether')
+                
+                print(f"7️⃣ Checking Last Balance: {Fore.YELLOW}{new_balance_eth:.8f} {token_symbol}{Fore.RESET}")
+                print(f"🤑 Transaction cost: {Fore.YELLOW}{gas_cost_eth:.8f} {token_symbol}{Fore.RESET}")
+                
+                # Schedule next GM time for display purposes
+                next_info = self.get_next_execution(sender)
+                if next_info['next_gm']:
+                    now = datetime.datetime.now()
+                    wait_time = (next_info['next_gm'] - now).total_seconds()
+                    hours, remainder = divmod(wait_time, 3600)
+                    minutes, seconds = divmod(remainder, 60)
+                    print(f"🥱🥱 Next GM available in: {int(hours)} hours, {int(minutes)} minutes")
+                
+                return True
+            else:
+                print(f"{Fore.RED}🤏Transaction failed or receipt not available.{Fore.RESET}")
+        except Exception as e:
+            print(f"Error executing GM: {str(e)}")
+        
+        return False
+
     @staticmethod
+    @tracing.traced("sleep", tracing.KIND_SLEEP)
     def delay(seconds):
         time.sleep(seconds)
 
 # ======================== Main Program ========================
 def main():
+    global tx_counter
     try:
         # Initialize Web3 and contract
         web3 = Web3(Web3.HTTPProvider(CONFIG["RPC_URL"]))
@@ -503,20 +642,41 @@ def main():
         # Initialize scheduler
         scheduler = GMScheduler()
         scheduler.initialize()
+        log_pipeline.setup('GMBot')
+        exporter = metrics.start()
+        if exporter:
+            print(f"📈 Metrics exported at {exporter}")
+        trace_file = tracing.start()
+        if trace_file:
+            print(f"🧵 Tracing spans to {trace_file} (python tracing.py report {trace_file})")
+        print(f"🧠 Memory watchdog: {memwatch.start()}")
+        state = memwatch.restore()
+        if state:
+            tx_counter = state.get("tx_counter", tx_counter)
+            print(f"♻️ Restored after memory restart, total TXiD {tx_counter}")
 
         # Execute GM based on the correct time
         for account in scheduler.accounts:
-            wait_until_next_gm(web3, contract, account['address'])  # Wait according to time
+            if scheduler.presigned is not None:
+                # Sign PRESIGN_LEAD seconds early so the due time only costs a broadcast
+                wait_until_next_gm(web3, contract, account['address'],
+                                   lambda: scheduler.presign(account), CONFIG["PRESIGN_LEAD"])
+            else:
+                wait_until_next_gm(web3, contract, account['address'])  # Wait according to time
             scheduler.execute_gm(account)  # Run GM transaction
 
         print(f"{Fore.YELLOW}☑️ All gM onchain completed. Waiting for next execution bang!!!...{Fore.RESET}")
+        if scheduler.presigned is not None:
+            print(f"🖊️ Pre-signed gM: {scheduler.presigned.latency_summary()}")
+            scheduler.presigned.stop()
 
-        # Restart after transactions are complete
-        main()
+        # Next round runs from the loop in __main__; recursing here kept every round's web3 and scheduler alive
+        memwatch.checkpoint({"tx_counter": tx_counter}, "gm round")
 
     except Exception as e:
         print(f"An error occurred: {str(e)}")
         exit(1)
 
 if __name__ == "__main__":
-    main()
+    while True:
+        main()
@@ -0,0 +1,261 @@
+import gc
+import os
+import sys
+import json
+import time
+import atexit
+import tracemalloc
+
+try:
+    import metrics
+except ImportError:
+    metrics = None  # directories without the Prometheus exporter only log the samples
+
+# ======================== Constants ========================
+MB = 1024 * 1024
+TOP_SITES = 5  # growth sites reported per sample
+TRACE_FRAMES = 1  # traceback depth kept per allocation; 1 = the allocating line only
+STATE_FILE = f".{os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]}.memwatch.json"
+# Sites that are the measuring itself or import machinery, dropped from the growth list
+IGNORED_SITES = (tracemalloc.__file__, "<frozen ", "<unknown>")
+
+
+def rss_bytes():
+    """Current resident memory of this process, None where not available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # No /proc (macOS): fall back to the peak, the best getrusage offers
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _ignored(stat):
+    filename = stat.traceback[0].filename
+    return any(filename.startswith(prefix) for prefix in IGNORED_SITES)
+
+
+def _site(stat):
+    frame = stat.traceback[0]
+    return f"{os.path.basename(frame.filename)}:{frame.lineno}"
+
+
+# ======================== Sample ========================
+class Growth:
+    __slots__ = ("site", "size_diff", "count_diff", "size")
+
+    def __init__(self, site, size_diff, count_diff, size):
+        self.site = site
+        self.size_diff = size_diff
+        self.count_diff = count_diff
+        self.size = size
+
+
+class MemorySample:
+    __slots__ = ("label", "rss", "rss_diff", "collections", "collected", "uncollectable", "traced", "top")
+
+    def __init__(self, label, rss, rss_diff, collections, collected, uncollectable, traced, top):
+        self.label = label
+        self.rss = rss
+        self.rss_diff = rss_diff
+        self.collections = collections  # gc runs per generation since start
+        self.collected = collected
+        self.uncollectable = uncollectable
+        self.traced = traced  # bytes tracemalloc currently attributes to Python objects, None if off
+        self.top = top
+
+    def lines(self):
+        rss = f"{self.rss / MB:.1f}MB ({self.rss_diff / MB:+.1f})" if self.rss is not None else "n/a"
+        head = (f"RSS {rss}, gc runs {'/'.join(map(str, self.collections))}, "
+                f"collected {self.collected}, uncollectable {self.uncollectable}")
+        if self.traced is not None:
+            head += f", traced {self.traced / MB:.1f}MB"
+        if self.label:
+            head = f"[{self.label}] {head}"
+        return [head] + [f"  {growth.size_diff / 1024:+.1f}KB ({growth.count_diff:+d} blocks) {growth.site}"
+                         for growth in self.top]
+
+
+# ======================== Watchdog ========================
+class MemoryWatchdog:
+    """Per-cycle memory sampling for processes that run for days.
+
+    Every `sample()` records RSS and gc statistics; with `trace` on it also diffs a
+    tracemalloc snapshot against the previous one and keeps the `top` growing allocation
+    sites. Call `checkpoint(state)` where the bot is between wallet actions: when RSS is
+    above `restart_mb` it saves `state` to `state_file` and re-executes the script, which
+    picks the state up again through `restore()`.
+    """
+
+    def __init__(self, trace=False, frames=TRACE_FRAMES, top=TOP_SITES, restart_mb=0, state_file=STATE_FILE,
+                 out=None):
+        self.trace = False
+        self.frames = frames
+        self.top = top
+        self.restart_mb = restart_mb
+        self.state_file = state_file
+        self.out = out
+        self.previous = None
+        self.last_rss = None
+        self.samples = 0
+        self.restarts = 0
+        if trace:
+            self.configure(trace=True)
+
+    def configure(self, trace=None, frames=None, top=None, restart_mb=None, state_file=None):
+        if frames is not None:
+            self.frames = int(frames)
+        if top is not None:
+            self.top = int(top)
+        if restart_mb is not None:
+            self.restart_mb = float(restart_mb)
+        if state_file is not None:
+            self.state_file = state_file
+        if trace and not self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+            self.trace = True
+            self.previous = self._snapshot()
+        elif trace is False and self.trace:
+            tracemalloc.stop()
+            self.trace = False
+            self.previous = None
+
+    def _snapshot(self):
+        # Filtering is done on the grouped stats: Snapshot.filter_traces() costs more than the diff
+        return tracemalloc.take_snapshot()
+
+    def _growth(self):
+        snapshot = self._snapshot()
+        stats = snapshot.compare_to(self.previous, "lineno") if self.previous is not None else []
+        self.previous = snapshot
+        top = []
+        for stat in stats:
+            if len(top) == self.top or stat.size_diff <= 0:
+                break
+            if not _ignored(stat):
+                top.append(Growth(_site(stat), stat.size_diff, stat.count_diff, stat.size))
+        return top, tracemalloc.get_traced_memory()[0]
+
+    def sample(self, label=None):
+        rss = rss_bytes()
+        rss_diff = rss - self.last_rss if rss is not None and self.last_rss is not None else 0
+        self.last_rss = rss
+        stats = gc.get_stats()
+        top, traced = self._growth() if self.trace else ([], None)
+        sample = MemorySample(label, rss, rss_diff, [gen["collections"] for gen in stats],
+                              sum(gen["collected"] for gen in stats), len(gc.garbage), traced, top)
+        self.samples += 1
+        if metrics is not None:
+            metrics.memory(sample)
+        return sample
+
+    def report(self, sample):
+        out = self.out or sys.stdout
+        for line in sample.lines():
+            out.write(f"🧠 {line}\n")
+
+    def over_limit(self, sample):
+        return bool(self.restart_mb) and sample.rss is not None and sample.rss > self.restart_mb * MB
+
+    def checkpoint(self, state=None, label=None, restart=True):
+        """Sample and report; re-exec with `state` saved when over the RSS threshold"""
+        sample = self.sample(label)
+        self.report(sample)
+        if restart and self.over_limit(sample):
+            self.restart(state, sample)
+        return sample
+
+    def save(self, state):
+        tmp = f"{self.state_file}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"restarts": self.restarts + 1, "saved_at": time.time(), "state": state}, f, default=str)
+        os.replace(tmp, self.state_file)
+
+    def restore(self):
+        """State saved by the previous process before its memory restart, or None (then deleted)"""
+        try:
+            with open(self.state_file) as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        try:
+            os.remove(self.state_file)
+        except OSError:
+            pass
+        self.restarts = saved.get("restarts", 0)
+        return saved.get("state")
+
+    def restart(self, state, sample):
+        self.save(state)
+        out = self.out or sys.stdout
+        out.write(f"♻️ RSS {sample.rss / MB:.1f}MB above {self.restart_mb:.0f}MB limit, restarting "
+                  f"(restart #{self.restarts + 1}, state saved to {self.state_file})\n")
+        # exec skips interpreter shutdown: flush queued logs, exporters and open files first
+        atexit._run_exitfuncs()
+        sys.stdout.flush()
+        os.execv(sys.executable, [sys.executable] + sys.argv)
+
+    def summary(self):
+        rss = f"{self.last_rss / MB:.1f}MB" if self.last_rss is not None else "n/a"
+        limit = f", restart above {self.restart_mb:.0f}MB" if self.restart_mb else ""
+        return f"RSS {rss} after {self.samples} samples, {self.restarts} restarts{limit}"
+
+
+WATCHDOG = MemoryWatchdog()
+
+
+def start():
+    """Configure WATCHDOG from MEMWATCH_TRACE / MEMWATCH_TOP / MEMWATCH_RESTART_MB; returns a description"""
+    trace = os.getenv("MEMWATCH_TRACE", "").strip().lower() in ("1", "true", "yes")
+    restart_mb = os.getenv("MEMWATCH_RESTART_MB", "").strip() or 0
+    WATCHDOG.configure(trace=trace, top=os.getenv("MEMWATCH_TOP", "").strip() or TOP_SITES, restart_mb=restart_mb)
+    parts = ["tracemalloc on" if trace else "RSS/gc only"]
+    if WATCHDOG.restart_mb:
+        parts.append(f"restart above {WATCHDOG.restart_mb:.0f}MB")
+    return ", ".join(parts)
+
+
+def restore():
+    return WATCHDOG.restore()
+
+
+def checkpoint(state=None, label=None, restart=True):
+    return WATCHDOG.checkpoint(state, label, restart)
+
+
+# ======================== Benchmark ========================
+def benchmark(cycles=20, actions=200):
+    """A bot loop that leaks one record per action: the leak site should top every sample"""
+    import io
+    import random
+
+    rng = random.Random(7)
+    history = []  # grows forever, like an unbounded deployments list
+    out = io.StringIO()
+    watchdog = MemoryWatchdog(trace=True, top=3, restart_mb=0, out=out)
+    costs = []
+    last = None
+    for cycle in range(cycles):
+        for _ in range(actions):
+            scratch = [rng.random() for _ in range(50)]  # churn: freed every action
+            history.append({"tx": os.urandom(32).hex(), "gas": sum(scratch)})
+        started = time.perf_counter()
+        last = watchdog.sample(f"cycle {cycle + 1}")
+        costs.append(time.perf_counter() - started)
+    watchdog.configure(trace=False)
+    for line in last.lines():
+        print(line)
+    costs.sort()
+    print(f"sample cost: p50 {costs[len(costs) // 2] * 1000:.1f} ms, max {costs[-1] * 1000:.1f} ms "
+          f"({len(history)} leaked records)")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
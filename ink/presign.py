@@ -0,0 +1,182 @@
+import sys
+import time
+import threading
+from eth_account import Account
+
+# ======================== Constants ========================
+FEE_HEADROOM = 2.0  # maxFeePerGas = base fee * headroom + priority, survives ~6 full blocks of base fee growth
+LEGACY_BUFFER = 1.05  # legacy gasPrice is what gets paid, so only a small buffer
+PRICE_POLL_INTERVAL = 3.0  # seconds between fee refreshes while a tx is waiting
+PRESIGN_LEAD = 30  # seconds before the due time to fetch nonce/fees and sign
+
+
+def raw_bytes(signed):
+    # eth-account < 0.13 (web3 v6) calls it rawTransaction
+    return getattr(signed, "raw_transaction", None) or signed.rawTransaction
+
+
+# ======================== Presigned Tx ========================
+class PresignedTx:
+    """A signed tx for one wallet's next nonce.
+
+    `cap` is the highest network price the tx still gets included at: the base fee for
+    EIP-1559 (maxFeePerGas - priority), the gas price itself for legacy.
+    """
+
+    __slots__ = ("key", "address", "nonce", "tx", "raw", "cap", "signed_at", "extra")
+
+    def __init__(self, key, address, nonce, tx, raw, cap, extra=None):
+        self.key = key
+        self.address = address
+        self.nonce = nonce
+        self.tx = tx
+        self.raw = raw
+        self.cap = cap
+        self.signed_at = time.monotonic()
+        self.extra = extra or {}
+
+
+# ======================== Queue ========================
+class PresignQueue:
+    """Signs GM txs ahead of their due time so the due time only costs a broadcast.
+
+    `template` holds the fields that never change (to, data, gas, chainId). `fetch_price()`
+    returns the current base fee (EIP-1559, when `priority` is set) or gas price (legacy).
+    While any tx is queued a background thread keeps that price fresh, so `broadcast()`
+    compares it to the tx's cap without a round trip and re-signs only when the fee
+    environment moved past the cap. `latencies` records call-to-send time per broadcast.
+    """
+
+    def __init__(self, template, fetch_price, send_raw, priority=None, headroom=FEE_HEADROOM,
+                 legacy_buffer=LEGACY_BUFFER, poll_interval=PRICE_POLL_INTERVAL):
+        self.template = dict(template)
+        self.fetch_price = fetch_price
+        self.send_raw = send_raw
+        self.priority = priority
+        self.headroom = headroom
+        self.legacy_buffer = legacy_buffer
+        self.poll_interval = poll_interval
+        self.pending = {}
+        self.price = None
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.latencies = []
+        self.resigned = 0
+
+    def __contains__(self, address):
+        return address in self.pending
+
+    # -------- fees --------
+    def refresh_price(self):
+        try:
+            price = self.fetch_price()
+        except Exception:
+            return self.price
+        if price is not None:
+            self.price = price
+        return self.price
+
+    def _poll(self):
+        while not self.stopped.is_set():
+            if not self.pending:
+                self.wake.wait()
+                self.wake.clear()
+                continue
+            self.refresh_price()
+            self.stopped.wait(self.poll_interval)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._poll, name="presign-fees", daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        self.wake.set()
+
+    # -------- signing --------
+    def sign(self, key, nonce, price):
+        tx = dict(self.template, nonce=nonce)
+        if self.priority is not None:
+            tx["maxPriorityFeePerGas"] = self.priority
+            tx["maxFeePerGas"] = int(price * self.headroom) + self.priority
+            cap = tx["maxFeePerGas"] - self.priority
+        else:
+            tx["gasPrice"] = int(price * self.legacy_buffer)
+            cap = tx["gasPrice"]
+        return tx, raw_bytes(Account.sign_transaction(tx, key)), cap
+
+    def prepare(self, key, address, nonce, extra=None):
+        """Sign `address`'s tx for `nonce` at the current price and queue it"""
+        price = self.refresh_price()
+        if price is None:
+            raise RuntimeError("no fee data to sign with")
+        tx, raw, cap = self.sign(key, nonce, price)
+        item = PresignedTx(key, address, nonce, tx, raw, cap, extra)
+        with self.lock:
+            self.pending[address] = item
+        self.wake.set()
+        return item
+
+    def discard(self, address):
+        with self.lock:
+            return self.pending.pop(address, None)
+
+    # -------- broadcast --------
+    def broadcast(self, address):
+        """Send the queued tx for `address`; returns (tx hash, PresignedTx).
+
+        Raises KeyError when nothing is queued and whatever `send_raw` raises, in which
+        case the entry is dropped so the caller falls back to the normal build-and-send.
+        """
+        started = time.perf_counter()
+        with self.lock:
+            item = self.pending.pop(address)
+        price = self.price
+        if price is not None and price > item.cap:
+            item.tx, item.raw, item.cap = self.sign(item.key, item.nonce, price)
+            self.resigned += 1
+        self.latencies.append(time.perf_counter() - started)
+        return self.send_raw(item.raw), item
+
+    def latency_summary(self):
+        if not self.latencies:
+            return "no presigned broadcasts"
+        ordered = sorted(self.latencies)
+        p50 = ordered[len(ordered) // 2]
+        p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+        return (f"due->broadcast p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms, "
+                f"max {ordered[-1] * 1000:.2f} ms, re-signed {self.resigned}/{len(ordered)}")
+
+
+# ======================== Benchmark ========================
+def benchmark(wallets=200, moved=0.1):
+    """Sign ahead for `wallets` keys, then time the due-time path with a local send.
+
+    A `moved` fraction of broadcasts happen after the base fee jumped past the cap.
+    """
+    sent = []
+    price = [50 * 10**9]
+    queue = PresignQueue({"to": "0x974fBb3C286fF89d62c507204406109a686080cD", "data": "0xc0129d43",
+                          "gas": 30000, "chainId": 57073},
+                         fetch_price=lambda: price[0], send_raw=lambda raw: sent.append(raw) or len(sent),
+                         priority=10**6)
+    accounts = [Account.create() for _ in range(wallets)]
+    started = time.perf_counter()
+    for account in accounts:
+        queue.prepare(account.key, account.address, 0)
+    signing = time.perf_counter() - started
+
+    for n, account in enumerate(accounts):
+        if n % int(1 / moved) == 0:
+            queue.price = int(price[0] * queue.headroom * 1.5)
+        else:
+            queue.price = price[0]
+        queue.broadcast(account.address)
+    print(f"{wallets} wallets pre-signed in {signing:.2f}s; {queue.latency_summary()}")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,270 @@
+import os
+import sys
+import json
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# ======================== Constants ========================
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+KIND_PHASE = "phase"  # our own code: grouping span, its self time is CPU/overhead
+KIND_IO = "io"  # waiting on an RPC / network call
+KIND_SLEEP = "sleep"  # deliberate delay (cooldowns, settle waits)
+CO_COROUTINE = 0x80  # inspect.CO_COROUTINE, without importing inspect at start-up
+
+_current = ContextVar("span", default=None)
+
+
+# ======================== Span ========================
+class Span:
+    __slots__ = ("name", "kind", "trace_id", "span_id", "parent_id", "start_ns", "started", "attributes", "status")
+
+    def __init__(self, name, kind, parent, attributes):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent else None
+        self.start_ns = time.time_ns()
+        self.started = time.perf_counter_ns()
+        self.attributes = attributes
+        self.status = "ok"
+
+    def record(self, end_ns):
+        """One JSONL line, field names after the OTLP JSON span encoding"""
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id or "",
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": end_ns,
+            "status": self.status,
+            "attributes": dict(self.attributes, script=SCRIPT),
+        }
+
+
+# ======================== Tracer ========================
+class Tracer:
+    """Nested spans exported as JSONL, one line per finished span.
+
+    The current span lives in a ContextVar, so nesting follows both threads and asyncio
+    tasks. With no file configured `span()` is a no-op. `nested=True` spans (per-RPC
+    spans) are only recorded inside an existing trace, so background polling does not
+    flood the file.
+    """
+
+    def __init__(self, path=None):
+        self.path = None
+        self.file = None
+        self.lock = threading.Lock()
+        if path:
+            self.configure(path)
+
+    def configure(self, path):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+            self.path = path
+            self.file = open(path, "a", buffering=1) if path else None
+
+    @property
+    def enabled(self):
+        return self.file is not None
+
+    @contextmanager
+    def _span(self, name, kind, parent, attributes):
+        span = Span(name, kind, parent, attributes)
+        token = _current.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.status = "error"
+            span.attributes["error"] = type(e).__name__
+            raise
+        finally:
+            _current.reset(token)
+            end_ns = span.start_ns + (time.perf_counter_ns() - span.started)
+            line = json.dumps(span.record(end_ns), default=str)
+            with self.lock:
+                if self.file is not None:
+                    self.file.write(line + "\n")
+
+    def span(self, name, kind=KIND_PHASE, nested=False, **attributes):
+        if self.file is None:
+            return _NOOP
+        parent = _current.get()
+        if nested and parent is None:
+            return _NOOP
+        return self._span(name, kind, parent, attributes)
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopSpan()
+TRACER = Tracer()
+
+
+def start(path=None):
+    """Enable span export to `path` or TRACE_FILE; returns the path or None"""
+    path = path if path is not None else os.getenv("TRACE_FILE", "").strip()
+    if path:
+        TRACER.configure(path)
+    return path or None
+
+
+def span(name, kind=KIND_PHASE, nested=False, **attributes):
+    return TRACER.span(name, kind, nested, **attributes)
+
+
+def traced(name, kind=KIND_PHASE):
+    """Decorator: run the whole function (sync or async) inside a span"""
+
+    def decorate(func):
+        if getattr(func, "__code__", None) is not None and func.__code__.co_flags & CO_COROUTINE:
+            @functools.wraps(func)
+            async def run_async(*args, **kwargs):
+                with TRACER.span(name, kind):
+                    return await func(*args, **kwargs)
+            return run_async
+
+        @functools.wraps(func)
+        def run(*args, **kwargs):
+            with TRACER.span(name, kind):
+                return func(*args, **kwargs)
+        return run
+
+    return decorate
+
+
+# ======================== Analysis ========================
+def load(path):
+    spans = []
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    spans.append(json.loads(line))
+                except ValueError:
+                    continue  # last line of a killed process may be cut
+    return spans
+
+
+def _duration(span):
+    return (span["endTimeUnixNano"] - span["startTimeUnixNano"]) / 1e9
+
+
+def _tree(spans):
+    by_id = {span["spanId"]: span for span in spans}
+    children = {}
+    for span in spans:
+        children.setdefault(span["parentSpanId"], []).append(span)
+    roots = [span for span in spans if span["parentSpanId"] not in by_id]
+    return by_id, children, roots
+
+
+def _self_time(span, children):
+    return max(0.0, _duration(span) - sum(_duration(child) for child in children.get(span["spanId"], ())))
+
+
+def _split(span, children):
+    """(io, sleep, other) seconds under `span`; io/sleep counted at their outermost span"""
+    if span["kind"] == KIND_IO:
+        return _duration(span), 0.0, 0.0
+    if span["kind"] == KIND_SLEEP:
+        return 0.0, _duration(span), 0.0
+    io, sleep, other = 0.0, 0.0, _self_time(span, children)
+    for child in children.get(span["spanId"], ()):
+        child_io, child_sleep, child_other = _split(child, children)
+        io, sleep, other = io + child_io, sleep + child_sleep, other + child_other
+    return io, sleep, other
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+
+def report(spans, root=None, out=sys.stdout):
+    """Per-root io/sleep/other split, then per-phase latency for the selected roots"""
+    _, children, roots = _tree(spans)
+    if root:
+        roots = [span for span in roots if span["name"] == root]
+    if not roots:
+        out.write("no spans\n")
+        return
+
+    out.write(f"{'root':<24}{'count':>7}{'p50 s':>10}{'p95 s':>10}{'io':>8}{'sleep':>8}{'other':>8}\n")
+    grouped = {}
+    for span in roots:
+        grouped.setdefault(span["name"], []).append(span)
+    for name, group in sorted(grouped.items(), key=lambda item: -sum(map(_duration, item[1]))):
+        durations = [_duration(span) for span in group]
+        io, sleep, other = (sum(part) for part in zip(*(_split(span, children) for span in group)))
+        total = (io + sleep + other) or 1.0
+        out.write(f"{name:<24}{len(group):>7}{_percentile(durations, 0.5):>10.2f}{_percentile(durations, 0.95):>10.2f}"
+                  f"{io / total:>8.0%}{sleep / total:>8.0%}{other / total:>8.0%}\n")
+
+    phases = {}
+    stack = list(roots)
+    while stack:
+        span = stack.pop()
+        phases.setdefault((span["name"], span["kind"]), []).append(span)
+        stack.extend(children.get(span["spanId"], ()))
+    out.write(f"\n{'phase':<32}{'kind':>6}{'count':>7}{'total s':>10}{'self s':>10}{'p50 s':>9}{'p95 s':>9}\n")
+    for (name, kind), group in sorted(phases.items(), key=lambda item: -sum(map(_duration, item[1]))):
+        durations = [_duration(span) for span in group]
+        self_total = sum(_self_time(span, children) for span in group)
+        out.write(f"{name[:31]:<32}{kind:>6}{len(group):>7}{sum(durations):>10.2f}{self_total:>10.2f}"
+                  f"{_percentile(durations, 0.5):>9.3f}{_percentile(durations, 0.95):>9.3f}\n")
+
+
+def folded_stacks(spans):
+    """{"root;child;leaf": self microseconds} for flamegraph.pl / speedscope / inferno"""
+    by_id, children, _ = _tree(spans)
+    stacks = {}
+    for span in spans:
+        names, node = [], span
+        while node is not None:
+            label = node["name"] + ("[sleep]" if node["kind"] == KIND_SLEEP else "")
+            names.append(label.replace(";", ":").replace(" ", "_"))
+            node = by_id.get(node["parentSpanId"])
+        key = ";".join(reversed(names))
+        stacks[key] = stacks.get(key, 0) + int(_self_time(span, children) * 1e6)
+    return stacks
+
+
+# ======================== CLI ========================
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Latency breakdown of a TRACE_FILE run")
+    commands = parser.add_subparsers(dest="command", required=True)
+    report_parser = commands.add_parser("report", help="per-phase latency table")
+    report_parser.add_argument("file")
+    report_parser.add_argument("--root", help="only traces whose root span has this name (swap, vote, gm, deploy)")
+    stacks_parser = commands.add_parser("stacks", help="folded stacks (self time in us) for flamegraph tools")
+    stacks_parser.add_argument("file")
+    args = parser.parse_args(argv)
+
+    spans = load(args.file)
+    if args.command == "report":
+        report(spans, args.root)
+    else:
+        for stack, micros in sorted(folded_stacks(spans).items()):
+            if micros:
+                sys.stdout.write(f"{stack} {micros}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,22 @@
 import os
-import time
+import sys
 import random
 import string
 import json
 import asyncio
 from web3 import Web3
 from web3.middleware import geth_poa_middleware
-from solcx import compile_source, install_solc
+from solc_cache import ARTIFACTS
 from dotenv import load_dotenv
 from datetime import datetime
-
-# solidity compiler version
-try:
-    install_solc("0.8.17")
-except Exception as e:
-    print(
-        f"Warning: Could not install solc 0.8.17, will use available version. Error: {e}"
-    )
+from wallet_registry import WalletRegistry
+from waiter import WAITER, wait_async, sleep_async
+import startup
 
 load_dotenv()
 
+WALLETS = WalletRegistry("private_keys.txt")
+
 
 class Colors:
     HEADER = "\033[95m"
@@ -236,14 +233,8 @@ def generate_random_name(length=10):
 
 def compile_contract(contract_source, contract_name):
     """Compile Solidity contract and return bytecode and ABI."""
-    compiled_sol = compile_source(
-        contract_source, output_values=["abi", "bin"], solc_version="0.8.17"
-    )
-
-    contract_key = f"<stdin>:{contract_name}"
-    contract_interface = compiled_sol[contract_key]
-
-    return {"abi": contract_interface["abi"], "bytecode": contract_interface["bin"]}
+    # Prebuilt by `--build`; only a source missing from the artifact starts solc
+    return ARTIFACTS.get(contract_source, contract_name)
 
 
 async def deploy_contract(w3, contract_type, contract_name, private_key):
@@ -263,7 +254,7 @@ async def deploy_contract(w3, contract_type, contract_name, private_key):
 
     print(f"✅ Compilation {Colors.GREEN}successful{Colors.END}")
 
-    account = w3.eth.account.from_key(private_key)
+    account = WALLETS.account_for(private_key)
     wallet_address = account.address
 
     # Get current balance
@@ -332,7 +323,7 @@ async def deploy_contract(w3, contract_type, contract_name, private_key):
     )
 
     # Sign transaction
-    signed_tx = w3.eth.account.sign_transaction(tx_data, private_key)
+    signed_tx = account.sign_transaction(tx_data)
 
     try:
         # Send transaction
@@ -411,37 +402,20 @@ def save_deployment_records(deployments):
 
 
 async def wait_with_progress(hours, message="Waiting"):
-    """Wait for specified hours with progress updates."""
+    """Wait for specified hours with progress updates; False if stopped."""
     seconds = int(hours * 3600)
-    update_interval = 2025  # progress every 33 menit
-
-    print(
-        f"\n{Colors.YELLOW}⏳ {message} for approximately {hours:.1f} hours...{Colors.END}"
-    )
-
-    start_time = time.time()
-    end_time = start_time + seconds
 
-    while time.time() < end_time:
-        elapsed = time.time() - start_time
-        remaining = end_time - time.time()
+    print(f"\n{Colors.YELLOW}⏳ {message} for approximately {hours:.1f} hours...{Colors.END}")
 
-        if remaining <= 0:
-            break
-
-        elapsed_hours = elapsed / 3600
-        remaining_hours = remaining / 3600
-        progress_percent = (elapsed / seconds) * 100
-
-        print(
-            f"⌛ Progress: {Colors.YELLOW}{progress_percent:.1f}%{Colors.END} | Elapsed: {Colors.YELLOW}{elapsed_hours:.1f}h{Colors.END} | Remaining: {Colors.YELLOW}{remaining_hours:.1f}h{Colors.END}",
-            end="\r",
-        )
-
-        # Sleep for update interval
-        await asyncio.sleep(min(update_interval, remaining))
+    def render(remaining, elapsed, total):
+        progress_percent = (elapsed / total) * 100 if total else 100.0
+        return (f"⌛ Progress: {Colors.YELLOW}{progress_percent:.1f}%{Colors.END} | Elapsed: {Colors.YELLOW}{elapsed / 3600:.1f}h{Colors.END} "
+                f"| Remaining: {Colors.YELLOW}{remaining / 3600:.1f}h{Colors.END}")
 
+    if not await wait_async(seconds, render):
+        return False
     print(f"✅ Wait a {Colors.GREEN}completed! bang{Colors.END}")
+    return True
 
 
 # Bang welcome banner
@@ -464,41 +438,27 @@ def print_welcome_message():
 
 
 def load_private_keys():
-    private_keys = []
-
     # Load from env
     env_private_key = os.getenv("PRIVATE_KEY")
     if env_private_key:
-        private_keys.append(env_private_key.strip())
+        WALLETS.add(env_private_key)
 
     # Try to load from private_keys.txt
     try:
-        with open("private_keys.txt", "r") as file:
-            keys = [
-                line.strip()
-                for line in file.readlines()
-                if line.strip() and not line.strip().startswith("#")
-            ]
-            private_keys.extend(keys)
+        WALLETS.add_file("private_keys.txt")
     except Exception as e:
         print(f" Note: private_keys.txt not found or couldn't be read: {e}")
 
-    if not private_keys:
+    if not len(WALLETS):
         raise Exception("No private keys found in .env or private_keys.txt")
 
+    WALLETS.save_index()
     print(
-        f"📸 Loaded {len(private_keys)} EVM wallet {Colors.GREEN}Successfully{Colors.END}"
+        f"📸 Loaded {len(WALLETS)} EVM wallet {Colors.GREEN}Successfully{Colors.END}"
     )
 
-    # Remove duplicates but preserve order
-    seen = set()
-    unique_keys = []
-    for key in private_keys:
-        if key not in seen:
-            seen.add(key)
-            unique_keys.append(key)
-
-    return unique_keys
+    # Registry keeps file order and drops duplicates
+    return WALLETS.keys()
 
 
 def get_contract_types_for_deployment(num_contracts=3):
@@ -545,6 +505,9 @@ async def main():
                 print(
                     f"✅ Successfully connected to RPC {Colors.GREEN}{rpc_url}{Colors.END}"
                 )
+                first_rpc = startup.mark()
+                if first_rpc:
+                    print(first_rpc)
                 break
         except Exception as e:
             print(
@@ -561,7 +524,7 @@ async def main():
 
     for idx, private_key in enumerate(private_keys):
         try:
-            account = w3.eth.account.from_key(private_key)
+            account = WALLETS.account_for(private_key)
             wallet_address = account.address
 
             balance = w3.eth.get_balance(wallet_address)
@@ -615,7 +578,7 @@ async def main():
     try:
         for i in range(13, 0, -1):
             print(f"{Colors.YELLOW} Starting in {i} seconds...{Colors.END}", end="\r")
-            await asyncio.sleep(1)
+            await sleep_async(1)
         print(f"{Colors.GREEN} Starting now!{Colors.END}")
     except KeyboardInterrupt:
         print(f"{Colors.RED} Deployment cancelled by user.{Colors.END}")
@@ -639,7 +602,7 @@ async def main():
 
         # Deploy one contract for each wallet in this cycle
         for wallet_idx, wallet_key in enumerate(valid_wallets):
-            wallet_account = w3.eth.account.from_key(wallet_key)
+            wallet_account = WALLETS.account_for(wallet_key)
             wallet_address = wallet_account.address
 
             contract_type = contract_types_per_wallet[wallet_key][cycle]
@@ -681,16 +644,18 @@ async def main():
                     print(
                         f"{Colors.YELLOW}⏳ Short delay wait in {wait_seconds} seconds before, switch next wallet deployment...{Colors.END}"
                     )
-                    await asyncio.sleep(wait_seconds)
+                    await sleep_async(wait_seconds)
 
         # But only if this is not the last cycle wait 8 hours
         if cycle < total_contracts_per_wallet - 1:
             # Random wait time between 7-8 hours
             wait_hours = random.uniform(7.0, 8.0)
-            await wait_with_progress(
+            if not await wait_with_progress(
                 wait_hours,
                 f"Completed cycle {cycle+1}/{total_contracts_per_wallet}. Waiting for next cycle",
-            )
+            ):
+                print(f"{Colors.YELLOW}Stopped, skipping remaining cycles.{Colors.END}")
+                break
 
     if deployments:
         save_deployment_records(deployments)
@@ -705,6 +670,11 @@ async def main():
 
 
 if __name__ == "__main__":
+    if "--build" in sys.argv[1:]:
+        # Out of band (setup / before PM2 start): install solc and precompile every contract
+        ARTIFACTS.build(CONTRACTS)
+        sys.exit(0)
+    WAITER.install_signal_handlers()
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
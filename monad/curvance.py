@@ -1,12 +1,15 @@
 import os
 import random
-import time
 from datetime import datetime
 from dotenv import load_dotenv
 from web3 import Web3
 from eth_account import Account
 import colorama
 from colorama import Fore, Style
+from waiter import sleep
+import memwatch
+import preflight
+from preflight import PREFLIGHT
 
 colorama.init(autoreset=True)
 
@@ -83,7 +86,7 @@ def connect_rpc():
                 Logger.error(f"🆙 Failed to connect RPC: {url}: {str(e)}")
         
         Logger.warning("🔁 Retrying RPC connection in 30 seconds...")
-        time.sleep(30)
+        sleep(30)
 
 def load_private_keys():
     load_dotenv()
@@ -175,6 +178,16 @@ class PumpBot:
         gas_type = "EIP-1559" if self.use_eip1559 else "Legacy"
         Logger.info(f" ⛽️ Using {gas_type} {Fore.MAGENTA}gas{Fore.RESET} pricing")
         Logger.info(f" 👛 Will rotate through {Fore.GREEN}{len(self.private_keys)}{Fore.RESET} wallets before random long delay")
+        Logger.info(f" 🧠 Memory watchdog: {memwatch.start()}")
+        Logger.info(f" 🧪 Preflight: {preflight.start()}")
+
+        # Resume the wallet rotation where a memory restart left it
+        state = memwatch.restore()
+        if state:
+            self.current_key_index = state.get("current_key_index", 0) % len(self.private_keys)
+            self.batch_count = state.get("batch_count", self.batch_count)
+            self.total_gas_used = state.get("total_gas_used", self.total_gas_used)
+            Logger.info(f" ♻️ Restored after memory restart: wallet {Fore.YELLOW}#{self.current_key_index + 1}{Fore.RESET}, batch {Fore.GREEN}#{self.batch_count}{Fore.RESET}")
 
     def switch_wallet(self):
         old_index = self.current_key_index
@@ -255,6 +268,15 @@ class PumpBot:
             
             tx = self.contract.functions.pump().build_transaction(tx_params)
 
+            # Simulate pump() at the pending block first: a reverting call is not worth GAS_LIMIT
+            verdict = PREFLIGHT.check(self.w3, {**tx, 'from': account.address})
+            if verdict.dropped:
+                Logger.error(f" 🧪 Preflight: pump() would revert ({verdict.reason}), not sent")
+                return False
+            if verdict.replanned:
+                Logger.warning(f" 🧪 Preflight: gas limit {tx['gas']} too low, raised to {Fore.YELLOW}{verdict.gas}{Fore.RESET}")
+                tx['gas'] = verdict.gas
+
             # Sign and send
             signed_tx = self.w3.eth.account.sign_transaction(tx, priv_key)
             tx_hash = self.w3.eth.send_raw_transaction(signed_tx.rawTransaction)
@@ -313,13 +335,14 @@ class PumpBot:
                         intra_delay = random.randint(41, 69)
                         minutes, seconds = divmod(intra_delay, 60)
                         Logger.warning(f" 🔮 Sub-batch get random rotating in --> {Fore.CYAN} {minutes} mins {seconds} secs{Fore.RESET}")
-                        time.sleep(intra_delay)
+                        sleep(intra_delay)
                     else:
-                        time.sleep(10)
+                        sleep(10)
                 
                 # Batch end
                 Logger.warning(f" ✅ Batch {Fore.GREEN}#{self.batch_count}{Fore.RESET} for wallet {Fore.GREEN}#{self.current_key_index + 1}{Fore.RESET} completed with {Fore.GREEN}{successful_txs}/{self.current_batch_size} successful{Fore.RESET} TxID")
                 
+                Logger.gas_report(f" 🧪 Preflight: {preflight.summary()}")
                 cycle_completed = self.switch_wallet()
                 # Update batch counter random 6-14tx per-batch
                 self.batch_count += 1
@@ -337,18 +360,25 @@ class PumpBot:
                     minutes, seconds = divmod(batch_delay, 60)
                     Logger.warning(f" ✅ Main-batch has {Fore.GREEN}Completed!!{Fore.RESET} Next sub-batch random rotating in -> {Fore.GREEN} {minutes} mins {seconds} secs{Fore.RESET}")
                     Logger.gas_report(f" 💲 Total gas used so far: {Fore.YELLOW} {self.total_gas_used:.8f} MON{Fore.RESET}")
-                    time.sleep(batch_delay)
+                    sleep(batch_delay)
                 else:
                     short_delay = random.randint(13, 35) # delay switch wallet 13s-35s
                     Logger.warning(f" 🔁 Moving to next wallet in {Fore.YELLOW}{short_delay}{Fore.RESET} seconds")
-                    time.sleep(short_delay)
+                    sleep(short_delay)
+
+                # After the delay, so a restart never skips the pause between batches
+                memwatch.checkpoint({
+                    "current_key_index": self.current_key_index,
+                    "batch_count": self.batch_count,
+                    "total_gas_used": self.total_gas_used,
+                }, f"batch {self.batch_count - 1}")
 
             except KeyboardInterrupt:
                 Logger.info(f" ❌ {Fore.YELLOW}Curvance Pump4Fun has been stopped by. Consider run at PM2 background.")
                 break
             except Exception as e:
                 Logger.error(f" ⭕️ Unexpected error in run loop: {str(e)}")
-                time.sleep(60)
+                sleep(60)
 
 if __name__ == "__main__":
     print_banner()
@@ -0,0 +1,287 @@
+import sys
+import json
+import time
+import random
+import threading
+
+# ======================== Constants ========================
+HEAD_TTL = 2.0  # detik; batas umur data "head" kalau block baru belum terlihat
+# Tidak pernah berubah selama endpoint-nya sama
+STATIC_METHODS = {"eth_chainId", "net_version"}
+# Berlaku untuk head block saat ini saja
+HEAD_METHODS = {"eth_blockNumber", "eth_gasPrice", "eth_maxPriorityFeePerGas", "eth_feeHistory",
+                "eth_getBlockByNumber", "web3_clientVersion"}
+# Nonce, saldo, eth_call & estimateGas sengaja tidak di-cache: berubah karena tx kita sendiri
+
+
+def _freeze(params):
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _block_number(value):
+    if value is None:
+        return None
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+# ======================== Stats ========================
+class MethodStats:
+    __slots__ = ("hits", "shared", "upstream")
+
+    def __init__(self):
+        self.hits = 0  # dijawab dari cache
+        self.shared = 0  # menumpang request identik yang sedang jalan
+        self.upstream = 0  # benar-benar dikirim ke RPC
+
+
+class _Flight:
+    """One upstream request that identical concurrent callers wait on"""
+
+    __slots__ = ("done", "response", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+class _Entry:
+    __slots__ = ("response", "stored_at", "head")
+
+    def __init__(self, response, stored_at, head):
+        self.response = response
+        self.stored_at = stored_at
+        self.head = head
+
+
+# ======================== Read Cache ========================
+class ReadCache:
+    """Singleflight plus a head-scoped cache for the chain reads every wallet action repeats.
+
+    Identical in-flight calls (same endpoint, method and params) share one upstream request.
+    Static answers (chain id) are kept per endpoint; head answers (gas price, latest block,
+    block number, client version probe) are kept until a newer block shows up in a
+    `eth_blockNumber` / latest-block response, or `head_ttl` passes without seeing one.
+    Error responses are shared with waiting callers but never stored.
+    """
+
+    def __init__(self, head_ttl=HEAD_TTL, clock=time.monotonic):
+        self.head_ttl = head_ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.flights = {}
+        self.heads = {}  # url -> nomor block tertinggi yang pernah terlihat
+        self.stats = {}
+
+    def configure(self, head_ttl=None):
+        if head_ttl is not None:
+            self.head_ttl = float(head_ttl)
+
+    @staticmethod
+    def scope(method, params):
+        """"static", "head" or None (not cacheable)"""
+        if method in STATIC_METHODS:
+            return "static"
+        if method not in HEAD_METHODS:
+            return None
+        if method == "eth_getBlockByNumber" and (not params or params[0] != "latest"):
+            return None
+        return "head"
+
+    def _stats(self, method):
+        stats = self.stats.get(method)
+        if stats is None:
+            stats = self.stats[method] = MethodStats()
+        return stats
+
+    def _fresh(self, url, entry, scope, now):
+        if scope == "static":
+            return True
+        return entry.head == self.heads.get(url) and now - entry.stored_at < self.head_ttl
+
+    def _observe(self, url, method, response):
+        """Move the endpoint's head forward when a response reveals a newer block"""
+        result = response.get("result") if isinstance(response, dict) else None
+        if method == "eth_blockNumber":
+            number = _block_number(result)
+        elif method == "eth_getBlockByNumber" and result:
+            number = _block_number(result.get("number"))
+        else:
+            return
+        if number is not None and number > self.heads.get(url, -1):
+            self.heads[url] = number
+            # Block baru: buang semua jawaban head lama untuk endpoint ini
+            for key in [key for key in self.entries if key[0] == url and key[3] == "head"]:
+                del self.entries[key]
+
+    def request(self, url, method, params, make_request):
+        scope = self.scope(method, params)
+        if scope is None:
+            return make_request(method, params)
+        key = (url, method, _freeze(params), scope)
+        with self.lock:
+            stats = self._stats(method)
+            entry = self.entries.get(key)
+            if entry is not None and self._fresh(url, entry, scope, self.clock()):
+                stats.hits += 1
+                return entry.response
+            flight = self.flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self.flights[key] = _Flight()
+                stats.upstream += 1
+            else:
+                stats.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.response
+
+        try:
+            flight.response = make_request(method, params)
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self.lock:
+                self.flights.pop(key, None)
+                response = flight.response
+                if flight.error is None and isinstance(response, dict) and "error" not in response:
+                    self._observe(url, method, response)
+                    self.entries[key] = _Entry(response, self.clock(), self.heads.get(url))
+            flight.done.set()
+        return flight.response
+
+    def summary(self):
+        with self.lock:
+            items = sorted(self.stats.items(), key=lambda item: -(item[1].hits + item[1].shared + item[1].upstream))
+            upstream = sum(stats.upstream for _, stats in items)
+            total = upstream + sum(stats.hits + stats.shared for _, stats in items)
+        if not total:
+            return "-"
+        parts = [f"{method} {stats.hits + stats.shared}/{stats.hits + stats.shared + stats.upstream} cache"
+                 for method, stats in items[:4]]
+        return f"{', '.join(parts)}; {total - upstream}/{total} cached ({(total - upstream) / total:.0%})"
+
+
+CACHE = ReadCache()
+
+
+# ======================== web3 integration ========================
+def cache_middleware(cache=None):
+    """web3 v6 middleware in front of the provider (and the rate limiter, when added after it)"""
+    cache = cache or CACHE
+
+    def middleware(make_request, w3):
+        url = w3.provider.endpoint_uri
+
+        def request(method, params):
+            return cache.request(url, method, params, make_request)
+
+        return request
+
+    return middleware
+
+
+def cached_web3(w3, cache=None):
+    """Serve repeated chain reads of `w3` from the shared cache; returns `w3`.
+
+    `add()` puts the cache in the outermost layer, so a hit never spends a rate-limit token.
+    """
+    w3.middleware_onion.add(cache_middleware(cache), "read_cache")
+    return w3
+
+
+def is_connected(w3):
+    """`w3.is_connected()` through the middleware stack, so repeated probes within a block are free.
+
+    web3's own is_connected() calls the provider directly and bypasses every middleware.
+    """
+    try:
+        w3.manager.request_blocking("web3_clientVersion", [])
+        return True
+    except Exception:
+        return False
+
+
+# ======================== Benchmark ========================
+class _Provider:
+    """RPC on a virtual clock: new block every `block_time`, `latency` per call"""
+
+    def __init__(self, now, block_time, latency):
+        self.now = now
+        self.block_time = block_time
+        self.latency = latency
+        self.calls = 0
+        self.endpoint_uri = "https://rpc.example"
+
+    def make_request(self, method, params):
+        self.calls += 1
+        self.now[0] += self.latency
+        head = int(self.now[0] // self.block_time)
+        result = {
+            "eth_chainId": "0x40d9",
+            "eth_blockNumber": hex(head),
+            "eth_gasPrice": hex(10**9 + head),
+            "eth_getBlockByNumber": {"number": hex(head), "baseFeePerGas": hex(10**9)},
+            "web3_clientVersion": "bench/1.0",
+        }.get(method, "0x1")
+        return {"jsonrpc": "2.0", "id": self.calls, "result": result}
+
+
+def _wallet_action(call):
+    """Reads a stake/swap makes in the scripts: probe, gas, latest block, chain id (x2), nonce, send"""
+    call("web3_clientVersion", [])
+    call("eth_gasPrice", [])
+    call("eth_getBlockByNumber", ["latest", False])
+    call("eth_chainId", [])
+    call("eth_getTransactionCount", ["0xabc", "pending"])
+    call("eth_chainId", [])
+    call("eth_sendRawTransaction", ["0x00"])
+    call("eth_blockNumber", [])
+
+
+def benchmark(actions=500, block_time=2.0, seed=3):
+    """RPC calls per wallet action with and without the cache, plus a singleflight burst"""
+    rng = random.Random(seed)
+    for label, cached in (("tanpa cache", False), ("read cache ", True)):
+        now = [0.0]
+        provider = _Provider(now, block_time, 0.05)
+        cache = ReadCache(clock=lambda: now[0])
+        url = provider.endpoint_uri
+        if cached:
+            def call(method, params):
+                return cache.request(url, method, params, provider.make_request)
+        else:
+            call = provider.make_request
+        for _ in range(actions):
+            _wallet_action(call)
+            now[0] += rng.uniform(0.0, 1.5)  # jeda antar wallet
+        line = f"{label}: {provider.calls / actions:.2f} RPC call per aksi wallet"
+        if cached:
+            line += f"; {cache.summary()}"
+        print(line)
+
+    # 50 thread minta gas price bersamaan: satu request upstream
+    calls = []
+    cache = ReadCache()
+
+    def slow(method, params):
+        calls.append(method)
+        time.sleep(0.05)
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x3b9aca00"}
+
+    threads = [threading.Thread(target=cache.request, args=("https://rpc.example", "eth_gasPrice", [], slow))
+               for _ in range(50)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    print(f"singleflight: 50 eth_gasPrice bersamaan -> {len(calls)} request upstream")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,182 @@
+"""Run VoteScheduler on a virtual clock against a local fake RPC.
+
+    python simulate.py [--hours 24] [--wallets 50] [--speed 1000] [--seed 1]
+
+Every wait, sleep and timestamp in voting.py goes through waiter.py, so switching the
+waiter to a ScaledClock makes a 24h schedule finish in ~90 real seconds at 1000x.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import rlp
+from eth_account import Account
+from eth_utils import keccak
+from hexbytes import HexBytes
+try:
+    from eth_account._utils.typed_transactions import TypedTransaction  # eth-account < 0.13
+except ImportError:
+    from eth_account.typed_transactions import TypedTransaction
+
+from waiter import WAITER, ScaledClock, use_clock, now
+
+# ======================== Fake chain ========================
+CHAIN_ID = 10143
+BASE_FEE = 50 * 10**9
+PRIORITY_FEE = 2 * 10**6
+GAS_USED = 26_000  # Vote() on the real contract
+START_BALANCE = 10**18
+
+
+class FakeChain:
+    """Just enough JSON-RPC state for the voting runner: nonces, balances, receipts"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.nonces = {}
+        self.balances = {}
+        self.receipts = {}
+        self.txs = []  # (virtual timestamp, sender, gas fee in wei)
+        self.block = 1
+
+    def _send(self, raw_hex):
+        raw = bytes.fromhex(raw_hex[2:])
+        sender = Account.recover_transaction(raw)
+        if raw[0] <= 0x7f:
+            tx = TypedTransaction.from_bytes(HexBytes(raw)).as_dict()
+            price = min(tx["maxFeePerGas"], BASE_FEE + tx["maxPriorityFeePerGas"])
+            gas, nonce = tx["gas"], tx["nonce"]
+        else:
+            nonce, price, gas = (int.from_bytes(field, "big") for field in rlp.decode(raw)[:3])
+        gas_used = min(gas, GAS_USED)
+        fee = gas_used * price
+        tx_hash = "0x" + keccak(raw).hex()
+        with self.lock:
+            if nonce != self.nonces.get(sender, 0):
+                raise ValueError("nonce too low")
+            self.nonces[sender] = nonce + 1
+            self.balances[sender] = self.balances.get(sender, START_BALANCE) - fee
+            self.block += 1
+            self.txs.append((now(), sender, fee))
+            self.receipts[tx_hash] = {
+                "transactionHash": tx_hash, "transactionIndex": "0x0", "blockNumber": hex(self.block),
+                "blockHash": "0x" + os.urandom(32).hex(), "from": sender, "to": None,
+                "cumulativeGasUsed": hex(gas_used), "gasUsed": hex(gas_used),
+                "effectiveGasPrice": hex(price), "contractAddress": None, "logs": [],
+                "logsBloom": "0x" + "00" * 256, "status": "0x1", "type": "0x2",
+            }
+        return tx_hash
+
+    def call(self, method, params):
+        if method == "eth_chainId":
+            return hex(CHAIN_ID)
+        if method == "eth_blockNumber":
+            return hex(self.block)
+        if method == "eth_gasPrice":
+            return hex(BASE_FEE + PRIORITY_FEE)
+        if method == "eth_maxPriorityFeePerGas":
+            return hex(PRIORITY_FEE)
+        if method == "eth_feeHistory":
+            return {"oldestBlock": hex(self.block), "baseFeePerGas": [hex(BASE_FEE)] * 2,
+                    "gasUsedRatio": [0.5], "reward": [[hex(PRIORITY_FEE)]]}
+        if method == "eth_getBalance":
+            return hex(self.balances.get(params[0], START_BALANCE))
+        if method == "eth_getTransactionCount":
+            return hex(self.nonces.get(params[0], 0))
+        if method == "eth_estimateGas":
+            return hex(GAS_USED)
+        if method == "eth_sendRawTransaction":
+            return self._send(params[0])
+        if method == "eth_getTransactionReceipt":
+            return self.receipts.get(params[0])
+        raise NotImplementedError(method)
+
+
+def serve(chain):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            response = {"jsonrpc": "2.0", "id": request.get("id")}
+            try:
+                response["result"] = chain.call(request["method"], request.get("params", []))
+            except Exception as e:
+                response["error"] = {"code": -32000, "message": str(e)}
+            body = json.dumps(response).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# ======================== Simulation ========================
+def simulate(hours=24.0, wallets=50, speed=1000.0, seed=None):
+    chain = FakeChain()
+    server = serve(chain)
+    key_file = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False)
+    key_file.write("\n".join(Account.create().key.hex() for _ in range(wallets)))
+    key_file.close()
+    if seed is not None:
+        os.environ["TIMELINE_SEED"] = str(seed)
+
+    import voting
+    voting.CONFIG["RPC_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    voting.CONFIG["PRIVATE_KEY_FILE"] = key_file.name
+    voting.CONFIG["ENV_FILE"] = os.path.join(tempfile.gettempdir(), "simulate-no.env")
+
+    clock = ScaledClock(speed)
+    use_clock(clock)
+    scheduler = voting.VoteScheduler()
+    scheduler.initialize()
+
+    def run():
+        while not WAITER.stopping:
+            scheduler.execute_cycle()
+
+    runner = threading.Thread(target=run, name="simulated-runner", daemon=True)
+    runner.start()
+    runner.join(hours * 3600 / speed)
+    WAITER.interrupt()
+    runner.join(5)
+    server.shutdown()
+    os.remove(key_file.name)
+
+    days = clock.elapsed() / 86400
+    senders = {sender for _, sender, _ in chain.txs}
+    gas_spent = sum(fee for _, _, fee in chain.txs) / 10**18
+    report = {
+        "simulated_hours": clock.elapsed() / 3600,
+        "tx_per_day": len(chain.txs) / days if days else 0.0,
+        "wallet_coverage": len(senders) / wallets,
+        "gas_spent_mon": gas_spent,
+        "cycles": scheduler.cycle_count - 1,
+        "worst_queue_lag_s": scheduler.max_queue_lag,
+    }
+    print(f"\nSimulasi {report['simulated_hours']:.1f} jam virtual ({speed:.0f}x): "
+          f"{len(chain.txs)} tx = {report['tx_per_day']:.0f} tx/hari, "
+          f"coverage {len(senders)}/{wallets} wallet ({report['wallet_coverage']:.0%}), "
+          f"gas {gas_spent:.6f} MON, {report['cycles']} siklus selesai, "
+          f"antrian terburuk {report['worst_queue_lag_s']:.0f}s")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--hours", type=float, default=24.0)
+    parser.add_argument("--wallets", type=int, default=50)
+    parser.add_argument("--speed", type=float, default=1000.0)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    simulate(args.hours, args.wallets, args.speed, args.seed)
+    sys.exit(0)
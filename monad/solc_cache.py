@@ -0,0 +1,99 @@
+import os
+import sys
+import json
+import time
+import hashlib
+import threading
+
+# ======================== Constants ========================
+SOLC_VERSION = "0.8.17"
+ARTIFACT_FILE = "contracts.build.json"
+
+
+def artifact_key(name, source, version=SOLC_VERSION):
+    """Contract name plus a hash of compiler version and source: an edited contract is recompiled"""
+    digest = hashlib.sha256(f"{version}\0{source}".encode()).hexdigest()[:16]
+    return f"{name}:{digest}"
+
+
+def ensure_solc(version=SOLC_VERSION):
+    """Import solcx and install `version` only when it is missing (network download)"""
+    import solcx
+
+    if not any(str(installed) == version for installed in solcx.get_installed_solc_versions()):
+        solcx.install_solc(version)
+    return solcx
+
+
+# ======================== Artifacts ========================
+class ContractArtifacts:
+    """Compiled ABI + bytecode per contract source, kept in a JSON artifact next to the script.
+
+    `python deploy.py --build` fills the artifact once (installing solc if needed), so a
+    normal start never imports solcx or spawns the compiler. A source that is missing
+    from the artifact is compiled on first use and written back.
+    """
+
+    def __init__(self, path=ARTIFACT_FILE, version=SOLC_VERSION):
+        self.path = path
+        self.version = version
+        self.lock = threading.Lock()
+        self.entries = None
+        self.loaded = 0
+        self.compiled = 0
+
+    def _load(self):
+        if self.entries is None:
+            try:
+                with open(self.path) as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+        return self.entries
+
+    def _save(self):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def _compile(self, source, name):
+        solcx = ensure_solc(self.version)
+        compiled = solcx.compile_source(source, output_values=["abi", "bin"], solc_version=self.version)
+        interface = compiled[f"<stdin>:{name}"]
+        return {"abi": interface["abi"], "bytecode": interface["bin"]}
+
+    def get(self, source, name):
+        """{"abi", "bytecode"} for contract `name` in `source`"""
+        key = artifact_key(name, source, self.version)
+        with self.lock:
+            entry = self._load().get(key)
+            if entry is not None:
+                self.loaded += 1
+                return entry
+        entry = self._compile(source, name)
+        with self.lock:
+            self.entries[key] = entry
+            self.compiled += 1
+            try:
+                self._save()
+            except OSError:
+                pass  # read-only checkout: keep the result in memory
+        return entry
+
+    def build(self, contracts, out=sys.stdout):
+        """Compile every {name: source} not yet in the artifact; returns the number compiled"""
+        started = time.perf_counter()
+        before = self.compiled
+        for name, source in contracts.items():
+            self.get(source, name)
+        built = self.compiled - before
+        out.write(f"{len(contracts)} contracts in {self.path}: {built} compiled, "
+                  f"{len(contracts) - built} up to date ({time.perf_counter() - started:.1f}s)\n")
+        return built
+
+    def summary(self):
+        return f"{self.loaded} from {self.path}, {self.compiled} compiled"
+
+
+ARTIFACTS = ContractArtifacts()
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import subprocess
+
+# ======================== Constants ========================
+TARGET_MS = 300  # budget from process start to the first RPC call
+MARKER = "-- startup.py: module body --"
+_IMPORTED = time.perf_counter()
+_marked = set()
+
+
+def process_age():
+    """Seconds since this process started (Linux /proc), else since this module was imported"""
+    try:
+        with open("/proc/self/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+        return uptime - int(fields[19]) / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError):
+        return time.perf_counter() - _IMPORTED
+
+
+def mark(label="first RPC"):
+    """One-shot "label after N ms" line; None when `label` was already reported"""
+    if label in _marked:
+        return None
+    _marked.add(label)
+    elapsed = process_age() * 1000
+    verdict = "within" if elapsed <= TARGET_MS else "over"
+    return f"⏱️ {label} {elapsed:.0f} ms after start ({verdict} the {TARGET_MS} ms target)"
+
+
+# ======================== Import profile ========================
+def import_profile(script, python=sys.executable):
+    """Run the module body of `script` (not its __main__ block) under -X importtime.
+
+    Returns (rows, wall seconds); rows are (cumulative us, self us, depth, module).
+    """
+    path = os.path.abspath(script)
+    # Everything imported before the marker is interpreter start-up and the runpy harness
+    code = (f"import runpy, pkgutil, sys; sys.argv = [{path!r}]; sys.stderr.write({MARKER!r} + '\\n'); "
+            f"runpy.run_path({path!r}, run_name='__startup__')")
+    started = time.perf_counter()
+    result = subprocess.run([python, "-X", "importtime", "-c", code], cwd=os.path.dirname(path),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    wall = time.perf_counter() - started
+    rows = []
+    lines = result.stderr.splitlines()
+    if MARKER in lines:
+        lines = lines[lines.index(MARKER) + 1:]
+    for line in lines:
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        if not own.strip().isdigit():
+            continue  # header line
+        # "| name" at the top level, two more spaces per nesting level
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(cumulative), int(own), depth, name.strip()))
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr.splitlines()[-1] + "\n" if result.stderr else "")
+    return rows, wall
+
+
+def report(script, top=15, out=sys.stdout):
+    rows, wall = import_profile(script)
+    roots = sorted((row for row in rows if row[2] == 0), reverse=True)
+    total = sum(row[0] for row in roots)
+    out.write(f"{'top-level import':<40}{'cumul ms':>10}{'self ms':>10}\n")
+    for cumulative, own, _, name in roots[:top]:
+        out.write(f"{name[:39]:<40}{cumulative / 1000:>10.1f}{own / 1000:>10.1f}\n")
+    out.write(f"\nimports {total / 1000:.0f} ms of {wall * 1000:.0f} ms to run the module body "
+              f"(target to first RPC: {TARGET_MS} ms)\n")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        sys.exit("usage: python startup.py <script.py> [top]")
+    report(sys.argv[1], *[int(arg) for arg in sys.argv[2:3]])
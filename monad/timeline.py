@@ -0,0 +1,147 @@
+import sys
+import time
+import heapq
+import numpy as np
+
+# ======================== Defaults ========================
+# Same keys as CONFIG in voting.py so the scheduler can pass its CONFIG straight in
+DEFAULTS = {
+    "WALLET_SWITCH_DELAY_MEAN": 88,
+    "WALLET_SWITCH_DELAY_STD": 38,
+    "WALLET_SWITCH_DELAY_MIN": 68,
+    "WALLET_SWITCH_DELAY_MAX": 248,
+    "CYCLE_COMPLETE_DELAY_MEAN": 2000,
+    "CYCLE_COMPLETE_DELAY_STD": 600,
+    "CYCLE_COMPLETE_DELAY_MIN": 1200,
+    "CYCLE_COMPLETE_DELAY_MAX": 3600,
+    "NIGHT_TIME_START_HOUR": 3,
+    "NIGHT_TIME_END_HOUR": 8,
+    "NIGHT_TIME_DELAY_FACTOR": 2.0,
+    "SKIP_WALLET_PROBABILITY": 0.04,
+    "FAST_TX_PROBABILITY": 0.08,
+}
+DECISION_DELAY_RANGE = (2.0, 5.0)  # "human decision time" before each wallet
+NIGHT_PASSES = 2  # re-evaluate night scaling once the scaled offsets are known
+
+
+# ======================== Timeline ========================
+class CycleTimeline:
+    """One cycle planned up front, as arrays in execution order.
+
+    wallets[i] is the account index acting i-th, offsets[i] its start in seconds from the
+    cycle start, gaps[i] the (night scaled) pause that follows it, the last one being the
+    cycle-complete break. `end` is when the next cycle may start.
+    """
+
+    __slots__ = ("start", "wallets", "skipped", "rushed", "offsets", "gaps", "night", "end")
+
+    def __init__(self, start, wallets, skipped, rushed, offsets, gaps, night):
+        self.start = start
+        self.wallets = wallets
+        self.skipped = skipped
+        self.rushed = rushed
+        self.offsets = offsets
+        self.gaps = gaps
+        self.night = night
+        self.end = float(offsets[-1] + gaps[-1]) if len(offsets) else 0.0
+
+    def __len__(self):
+        return len(self.wallets)
+
+
+def is_night(timestamps, config=DEFAULTS):
+    """Vectorized UTC night check for epoch seconds"""
+    hours = (np.asarray(timestamps) // 3600) % 24
+    return (hours >= config["NIGHT_TIME_START_HOUR"]) & (hours < config["NIGHT_TIME_END_HOUR"])
+
+
+def _clipped_gauss(rng, mean, std, low, high, size=None):
+    return np.clip(np.rint(rng.normal(mean, std, size)), low, high)
+
+
+def plan_cycle(wallet_count, start, seed=None, config=DEFAULTS):
+    """Skip mask, rushed flags and every delay of a cycle in a few vector ops.
+
+    The same seed and start time always give the same timeline.
+    """
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(wallet_count)
+    skip = rng.random(wallet_count) < config["SKIP_WALLET_PROBABILITY"]
+    rushed = rng.random(wallet_count) < config["FAST_TX_PROBABILITY"]
+    decision = rng.uniform(*DECISION_DELAY_RANGE, wallet_count)
+    gaps = _clipped_gauss(rng, config["WALLET_SWITCH_DELAY_MEAN"], config["WALLET_SWITCH_DELAY_STD"],
+                          config["WALLET_SWITCH_DELAY_MIN"], config["WALLET_SWITCH_DELAY_MAX"], wallet_count)
+    cycle_gap = _clipped_gauss(rng, config["CYCLE_COMPLETE_DELAY_MEAN"], config["CYCLE_COMPLETE_DELAY_STD"],
+                               config["CYCLE_COMPLETE_DELAY_MIN"], config["CYCLE_COMPLETE_DELAY_MAX"])
+
+    keep = ~skip
+    wallets, rushed, decision, gaps = order[keep], rushed[keep], decision[keep], gaps[keep]
+    if len(gaps):
+        gaps[-1] = cycle_gap
+
+    # Action i starts after every earlier decision + gap and its own decision time.
+    # A gap is night scaled by the hour it starts in, which depends on earlier scaled gaps,
+    # so the scaling is re-evaluated NIGHT_PASSES times instead of walking wallet by wallet.
+    scaled = gaps
+    night = np.zeros(len(gaps), dtype=bool)
+    for _ in range(NIGHT_PASSES):
+        offsets = np.cumsum(decision + np.concatenate(([0.0], scaled[:-1])))
+        night = is_night(start + offsets, config)
+        scaled = np.where(night, gaps * config["NIGHT_TIME_DELAY_FACTOR"], gaps)
+    offsets = np.cumsum(decision + np.concatenate(([0.0], scaled[:-1])))
+
+    return CycleTimeline(start, wallets, order[skip], rushed, offsets, scaled, night)
+
+
+# ======================== Dispatcher ========================
+class TimelineDispatcher:
+    """Fires scheduled actions in timestamp order from a heap.
+
+    Time an action spends running is added to every later timestamp, so the planned
+    pauses stay pauses between actions instead of being eaten by slow transactions.
+    `sleep(seconds, message)` returns False to abort the run (e.g. on shutdown).
+    `max_lag` is the worst delay between an action's due time and when it actually fired.
+    """
+
+    def __init__(self, sleep, clock=time.time):
+        self.sleep = sleep
+        self.clock = clock
+        self.heap = []
+        self.slip = 0.0
+        self.counter = 0
+        self.max_lag = 0.0
+
+    def schedule(self, at, action, message=None):
+        heapq.heappush(self.heap, (at, self.counter, action, message))
+        self.counter += 1
+
+    def run(self):
+        while self.heap:
+            at, _, action, message = heapq.heappop(self.heap)
+            delay = at + self.slip - self.clock()
+            if delay > 0 and self.sleep(delay, message) is False:
+                return False
+            started = self.clock()
+            self.max_lag = max(self.max_lag, started - (at + self.slip))
+            action()
+            self.slip += self.clock() - started
+        return True
+
+
+# ======================== Benchmark ========================
+def benchmark(wallet_count=100_000, runs=5, seed=42):
+    start = time.time()
+    timings = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        timeline = plan_cycle(wallet_count, start, seed=seed)
+        timings.append(time.perf_counter() - t0)
+    again = plan_cycle(wallet_count, start, seed=seed)
+    same = np.array_equal(timeline.wallets, again.wallets) and np.array_equal(timeline.offsets, again.offsets)
+    print(f"{wallet_count} wallet: plan {min(timings) * 1000:.1f} ms (terbaik dari {runs}), "
+          f"aktif={len(timeline)} skip={len(timeline.skipped)} rushed={int(timeline.rushed.sum())} "
+          f"malam={int(timeline.night.sum())} durasi siklus={timeline.end / 3600:.1f} jam, reproducible={same}")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -4,6 +4,7 @@ import time
 from web3 import Web3
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
+from wallet_registry import WalletRegistry
 
 init(autoreset=True)
 
@@ -176,22 +177,21 @@ def get_reasonable_gas_price(web3):
     return int(final_gas_price)
 
 def load_private_keys():
-    private_keys = []
+    wallets = WalletRegistry("private_keys.txt")
 
     env_private_key = os.getenv("PRIVATE_KEY")
     if env_private_key:
-        private_keys.append(env_private_key.strip())
+        wallets.add(env_private_key)
 
     # NO HAVE TRY TO PRIVATE_KEY.txt
     try:
-        with open("private_keys.txt", "r") as file:
-            keys = [line.strip() for line in file.readlines()]
-            private_keys.extend(keys)
+        wallets.add_file("private_keys.txt")
     except Exception as e:
         print(f"Error loading private keys from private_keys.txt: {e}")
 
-    print(f"2 📸 To the moon load {len(private_keys)} address are {Fore.GREEN}succesfull..{Style.RESET_ALL}")
-    return list(set(private_keys))
+    wallets.save_index()
+    print(f"2 📸 To the moon load {len(wallets)} address are {Fore.GREEN}succesfull..{Style.RESET_ALL}")
+    return wallets
 
 def safe_send_transaction(web3, signed_tx, retries=3):
     for i in range(retries):
@@ -410,13 +410,13 @@ def main():
     try:
         web3 = connect_to_rpc()
 
-        private_keys = load_private_keys()
-        if not private_keys:
+        wallets = load_private_keys()
+        if not len(wallets):
             print("No private keys found, exiting...")
             return
 
-        for private_key in private_keys:
-            wallet = web3.eth.account.from_key(private_key)
+        for index in range(len(wallets)):
+            wallet = wallets.account(index)
             print(f"3 🔑 Oh Yes...!! correct using EVM address --> {wallet.address}")
 
             for token_symbol, token_address in TOKEN_ADDRESSES.items():
@@ -2,14 +2,16 @@ import web3
 from web3 import Web3
 import json
 import os
-import time
 import datetime
 import pytz
 import logging
 import random
+import functools
 from pathlib import Path
 from colorama import Fore, Style, init
 from dotenv import load_dotenv
+from waiter import WAITER, wait, sleep, now, format_duration
+from timeline import plan_cycle, TimelineDispatcher
 
 # Init colorama
 init(autoreset=True)
@@ -127,50 +129,24 @@ def log_warning(message):
 def short_address(address):
     return f"{address[:6]}...{address[-4:]}" if address else "Unknown address"
 
-def human_delay(mean, std_dev, min_val, max_val):
-    """Generate a human-like delay based on normal distribution"""
-    # Use normal distribution for more human-like randomness
-    delay = int(random.gauss(mean, std_dev))
-    delay = max(min_val, min(max_val, delay))
-    return delay
-    
 def is_night_time():
     """Check if current time is within the defined night hours (UTC)"""
     utc_timezone = pytz.utc
-    current_hour = datetime.datetime.now(utc_timezone).hour
+    current_hour = datetime.datetime.fromtimestamp(now(), utc_timezone).hour
     return CONFIG["NIGHT_TIME_START_HOUR"] <= current_hour < CONFIG["NIGHT_TIME_END_HOUR"]
 
-def apply_night_time_factor(delay_seconds):
-    """Apply night time factor to delay if applicable"""
-    if is_night_time():
-        night_factor = CONFIG["NIGHT_TIME_DELAY_FACTOR"]
-        return int(delay_seconds * night_factor)
-    return delay_seconds
-
 def sleep_seconds(seconds, message=None):
-    """Sleep with a message, showing a human-friendly countdown"""
+    """Sleep with a message, showing a human-friendly countdown; False if stopped"""
     if message:
         print(f"9️⃣ {Fore.GREEN}{message} in {seconds} seconds...{Style.RESET_ALL}")
     else:
         print(f"9️⃣ {Fore.GREEN}Mode airplane..Rotating sleep in {seconds} seconds...{Style.RESET_ALL}")
-        
+
+    def render(remaining, elapsed, total):
+        return f"⏳ {Fore.YELLOW}Waiting... {format_duration(remaining)} remaining{Style.RESET_ALL}"
+
     # For long delays, show progress
-    if seconds > 500:  # 9 minutes
-        start_time = time.time()
-        while time.time() - start_time < seconds:
-            elapsed = time.time() - start_time
-            remaining = seconds - elapsed
-            if remaining <= 0:
-                break
-                
-            minutes_remaining = int(remaining // 60)
-            if minutes_remaining > 0 and minutes_remaining % 15 == 0:  # Update every 15 minutes
-                print(f"⏳ {Fore.YELLOW}Waiting... Approximately {minutes_remaining} minutes remaining{Style.RESET_ALL}")
-            
-            time.sleep(min(30, remaining))
-    else:
-        # For shorter delays, just sleep
-        time.sleep(seconds)
+    return wait(seconds, render if seconds > 500 else None)
 
 # Print bang banner
 def print_welcome_message():
@@ -209,11 +185,12 @@ class VoteScheduler:
         self.web3 = Web3(Web3.HTTPProvider(CONFIG["RPC_URL"]))
         self.contract = self.web3.eth.contract(address=CONFIG["CONTRACT_ADDRESS"], abi=ABI)
         self.cycle_count = 1
+        self.max_queue_lag = 0.0
         
     def build_transaction(self, sender):
         try:
             # Add small random delay to simulate human thinking
-            time.sleep(random.uniform(0.8, 6.5))
+            sleep(random.uniform(0.8, 6.5))
             
             nonce = self.web3.eth.get_transaction_count(sender, 'pending')
             gas_limit = self.estimate_gas(sender)
@@ -482,7 +459,7 @@ class VoteScheduler:
         while retries > 0:
             try:
                 # Short random delay before signing (simulates human review)
-                time.sleep(random.uniform(1.0, 3.0))
+                sleep(random.uniform(1.0, 3.0))
                 
                 signed = self.web3.eth.account.sign_transaction(tx, private_key)
                 receipt = self.web3.eth.send_raw_transaction(signed.rawTransaction)
@@ -519,18 +496,15 @@ class VoteScheduler:
                 
                 # Randomize error cooldown slightly
                 error_cooldown = CONFIG["COOLDOWN"]["ERROR"] * random.uniform(0.8, 1.2)
-                time.sleep(error_cooldown)
+                sleep(error_cooldown)
         
         return None
         
-    def execute_vote(self, account, is_last_wallet=False):
+    def execute_vote(self, account, is_rushed=False):
         try:
             private_key = account['key']
             sender = account['address']
             
-            # Decide if this transaction will be "rushed" (higher gas)
-            is_rushed = random.random() < CONFIG["FAST_TX_PROBABILITY"]
-            
             # Update gas price for this specific transaction
             self.update_gas_price(is_rushed)
             
@@ -547,7 +521,7 @@ class VoteScheduler:
                 return False
                 
             # Add a short random delay after transaction (simulating checking tx status)
-            time.sleep(random.uniform(3.0, 8.0))
+            sleep(random.uniform(3.0, 8.0))
             
             # Get updated balance
             chain_id = self.web3.eth.chain_id
@@ -559,52 +533,26 @@ class VoteScheduler:
             
             print(f"7️⃣ Checking Last Balance: {Fore.YELLOW}{new_balance_eth:.8f} {token_symbol}{Fore.RESET}")
             print(f"🤑 Final Transaction Cost: {Fore.MAGENTA}{gas_cost_eth:.8f} {token_symbol}{Fore.RESET}")
-            
-            # If this is the last wallet in the cycle, apply long delay
-            # Otherwise apply short delay between wallets
-            if is_last_wallet:
-                # Calculate human-like delay between cycles with night time factor
-                delay_seconds = human_delay(
-                    CONFIG["CYCLE_COMPLETE_DELAY_MEAN"],
-                    CONFIG["CYCLE_COMPLETE_DELAY_STD"],
-                    CONFIG["CYCLE_COMPLETE_DELAY_MIN"],
-                    CONFIG["CYCLE_COMPLETE_DELAY_MAX"]
-                )
-                
-                # Check if it's night time and apply factor if needed
-                delay_seconds = apply_night_time_factor(delay_seconds)
-                
-                # Convert to minutes for display
-                delay_minutes = delay_seconds // 60
-                
-                if is_night_time():
-                    print(f"{Fore.MAGENTA}🌙 Night time detected (UTC). Applying longer delay.{Style.RESET_ALL}")
-                
-                print(f"8️⃣ All wallets used! {Fore.MAGENTA}cycle #{self.cycle_count}{Fore.RESET} completed. Taking a break for {Fore.MAGENTA}[{delay_minutes} minutes]{Fore.RESET} before next cycle...{Style.RESET_ALL}")
-                sleep_seconds(delay_seconds, f"Waiting for {Fore.MAGENTA}cycle #{self.cycle_count + 1}{Fore.RESET}")
-                self.cycle_count += 1
-            else:
-                # Calculate human-like delay between wallets
-                delay_seconds = human_delay(
-                    CONFIG["WALLET_SWITCH_DELAY_MEAN"],
-                    CONFIG["WALLET_SWITCH_DELAY_STD"],
-                    CONFIG["WALLET_SWITCH_DELAY_MIN"],
-                    CONFIG["WALLET_SWITCH_DELAY_MAX"]
-                )
-                
-                # Check if it's night time and apply factor if needed
-                delay_seconds = apply_night_time_factor(delay_seconds)
-                
-                print(f"{Fore.GREEN}8️⃣ Taking a short break before next wallet ({delay_seconds} seconds)...{Style.RESET_ALL}")
-                sleep_seconds(delay_seconds, "Preparing next wallet")
-            
+
             return True
         except Exception as e:
             log_error(f"Error executing Voting: {str(e)}")
             return False
 
+    def pause(self, seconds, message=None):
+        """Timeline pause: announced for wallet/cycle breaks, silent for decision time"""
+        if message:
+            return sleep_seconds(int(seconds), message)
+        return wait(seconds)
+
+    def run_wallet(self, account, wallet_num, wallet_total, is_rushed):
+        address_short = short_address(account['address'])
+        print(f"🏦 Now the ATM using wallet {Fore.MAGENTA}[{wallet_num}/{wallet_total}]{Fore.RESET} -> {Fore.YELLOW}{address_short}{Fore.RESET}")
+        if not self.execute_vote(account, is_rushed):
+            print(f"{Fore.RED}❌ Failed to execute Voting for{Fore.RESET} {Fore.YELLOW}wallet {wallet_num}.{Fore.RESET} Continuing to next wallet.")
+
     def execute_cycle(self):
-        """Execute one Voting transaction for each wallet in a cycle"""
+        """Plan the whole cycle up front, then dispatch one Voting transaction per wallet"""
         print(f"🔄 Starting voting transaction {Fore.MAGENTA}cycle #{self.cycle_count}{Fore.RESET} with {Fore.YELLOW}{len(self.accounts)} wallets{Fore.RESET}")
         
         # Check if it's night time
@@ -615,35 +563,35 @@ class VoteScheduler:
         # Update gas price at the start of each cycle
         self.update_gas_price()
         
-        # Shuffle the accounts for more natural behavior
-        shuffled_accounts = self.accounts.copy()
-        random.shuffle(shuffled_accounts)
+        # Skips, rushed flags and every delay of this cycle in one go (TIMELINE_SEED makes it reproducible)
+        seed = os.getenv("TIMELINE_SEED")
+        start = now()
+        timeline = plan_cycle(len(self.accounts), start,
+                              seed=[int(seed), self.cycle_count] if seed else None, config=CONFIG)
+        for idx in timeline.skipped:
+            address_short = short_address(self.accounts[idx]['address'])
+            print(f"⏭️ {Fore.MAGENTA}Randomly skipping wallet {Fore.YELLOW}{address_short}{Fore.RESET} this cycle (USE Variable HUMAN-LIKE for NATURAL TRANSACTIONS){Style.RESET_ALL}")
+        if timeline.night.any():
+            print(f"{Fore.MAGENTA}🌙 {int(timeline.night.sum())} delay(s) fall in night hours (UTC) and are {CONFIG['NIGHT_TIME_DELAY_FACTOR']}x longer{Style.RESET_ALL}")
         
-        # Process each account
-        processed_count = 0
-        for idx, account in enumerate(shuffled_accounts):
-            # Randomly decide whether to skip this wallet
-            if random.random() < CONFIG["SKIP_WALLET_PROBABILITY"]:
-                address_short = short_address(account['address'])
-                print(f"⏭️ {Fore.MAGENTA}Randomly skipping wallet {Fore.YELLOW}{address_short}{Fore.RESET} this cycle (USE Variable HUMAN-LIKE for NATURAL TRANSACTIONS){Style.RESET_ALL}")
-                continue
-                
-            processed_count += 1
-            wallet_num = idx + 1
-            # Last wallet check considers actually executed wallets, not just position in list
-            is_last_wallet = (processed_count == len(shuffled_accounts) - sum(1 for _ in shuffled_accounts if random.random() < CONFIG["SKIP_WALLET_PROBABILITY"]))
-            
-            address_short = short_address(account['address'])
-            print(f"🏦 Now the ATM using wallet {Fore.MAGENTA}[{wallet_num}/{len(shuffled_accounts)}]{Fore.RESET} -> {Fore.YELLOW}{address_short}{Fore.RESET}")
-            
-            # Add a small random delay before processing (simulates human decision time)
-            time.sleep(random.uniform(2.0, 5.0))
-            
-            success = self.execute_vote(account, is_last_wallet)
-            if not success:
-                print(f"{Fore.RED}❌ Failed to execute Voting for{Fore.RESET} {Fore.YELLOW}wallet {wallet_num}.{Fore.RESET} Continuing to next wallet.")
+        dispatcher = TimelineDispatcher(sleep=self.pause, clock=now)
+        for n in range(len(timeline)):
+            account = self.accounts[timeline.wallets[n]]
+            message = "Preparing next wallet" if n else None
+            dispatcher.schedule(start + timeline.offsets[n],
+                                functools.partial(self.run_wallet, account, n + 1, len(timeline), bool(timeline.rushed[n])),
+                                message)
+        if len(timeline):
+            print(f"🗓️ Cycle planned: {len(timeline)} wallet(s), next cycle in ~{format_duration(timeline.end)}")
+            dispatcher.schedule(start + timeline.end, lambda: None,
+                                f"8️⃣ All wallets used! Waiting for {Fore.MAGENTA}cycle #{self.cycle_count + 1}{Fore.RESET}")
+        finished = dispatcher.run()
+        self.max_queue_lag = max(self.max_queue_lag, dispatcher.max_lag)
+        if not finished:
+            return False
         
-        print(f"{Fore.YELLOW}☑️ Vote cycle {Fore.MAGENTA}[#{self.cycle_count}]{Fore.RESET} completed with {processed_count} wallet(s).{Fore.RESET}")
+        print(f"{Fore.YELLOW}☑️ Vote cycle {Fore.MAGENTA}[#{self.cycle_count}]{Fore.RESET} completed with {len(timeline)} wallet(s).{Fore.RESET}")
+        self.cycle_count += 1
         return True
         
 # ======================== Main Program ========================
@@ -679,8 +627,9 @@ def main():
         # Execute Vote in rotating wallet mode with efficient cycles
         try:
             print(f"{Fore.GREEN}⚡ Vote Onchain is now running.{Fore.RESET} {Fore.YELLOW}Press Ctrl+C to cancel.{Fore.RESET}")
-            while True:
+            while not WAITER.stopping:
                 scheduler.execute_cycle()
+            print(f"\n{Fore.YELLOW}Stopped, exiting.{Fore.RESET}")
         except KeyboardInterrupt:
             print(f"\n{Fore.YELLOW}Script interrupted by user. Exiting what the fuck.{Fore.RESET}")
             return
@@ -690,4 +639,5 @@ def main():
         exit(1)
 
 if __name__ == "__main__":
+    WAITER.install_signal_handlers()
     main()
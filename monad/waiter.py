@@ -0,0 +1,255 @@
+import sys
+import heapq
+import signal
+import asyncio
+import itertools
+import threading
+import time
+
+# ======================== Constants ========================
+RENDER_INTERVAL = 5.0  # detik antar update progress di terminal
+
+
+# ======================== Clocks ========================
+class RealClock:
+    """Wall clock; `speed` is how many clock seconds pass per real second"""
+
+    speed = 1.0
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+
+class ScaledClock:
+    """Virtual clock running `speed` times faster than real time.
+
+    Virtual time is derived from the real monotonic clock, so every thread and the
+    asyncio loop agree on it without coordination; a 24h schedule at speed=1000 takes
+    about 86 real seconds.
+    """
+
+    def __init__(self, speed=1000.0, start=None):
+        self.speed = float(speed)
+        self.real_start = time.monotonic()
+        self.start = time.time() if start is None else start
+
+    def elapsed(self):
+        return (time.monotonic() - self.real_start) * self.speed
+
+    def time(self):
+        return self.start + self.elapsed()
+
+    def monotonic(self):
+        return self.elapsed()
+
+
+# ======================== Wait Handle ========================
+class Wait:
+    """One pending wait; `render(remaining, elapsed, total)` returns its progress line"""
+
+    __slots__ = ("deadline", "started", "render", "fire", "finished", "result")
+
+    def __init__(self, deadline, started, render, fire):
+        self.deadline = deadline
+        self.started = started
+        self.render = render
+        self.fire = fire
+        self.finished = False
+        self.result = None
+
+
+# ======================== Waiter ========================
+class Waiter:
+    """Serves every wait in the process from one timer thread.
+
+    Waits are monotonic deadlines in a heap; the thread sleeps until the nearest one (or
+    the next render tick), so there is no per-second loop and no thread per wait. Progress
+    is drawn at RENDER_INTERVAL for the wait that ends first, and only when the stream is
+    a TTY. `interrupt()` releases every wait early with False for graceful shutdown.
+    """
+
+    def __init__(self, render_interval=RENDER_INTERVAL, stream=None, clock=None):
+        self.render_interval = render_interval
+        self.stream = stream or sys.stdout
+        self.source = clock or RealClock()
+        self.clock = self.source.monotonic
+        self.cond = threading.Condition()
+        self.heap = []
+        self.counter = itertools.count()
+        self.stopping = False
+        self.thread = None
+        self.rendered = False
+
+    def _tty(self):
+        try:
+            return self.stream.isatty()
+        except (AttributeError, ValueError):
+            return False
+
+    def schedule(self, seconds, fire, render=None):
+        """Register a wait; `fire(result)` runs on the timer thread when it ends"""
+        with self.cond:
+            now = self.clock()
+            wait = Wait(now + max(0.0, seconds), now, render, fire)
+            if self.stopping:
+                self._finish(wait, False)
+                return wait
+            heapq.heappush(self.heap, (wait.deadline, next(self.counter), wait))
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name="waiter", daemon=True)
+                self.thread.start()
+            self.cond.notify()
+            return wait
+
+    def use_clock(self, clock):
+        """Switch to another clock (e.g. ScaledClock for simulations) and re-time pending waits"""
+        with self.cond:
+            now, self.source = self.clock(), clock
+            self.clock = clock.monotonic
+            shift = self.clock() - now
+            self.heap = [(deadline + shift, n, wait) for deadline, n, wait in self.heap]
+            for _, _, wait in self.heap:
+                wait.deadline += shift
+                wait.started += shift
+            self.cond.notify()
+
+    def cancel(self, wait):
+        with self.cond:
+            wait.finished = True
+            self.cond.notify()
+
+    def wait(self, seconds, render=None):
+        """Block the caller until the deadline; False if interrupted"""
+        done = threading.Event()
+        wait = self.schedule(seconds, lambda result: done.set(), render)
+        try:
+            done.wait()
+        finally:
+            self.cancel(wait)
+        return wait.result
+
+    async def wait_async(self, seconds, render=None):
+        """asyncio version of wait(); the event loop is woken from the timer thread"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(result):
+            if not future.done():
+                future.set_result(result)
+
+        wait = self.schedule(seconds, lambda result: loop.call_soon_threadsafe(resolve, result), render)
+        try:
+            return await future
+        finally:
+            self.cancel(wait)
+
+    def interrupt(self):
+        """Release every pending wait with False; later waits return immediately"""
+        with self.cond:
+            self.stopping = True
+            for _, _, wait in self.heap:
+                self._finish(wait, False)
+            self.heap.clear()
+            self.cond.notify()
+
+    def install_signal_handlers(self, signals=(signal.SIGTERM,)):
+        """Turn SIGTERM (e.g. pm2 stop) into interrupt(); main thread only"""
+        for signum in signals:
+            signal.signal(signum, lambda *_: self.interrupt())
+
+    def _finish(self, wait, result):
+        if wait.finished:
+            return
+        wait.finished = True
+        wait.result = result
+        wait.fire(result)
+
+    def _render(self, now):
+        live = [wait for _, _, wait in self.heap if not wait.finished and wait.render]
+        if not live:
+            if self.rendered:
+                self.stream.write("\r" + " " * 79 + "\r")
+                self.stream.flush()
+                self.rendered = False
+            return
+        wait = min(live, key=lambda w: w.deadline)
+        line = wait.render(max(0.0, wait.deadline - now), now - wait.started, wait.deadline - wait.started)
+        if len(live) > 1:
+            line += f" (+{len(live) - 1})"
+        self.stream.write("\r" + line)
+        self.stream.flush()
+        self.rendered = True
+
+    def _run(self):
+        tty = self._tty()
+        with self.cond:
+            while True:
+                now = self.clock()
+                while self.heap and (self.heap[0][2].finished or self.heap[0][0] <= now):
+                    _, _, wait = heapq.heappop(self.heap)
+                    self._finish(wait, True)
+                if tty:
+                    self._render(now)
+                # Deadlines are in clock seconds, the condition waits in real seconds
+                timeout = (self.heap[0][0] - now) / self.source.speed if self.heap else None
+                if tty and self.rendered:
+                    timeout = self.render_interval if timeout is None else min(timeout, self.render_interval)
+                self.cond.wait(timeout)
+
+
+WAITER = Waiter()
+
+
+def use_clock(clock):
+    """Drive every wait, sleep and now() in the process from `clock`"""
+    WAITER.use_clock(clock)
+
+
+def now():
+    """Epoch seconds on the active clock (virtual when simulating)"""
+    return WAITER.source.time()
+
+
+def sleep(seconds):
+    """Short uninterruptible pause, scaled to the active clock"""
+    time.sleep(max(0.0, seconds) / WAITER.source.speed)
+
+
+async def sleep_async(seconds):
+    await asyncio.sleep(max(0.0, seconds) / WAITER.source.speed)
+
+
+def wait(seconds, render=None):
+    return WAITER.wait(seconds, render)
+
+
+async def wait_async(seconds, render=None):
+    return await WAITER.wait_async(seconds, render)
+
+
+def format_duration(seconds):
+    """Compact "1h 02m 03s" style string"""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m {secs:02d}s"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+if __name__ == "__main__":
+    # 200 concurrent waits on one timer thread
+    started = time.monotonic()
+    workers = [threading.Thread(target=wait, args=(0.5 + i / 200,)) for i in range(200)]
+    for worker in workers:
+        worker.start()
+    wait(1.0, lambda remaining, elapsed, total: f"Waiting {format_duration(remaining)}")
+    for worker in workers:
+        worker.join()
+    print(f"\n200 waits selesai dalam {time.monotonic() - started:.2f}s, "
+          f"thread aktif: {threading.active_count()}")
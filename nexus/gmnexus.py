@@ -1,8 +1,13 @@
 import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
 from web3 import Web3
 from dotenv import load_dotenv
 import os
 from colorama import Fore, Style, init
+from waiter import WAITER, wait, sleep, now
+from presign import PresignQueue, PRESIGN_LEAD as DEFAULT_PRESIGN_LEAD
 
 # Init colorama
 init(autoreset=True)
@@ -20,12 +25,20 @@ GAS_MULTIPLIER = 1.2  # Gas multiplier for faster transactions
 COOLDOWN_ERROR = 30  # Cooldown time after an error
 COOLDOWN_SUCCESS = 10  # Cooldown time after a successful transaction
 LOOP_WAIT_TIME = 90  # 1 minutes every gM txhash, you can edit this in seconds
+GM_CONCURRENCY = int(os.getenv('GM_CONCURRENCY', '0'))  # >1 = concurrent mode with this many parallel sends
+RPC_BATCH_SIZE = 100  # calls per JSON-RPC batch request
+CONFIRM_WAIT = 5  # seconds before re-reading balances
+PRESIGN_LEAD = int(os.getenv('PRESIGN_LEAD', str(DEFAULT_PRESIGN_LEAD)))  # sign next cycle's GMs this many seconds early, 0 = off
 
 # Initialize Web3 connection
 web3 = Web3(Web3.HTTPProvider(RPC_URL))
 
 # Transaction counter
 tx_counter = 0
+tx_counter_lock = threading.Lock()
+
+# Pre-signed GM queue (set up in main when PRESIGN_LEAD > 0)
+presigned = None
 
 # Chain ID to symbol mapping
 CHAIN_SYMBOLS = {
@@ -224,7 +237,8 @@ def send_transaction(tx, private_key):
         try:
             signed_tx = web3.eth.account.sign_transaction(tx, private_key)
             tx_hash = web3.eth.send_raw_transaction(signed_tx.rawTransaction)
-            tx_counter += 1
+            with tx_counter_lock:
+                tx_counter += 1
             print(f"8 Transaction Sent {Fore.GREEN}Successfully{Style.RESET_ALL} with Total TXiD {Fore.RED}{tx_counter}{Style.RESET_ALL} -> {Fore.GREEN}TxID Hash:{Style.RESET_ALL} {tx_hash.hex()}")
             return tx_hash
         except Exception as e:
@@ -273,52 +287,220 @@ def execute_gm(account):
         private_key = account['private_key']
         sender = account['address']
         
-        # Get initial balance
-        initial_balance = get_wallet_balance(sender)
-        
-        # Build and send transaction
-        tx_data = build_gm_transaction(sender)
-        if tx_data:
+        # Pre-signed during the countdown: broadcast only
+        tx_hash = broadcast_presigned(account)
+        if not tx_hash:
+            # Get initial balance
+            initial_balance = get_wallet_balance(sender)
+            
+            # Build and send transaction
+            tx_data = build_gm_transaction(sender)
+            if not tx_data:
+                print("Failed to build transaction.")
+                return False
             tx_hash = send_transaction(tx_data, private_key)
-            if tx_hash:
-                # Wait for transaction confirmation
-                time.sleep(5)
-                
-                # Get updated balance
-                new_balance = web3.eth.get_balance(sender)
-                new_balance_eth = web3.from_wei(new_balance, 'ether')
-                print(f"9 Checking Last Balance: {Fore.YELLOW}{new_balance_eth:.4f} {token_symbol}{Fore.RESET}")
-                
-                return True
-            else:
-                print("Transaction failed.")
+
+        if tx_hash:
+            # Wait for transaction confirmation
+            time.sleep(5)
+            
+            # Get updated balance
+            new_balance = web3.eth.get_balance(sender)
+            new_balance_eth = web3.from_wei(new_balance, 'ether')
+            print(f"9 Checking Last Balance: {Fore.YELLOW}{new_balance_eth:.4f} {token_symbol}{Fore.RESET}")
+            
+            return True
         else:
-            print("Failed to build transaction.")
+            print("Transaction failed.")
     except Exception as e:
         print(f"Error executing GM: {e}")
     
     return False
 
+# ======================== Concurrent mode ========================
+def rpc_batch(calls):
+    """Run [(method, params), ...] as JSON-RPC batches; results in call order, None on per-call error"""
+    results = []
+    for start in range(0, len(calls), RPC_BATCH_SIZE):
+        chunk = calls[start:start + RPC_BATCH_SIZE]
+        payload = [{'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+                   for i, (method, params) in enumerate(chunk)]
+        try:
+            response = requests.post(RPC_URL, json=payload, timeout=30)
+            response.raise_for_status()
+            replies = {reply['id']: reply for reply in response.json()}
+            results.extend(int(replies[i]['result'], 16) if 'result' in replies.get(i, {}) else None
+                           for i in range(len(chunk)))
+        except Exception as e:
+            # Some RPCs reject batches; fall back to parallel single calls for this chunk
+            print(f"{Fore.YELLOW}Batch RPC failed ({e}), falling back to single calls{Style.RESET_ALL}")
+            def single(call):
+                try:
+                    return int(web3.provider.make_request(call[0], call[1])['result'], 16)
+                except Exception:
+                    return None
+            with ThreadPoolExecutor(max_workers=max(1, GM_CONCURRENCY)) as pool:
+                results.extend(pool.map(single, chunk))
+    return results
+
+def read_nonces_and_balances(addresses):
+    """Pending nonce and balance for every address in one batched round trip"""
+    calls = [('eth_getTransactionCount', [address, 'pending']) for address in addresses]
+    calls += [('eth_getBalance', [address, 'latest']) for address in addresses]
+    results = rpc_batch(calls)
+    return results[:len(addresses)], results[len(addresses):]
+
+def prepare_cycle(sender):
+    """Fee, gas limit, chain id and calldata shared by every wallet this cycle"""
+    gas_prices = get_gas_prices()
+    if not gas_prices:
+        return None
+    gas_estimate = contract.functions.gm().estimate_gas({'from': sender})
+    return {
+        'gas': int(gas_estimate * GAS_MULTIPLIER),
+        'maxFeePerGas': gas_prices['maxFeePerGas'],
+        'maxPriorityFeePerGas': gas_prices['maxPriorityFeePerGas'],
+        'data': contract.encodeABI(fn_name='gm', args=[]),
+        'chainId': chain_id,
+    }
+
+def send_gm(account, nonce, shared):
+    tx_data = dict(shared, **{'from': account['address'], 'to': CONTRACT_ADDRESS, 'nonce': nonce})
+    try:
+        return send_transaction(tx_data, account['private_key']) is not None
+    except Exception as e:
+        print(f"Error executing GM for {account['address']}: {e}")
+        return False
+
+def execute_gm_concurrent(accounts):
+    """One GM per wallet: shared data once, batched reads, bounded parallel sends"""
+    addresses = [account['address'] for account in accounts]
+    balances = {}
+    with ThreadPoolExecutor(max_workers=GM_CONCURRENCY) as pool:
+        # Wallets pre-signed during the countdown go out first, no RPC reads in front of them
+        sent = 0
+        rest = []
+        for account, tx_hash in zip(accounts, pool.map(broadcast_presigned, accounts)):
+            if tx_hash:
+                sent += 1
+            else:
+                rest.append(account)
+
+        if rest:
+            shared = prepare_cycle(rest[0]['address'])
+            if shared:
+                nonces, old_balances = read_nonces_and_balances([account['address'] for account in rest])
+                balances.update((account['address'], balance) for account, balance in zip(rest, old_balances))
+                ready = [(account, nonce) for account, nonce in zip(rest, nonces) if nonce is not None]
+                print(f"7 Sending {Fore.GREEN}hELLO gM{Style.RESET_ALL} from {len(ready)}/{len(rest)} wallets ({GM_CONCURRENCY} parallel)")
+                sent += sum(pool.map(lambda item: send_gm(item[0], item[1], shared), ready))
+            else:
+                print("Failed to prepare cycle.")
+
+    sleep(CONFIRM_WAIT)
+    _, new_balances = read_nonces_and_balances(addresses)
+    for address in addresses:
+        balances.setdefault(address, presigned_balances.pop(address, None))
+    spent = sum(balances[address] - new for address, new in zip(addresses, new_balances)
+                if balances[address] is not None and new is not None)
+    print(f"9 Cycle done: {Fore.GREEN}{sent}/{len(accounts)}{Style.RESET_ALL} GM sent, spent {Fore.YELLOW}{web3.from_wei(spent, 'ether'):.6f} {token_symbol}{Fore.RESET}")
+    return sent
+
+# ======================== Pre-signed mode ========================
+presigned_balances = {}  # balance read when a wallet's GM was pre-signed
+
+def setup_presign(sender):
+    """Queue that signs each GM during the countdown and only broadcasts when the cycle starts"""
+    global presigned
+    try:
+        gas_estimate = contract.functions.gm().estimate_gas({'from': sender})
+        template = {
+            'to': CONTRACT_ADDRESS,
+            'gas': int(gas_estimate * GAS_MULTIPLIER),
+            'data': contract.encodeABI(fn_name='gm', args=[]),
+            'chainId': chain_id,
+        }
+        presigned = PresignQueue(template, lambda: web3.eth.get_block('latest')['baseFeePerGas'],
+                                 web3.eth.send_raw_transaction,
+                                 priority=web3.to_wei(2, 'gwei'))  # same tip as get_gas_prices
+        presigned.start()
+    except Exception as e:
+        print(f"Pre-signing disabled: {e}")
+        presigned = None
+
+def presign_cycle(accounts):
+    """Sign every wallet's next GM with one batched nonce/balance read"""
+    nonces, balances = read_nonces_and_balances([account['address'] for account in accounts])
+    signed = 0
+    for account, nonce, balance in zip(accounts, nonces, balances):
+        if nonce is None:
+            continue
+        try:
+            presigned.prepare(account['private_key'], account['address'], nonce)
+            presigned_balances[account['address']] = balance
+            signed += 1
+        except Exception as e:
+            print(f"Pre-sign failed for {account['address']}: {e}")
+    print(f"\n7 Pre-signed {Fore.GREEN}{signed}/{len(accounts)}{Style.RESET_ALL} gM transactions for the next cycle")
+
+def broadcast_presigned(account):
+    """Send the GM signed during the countdown; None means build and send it the normal way"""
+    global tx_counter
+    if presigned is None or account['address'] not in presigned:
+        return None
+    try:
+        tx_hash, item = presigned.broadcast(account['address'])
+    except Exception as e:
+        print(f"Pre-signed broadcast failed ({e}), building a fresh one")
+        return None
+    with tx_counter_lock:
+        tx_counter += 1
+    print(f"8 Transaction Sent {Fore.GREEN}Successfully{Style.RESET_ALL} with Total TXiD {Fore.RED}{tx_counter}{Style.RESET_ALL} -> {Fore.GREEN}TxID Hash:{Style.RESET_ALL} {tx_hash.hex()} (pre-signed nonce {item.nonce})")
+    return tx_hash
+
 # Function to display countdown
-def countdown_timer(seconds):
+def countdown_timer(seconds, before_end=None, lead=0):
     print(f"{Fore.CYAN}Waiting to sleep next GM...bang!!! for {seconds//60} minutes{Style.RESET_ALL}")
-    for i in range(seconds, 0, -1):
-        mins, secs = divmod(i, 60)
-        timer = f"{Fore.YELLOW}   Countdown: {mins:02d}:{secs:02d}{Style.RESET_ALL}"
-        print(timer, end="\r")
-        time.sleep(1)
-    print(" " * 50, end="\r")  # Clear the countdown line
+
+    def render(remaining, elapsed, total):
+        mins, secs = divmod(int(remaining), 60)
+        return f"{Fore.YELLOW}   Countdown: {mins:02d}:{secs:02d}{Style.RESET_ALL}"
+
+    # before_end() runs `lead` seconds before the countdown ends (pre-signing the next cycle)
+    if before_end is None or seconds <= lead:
+        return wait(seconds, render)
+    if not wait(seconds - lead, render):
+        return False
+    before_end()
+    return wait(lead, render)
 
 # Main function to execute the schedule
 def main():
     accounts = load_accounts()
+    if PRESIGN_LEAD > 0:
+        setup_presign(accounts[0]['address'])
     while True:
-        for account in accounts:
-            execute_gm(account)
-            time.sleep(COOLDOWN_SUCCESS)
+        cycle_started = now()
+        if GM_CONCURRENCY > 1:
+            execute_gm_concurrent(accounts)
+        else:
+            for account in accounts:
+                execute_gm(account)
+                time.sleep(COOLDOWN_SUCCESS)
         
-        # Wait for the next cycle with countdown
-        countdown_timer(LOOP_WAIT_TIME)
+        # Wait for the next cycle with countdown (concurrent mode keeps the LOOP_WAIT_TIME cadence)
+        wait_time = LOOP_WAIT_TIME
+        if GM_CONCURRENCY > 1:
+            wait_time = max(0, int(LOOP_WAIT_TIME - (now() - cycle_started)))
+        if presigned is not None:
+            print(f"Pre-signed gM: {presigned.latency_summary()}")
+            stopped = not countdown_timer(wait_time, lambda: presign_cycle(accounts), PRESIGN_LEAD)
+        else:
+            stopped = not countdown_timer(wait_time)
+        if stopped:
+            print(f"{Fore.YELLOW}Stopped, bye bang!{Style.RESET_ALL}")
+            break
 
 if __name__ == "__main__":
+    WAITER.install_signal_handlers()
     main()
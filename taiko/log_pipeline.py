@@ -0,0 +1,309 @@
+import io
+import os
+import re
+import sys
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+
+# ======================== Constants ========================
+LOG_QUEUE_SIZE = 20000  # pending lines/records; beyond this new ones are dropped, never blocked on
+LOG_BATCH = 512  # items written per stdout write+flush
+MAX_LOG_BYTES = 2 * 1024 * 1024
+MAX_LOG_FILES = 3
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+ANSI = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+LEVEL_COLORS = {logging.WARNING: "\x1b[33m", logging.ERROR: "\x1b[31m", logging.CRITICAL: "\x1b[31;1m"}
+
+
+def strip_ansi(text):
+    return ANSI.sub("", text)
+
+
+# ======================== Formatters ========================
+class PlainFormatter(logging.Formatter):
+    """Text without colorama escapes (files, pipes)"""
+
+    def format(self, record):
+        return strip_ansi(super().format(record))
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "script": SCRIPT,
+            "msg": strip_ansi(record.getMessage()),
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def _print_json(line):
+    return json.dumps({"ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"), "level": "INFO",
+                       "logger": "stdout", "script": SCRIPT, "msg": strip_ansi(line)}, ensure_ascii=False)
+
+
+# ======================== Pipeline ========================
+class LogPipeline:
+    """One bounded queue and one writer thread for every print and log record of the process.
+
+    Producers only enqueue: `print()` text (through `QueuedStdout`) and raw LogRecords (through
+    `PipelineHandler`, whose message is formatted on the writer thread, so `%s` args cost
+    nothing at the call site). Prints and records share the queue, so their order is kept.
+    The writer batches stdout writes, keeps color only on a TTY, emits JSON lines when
+    `json_output` is set and feeds the size-rotated log file. When the queue is full new
+    items are counted in `dropped` instead of stalling the bot.
+    """
+
+    def __init__(self, stream, json_output=False, logfile=None, max_bytes=MAX_LOG_BYTES,
+                 backups=MAX_LOG_FILES, maxsize=LOG_QUEUE_SIZE):
+        self.stream = stream
+        self.tty = _isatty(stream)
+        self.json_output = json_output
+        self.queue = queue.Queue(maxsize)
+        self.dropped = 0
+        self.written = 0
+        self.partial = ""
+        if json_output:
+            self.console = JsonFormatter()
+        elif self.tty:
+            self.console = logging.Formatter(TEXT_FORMAT, datefmt="%H:%M:%S")
+        else:
+            self.console = PlainFormatter(TEXT_FORMAT, datefmt="%H:%M:%S")
+        self.file = None
+        if logfile:
+            # Rotation runs here on the writer thread, the producer never waits for it
+            from logging.handlers import RotatingFileHandler
+
+            self.file = RotatingFileHandler(logfile, maxBytes=max_bytes, backupCount=backups, encoding="utf-8")
+            self.file.setFormatter(JsonFormatter() if json_output else PlainFormatter(TEXT_FORMAT))
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def _render_text(self, text):
+        if self.json_output:
+            lines = (self.partial + text).split("\n")
+            self.partial = lines.pop()
+            return "".join(_print_json(line) + "\n" for line in lines if line.strip())
+        return text if self.tty else strip_ansi(text)
+
+    def _render_record(self, record):
+        if self.file is not None:
+            self.file.handle(record)
+        line = self.console.format(record)
+        if self.tty and record.levelno in LEVEL_COLORS:
+            line = f"{LEVEL_COLORS[record.levelno]}{line}\x1b[0m"
+        return line + "\n"
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            try:
+                while len(batch) < LOG_BATCH:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+            out, stop = [], False
+            for item in batch:
+                if item is None:
+                    stop = True
+                elif isinstance(item, str):
+                    out.append(self._render_text(item))
+                else:
+                    try:
+                        out.append(self._render_record(item))
+                    except Exception:
+                        out.append(f"<unformattable log record: {item.msg!r}>\n")
+            try:
+                self.stream.write("".join(out))
+                self.stream.flush()
+            except (OSError, ValueError):
+                pass  # PM2 / terminal went away; keep draining so producers never block
+            self.written += len(batch) - stop  # the stop marker is not a line
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def close(self, timeout=2.0):
+        """Flush what is queued (bounded by `timeout`) and stop the writer"""
+        deadline = time.monotonic() + timeout
+        try:
+            # Unlike a line, the stop marker waits for room: dropping it leaves the writer running
+            self.queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(max(0.0, deadline - time.monotonic()))
+        if self.file is not None:
+            self.file.close()
+
+    def summary(self):
+        return f"{self.written} lines written, {self.queue.qsize()} queued, {self.dropped} dropped"
+
+
+class QueuedStdout(io.TextIOBase):
+    """sys.stdout replacement: print() only enqueues"""
+
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+    def write(self, text):
+        self.pipeline.put(text)
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return self.pipeline.tty
+
+    def fileno(self):
+        return self.pipeline.stream.fileno()
+
+    @property
+    def encoding(self):
+        return getattr(self.pipeline.stream, "encoding", "utf-8")
+
+
+class PipelineHandler(logging.Handler):
+    """Hands the unformatted record to the writer thread.
+
+    The record keeps its `args`, so pass values that are not mutated afterwards (the
+    scripts log numbers, strings and addresses).
+    """
+
+    def __init__(self, pipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def emit(self, record):
+        self.pipeline.put(record)
+
+
+def _isatty(stream):
+    try:
+        return stream.isatty()
+    except (AttributeError, ValueError):
+        return False
+
+
+PIPELINE = None
+
+
+def setup(name=None, level=None, json_output=None, logfile=None, max_bytes=MAX_LOG_BYTES,
+          backups=MAX_LOG_FILES, capture_print=True):
+    """Route logging (and print, unless `capture_print=False`) through the background writer.
+
+    LOG_LEVEL (default INFO) gates records before they are built, LOG_JSON=1 switches
+    stdout and the log file to JSON lines. Replaces logging.basicConfig; returns the
+    logger `name`.
+    """
+    global PIPELINE
+    level = level or os.getenv("LOG_LEVEL", "INFO").upper()
+    if json_output is None:
+        json_output = os.getenv("LOG_JSON", "").strip().lower() in ("1", "true", "yes")
+    if PIPELINE is None:
+        PIPELINE = LogPipeline(sys.stdout, json_output, logfile, max_bytes, backups)
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        root.addHandler(PipelineHandler(PIPELINE))
+        if capture_print:
+            sys.stdout = QueuedStdout(PIPELINE)
+        atexit.register(shutdown)
+    logging.getLogger().setLevel(level)
+    return logging.getLogger(name)
+
+
+def shutdown():
+    global PIPELINE
+    if PIPELINE is None:
+        return
+    pipeline, PIPELINE = PIPELINE, None
+    if isinstance(sys.stdout, QueuedStdout):
+        sys.stdout = pipeline.stream
+    pipeline.close()
+
+
+def summary():
+    return PIPELINE.summary() if PIPELINE is not None else "-"
+
+
+# ======================== Benchmark ========================
+class _SlowStream:
+    """stdout whose consumer (PM2's pipe reader) is busy: every write+flush costs `delay`"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def write(self, text):
+        return len(text)
+
+    def flush(self):
+        time.sleep(self.delay)
+
+    def isatty(self):
+        return False
+
+
+def _per_call(func, calls):
+    started = time.perf_counter()
+    for n in range(calls):
+        func(n)
+    return (time.perf_counter() - started) / calls
+
+
+def benchmark(calls=2000, lines_per_tx=12, delay=0.0005):
+    """Producer-side cost of one log call: blocking stdout vs the queued pipeline"""
+    message = "\x1b[32m6️⃣ Transaction sent Successfully with total TXiD [%d] -> 0x%064x\x1b[0m"
+
+    slow = _SlowStream(delay)
+    direct = logging.Logger("direct")
+    handler = logging.StreamHandler(slow)
+    handler.setFormatter(PlainFormatter(TEXT_FORMAT))
+    direct.addHandler(handler)
+    sync_log = _per_call(lambda n: direct.info(message, n, n), calls)
+
+    def sync_print(n):
+        slow.write(message % (n, n) + "\n")
+        slow.flush()
+    sync_print_cost = _per_call(sync_print, calls)
+
+    pipeline = LogPipeline(_SlowStream(delay))
+    queued = logging.Logger("queued")
+    queued.addHandler(PipelineHandler(pipeline))
+    queued_log = _per_call(lambda n: queued.info(message, n, n), calls)
+    stdout = QueuedStdout(pipeline)
+    queued_print = _per_call(lambda n: stdout.write(f"{message % (n, n)}\n"), calls)
+
+    queued.setLevel(logging.INFO)
+    eager_debug = _per_call(lambda n: queued.debug(f"nonce {n} tx {n:064x} " + message % (n, n)), calls)
+    lazy_debug = _per_call(lambda n: queued.debug("nonce %d tx %064x", n, n), calls)
+    pipeline.close(timeout=30)
+
+    print(f"per log call: blocking print {sync_print_cost * 1e6:.0f} us, blocking logger {sync_log * 1e6:.0f} us, "
+          f"queued print {queued_print * 1e6:.1f} us, queued logger {queued_log * 1e6:.1f} us")
+    print(f"debug when disabled: f-string {eager_debug * 1e6:.2f} us, lazy %-args {lazy_debug * 1e6:.2f} us")
+    print(f"per tx ({lines_per_tx} lines): blocking {sync_print_cost * lines_per_tx * 1000:.2f} ms -> "
+          f"queued {queued_print * lines_per_tx * 1000:.3f} ms; writer: {pipeline.summary()}")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,415 @@
+import sys
+import math
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from eth_account import Account
+from eth_utils import keccak
+
+# ======================== Constants ========================
+RBF_MIN_BUMP = 0.125  # geth wants +10% on both fees, other clients 12.5%; take the strict one
+RBF_LADDER = (1.125, 1.3, 1.6, 2.0, 3.0)  # fee multipliers over the original tx, one rung per step
+RBF_STEP_WAIT = 20.0  # seconds a rung gets to be mined before climbing to the next
+RBF_POLL_INTERVAL = 3.0
+RBF_WORKERS = 8  # wallets unstuck in parallel
+CANCEL_GAS = 21000
+
+FEE_FIELDS = ("maxFeePerGas", "maxPriorityFeePerGas", "gasPrice")
+UNDERPRICED_ERRORS = ("underpriced", "fee too low", "replacement transaction")
+MINED_ERRORS = ("nonce too low", "already mined", "nonce has already been used")
+KNOWN_ERRORS = ("already known", "known transaction", "already imported", "already exists")
+
+
+def parse_ladder(text, default=RBF_LADDER):
+    """"1.125,1.3,2" from .env -> (1.125, 1.3, 2.0); falls back to `default` when empty or broken"""
+    try:
+        ladder = tuple(float(step) for step in str(text).split(",") if step.strip())
+    except ValueError:
+        return default
+    return ladder or default
+
+
+def fee_fields(price):
+    """Fee part of a tx dict, or {"gasPrice": price} for a legacy price"""
+    if isinstance(price, dict):
+        return {field: price[field] for field in FEE_FIELDS if field in price}
+    return {"gasPrice": int(price)}
+
+
+def bump_fees(base, factor, previous=None, min_bump=RBF_MIN_BUMP, fee_cap=None):
+    """Fees of `base` scaled by `factor` and at least `min_bump` above `previous`.
+
+    Every fee field has to clear the bump or the node rejects the replacement as
+    underpriced, so each one is raised on its own. Returns None when `fee_cap` keeps a
+    field below the required bump, i.e. the tx can no longer be replaced.
+    """
+    previous = previous or {}
+    fees = {}
+    for field, value in fee_fields(base).items():
+        required = math.ceil(previous[field] * (1 + min_bump)) if field in previous else 0
+        fees[field] = max(math.ceil(value * factor), required)
+        if fee_cap is not None and fees[field] > fee_cap:
+            if required > fee_cap:
+                return None
+            fees[field] = fee_cap
+    if "maxFeePerGas" in fees:
+        fees["maxPriorityFeePerGas"] = min(fees.get("maxPriorityFeePerGas", 0), fees["maxFeePerGas"])
+    return fees
+
+
+def _matches(error, patterns):
+    message = str(error).lower()
+    return any(pattern in message for pattern in patterns)
+
+
+# ======================== In-flight Tx ========================
+class InFlightTx:
+    """One wallet nonce waiting to be mined.
+
+    `tx` is the original tx dict (None for a nonce found pending but not sent by this
+    process, which can only be cancelled), `base` the fees the ladder multiplies and
+    `current` the fees of the last version the node accepted.
+    """
+
+    __slots__ = ("address", "nonce", "key", "tx", "base", "current", "hashes", "sent_at",
+                 "replaced", "cancelled")
+
+    def __init__(self, address, nonce, key, tx, base, sent_at, tx_hash=None):
+        self.address = address
+        self.nonce = nonce
+        self.key = key
+        self.tx = tx
+        self.base = base
+        self.current = dict(base) if tx is not None else None
+        self.hashes = [tx_hash] if tx_hash is not None else []
+        self.sent_at = sent_at
+        self.replaced = 0
+        self.cancelled = False
+
+
+# ======================== Engine ========================
+class RbfEngine:
+    """Replace-by-fee escalation for stuck nonces, tracked by (address, nonce).
+
+    Callers `track()` every tx they send. `unstick(address)` re-sends the ORIGINAL tx up
+    a fee ladder, one rung per `step_wait`, each rung at least `min_bump` above the version
+    already in the mempool so nodes accept it as a replacement. Only when the ladder is
+    exhausted does it fall back to a zero-value self-transfer at the same nonce. Nonces
+    that are pending but untracked (sent before a restart) go straight to the cancel, priced
+    from `network_fees()`. `unstick_all()` runs many wallets in parallel.
+
+    `send_raw(raw)` returns the tx hash (a RawTxBroadcaster or `eth.send_raw_transaction`),
+    `get_nonce(address)` the mined ("latest") nonce, `sign(tx, key)` the raw bytes.
+    """
+
+    def __init__(self, send_raw, get_nonce, sign=None, network_fees=None, chain_id=None,
+                 ladder=RBF_LADDER, min_bump=RBF_MIN_BUMP, step_wait=RBF_STEP_WAIT, fee_cap=None,
+                 poll_interval=RBF_POLL_INTERVAL, workers=RBF_WORKERS, clock=time.monotonic, sleep=time.sleep):
+        self.send_raw = send_raw
+        self.get_nonce = get_nonce
+        self.sign = sign or _sign
+        self.network_fees = network_fees
+        self.chain_id = chain_id
+        self.ladder = tuple(ladder)
+        self.min_bump = min_bump
+        self.step_wait = step_wait
+        self.fee_cap = fee_cap
+        self.poll_interval = poll_interval
+        self.clock = clock
+        self.sleep = sleep
+        self.inflight = {}
+        self.lock = threading.Lock()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="rbf")
+        self.unstick_times = []
+        self.replacements = 0
+        self.cancels = 0
+        self.failed = 0
+
+    # -------- tracking --------
+    def track(self, address, tx, key, tx_hash=None):
+        item = InFlightTx(address, tx["nonce"], key, dict(tx), fee_fields(tx), self.clock(), tx_hash)
+        with self.lock:
+            self.inflight[(address, item.nonce)] = item
+        return item
+
+    def settle(self, address, mined_nonce):
+        """Forget every tracked nonce of `address` below `mined_nonce`"""
+        with self.lock:
+            for key in [key for key in self.inflight if key[0] == address and key[1] < mined_nonce]:
+                del self.inflight[key]
+
+    def stuck(self, address):
+        with self.lock:
+            return sorted((item for key, item in self.inflight.items() if key[0] == address),
+                          key=lambda item: item.nonce)
+
+    def replacement_fees(self, address, tx):
+        """Fees for re-sending `tx` over whatever this process last sent at its nonce.
+
+        For the "replacement transaction underpriced" path of the send loops: max of the
+        new tx's fees and the tracked ones, plus the minimum bump.
+        """
+        with self.lock:
+            item = self.inflight.get((address, tx["nonce"]))
+        previous = fee_fields(tx)
+        if item is not None and item.current is not None:
+            previous = {field: max(value, item.current.get(field, 0)) for field, value in previous.items()}
+        return bump_fees(previous, 1.0, previous, self.min_bump, self.fee_cap)
+
+    # -------- replace --------
+    def _cancel_tx(self, item, fees):
+        tx = {"to": item.address, "value": 0, "gas": CANCEL_GAS, "nonce": item.nonce}
+        chain_id = item.tx.get("chainId") if item.tx is not None else self.chain_id
+        if chain_id is not None:
+            tx["chainId"] = chain_id
+        tx.update(fees)
+        return tx
+
+    def _escalate(self, item, factor, cancel):
+        """Send the next version of `item`; "sent", "underpriced", "mined", "capped" or "error" """
+        fees = bump_fees(item.base, factor, item.current, self.min_bump, self.fee_cap)
+        if fees is None:
+            return "capped"
+        cancel = cancel or item.tx is None
+        tx = self._cancel_tx(item, fees) if cancel else dict(item.tx, **fees)
+        for field in FEE_FIELDS:
+            if field not in fees:
+                tx.pop(field, None)
+        try:
+            tx_hash = self.send_raw(self.sign(tx, item.key))
+        except Exception as e:
+            if _matches(e, MINED_ERRORS):
+                return "mined"
+            if _matches(e, UNDERPRICED_ERRORS):
+                # Whatever sits in the mempool is priced above these fees: climb from them
+                item.current = fees
+                return "underpriced"
+            if not _matches(e, KNOWN_ERRORS):
+                return "error"
+            tx_hash = None
+        item.current = fees
+        if tx_hash is not None:
+            item.hashes.append(tx_hash)
+        with self.lock:
+            if cancel:
+                item.cancelled = True
+                self.cancels += 1
+            else:
+                item.replaced += 1
+                self.replacements += 1
+        return "sent"
+
+    def _adopt(self, address, key, mined, pending):
+        """Track pending nonces this process never sent so they can be cancelled"""
+        if self.network_fees is None or pending is None or pending <= mined:
+            return
+        with self.lock:
+            missing = [nonce for nonce in range(mined, pending) if (address, nonce) not in self.inflight]
+        if not missing:
+            return
+        base = fee_fields(self.network_fees())
+        for nonce in missing:
+            item = InFlightTx(address, nonce, key, None, base, self.clock())
+            with self.lock:
+                self.inflight.setdefault((address, nonce), item)
+
+    def _wait_mined(self, address, nonce, seconds):
+        """Poll the mined nonce until it passes `nonce` or `seconds` run out; the mined nonce"""
+        deadline = self.clock() + seconds
+        while True:
+            mined = self.get_nonce(address)
+            if mined > nonce or self.clock() >= deadline:
+                return mined
+            self.sleep(min(self.poll_interval, max(0.0, deadline - self.clock())))
+
+    def unstick(self, address, key=None, pending=None, report=None):
+        """Escalate every stuck nonce of `address` until mined; True when all cleared.
+
+        `pending` is the node's pending nonce, used to find untracked stuck nonces (needs
+        `key`). `report(message)` gets one line per step for the script's log.
+        """
+        report = report or (lambda message: None)
+        started = self.clock()
+        mined = self.get_nonce(address)
+        self.settle(address, mined)
+        if key is not None:
+            self._adopt(address, key, mined, pending)
+        items = self.stuck(address)
+        if not items:
+            return True
+
+        steps = [(factor, False) for factor in self.ladder] + [(self.ladder[-1], True)]
+        for rung, (factor, cancel) in enumerate(steps, 1):
+            statuses = {}
+            for item in items:
+                statuses[item.nonce] = self._escalate(item, factor, cancel)
+            label = "cancel" if cancel else f"x{factor:g}"
+            report(f"RBF {rung}/{len(steps)} ({label}): " + ", ".join(f"nonce {n} {s}" for n, s in statuses.items()))
+            if all(status == "capped" for status in statuses.values()):
+                break
+            # A rejected rung gets no wait time: the next one goes out right away
+            wait = 0 if "underpriced" in statuses.values() and "sent" not in statuses.values() else self.step_wait
+            mined = self._wait_mined(address, items[-1].nonce, wait)
+            self.settle(address, mined)
+            items = [item for item in items if item.nonce >= mined]
+            if not items:
+                with self.lock:
+                    self.unstick_times.append(self.clock() - started)
+                return True
+
+        with self.lock:
+            self.failed += 1
+        return False
+
+    def unstick_all(self, wallets, report=None):
+        """Run unstick() for many (address, key, pending) at once; {address: cleared}"""
+        wallets = list(wallets)
+        futures = [self.pool.submit(self.unstick, address, key, pending, report) for address, key, pending in wallets]
+        results = {}
+        for (address, _, _), future in zip(wallets, futures):
+            try:
+                results[address] = future.result()
+            except Exception:
+                results[address] = False
+        return results
+
+    def summary(self):
+        with self.lock:
+            times = list(self.unstick_times)
+            replacements, cancels, failed = self.replacements, self.cancels, self.failed
+        mean = f"{sum(times) / len(times):.0f}s" if times else "-"
+        return (f"unstuck {len(times)}, mean time-to-unstick {mean}, "
+                f"{replacements} replacements, {cancels} cancels, {failed} still stuck")
+
+
+def _sign(tx, key):
+    signed = Account.sign_transaction(tx, key)
+    # eth-account < 0.13 (web3 v6) calls it rawTransaction
+    return getattr(signed, "raw_transaction", None) or signed.rawTransaction
+
+
+# ======================== Benchmark ========================
+class _DevChain:
+    """Dev-chain stand-in on a scaled clock: nonce ordering, base fee spike, replacement rule.
+
+    A replacement needs +`bump` on every fee (integer math like geth's txpool) or it is
+    rejected as underpriced. The base fee sits at `spike` x normal for `spike_for` seconds,
+    which is what leaves the wallets' original txs stuck.
+    """
+
+    def __init__(self, speed, base_fee=10**9, spike=2.4, spike_for=900.0, bump=10, block_time=2.0):
+        self.speed = speed
+        self.started = time.monotonic()
+        self.base_fee = base_fee
+        self.spike = spike
+        self.spike_for = spike_for
+        self.bump = bump
+        self.block_time = block_time
+        self.lock = threading.Lock()
+        self.mined = {}
+        self.mempool = {}
+        self.last_block = 0.0
+
+    def clock(self):
+        return (time.monotonic() - self.started) * self.speed
+
+    def sleep(self, seconds):
+        time.sleep(max(0.0, seconds) / self.speed)
+
+    def base_at(self, at):
+        return int(self.base_fee * (self.spike if at < self.spike_for else 1.0))
+
+    def _mine(self):
+        now = self.clock()
+        while self.last_block + self.block_time <= now:
+            self.last_block += self.block_time
+            base = self.base_at(self.last_block)
+            for address in {address for address, _ in self.mempool}:
+                while True:
+                    tx = self.mempool.get((address, self.mined.get(address, 0)))
+                    price = tx and tx.get("maxFeePerGas", tx.get("gasPrice"))
+                    if tx is None or price < base:
+                        break
+                    del self.mempool[(address, tx["nonce"])]
+                    self.mined[address] = tx["nonce"] + 1
+
+    def send_raw_transaction(self, raw):
+        address, tx = raw
+        with self.lock:
+            self._mine()
+            if tx["nonce"] < self.mined.get(address, 0):
+                raise ValueError("nonce too low")
+            old = self.mempool.get((address, tx["nonce"]))
+            if old is not None:
+                for field in fee_fields(old):
+                    if tx.get(field, 0) < old[field] * (100 + self.bump) // 100:
+                        raise ValueError("replacement transaction underpriced")
+            self.mempool[(address, tx["nonce"])] = tx
+        return keccak(repr(sorted(tx.items())).encode())
+
+    def get_nonce(self, address):
+        with self.lock:
+            self._mine()
+            return self.mined.get(address, 0)
+
+
+def _old_reset(chain, address, wallet_tx, period=30.0, limit=3600.0):
+    """What reset_pending_transactions did: a self-transfer at a random GAS_RANGE_GWEI price"""
+    started = chain.clock()
+    while chain.get_nonce(address) <= wallet_tx["nonce"] and chain.clock() - started < limit:
+        price = int(random.uniform(0.005, 0.1) * 10**9)
+        try:
+            chain.send_raw_transaction((address, dict(wallet_tx, maxFeePerGas=price, maxPriorityFeePerGas=price)))
+        except ValueError:
+            pass
+        chain.sleep(period)
+    return chain.clock() - started
+
+
+def _old_bump(chain, address, wallet_tx, factor=1.1, period=30.0, limit=3600.0):
+    """What the send loops did: fees x1.1 (int-truncated), then sleep 30 s"""
+    started = chain.clock()
+    tx = dict(wallet_tx)
+    while chain.get_nonce(address) <= wallet_tx["nonce"] and chain.clock() - started < limit:
+        tx = dict(tx, maxFeePerGas=int(tx["maxFeePerGas"] * factor),
+                  maxPriorityFeePerGas=int(tx["maxPriorityFeePerGas"] * factor))
+        try:
+            chain.send_raw_transaction((address, tx))
+        except ValueError:
+            pass
+        chain.sleep(period)
+    return chain.clock() - started
+
+
+def benchmark(wallets=40, speed=300.0, seed=7):
+    """Mean time-to-unstick for `wallets` stuck nonces: random reset vs x1.1 bump vs RBF ladder"""
+    random.seed(seed)
+    addresses = [f"0x{n:040x}" for n in range(1, wallets + 1)]
+    original = {"to": "0x" + "11" * 20, "data": "0x", "gas": 60000, "nonce": 0, "chainId": 16601,
+                "maxFeePerGas": 11 * 10**8, "maxPriorityFeePerGas": 10**8}
+
+    def stuck_chain():
+        chain = _DevChain(speed)
+        for address in addresses:
+            chain.send_raw_transaction((address, dict(original)))
+        return chain
+
+    for label, strategy in (("reset acak ", _old_reset), ("bump x1.1  ", _old_bump)):
+        chain = stuck_chain()
+        with ThreadPoolExecutor(max_workers=wallets) as pool:
+            times = list(pool.map(lambda address: strategy(chain, address, original), addresses))
+        print(f"{label}: mean time-to-unstick {sum(times) / len(times):.0f}s")
+
+    chain = stuck_chain()
+    engine = RbfEngine(chain.send_raw_transaction, chain.get_nonce, sign=lambda tx, key: (key, tx),
+                       workers=wallets, clock=chain.clock, sleep=chain.sleep)
+    for address in addresses:
+        engine.track(address, original, address)
+    results = engine.unstick_all((address, None, None) for address in addresses)
+    print(f"RBF ladder : {engine.summary()} ({sum(results.values())}/{wallets} clear)")
+    engine.pool.shutdown()
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,363 @@
+import os
+import sys
+import time
+import random
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+import tracing
+
+# ======================== Constants ========================
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 150.0)
+TEXTFILE_INTERVAL = 15.0  # seconds between textfile collector writes
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+SCRIPT = os.path.splitext(os.path.basename(sys.argv[0] or "python"))[0] or "python"
+
+# Substring -> error class for the retries counter, first match wins
+ERROR_CLASSES = (
+    ("nonce", ("nonce too low", "nonce too high", "invalid nonce")),
+    ("replacement_underpriced", ("replacement transaction underpriced",)),
+    ("underpriced", ("underpriced", "fee too low", "max fee per gas less than block base fee")),
+    ("insufficient_funds", ("insufficient funds",)),
+    ("rate_limited", ("429", "too many requests", "rate limit")),
+    ("timeout", ("timed out", "timeout")),
+    ("reverted", ("execution reverted", "revert")),
+    ("connection", ("connection", "502", "503", "504")),
+)
+
+
+def error_class(error):
+    message = str(error).lower()
+    for name, patterns in ERROR_CLASSES:
+        if any(pattern in message for pattern in patterns):
+            return name
+    return "other"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# ======================== Metric Types ========================
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def set(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            self.values[key] = value
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self.lock:
+            for key, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.series = {}  # labels -> [per-bucket counts, sum, count]
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for n, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][n] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.series.items()):
+                cumulative = 0
+                for bound, hits in zip(self.buckets, counts):
+                    cumulative += hits
+                    le = ("le", _number(bound))
+                    lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+# ======================== Registry ========================
+class Registry:
+    """Metrics of this process in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics = []
+
+    def counter(self, name, documentation, labelnames=()):
+        metric = Counter(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def gauge(self, name, documentation, labelnames=()):
+        metric = Gauge(name, documentation, labelnames)
+        self.metrics.append(metric)
+        return metric
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        metric = Histogram(name, documentation, labelnames, buckets)
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+RPC_LATENCY = REGISTRY.histogram("bot_rpc_latency_seconds", "JSON-RPC round trip per endpoint and method",
+                                 ("script", "endpoint", "method"))
+RPC_ERRORS = REGISTRY.counter("bot_rpc_errors_total", "JSON-RPC calls that raised or returned an error",
+                              ("script", "endpoint", "method"))
+PHASE_LATENCY = REGISTRY.histogram("bot_tx_phase_seconds", "Time spent building, signing, sending and confirming txs",
+                                   ("script", "phase"))
+TX_SENT = REGISTRY.counter("bot_tx_sent_total", "Transactions accepted by an RPC", ("script",))
+TX_CONFIRMED = REGISTRY.counter("bot_tx_confirmed_total", "Transactions mined with status 1", ("script",))
+TX_REVERTED = REGISTRY.counter("bot_tx_reverted_total", "Transactions mined with status 0", ("script",))
+GAS_USED = REGISTRY.counter("bot_gas_used_total", "Gas units used by mined transactions", ("script", "wallet"))
+FEES_PAID = REGISTRY.counter("bot_fees_paid_wei_total", "gasUsed * effectiveGasPrice of mined transactions",
+                             ("script", "wallet"))
+RETRIES = REGISTRY.counter("bot_retries_total", "Failed send attempts by error class", ("script", "error_class"))
+MEMORY_RSS = REGISTRY.gauge("bot_memory_rss_bytes", "Resident set size at the last memory sample", ("script",))
+GC_COLLECTIONS = REGISTRY.gauge("bot_gc_collections", "Garbage collector runs since start per generation",
+                                ("script", "generation"))
+MEMORY_GROWTH = REGISTRY.gauge("bot_memory_growth_bytes", "Top allocation growth sites since the previous sample",
+                               ("script", "site"))
+
+
+# ======================== Recording helpers ========================
+@contextmanager
+def phase(name):
+    """`with phase("sign"): ...` times one step of a wallet action (histogram and trace span)"""
+    with tracing.span(name), PHASE_LATENCY.time(script=SCRIPT, phase=name):
+        yield
+
+
+def tx_sent():
+    TX_SENT.inc(script=SCRIPT)
+
+
+def tx_result(receipt, wallet=None):
+    """Count a mined receipt (status, gas and fee per wallet); ignores None/placeholder receipts"""
+    try:
+        status = receipt["status"]
+        gas_used = receipt["gasUsed"]
+    except (KeyError, TypeError):
+        return
+    (TX_CONFIRMED if status == 1 else TX_REVERTED).inc(script=SCRIPT)
+    wallet = wallet or receipt.get("from", "")
+    GAS_USED.inc(gas_used, script=SCRIPT, wallet=wallet)
+    price = receipt.get("effectiveGasPrice")
+    if price is not None:
+        FEES_PAID.inc(gas_used * price, script=SCRIPT, wallet=wallet)
+
+
+def retry(error):
+    RETRIES.inc(script=SCRIPT, error_class=error_class(error))
+
+
+def memory(sample):
+    """Export a memwatch sample; growth sites are replaced, not accumulated, to bound label count"""
+    if sample.rss is not None:
+        MEMORY_RSS.set(sample.rss, script=SCRIPT)
+    for generation, runs in enumerate(sample.collections):
+        GC_COLLECTIONS.set(runs, script=SCRIPT, generation=generation)
+    MEMORY_GROWTH.clear()
+    for growth in sample.top:
+        MEMORY_GROWTH.set(growth.size_diff, script=SCRIPT, site=growth.site)
+
+
+# ======================== web3 integration ========================
+def rpc_middleware():
+    """web3 v6 middleware timing every call that reaches the node; an io span inside a trace"""
+
+    def middleware(make_request, w3):
+        endpoint = urlsplit(w3.provider.endpoint_uri).netloc or w3.provider.endpoint_uri
+
+        def request(method, params):
+            started = time.perf_counter()
+            try:
+                with tracing.span(method, tracing.KIND_IO, nested=True, endpoint=endpoint):
+                    response = make_request(method, params)
+            except Exception:
+                RPC_ERRORS.inc(script=SCRIPT, endpoint=endpoint, method=method)
+                raise
+            finally:
+                RPC_LATENCY.observe(time.perf_counter() - started, script=SCRIPT, endpoint=endpoint, method=method)
+            if isinstance(response, dict) and "error" in response:
+                RPC_ERRORS.inc(script=SCRIPT, endpoint=endpoint, method=method)
+            return response
+
+        return request
+
+    return middleware
+
+
+def metered_web3(w3):
+    """Record RPC latency of `w3`; returns `w3`.
+
+    Wrap the bare client first so cache hits and rate-limit waits are not counted as RPC time.
+    """
+    w3.middleware_onion.add(rpc_middleware(), "metrics")
+    return w3
+
+
+# ======================== Exporters ========================
+def _handler(registry):
+    # http.server is imported only when METRICS_PORT is set: it is most of this module's import time
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", CONTENT_TYPE)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass  # scrapes would flood the bot's console
+
+    return MetricsHandler
+
+
+def serve(port, host="0.0.0.0", registry=REGISTRY):
+    from http.server import ThreadingHTTPServer
+
+    server = ThreadingHTTPServer((host, port), _handler(registry))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def write_textfile(path, registry=REGISTRY):
+    """Atomic write for node_exporter's textfile collector"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp, path)
+
+
+def _textfile_loop(path, interval, registry):
+    while True:
+        try:
+            write_textfile(path, registry)
+        except OSError:
+            pass
+        time.sleep(interval)
+
+
+_STARTED = {}  # registry -> description of its running exporters
+
+
+def start(port=None, textfile=None, registry=REGISTRY):
+    """Start the exporters enabled by METRICS_PORT / METRICS_TEXTFILE; returns a description or None.
+
+    Both are off by default. With several PM2 processes on one host give each its own port,
+    or point the textfiles at one node_exporter directory with distinct file names.
+    """
+    if registry in _STARTED:
+        return _STARTED[registry]  # scripts that re-run main() per round must not bind the port twice
+    port = port if port is not None else os.getenv("METRICS_PORT", "").strip()
+    textfile = textfile if textfile is not None else os.getenv("METRICS_TEXTFILE", "").strip()
+    enabled = []
+    if port:
+        serve(int(port), registry=registry)
+        enabled.append(f"http://0.0.0.0:{port}/metrics")
+    if textfile:
+        threading.Thread(target=_textfile_loop, args=(textfile, TEXTFILE_INTERVAL, registry),
+                         name="metrics-textfile", daemon=True).start()
+        enabled.append(textfile)
+    _STARTED[registry] = ", ".join(enabled) or None
+    return _STARTED[registry]
+
+
+# ======================== Benchmark ========================
+def benchmark(calls=200000, seed=1):
+    """Per-call cost of recording, so the hot RPC path stays cheap"""
+    rng = random.Random(seed)
+    methods = ["eth_gasPrice", "eth_getTransactionCount", "eth_sendRawTransaction", "eth_getTransactionReceipt"]
+    started = time.perf_counter()
+    for _ in range(calls):
+        RPC_LATENCY.observe(rng.expovariate(5), script=SCRIPT, endpoint="rpc.example", method=rng.choice(methods))
+    elapsed = time.perf_counter() - started
+    render_started = time.perf_counter()
+    text = REGISTRY.render()
+    print(f"{calls} observations: {elapsed / calls * 1e6:.2f} us each; "
+          f"render {len(text.splitlines())} lines in {(time.perf_counter() - render_started) * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,343 @@
+import sys
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+# ======================== Constants ========================
+DEFAULT_RATE = 10.0  # req/detik per endpoint sebelum limit-nya diketahui
+DEFAULT_BURST = 10.0
+MIN_RATE = 0.2
+MAX_RATE = 200.0
+DECREASE = 0.7  # rate dikali ini setiap kena 429
+TARGET = 0.9  # berjalan di 90% dari rate yang terakhir kena 429
+RECOVERY = 0.2  # fraksi jarak ke target yang ditutup per sukses
+PROBE = 0.002  # pertumbuhan pelan di atas target, untuk menemukan limit yang naik
+RETRY_LIMITED = 2  # retry otomatis untuk respons 429 (server belum memproses request)
+LIMITED_STATUS = {429}
+LIMITED_ERRORS = (b"rate limit", b"too many requests", b"exceeded")
+
+
+def parse_retry_after(value, now=None):
+    """Retry-After header (seconds or HTTP date) -> seconds, None when missing/unparseable"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - (now or time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+def endpoint_key(url, scope=None):
+    """Limits belong to a host (and the proxy the request leaves through), not a path"""
+    host = urlsplit(url).netloc.lower()
+    return f"{scope}|{host}" if scope else host
+
+
+# ======================== Bucket ========================
+class TokenBucket:
+    """Token bucket whose rate and burst are learned from the provider's 429s.
+
+    Requests reserve a token and sleep until it is due, so concurrent callers queue up
+    instead of bursting. A 429 records the rate that tripped it as the ceiling, cuts the
+    rate and burst and blocks for Retry-After; successes climb back quickly to TARGET x
+    ceiling and only probe slowly above it, so throughput settles just under the limit.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "blocked_until", "ceiling",
+                 "granted", "limited", "waited")
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+        self.blocked_until = 0.0
+        self.ceiling = None
+        self.granted = 0
+        self.limited = 0
+        self.waited = 0.0
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now):
+        """Seconds until a token would be granted, without taking it"""
+        self._refill(now)
+        return max(0.0, (1 - self.tokens) / self.rate, self.blocked_until - now)
+
+    def reserve(self, now):
+        wait = self.delay(now)
+        self.tokens -= 1
+        self.granted += 1
+        self.waited += wait
+        return wait
+
+    def on_success(self):
+        if self.ceiling is None:
+            self.rate = min(MAX_RATE, self.rate * (1 + PROBE))
+            return
+        target = self.ceiling * TARGET
+        if self.rate < target:
+            self.rate += (target - self.rate) * RECOVERY
+        else:
+            self.rate = min(MAX_RATE, self.rate * (1 + PROBE))
+        self.burst = max(1.0, min(self.burst * (1 + PROBE), self.rate))
+
+    def on_limited(self, now, retry_after=None):
+        self.limited += 1
+        # Every request in flight when the limit hit gets a 429: cut once per block
+        if now >= self.blocked_until:
+            self.ceiling = self.rate if self.ceiling is None else min(self.rate, max(self.ceiling, self.rate * TARGET))
+            self.rate = max(MIN_RATE, self.rate * DECREASE)
+            self.burst = max(1.0, self.burst * DECREASE)
+        self.tokens = min(self.tokens, 0.0)
+        pause = retry_after if retry_after is not None else 1.0 / self.rate
+        self.blocked_until = max(self.blocked_until, now + pause)
+
+
+# ======================== Limiter ========================
+class EndpointLimiter:
+    """One learned token bucket per endpoint, shared by every thread and session.
+
+    `acquire(url)` blocks until the endpoint has a token; `report(url, limited,
+    retry_after)` feeds the outcome back. `pick(urls)` returns the endpoint that can be
+    served soonest, which spreads load across RPCs instead of draining one at a time.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.sleep = sleep
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    def configure(self, rate=None, burst=None):
+        """Starting rate/burst for endpoints not seen yet (e.g. from .env)"""
+        self.rate = rate or self.rate
+        self.burst = burst or self.burst
+
+    def _bucket(self, key):
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            bucket = self.buckets[key] = TokenBucket(self.rate, self.burst, self.clock())
+        return bucket
+
+    def acquire(self, url, scope=None):
+        with self.lock:
+            wait = self._bucket(endpoint_key(url, scope)).reserve(self.clock())
+        if wait > 0:
+            self.sleep(wait)
+        return wait
+
+    def report(self, url, limited=False, retry_after=None, scope=None):
+        with self.lock:
+            bucket = self._bucket(endpoint_key(url, scope))
+            if limited:
+                bucket.on_limited(self.clock(), retry_after)
+            else:
+                bucket.on_success()
+
+    def delay(self, url, scope=None):
+        with self.lock:
+            return self._bucket(endpoint_key(url, scope)).delay(self.clock())
+
+    def pick(self, urls, scope=None, rng=random):
+        """The endpoint with the shortest wait; ties broken at random"""
+        urls = list(urls)
+        with self.lock:
+            now = self.clock()
+            waits = [(self._bucket(endpoint_key(url, scope)).delay(now), rng.random(), url) for url in urls]
+        return min(waits)[2] if waits else None
+
+    def summary(self):
+        with self.lock:
+            buckets = sorted(self.buckets.items(), key=lambda item: -item[1].granted)
+        parts = [f"{key.split('|')[-1]} {bucket.rate:.1f}/s ({bucket.limited}x429)" for key, bucket in buckets[:4]]
+        return ", ".join(parts) or "-"
+
+
+LIMITER = EndpointLimiter()
+
+
+# ======================== requests integration ========================
+# Indexer, sumber konten & CoinGecko: sesi requests (satu per proxy di ProxyPool)
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that takes a token before every request and learns from 429s.
+
+    A 429 (or a small JSON-RPC body saying "rate limit") is retried up to RETRY_LIMITED
+    times after the learned pause, since the server rejected it without processing it.
+    Streamed bodies (generators, file objects) cannot be replayed, so for those the
+    limited response is returned as-is after the limiter learns from it.
+    `scope` separates limits per proxy.
+    """
+
+    def __init__(self, limiter=None, scope=None, **kwargs):
+        self.limiter = limiter or LIMITER
+        self.scope = scope
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        for attempt in range(RETRY_LIMITED + 1):
+            self.limiter.acquire(request.url, self.scope)
+            response = super().send(request, **kwargs)
+            limited = _is_limited(response, kwargs.get("stream", False))
+            self.limiter.report(request.url, limited, parse_retry_after(response.headers.get("Retry-After")),
+                                self.scope)
+            if not limited or attempt == RETRY_LIMITED or not _replayable(request.body):
+                return response
+            response.close()
+        return response
+
+
+def _replayable(body):
+    return body is None or isinstance(body, (bytes, bytearray, str))
+
+
+def _is_limited(response, stream):
+    if response.status_code in LIMITED_STATUS:
+        return True
+    if stream or response.status_code != 200 or int(response.headers.get("Content-Length") or 0) > 512:
+        return False
+    body = response.content[:512].lower()
+    return b'"error"' in body and any(pattern in body for pattern in LIMITED_ERRORS)
+
+
+def limited_session(session=None, scope=None, limiter=None):
+    """Mount the rate limiter on `session` (a new requests.Session by default)"""
+    session = session or requests.Session()
+    adapter = RateLimitedAdapter(limiter, scope)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# ======================== web3 integration ========================
+LIMITED_RPC_CODES = {429, -32005}  # -32005: "limit exceeded" di banyak provider
+
+
+def rpc_middleware(limiter=None):
+    """web3 v6 middleware: every JSON-RPC call takes a token from its endpoint's bucket.
+
+    web3 keeps one requests session per thread, so a session passed to HTTPProvider
+    would not cover broadcaster or pool threads; a middleware sees every call.
+    """
+    limiter = limiter or LIMITER
+
+    def middleware(make_request, w3):
+        url = w3.provider.endpoint_uri
+
+        def request(method, params):
+            for attempt in range(RETRY_LIMITED + 1):
+                limiter.acquire(url)
+                try:
+                    response = make_request(method, params)
+                except Exception as e:
+                    http = getattr(e, "response", None)
+                    limited = getattr(http, "status_code", None) in LIMITED_STATUS
+                    retry_after = parse_retry_after(http.headers.get("Retry-After")) if limited else None
+                    limiter.report(url, limited, retry_after)
+                    if not limited or attempt == RETRY_LIMITED:
+                        raise
+                    continue
+                limited = _is_limited_rpc(response)
+                limiter.report(url, limited)
+                if not limited or attempt == RETRY_LIMITED:
+                    return response
+            return response
+
+        return request
+
+    return middleware
+
+
+def _is_limited_rpc(response):
+    error = response.get("error") if isinstance(response, dict) else None
+    if not isinstance(error, dict):
+        return False
+    message = str(error.get("message", "")).lower().encode()
+    return error.get("code") in LIMITED_RPC_CODES or any(pattern in message for pattern in LIMITED_ERRORS)
+
+
+def limited_web3(w3, limiter=None):
+    """Route every RPC call of `w3` through the per-endpoint limiter; returns `w3`"""
+    w3.middleware_onion.add(rpc_middleware(limiter), "rate_limit")
+    return w3
+
+
+# ======================== Benchmark ========================
+class _Provider:
+    """RPC provider on a virtual clock with a hidden token-bucket limit"""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = 0.0
+
+    def call(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens < 1:
+            return 429, (1 - self.tokens) / self.rate
+        self.tokens -= 1
+        return 200, None
+
+
+def _run(limits, duration, latency, use_limiter, seed):
+    """Serial caller over `limits` endpoints; (ok calls, 429s, stdev of ok per 10 s window)"""
+    rng = random.Random(seed)
+    now = [0.0]
+    providers = {f"https://rpc-{n}.example/": _Provider(rate, burst) for n, (rate, burst) in enumerate(limits)}
+    urls = list(providers)
+    limiter = EndpointLimiter(clock=lambda: now[0], sleep=lambda s: now.__setitem__(0, now[0] + s))
+    current, ok, limited, windows = 0, 0, 0, {}
+    while now[0] < duration:
+        if use_limiter:
+            url = limiter.pick(urls, rng=rng)
+            limiter.acquire(url)
+        else:
+            url = urls[current]
+        status, retry_after = providers[url].call(now[0])
+        now[0] += latency
+        if status == 200:
+            ok += 1
+            windows[int(now[0] // 10)] = windows.get(int(now[0] // 10), 0) + 1
+        else:
+            limited += 1
+        if use_limiter:
+            limiter.report(url, status == 429, retry_after)
+        elif status == 429:
+            # Perilaku lama: string-match 429, pindah RPC lalu tidur RPC_RETRY_DELAY
+            current = (current + 1) % len(urls)
+            now[0] += rng.uniform(10, 15)
+    counts = [windows.get(n, 0) for n in range(int(duration // 10))]
+    mean = sum(counts) / len(counts)
+    spread = (sum((c - mean) ** 2 for c in counts) / len(counts)) ** 0.5
+    return ok, limited, spread, limiter
+
+
+def benchmark(duration=600, seed=5):
+    """Reactive 429 handling vs learned token buckets on 3 RPCs with hidden limits"""
+    limits = [(25, 10), (10, 5), (5, 5)]
+    capacity = sum(rate for rate, _ in limits)
+    for label, use_limiter in (("reaktif 429", False), ("token bucket", True)):
+        ok, limited, spread, limiter = _run(limits, duration, 0.01, use_limiter, seed)
+        line = (f"{label}: {ok / duration:.1f} req/s dari kapasitas {capacity} "
+                f"({ok / duration / capacity:.0%}), {limited} x 429, stdev per 10s {spread:.0f}")
+        if use_limiter:
+            line += f"; {limiter.summary()}"
+        print(line)
+
+
+if __name__ == "__main__":
+    benchmark(*[int(arg) for arg in sys.argv[1:2]])
@@ -1,13 +1,16 @@
 import os
-import time
 import random
 import asyncio
 import json
 from web3 import Web3
 from dotenv import load_dotenv
 from colorama import Fore, Style, init
+from waiter import sleep_async
 from web3.middleware import geth_poa_middleware
-from eth_account import Account
+from wallet_registry import WalletRegistry
+from rate_limit import limited_web3
+from read_cache import CACHE, cached_web3, is_connected
+import memwatch
 from datetime import datetime, timedelta
 
 init(autoreset=True)
@@ -82,23 +85,22 @@ def connect_to_rpc():
     """Connect to one of the RPC URLs"""
     global RPC_CACHE
     if RPC_CACHE:
-        try:
-            RPC_CACHE.eth.chain_id
+        # chain_id is cached for good now, the probe still reaches the node once per block
+        if is_connected(RPC_CACHE):
             print(f"🔄 Already Connected to RPC URL: {Fore.GREEN}{RPC_CACHE.provider.endpoint_uri}{Style.RESET_ALL}")
             return RPC_CACHE
-        except:
-            RPC_CACHE = None
-            print(f"{Fore.RED}RPC connection lost, reconnecting...{Style.RESET_ALL}")
+        RPC_CACHE = None
+        print(f"{Fore.RED}RPC connection lost, reconnecting...{Style.RESET_ALL}")
 
     random.shuffle(RPC_URLS)
     
     for url in RPC_URLS:
         try:
-            web3 = Web3(Web3.HTTPProvider(url))
+            web3 = cached_web3(limited_web3(Web3(Web3.HTTPProvider(url))))
             # Add middleware for PoA chains if needed
             web3.middleware_onion.inject(geth_poa_middleware, layer=0)
             
-            if web3.is_connected():
+            if is_connected(web3):
                 print(f"📶 Connected to RPC URL: {Fore.GREEN}{url}{Style.RESET_ALL}")
                 RPC_CACHE = web3
                 return web3
@@ -109,30 +111,28 @@ def connect_to_rpc():
 
 def load_private_keys():
     """Load private keys from environment variable and file"""
-    private_keys = []
+    wallets = WalletRegistry("private_keys.txt")
 
     # Load from environment variable
     env_private_key = os.getenv("PRIVATE_KEY")
     if env_private_key:
-        private_keys.append(env_private_key.strip())
+        wallets.add(env_private_key)
 
-    # Try to load from private_keys.txt
+    # Stream private_keys.txt, addresses are derived in a process pool or read from the index
     try:
-        with open("private_keys.txt", "r") as file:
-            keys = [line.strip() for line in file.readlines()]
-            private_keys.extend(keys)
+        wallets.add_file("private_keys.txt")
+        print(f"⚡ {wallets.describe_stats()}")
     except Exception as e:
         print(f"{Fore.YELLOW}Note: private_keys.txt not found or couldn't be read: {e}{Style.RESET_ALL}")
 
-    if not private_keys:
+    if not len(wallets):
         raise Exception("No private keys found in .env or private_keys.txt")
 
-    private_keys = [k if k.startswith("0x") else "0x" + k for k in private_keys]
-    
-    print(f"📸 Loaded {len(private_keys)} wallet(s) {Fore.GREEN}successfully{Style.RESET_ALL}")
+    wallets.save_index()
+    print(f"📸 Loaded {len(wallets)} wallet(s) {Fore.GREEN}successfully{Style.RESET_ALL}")
     
-    # Return unique keys
-    return list(set(private_keys))
+    # Unique keys, file order preserved
+    return wallets
 
 def get_wallet_balance(web3, address):
     """Get wallet balance in TEA"""
@@ -164,7 +164,7 @@ async def sleep_seconds(seconds, wallet_idx=None):
     """Sleep with a nice message"""
     wallet_str = f"Wallet {wallet_idx} " if wallet_idx is not None else ""
     print(f"🛏️  {Fore.GREEN} {wallet_str}sleeping in {seconds} seconds...{Style.RESET_ALL}")
-    await asyncio.sleep(seconds)
+    await sleep_async(seconds)
 
 # ======================= TRANSACTION FUNCTIONS =======================
 
@@ -379,7 +379,7 @@ async def safe_send_transaction(web3, signed_tx, wallet_idx, retries=3):
             if i < retries - 1:
                 wait_time = 3 * (i + 1)
                 print(f"Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} waiting {wait_time} seconds before {Fore.MAGENTA}RETRY...{Style.RESET_ALL}")
-                await asyncio.sleep(wait_time)
+                await sleep_async(wait_time)
     
     print(f"{Fore.RED}🥵 Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} transaction ultimately failed after {retries} retries.{Style.RESET_ALL}")
     return None
@@ -409,6 +409,9 @@ async def process_wallet(wallet, wallet_idx, cycle):
         
         if unstake_success:
             print(f"\n ✅ Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} cycle {Fore.YELLOW}[{cycle}]{Fore.RESET} WTF are {Fore.GREEN}complete.................!!!{Style.RESET_ALL}\n")
+            print(f"📦 Read cache: {CACHE.summary()}")
+            # Sampling only: the other wallets' tasks may be mid-transaction
+            memwatch.checkpoint(label=f"wallet {wallet_idx} cycle {cycle}", restart=False)
             return True
         else:
             print(f"\n ⚠️ Wallet {Fore.YELLOW}[{wallet_idx}]{Fore.RESET} cycle {Fore.YELLOW}[{cycle}]{Fore.RESET} unstake are partially\n")
@@ -442,16 +445,18 @@ async def run_wallet_continuously(wallet, wallet_idx):
 async def main():
     """Main entry point - runs all wallets in parallel"""
     try:
-        private_keys = load_private_keys()
+        wallets = load_private_keys()
+        private_keys = wallets.keys()
         
         print(f"🚀  Starting {Fore.MAGENTA}TEA Stake{Fore.RESET} Liquid Staking Unstaking Automation bang...")
         print(f"ℹ️  Using {'EIP-1559' if USE_EIP1559 else 'Legacy'} transaction type{Style.RESET_ALL}")
+        print(f"🧠  Memory watchdog: {memwatch.start()}")
         
         tasks = []
         
         # Start process for each wallet with a small delay
-        for idx, private_key in enumerate(private_keys):
-            wallet = Account.from_key(private_key)
+        for idx in range(len(wallets)):
+            wallet = wallets.account(idx)
             print(f"🔑 Preparing wallet {Fore.YELLOW}[{idx+1}/{len(private_keys)}]{Fore.RESET}: {Fore.MAGENTA}{wallet.address}{Style.RESET_ALL}")
             
             task = asyncio.create_task(run_wallet_continuously(wallet, idx+1))
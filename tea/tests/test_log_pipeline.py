@@ -0,0 +1,85 @@
+import io
+import os
+import sys
+import json
+import logging
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_pipeline import LogPipeline, PipelineHandler, QueuedStdout
+
+
+class BlockingStream(io.StringIO):
+    """stdout whose reader stalls until `release` is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.entered = threading.Event()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.entered.set()
+        self.release.wait(timeout=5)
+        return super().write(text)
+
+
+def record(message, *args, level=logging.INFO):
+    return logging.LogRecord("bot", level, __file__, 1, message, args, None)
+
+
+def test_full_queue_drops_new_lines_instead_of_blocking():
+    stream = BlockingStream()
+    pipeline = LogPipeline(stream, maxsize=3)
+    pipeline.put("first\n")
+    assert stream.entered.wait(timeout=5)  # writer holds "first" and is stuck in write()
+    for n in range(5):
+        pipeline.put(f"line {n}\n")
+    assert pipeline.dropped == 2
+    assert pipeline.queue.qsize() == 3
+
+    stream.release.set()
+    pipeline.close()
+    assert stream.getvalue() == "first\nline 0\nline 1\nline 2\n"
+    assert pipeline.summary() == "4 lines written, 0 queued, 2 dropped"
+
+
+def test_prints_and_records_keep_their_order_and_lose_colors_off_tty():
+    stream = io.StringIO()
+    pipeline = LogPipeline(stream)
+    out = QueuedStdout(pipeline)
+    handler = PipelineHandler(pipeline)
+    out.write("\x1b[32mvote sent\x1b[0m\n")
+    handler.emit(record("nonce %d reserved", 7))
+    out.write("done\n")
+    pipeline.close()
+    lines = stream.getvalue().splitlines()
+    assert lines[0] == "vote sent"
+    assert lines[1].endswith(" - INFO - nonce 7 reserved")
+    assert lines[2] == "done"
+
+
+def test_json_output_joins_partial_prints_into_one_line():
+    stream = io.StringIO()
+    pipeline = LogPipeline(stream, json_output=True)
+    pipeline.put("gas price ")
+    pipeline.put("1.5 gwei\n\n")
+    pipeline.put(record("swap %s", "ok", level=logging.WARNING))
+    pipeline.close()
+    first, second = [json.loads(line) for line in stream.getvalue().splitlines()]
+    assert (first["logger"], first["msg"]) == ("stdout", "gas price 1.5 gwei")
+    assert (second["level"], second["msg"]) == ("WARNING", "swap ok")
+
+
+def test_log_file_gets_plain_records_and_bad_records_do_not_stop_the_writer(tmp_path):
+    logfile = str(tmp_path / "bot.log")
+    stream = io.StringIO()
+    pipeline = LogPipeline(stream, logfile=logfile)
+    pipeline.put(record("\x1b[31mreverted\x1b[0m tx %s", "0xabc"))
+    pipeline.put(record("needs two %s %s", "args"))
+    pipeline.put("still running\n")
+    pipeline.close()
+    with open(logfile) as f:
+        assert f.read().rstrip().endswith(" - INFO - reverted tx 0xabc")
+    assert "<unformattable log record: 'needs two %s %s'>" in stream.getvalue()
+    assert stream.getvalue().endswith("still running\n")
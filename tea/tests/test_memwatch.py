@@ -0,0 +1,78 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import memwatch
+from memwatch import MemoryWatchdog
+
+
+def make_watchdog(tmp_path, **kwargs):
+    return MemoryWatchdog(state_file=str(tmp_path / ".bot.memwatch.json"), out=io.StringIO(), **kwargs)
+
+
+def test_save_and_restore_round_trip_the_state_once(tmp_path):
+    watchdog = make_watchdog(tmp_path)
+    watchdog.save({"tx_counter": 41, "deployments": ["0xabc"]})
+    assert os.listdir(tmp_path) == [".bot.memwatch.json"]
+
+    after_exec = make_watchdog(tmp_path)
+    assert after_exec.restore() == {"tx_counter": 41, "deployments": ["0xabc"]}
+    assert after_exec.restarts == 1
+    assert not os.path.exists(after_exec.state_file)
+    assert after_exec.restore() is None  # a normal start after that has nothing to pick up
+
+
+def test_restart_count_carries_over_successive_restarts(tmp_path):
+    watchdog = make_watchdog(tmp_path)
+    for expected in (1, 2, 3):
+        watchdog.save({"round": expected})
+        assert watchdog.restore() == {"round": expected}
+        assert watchdog.restarts == expected
+
+
+def test_restore_ignores_a_corrupt_state_file(tmp_path):
+    watchdog = make_watchdog(tmp_path)
+    with open(watchdog.state_file, "w") as f:
+        f.write('{"state": {"tx_cou')
+    assert watchdog.restore() is None
+    assert watchdog.restarts == 0
+
+
+def test_checkpoint_restarts_only_above_the_limit(tmp_path, monkeypatch):
+    watchdog = make_watchdog(tmp_path)
+    restarts = []
+    monkeypatch.setattr(watchdog, "restart", lambda state, sample: restarts.append(state))
+
+    watchdog.checkpoint({"cycle": 1})
+    watchdog.configure(restart_mb=1)  # any real process is above 1 MB
+    watchdog.checkpoint({"cycle": 2}, restart=False)
+    watchdog.checkpoint({"cycle": 3}, label="cycle 3")
+    assert restarts == [{"cycle": 3}]
+    assert watchdog.samples == 3
+    assert "[cycle 3] RSS " in watchdog.out.getvalue()
+    assert "restart above 1MB" in watchdog.summary()
+
+
+def test_traced_samples_point_at_the_growing_site(tmp_path):
+    watchdog = make_watchdog(tmp_path, trace=True, top=3)
+    try:
+        leak = []
+        for _ in range(20000):
+            leak.append(os.urandom(16).hex())
+        sample = watchdog.sample("leak")
+    finally:
+        watchdog.configure(trace=False)
+    assert sample.traced is not None
+    assert sample.top and sample.top[0].site.startswith("test_memwatch.py:")
+    assert sample.top[0].size_diff > 0
+    assert any("test_memwatch.py:" in line for line in sample.lines())
+
+
+def test_start_reads_the_environment(monkeypatch):
+    monkeypatch.setenv("MEMWATCH_TRACE", "")
+    monkeypatch.setenv("MEMWATCH_RESTART_MB", "512")
+    monkeypatch.setattr(memwatch, "WATCHDOG", MemoryWatchdog())
+    assert memwatch.start() == "RSS/gc only, restart above 512MB"
+    assert memwatch.WATCHDOG.restart_mb == 512
@@ -0,0 +1,100 @@
+import io
+import os
+import sys
+import json
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import startup
+from solc_cache import ContractArtifacts, artifact_key
+
+SOURCE = "pragma solidity ^0.8.17; contract Counter { uint256 public count; }"
+
+
+@pytest.fixture
+def artifacts(tmp_path, monkeypatch):
+    """Artifact file in tmp_path whose compiler is a stub that records what it built"""
+    artifacts = ContractArtifacts(path=str(tmp_path / "contracts.build.json"))
+    built = []
+
+    def compile_stub(source, name):
+        built.append(name)
+        return {"abi": [{"name": "count"}], "bytecode": f"60{len(built):02x}"}
+
+    monkeypatch.setattr(artifacts, "_compile", compile_stub)
+    artifacts.built = built
+    return artifacts
+
+
+def test_artifact_key_changes_with_source_and_compiler_version():
+    key = artifact_key("Counter", SOURCE)
+    assert key.startswith("Counter:")
+    assert artifact_key("Counter", SOURCE) == key
+    assert artifact_key("Counter", SOURCE + " ") != key
+    assert artifact_key("Counter", SOURCE, version="0.8.20") != key
+
+
+def test_a_missing_contract_is_compiled_once_and_written_back(artifacts):
+    first = artifacts.get(SOURCE, "Counter")
+    assert artifacts.get(SOURCE, "Counter") == first
+    assert artifacts.built == ["Counter"]
+    assert (artifacts.compiled, artifacts.loaded) == (1, 1)
+    with open(artifacts.path) as f:
+        assert json.load(f) == {artifact_key("Counter", SOURCE): first}
+
+
+def test_a_prebuilt_artifact_skips_the_compiler(artifacts):
+    entry = {"abi": [], "bytecode": "6001"}
+    with open(artifacts.path, "w") as f:
+        json.dump({artifact_key("Counter", SOURCE): entry}, f)
+    assert artifacts.get(SOURCE, "Counter") == entry
+    assert artifacts.built == []
+    assert artifacts.summary().startswith("1 from ")
+
+
+def test_an_edited_source_is_recompiled(artifacts):
+    artifacts.get(SOURCE, "Counter")
+    artifacts.get(SOURCE.replace("count", "total"), "Counter")
+    assert artifacts.built == ["Counter", "Counter"]
+
+
+def test_an_unwritable_artifact_keeps_results_in_memory(artifacts, tmp_path):
+    artifacts.path = str(tmp_path / "missing-dir" / "contracts.build.json")
+    entry = artifacts.get(SOURCE, "Counter")
+    assert artifacts.get(SOURCE, "Counter") == entry
+    assert artifacts.built == ["Counter"]
+
+
+def test_build_reports_compiled_and_up_to_date(artifacts):
+    out = io.StringIO()
+    contracts = {"Counter": SOURCE, "Token": SOURCE.replace("Counter", "Token")}
+    assert artifacts.build(contracts, out=out) == 2
+    assert artifacts.build(contracts, out=out) == 0
+    assert ": 2 compiled, 0 up to date" in out.getvalue()
+    assert ": 0 compiled, 2 up to date" in out.getvalue()
+
+
+# -------- startup --------
+def test_mark_reports_each_label_once(monkeypatch):
+    monkeypatch.setattr(startup, "_marked", set())
+    monkeypatch.setattr(startup, "process_age", lambda: 0.12)
+    assert startup.mark() == "⏱️ first RPC 120 ms after start (within the 300 ms target)"
+    assert startup.mark() is None
+    monkeypatch.setattr(startup, "process_age", lambda: 1.5)
+    assert "(over the 300 ms target)" in startup.mark("wallets loaded")
+
+
+def test_import_profile_sees_only_the_script_imports(tmp_path):
+    (tmp_path / "heavy_helper_for_startup_test.py").write_text("import time\ntime.sleep(0.02)\n")
+    script = tmp_path / "bot.py"
+    script.write_text("import heavy_helper_for_startup_test\n"
+                      "if __name__ == '__main__':\n    raise SystemExit('main block must not run')\n")
+    rows, wall = startup.import_profile(str(script))
+    names = {name: (cumulative, depth) for cumulative, _, depth, name in rows}
+    assert "heavy_helper_for_startup_test" in names
+    cumulative, depth = names["heavy_helper_for_startup_test"]
+    assert depth == 0 and cumulative >= 20000
+    assert "runpy" not in names  # the harness is cut off at the marker
+    assert wall > 0.02
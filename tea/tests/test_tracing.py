@@ -0,0 +1,120 @@
+import asyncio
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing
+from tracing import Tracer, KIND_IO, KIND_PHASE, KIND_SLEEP
+
+
+@pytest.fixture
+def trace_file(tmp_path):
+    """Module tracer writing to a temp file, switched off again after the test"""
+    path = str(tmp_path / "trace.jsonl")
+    tracing.TRACER.configure(path)
+    yield path
+    tracing.TRACER.configure(None)
+
+
+def make_span(span_id, name, start, end, parent="", kind=KIND_PHASE):
+    return {"traceId": "t", "spanId": span_id, "parentSpanId": parent, "name": name, "kind": kind,
+            "startTimeUnixNano": int(start * 1e9), "endTimeUnixNano": int(end * 1e9)}
+
+
+def test_spans_are_noops_without_a_file():
+    tracer = Tracer()
+    with tracer.span("vote") as span:
+        assert span is None
+    assert not tracer.enabled
+
+
+def test_nested_spans_share_the_trace_and_point_at_their_parent(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    tracer = Tracer(path)
+    with tracer.span("vote", wallet=1):
+        with tracer.span("eth_call", KIND_IO, nested=True):
+            pass
+    with tracer.span("eth_blockNumber", KIND_IO, nested=True):
+        pass  # background poll outside a trace: not recorded
+    tracer.configure(None)
+
+    child, parent = tracing.load(path)
+    assert (parent["name"], child["name"]) == ("vote", "eth_call")
+    assert child["traceId"] == parent["traceId"]
+    assert child["parentSpanId"] == parent["spanId"]
+    assert parent["parentSpanId"] == ""
+    assert parent["attributes"]["wallet"] == 1
+    assert parent["endTimeUnixNano"] >= child["endTimeUnixNano"]
+
+
+def test_a_raising_span_is_marked_as_error(tmp_path):
+    path = str(tmp_path / "trace.jsonl")
+    tracer = Tracer(path)
+    with pytest.raises(ValueError):
+        with tracer.span("send"):
+            raise ValueError("nonce too low")
+    tracer.configure(None)
+    (span,) = tracing.load(path)
+    assert span["status"] == "error"
+    assert span["attributes"]["error"] == "ValueError"
+
+
+def test_traced_wraps_sync_and_async_functions(trace_file):
+    @tracing.traced("swap")
+    def swap():
+        with tracing.span("sign"):
+            return "signed"
+
+    @tracing.traced("stake")
+    async def stake():
+        await asyncio.sleep(0)
+        with tracing.span("confirm", KIND_IO, nested=True):
+            return "staked"
+
+    assert swap() == "signed"
+    assert asyncio.run(stake()) == "staked"
+    names = {span["name"]: span for span in tracing.load(trace_file)}
+    assert set(names) == {"swap", "sign", "stake", "confirm"}
+    assert names["sign"]["parentSpanId"] == names["swap"]["spanId"]
+    assert names["confirm"]["parentSpanId"] == names["stake"]["spanId"]
+
+
+def test_load_skips_a_truncated_last_line(tmp_path):
+    path = tmp_path / "trace.jsonl"
+    path.write_text('{"name": "gm"}\n\n{"name": "dep')
+    assert tracing.load(str(path)) == [{"name": "gm"}]
+
+
+def test_report_splits_roots_into_io_sleep_and_other():
+    spans = [
+        make_span("a", "vote", 0, 10),
+        make_span("b", "eth_call", 0, 6, parent="a", kind=KIND_IO),
+        make_span("c", "cooldown", 6, 9, parent="a", kind=KIND_SLEEP),
+    ]
+    out = io.StringIO()
+    tracing.report(spans, out=out)
+    lines = out.getvalue().splitlines()
+    vote = next(line for line in lines if line.startswith("vote"))
+    assert vote.split()[1:] == ["1", "10.00", "10.00", "60%", "30%", "10%"]
+    assert any(line.startswith("eth_call") and " io " in line for line in lines)
+
+    out = io.StringIO()
+    tracing.report(spans, root="swap", out=out)
+    assert out.getvalue() == "no spans\n"
+
+
+def test_folded_stacks_use_self_time_per_path():
+    spans = [
+        make_span("a", "deploy", 0, 5),
+        make_span("b", "compile", 0, 2, parent="a"),
+        make_span("c", "settle wait", 2, 4, parent="a", kind=KIND_SLEEP),
+    ]
+    assert tracing.folded_stacks(spans) == {
+        "deploy": 1_000_000,
+        "deploy;compile": 2_000_000,
+        "deploy;settle_wait[sleep]": 2_000_000,
+    }
@@ -0,0 +1,60 @@
+import os
+import sys
+import importlib.util
+from web3 import Web3
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_DIR = os.path.dirname(HERE)
+
+
+def load_voting():
+    sys.path.insert(0, SCRIPT_DIR)
+    spec = importlib.util.spec_from_file_location(f"voting_{os.path.basename(SCRIPT_DIR)}",
+                                                  os.path.join(SCRIPT_DIR, "voting.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    module.log_pipeline.shutdown()  # give stdout back to pytest
+    return module
+
+
+voting = load_voting()
+
+
+class StubEth:
+    def __init__(self, base_fee):
+        self.base_fee = base_fee
+        self.gas_price = Web3.to_wei(2, "gwei")
+        self.chain_id = 1
+
+    def fee_history(self, blocks, newest):
+        return {"baseFeePerGas": [self.base_fee] if self.base_fee is not None else []}
+
+
+class StubWeb3:
+    to_wei = staticmethod(Web3.to_wei)
+    from_wei = staticmethod(Web3.from_wei)
+
+    def __init__(self, base_fee):
+        self.eth = StubEth(base_fee)
+
+
+def scheduler(base_fee):
+    bot = voting.VoteScheduler()
+    bot.web3 = StubWeb3(base_fee)
+    return bot
+
+
+def test_update_gas_price_uses_eip1559_when_base_fee_known():
+    bot = scheduler(Web3.to_wei(1, "gwei"))
+    bot.update_gas_price()
+    assert isinstance(bot.gas_price, dict)
+    priority = Web3.to_wei(voting.CONFIG["MAX_PRIORITY_GWEI"], "gwei")
+    assert bot.gas_price["maxPriorityFeePerGas"] == priority
+    assert bot.gas_price["maxFeePerGas"] == int(Web3.to_wei(1, "gwei") * voting.CONFIG["GAS_MULTIPLIER"]) + priority
+
+
+def test_update_gas_price_falls_back_to_legacy():
+    bot = scheduler(None)
+    bot.update_gas_price()
+    assert isinstance(bot.gas_price, int)
+    assert Web3.to_wei(voting.CONFIG["GAS_MIN_GWEI"], "gwei") <= bot.gas_price <= Web3.to_wei(voting.CONFIG["GAS_MAX_GWEI"], "gwei")
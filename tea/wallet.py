@@ -10,6 +10,11 @@ from eth_account import Account
 import colorama
 from colorama import Fore, Style
 import asyncio
+from collections import deque
+from web3.exceptions import TransactionNotFound
+from wallet_registry import generate_wallets
+from rate_limit import limited_web3
+from read_cache import cached_web3, is_connected
 
 # Banner bang!!
 print(f"{Fore.GREEN}======================= WELCOME TO TEA ONCHAIN ========================{Fore.RESET}")
@@ -66,11 +71,32 @@ network = {
     "explorer": "https://sepolia.tea.xyz/tx/"
 }
 
+# Bulk mode: generate wallets in a process pool and fund them as a pipelined stream
+BULK_WALLETS = int(os.getenv("BULK_WALLETS", "0"))  # 0 = classic one-by-one mode
+BULK_WINDOW = int(os.getenv("BULK_WINDOW", "64"))  # max unconfirmed transfers in flight
+RECEIPT_POLL = 2  # seconds
+RECEIPT_TIMEOUT = int(os.getenv("RECEIPT_TIMEOUT", "300"))  # seconds before an unmined transfer is marked failed
+DISPERSE_CONTRACT = os.getenv("DISPERSE_CONTRACT")  # optional disperse.app style contract
+DISPERSE_BATCH = int(os.getenv("DISPERSE_BATCH", "200"))  # recipients per disperse tx
+
+DISPERSE_ABI = [
+    {
+        "inputs": [
+            {"internalType": "address[]", "name": "recipients", "type": "address[]"},
+            {"internalType": "uint256[]", "name": "values", "type": "uint256[]"},
+        ],
+        "name": "disperseEther",
+        "outputs": [],
+        "stateMutability": "payable",
+        "type": "function",
+    }
+]
+
 # connected to web3
-w3 = Web3(Web3.HTTPProvider(network["rpc"]))
+w3 = cached_web3(limited_web3(Web3(Web3.HTTPProvider(network["rpc"]))))
 w3.middleware_onion.inject(geth_poa_middleware, layer=0)
 
-if not w3.is_connected():
+if not is_connected(w3):
     print(Fore.RED + f"Disconnect to chain {network['name']}")
     exit(1)
 
@@ -134,12 +160,159 @@ def save_wallets_to_json(wallets_data):
     
     return filename
 
+def get_random_amount():
+    random_amount = max(random.uniform(0.0001, 0.001), 0.0001)
+    return round(random_amount, 6)
+
+def append_jsonl(file, record):
+    file.write(json.dumps(record) + "\n")
+    file.flush()
+
+def drain_confirmed(in_flight, out):
+    """Write every leading in-flight tx that has a receipt to JSONL, returns how many"""
+    done = 0
+    while in_flight:
+        tx_hash, records, _ = in_flight[0]
+        try:
+            receipt = w3.eth.get_transaction_receipt(tx_hash)
+        except TransactionNotFound:
+            break
+        in_flight.popleft()
+        for record in records:
+            record.update({
+                "status": "confirmed" if receipt.status == 1 else "reverted",
+                "block": receipt.blockNumber,
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            })
+            append_jsonl(out, record)
+        print(Fore.YELLOW + f"🟣 [CONFIRMED] block {receipt.blockNumber} : {len(records)} wallet(s) funded : TXiD/Hash {tx_hash.hex()}")
+        done += len(records)
+    return done
+
+def expire_stuck(in_flight, out):
+    """Mark leading txs without a receipt after RECEIPT_TIMEOUT as failed, returns how many"""
+    expired = 0
+    while in_flight and time.monotonic() - in_flight[0][2] > RECEIPT_TIMEOUT:
+        tx_hash, records, _ = in_flight.popleft()
+        for record in records:
+            record.update({"status": "timeout", "error": f"no receipt after {RECEIPT_TIMEOUT}s"})
+            append_jsonl(out, record)
+        print(Fore.RED + f"❌ No receipt after {RECEIPT_TIMEOUT}s, marked {len(records)} wallet(s) failed : TXiD/Hash {tx_hash.hex()}")
+        expired += len(records)
+    return expired
+
+def wait_for_window(in_flight, out, limit):
+    """Block until at most `limit` txs are unconfirmed or expired"""
+    while len(in_flight) > limit:
+        if not drain_confirmed(in_flight, out) and not expire_stuck(in_flight, out):
+            time.sleep(RECEIPT_POLL)
+
+def send_funding_tx(account, tx, records, in_flight, out):
+    """Sign and broadcast without waiting, returns True if the nonce was consumed"""
+    try:
+        signed_tx = account.sign_transaction(tx)
+        tx_hash = w3.eth.send_raw_transaction(signed_tx.rawTransaction)
+    except Exception as e:
+        for record in records:
+            record.update({"status": "send_failed", "error": str(e)})
+            append_jsonl(out, record)
+        print(Fore.RED + f"❌ Funding tx nonce {tx['nonce']} failed: {e}")
+        return False
+    for record in records:
+        record["tx_hash"] = tx_hash.hex()
+    in_flight.append((tx_hash, records, time.monotonic()))
+    return True
+
+def fund_wallets_pipelined(account, new_wallets, out):
+    """One transfer per wallet, nonces sequenced locally, up to BULK_WINDOW in flight"""
+    nonce = w3.eth.get_transaction_count(account.address, 'pending')
+    gas_price = w3.eth.gas_price
+    in_flight = deque()
+    try:
+        for index, (key, address) in enumerate(new_wallets):
+            amount = get_random_amount()
+            tx = {
+                'nonce': nonce,
+                'to': address,
+                'value': int(amount * 10**6),
+                'gas': 30000,
+                'gasPrice': gas_price,
+                'chainId': network["chainId"]
+            }
+            record = {"index": index + 1, "address": address, "private_key": key, "amount": amount}
+            if send_funding_tx(account, tx, [record], in_flight, out):
+                nonce += 1
+            else:
+                nonce = w3.eth.get_transaction_count(account.address, 'pending')
+            if len(in_flight) >= BULK_WINDOW:
+                wait_for_window(in_flight, out, BULK_WINDOW - 1)
+                gas_price = w3.eth.gas_price
+        wait_for_window(in_flight, out, 0)
+    finally:
+        for _, records, _ in in_flight:
+            for record in records:
+                record["status"] = "unconfirmed"
+                append_jsonl(out, record)
+
+def fund_wallets_disperse(account, new_wallets, out):
+    """Fund DISPERSE_BATCH wallets per tx through a disperseEther contract"""
+    contract = w3.eth.contract(address=Web3.to_checksum_address(DISPERSE_CONTRACT), abi=DISPERSE_ABI)
+    nonce = w3.eth.get_transaction_count(account.address, 'pending')
+    gas_price = w3.eth.gas_price
+    in_flight = deque()
+    try:
+        for start in range(0, len(new_wallets), DISPERSE_BATCH):
+            chunk = new_wallets[start:start + DISPERSE_BATCH]
+            records = []
+            for offset, (key, address) in enumerate(chunk):
+                amount = get_random_amount()
+                records.append({"index": start + offset + 1, "address": address, "private_key": key, "amount": amount})
+            values = [int(record["amount"] * 10**6) for record in records]
+            tx = contract.functions.disperseEther([record["address"] for record in records], values).build_transaction({
+                'from': account.address,
+                'value': sum(values),
+                'nonce': nonce,
+                'gasPrice': gas_price,
+                'chainId': network["chainId"]
+            })
+            if send_funding_tx(account, tx, records, in_flight, out):
+                nonce += 1
+            else:
+                nonce = w3.eth.get_transaction_count(account.address, 'pending')
+        wait_for_window(in_flight, out, 0)
+    finally:
+        for _, records, _ in in_flight:
+            for record in records:
+                record["status"] = "unconfirmed"
+                append_jsonl(out, record)
+
+async def handle_bulk_transfers(account):
+    started = time.time()
+    print(Fore.BLUE + f"🔎 BULK MODE: generating {BULK_WALLETS} wallets in a process pool 💭💭💭")
+    new_wallets = list(generate_wallets(BULK_WALLETS))
+    print(Fore.GREEN + f"✅ Generated {len(new_wallets)} wallets in {time.time() - started:.1f}s")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"TEA_wallets_{timestamp}.jsonl"
+    with open(filename, 'a') as out:
+        if DISPERSE_CONTRACT:
+            fund_wallets_disperse(account, new_wallets, out)
+        else:
+            fund_wallets_pipelined(account, new_wallets, out)
+
+    print(Fore.GREEN + f"✅ Bulk funding finished in {time.time() - started:.1f}s")
+    print(Fore.YELLOW + f"📝 Wallet data streamed to {filename}")
+
 async def handle_token_transfers():
     private_keys = load_private_keys()
     
     # Use the first private key (modify if you need to use multiple keys)
     account = Account.from_key(private_keys[0])
     wallet_address = account.address
+
+    if BULK_WALLETS > 0:
+        await handle_bulk_transfers(account)
+        return
     
     print(Fore.BLUE + f"🔎 TRY AUTO GENERATE WALLET & SEND ANY $TEA 💭💭💭")
     print(" ")